@@ -2,10 +2,15 @@
 
 import psycopg2 as pg
 from psycopg2.extras import execute_batch
+from collections import Counter
+import csv
+import io
+import itertools
 import json
 import os
+import re
 import logging
-from typing import List, Dict, Any
+from typing import Iterable, Iterator, Dict, Any, Optional, Tuple
 from contextlib import contextmanager
 
 # Configuración de logging
@@ -32,6 +37,84 @@ DB_CONFIG = {
 DATA_FILE_PATH = './shopify_products_20250704_230818.json'
 DEFAULT_LOCATIONS = ["default"]
 BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 1 << 20      # Caracteres del JSON leídos a la vez
+COPY_BUFFER_SIZE = 1 << 20     # Bloques que COPY pide al stream
+
+# Campos requeridos: de texto (no vacíos) y numéricos (convertibles con float)
+TEXT_FIELDS = (
+    "SKU",
+    "TITLE",
+    "SYNC_OP",
+    "SHOPIFY_PRODUCT_GID",
+    "SHOPIFY_VARIANT_GID",
+    "SHOPIFY_INVENTORY_ITEM_GID",
+    "SHOPIFY_INVENTORY_LEVEL_GID"
+)
+NUMERIC_FIELDS = ("PRICE", "PRICECOMPAREAT", "ID_LOCATION", "QUANTITIES_AVAILABLE")
+REQUIRED_FIELDS = frozenset(TEXT_FIELDS + NUMERIC_FIELDS + ("CATEGORY",))
+
+# Espacios y comas entre elementos de la lista del JSON
+_ARRAY_SEPARATORS = re.compile(r'[\s,]*')
+
+# COPY en formato csv (el escritor de csv está en C). NULL es \N sin comillas para
+# distinguirlo de un texto vacío; solo CATEGORY puede venir en None, los demás
+# textos ya se validaron como no vacíos
+_COPY_NULL = "\\N"
+
+# Staging temporal (se borra al confirmar); line conserva el orden del archivo
+STAGING_TABLE_QUERY = """
+    CREATE TEMP TABLE product_staging (
+        line BIGINT NOT NULL,
+        pos_sku VARCHAR(30) NOT NULL,
+        title VARCHAR(200) NOT NULL,
+        price FLOAT,
+        price_compare FLOAT,
+        category VARCHAR(50),
+        sync_op VARCHAR(20),
+        shopify_product_gid VARCHAR(100),
+        shopify_variant_gid VARCHAR(100),
+        shopify_inventory_item_gid VARCHAR(100),
+        id_location INTEGER NOT NULL,
+        shopify_inventory_level_gid VARCHAR(100),
+        quantities_available FLOAT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+STAGING_COPY_QUERY = """
+    COPY product_staging
+    (line, pos_sku, title, price, price_compare, category, sync_op, shopify_product_gid,
+     shopify_variant_gid, shopify_inventory_item_gid, id_location, shopify_inventory_level_gid, quantities_available)
+    FROM STDIN WITH (FORMAT csv, NULL '\\N')
+"""
+
+# Un SKU aparece una vez por ubicación: DISTINCT ON deja la última fila del archivo
+# (ON CONFLICT no puede tocar dos veces la misma fila en una sentencia)
+MERGE_PRODUCTS_QUERY = """
+    INSERT INTO shopify_product
+    (pos_sku, title, price, price_compare, category, sync_op, shopify_product_gid, shopify_variant_gid, shopify_inventory_item_gid)
+    SELECT DISTINCT ON (pos_sku)
+        pos_sku, title, price, price_compare, category, sync_op,
+        shopify_product_gid, shopify_variant_gid, shopify_inventory_item_gid
+    FROM product_staging
+    ORDER BY pos_sku, line DESC
+    ON CONFLICT (pos_sku) DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        category = EXCLUDED.category,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+MERGE_INVENTORY_QUERY = """
+    INSERT INTO shopify_inventory_level
+    (pos_sku, id_location, quantities_available, shopify_inventory_level_gid)
+    SELECT DISTINCT ON (pos_sku, id_location)
+        pos_sku, id_location, quantities_available, shopify_inventory_level_gid
+    FROM product_staging
+    ORDER BY pos_sku, id_location, line DESC
+    ON CONFLICT (pos_sku, id_location) DO UPDATE SET
+        quantities_available = EXCLUDED.quantities_available,
+        updated_at = CURRENT_TIMESTAMP
+"""
 
 
 @contextmanager
@@ -51,72 +134,158 @@ def get_db_connection():
             conn.close()
 
 
-def load_json_data(file_path: str) -> List[Dict[str, Any]]:
-    """Carga y valida los datos del archivo JSON"""
-    try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"El archivo {file_path} no existe")
-        
-        with open(file_path, encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if not isinstance(data, list):
+def iter_json_array(file_path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Lee la lista del JSON elemento por elemento (sin cargar el archivo completo)
+
+    Cada elemento se decodifica con el decodificador en C de json sobre un
+    buffer de chunk_size caracteres; si un elemento queda cortado al final
+    del buffer se lee el siguiente bloque y se reintenta.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo {file_path} no existe")
+
+    decoder = json.JSONDecoder()
+    with open(file_path, encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
             raise ValueError("El archivo JSON debe contener una lista de productos")
-        
-        logger.info(f"Cargados {len(data)} productos del archivo JSON")
-        return data
-    
-    except (json.JSONDecodeError, FileNotFoundError, ValueError) as e:
-        logger.error(f"Error al cargar datos JSON: {e}")
-        raise
 
+        position = 1
+        eof = False
+        while True:
+            position = _ARRAY_SEPARATORS.match(buffer, position).end()
+            if position < len(buffer):
+                if buffer[position] == ']':
+                    return
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield item
+                    continue
+            elif eof:
+                raise ValueError("El archivo JSON terminó antes de cerrar la lista de productos")
 
-def validate_product_data(product: Dict[str, Any]) -> bool:
-    """Valida que el producto tenga los campos requeridos y que ninguno esté vacío"""
-    required_fields = [
-        "SKU", 
-        "TITLE", 
-        "PRICE", 
-        "PRICECOMPAREAT", 
-        "CATEGORY", 
-        "SYNC_OP", 
-        "SHOPIFY_PRODUCT_GID", 
-        "SHOPIFY_VARIANT_GID", 
-        "SHOPIFY_INVENTORY_ITEM_GID", 
-        "ID_LOCATION",
-        "SHOPIFY_INVENTORY_LEVEL_GID",
-        "QUANTITIES_AVAILABLE"
-    ]
-    
-    for field in required_fields:
-        # Verificar que el campo existe
-        if field not in product:
-            logger.warning(f"Producto omitido: falta el campo '{field}'")
-            return False
-        
-        # Verificar que el campo no esté vacío según su tipo
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+class ImportStats:
+    """Conteo de filas leídas, válidas y omitidas por motivo (se registra una vez al final)"""
+
+    def __init__(self):
+        self.read = 0
+        self.valid = 0
+        self.rejected: Counter = Counter()
+
+    def log_summary(self) -> None:
+        logger.info(f"Productos válidos: {self.valid} de {self.read}")
+        for reason, count in self.rejected.most_common():
+            logger.warning(f"Productos omitidos ({count}): {reason}")
+
+
+def _rejection_reason(product: Any) -> Optional[str]:
+    """Motivo por el que una fila no es válida (None si lo es); solo se llama para las filas fuera del camino común"""
+    if not isinstance(product, dict):
+        return "el elemento no es un objeto"
+    missing = REQUIRED_FIELDS - product.keys()
+    if missing:
+        return f"falta el campo '{sorted(missing)[0]}'"
+    for field in TEXT_FIELDS:
         value = product[field]
-        
-        # Para campos de texto (strings)
-        if field in ['SKU', 'TITLE', 'SYNC_OP', 'SHOPIFY_PRODUCT_GID', 
-                    'SHOPIFY_VARIANT_GID', 'SHOPIFY_INVENTORY_ITEM_GID', 'SHOPIFY_INVENTORY_LEVEL_GID']:
-            if not value or (isinstance(value, str) and value.strip() == ""):
-                logger.warning(f"Producto omitido: el campo '{field}' está vacío")
-                return False
-        
-        # Para campos numéricos
-        elif field in ['PRICE', 'PRICECOMPAREAT', 'ID_LOCATION', 'QUANTITIES_AVAILABLE']:
-            if value is None:
-                logger.warning(f"Producto omitido: el campo '{field}' es None")
-                return False
-            # Permitir 0 como valor válido para números
-            try:
-                float(value)  # Verificar que sea convertible a número
-            except (ValueError, TypeError):
-                logger.warning(f"Producto omitido: el campo '{field}' no es un número válido: {value}")
-                return False
-    
-    return True
+        if not value or (isinstance(value, str) and value.strip() == ""):
+            return f"el campo '{field}' está vacío"
+    for field in NUMERIC_FIELDS:
+        value = product[field]
+        if value is None:
+            return f"el campo '{field}' es None"
+        try:
+            round(float(value)) if field == "ID_LOCATION" else float(value)
+        except (ValueError, TypeError, OverflowError):
+            return f"el campo '{field}' no es un número válido"
+    return None
+
+
+def _staging_row(line: int, product: Dict[str, Any]) -> Tuple:
+    """
+    Fila del staging; lanza excepción si el producto no pasa la validación
+
+    Los textos se revisan juntos (all y map de str.strip, en C) y los
+    números se convierten juntos; no hay ramas ni logging por campo.
+    """
+    texts = [product[field] for field in TEXT_FIELDS]
+    if not (all(texts) and all(map(str.strip, texts))):
+        raise ValueError
+    price, price_compare, location, quantity = map(float, map(product.__getitem__, NUMERIC_FIELDS))
+    category = product['CATEGORY']
+    sku, title, sync_op, product_gid, variant_gid, item_gid, level_gid = texts
+    return (
+        line, sku, title, price, price_compare,
+        _COPY_NULL if category is None else category,
+        sync_op, product_gid, variant_gid, item_gid,
+        round(location),  # Mismo redondeo que el cast de PostgreSQL a INTEGER
+        level_gid, quantity
+    )
+
+
+def staging_rows(products: Iterable[Any], stats: ImportStats) -> Iterator[Tuple]:
+    """
+    Valida cada producto y lo convierte en fila del staging
+
+    Mismas reglas que antes (campos requeridos, textos no vacíos, números
+    convertibles con float). Una fila que no pasa el camino común (incluye
+    textos que no son str, p. ej. un SKU numérico) se revisa campo por campo
+    con _rejection_reason; los motivos se cuentan en stats en lugar de
+    registrarse uno por uno.
+    """
+    for line, product in enumerate(products, start=1):
+        stats.read += 1
+        try:
+            row = _staging_row(line, product)
+        except (KeyError, TypeError, ValueError, OverflowError, AttributeError):
+            reason = _rejection_reason(product)
+            if reason is not None:
+                stats.rejected[reason] += 1
+                continue
+            normalized = dict(product)
+            for field in TEXT_FIELDS:
+                normalized[field] = str(product[field])
+            row = _staging_row(line, normalized)
+
+        stats.valid += 1
+        yield row
+
+
+class CopyStream:
+    """Archivo de solo lectura sobre un iterador de filas: COPY lo consume por bloques en csv"""
+
+    def __init__(self, rows: Iterator[Tuple], rows_per_fill: int = 1000):
+        self._rows = rows
+        self._rows_per_fill = rows_per_fill
+        self._buffer = ""
+        self._chunk = io.StringIO()
+        self._writer = csv.writer(self._chunk, lineterminator="\n")
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            self._chunk.seek(0)
+            self._chunk.truncate()
+            self._writer.writerows(itertools.islice(self._rows, self._rows_per_fill))
+            chunk = self._chunk.getvalue()
+            if not chunk:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
 
 def debug_product_fields(product: Dict[str, Any]) -> None:
     """Función para debuggear qué campos existen realmente"""
@@ -127,37 +296,6 @@ def debug_product_fields(product: Dict[str, Any]) -> None:
 
 
 
-def prepare_product_data(product: Dict[str, Any]) -> tuple:
-    """Prepara los datos del producto para inserción"""
-    return (
-            product.get('SKU', ''),
-            product.get('TITLE', ''),
-            product.get('PRICE', 0.0),
-            product.get('PRICECOMPAREAT', 0.0),
-            product.get('CATEGORY', ''),
-            product.get('SYNC_OP', 'UPDATE'),
-            product.get('SHOPIFY_PRODUCT_GID', ''),
-            product.get('SHOPIFY_VARIANT_GID', ''),
-            product.get('SHOPIFY_INVENTORY_ITEM_GID', ''),
-        )
-
-
-def prepare_inventory_data(product: Dict[str, Any]) -> List[tuple]:
-    """Prepara los datos de inventario para inserción"""
-    SKU = product['SKU']
-    QUANTITIES_AVAILABLE = product['QUANTITIES_AVAILABLE']
-    LOCATION = product['ID_LOCATION']
-    SHOPIFY_INVENTORY_LEVEL_GID = product['SHOPIFY_INVENTORY_LEVEL_GID']
-    
-    return [
-        (
-            SKU,                               # pos_sku                               # shopify_inventory_level_gid
-            LOCATION,                          # location_name
-            QUANTITIES_AVAILABLE,              # quantities_available
-            SHOPIFY_INVENTORY_LEVEL_GID
-        )
-    ]
-
 def insert_location_batch(cursor) -> None:
     locations = [ 
         ( "CEDIS/Envio Nacional","gid://shopify/Location/36497621067" ), 
@@ -180,66 +318,31 @@ def insert_location_batch(cursor) -> None:
     execute_batch(cursor, insert_query, locations, page_size=BATCH_SIZE)
     logger.info(f"Insertados/actualizados {len(locations)} Locaciones")
 
-def insert_products_batch(cursor, products_data: List[tuple]) -> None:
-    """Inserta productos en lotes para mejor rendimiento"""
-    insert_query = """
-        INSERT INTO shopify_product 
-        (pos_sku, title, price, price_compare, category, sync_op, shopify_product_gid, shopify_variant_gid, shopify_inventory_item_gid)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (pos_sku) DO UPDATE SET
-            title = EXCLUDED.title,
-            description = EXCLUDED.description,
-            category = EXCLUDED.category,
-            updated_at = CURRENT_TIMESTAMP
-    """
-    
-    execute_batch(cursor, insert_query, products_data, page_size=BATCH_SIZE)
-    logger.info(f"Insertados/actualizados {len(products_data)} productos")
 
+def copy_to_staging(cursor, products: Iterable[Any], stats: ImportStats) -> None:
+    """Crea el staging temporal y lo llena con un solo COPY mientras se lee el archivo"""
+    cursor.execute(STAGING_TABLE_QUERY)
+    cursor.copy_expert(STAGING_COPY_QUERY, CopyStream(staging_rows(products, stats)), size=COPY_BUFFER_SIZE)
 
-def insert_inventory_batch(cursor, inventory_data: List[tuple]) -> None:
-    """Inserta datos de inventario en lotes"""
-    insert_query = """
-        INSERT INTO shopify_inventory_level 
-        (pos_sku, id_location, quantities_available, shopify_inventory_level_gid)
-        VALUES (%s, %s, %s, %s)
-        ON CONFLICT (pos_sku, id_location) DO UPDATE SET
-            quantities_available = EXCLUDED.quantities_available,
-            updated_at = CURRENT_TIMESTAMP
-    """
-    
-    execute_batch(cursor, insert_query, inventory_data, page_size=BATCH_SIZE)
-    logger.info(f"Insertados/actualizados {len(inventory_data)} registros de inventario")
+
+def merge_staging(cursor) -> Dict[str, int]:
+    """Aplica el staging con un INSERT ... ON CONFLICT por tabla (misma transacción)"""
+    cursor.execute(MERGE_PRODUCTS_QUERY)
+    products = cursor.rowcount
+    logger.info(f"Insertados/actualizados {products} productos")
+
+    cursor.execute(MERGE_INVENTORY_QUERY)
+    inventory = cursor.rowcount
+    logger.info(f"Insertados/actualizados {inventory} registros de inventario")
+    return {"products": products, "inventory": inventory}
 
 
 def main():
     """Función principal del script"""
     try:
-        # Cargar datos
         logger.info("Iniciando importación de datos...")
-        data = load_json_data(DATA_FILE_PATH)
-        #print(data)
-        
-        # Validar y preparar datos
-        valid_products = [product for product in data if validate_product_data(product)]
-        logger.info(f"Productos válidos: {len(valid_products)} de {len(data)}")
-        
-        #valid_products = []
-
-        if not valid_products:
-            logger.error("No hay productos válidos para importar")
-            return
-        
-        # Preparar datos para inserción
-        products_data = [prepare_product_data(product) for product in valid_products]
-        
-        inventory_data = []
-        for product in valid_products:
-            inventory_data.extend(prepare_inventory_data(product))
-
-        #print(inventory_data)
-        
-        # Insertar datos en la base de datos
+        stats = ImportStats()
+
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
 
@@ -248,25 +351,27 @@ def main():
                 #conn.commit()
                 #logger.info("Locaciones Cargadas")
 
-                # Insertar productos
-                insert_products_batch(cursor, products_data)
-                conn.commit()
-                logger.info("Productos Cargados")
-                
-                # Insertar inventario
-                insert_inventory_batch(cursor, inventory_data)
-                conn.commit()
-                logger.info("Inventarios Cargados")
-                
-                #Confirmar transacción
+                # Leer, validar y copiar al staging en un solo recorrido del archivo
+                copy_to_staging(cursor, iter_json_array(DATA_FILE_PATH), stats)
+                stats.log_summary()
+
+                if not stats.valid:
+                    logger.error("No hay productos válidos para importar")
+                    conn.rollback()
+                    return
+
+                # Productos e inventario desde el staging; todo o nada
+                merge_staging(cursor)
                 conn.commit()
                 logger.info("Importación completada exitosamente")
-                pass
-    
+
+    except (json.JSONDecodeError, FileNotFoundError, ValueError) as e:
+        logger.error(f"Error al cargar datos JSON: {e}")
+        raise
     except Exception as e:
         logger.error(f"Error durante la importación: {e}")
         raise
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
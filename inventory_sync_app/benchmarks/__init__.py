@@ -0,0 +1,3 @@
+"""
+Benchmarks del pipeline de sincronización (end-to-end y micro-benchmarks)
+"""
@@ -0,0 +1,120 @@
+"""
+Comparación de resultados de benchmark contra una línea base guardada
+
+Cada métrica tiene una tolerancia relativa: si el valor actual supera
+baseline * (1 + tolerancia) se reporta como regresión. Las métricas de
+throughput (donde más es mejor) se comparan al revés.
+
+Un escenario sin línea base no se compara: los scripts lo reportan con
+missing_from_baseline y fallan salvo que se ejecuten con --update-baseline.
+
+Bootstrap: si el archivo de línea base no existe (o no tiene escenarios) no
+hay contra qué comparar. Los scripts igual miden e imprimen los resultados,
+muestran cómo generarla y terminan con NO_BASELINE_EXIT_CODE (distinto del
+1 de regresión) para que CI pueda distinguir "falta la línea base" de
+"empeoró". La línea base se genera una vez en el runner de referencia con
+--update-baseline y el JSON resultante se commitea.
+"""
+
+from typing import Dict, Any, List, Optional
+import json
+import os
+
+# Tolerancia relativa por métrica (se busca por sufijo). Los ns/fila de los
+# micro-benchmarks no se comparan: dependen de la máquina; se compara relative_cost
+DEFAULT_TOLERANCES = {
+    "_seconds": 0.25,
+    "peak_rss_mb": 0.20,
+    "api_calls_per_change": 0.05,
+    "db_round_trips": 0.10,
+    "rows_per_second": 0.20,
+    "relative_cost": 0.25,
+    "allocated_blocks_per_row": 0.10,
+    "peak_bytes_per_row": 0.15
+}
+
+# Código de salida cuando todavía no hay línea base (1 queda para regresiones)
+NO_BASELINE_EXIT_CODE = 3
+
+# Métricas donde un valor mayor es mejor
+HIGHER_IS_BETTER = ("rows_per_second",)
+
+# Diferencias absolutas por debajo de esto se consideran ruido
+MIN_ABSOLUTE_DELTA = {
+    "_seconds": 0.05,
+    "peak_rss_mb": 5.0,
+    "relative_cost": 0.1,
+    "allocated_blocks_per_row": 0.05,
+    "peak_bytes_per_row": 8.0
+}
+
+
+def _lookup(table: Dict[str, float], metric: str) -> Optional[float]:
+    for suffix, value in table.items():
+        if metric.endswith(suffix):
+            return value
+    return None
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"scenarios": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def has_baseline(baseline: Dict[str, Any]) -> bool:
+    """False si la línea base nunca se generó (archivo ausente o sin escenarios)"""
+    return bool(baseline.get("scenarios"))
+
+
+def print_bootstrap_instructions(path: str, command: str) -> None:
+    print(f"\n⚠️ No hay línea base en {path}: no hay contra qué comparar")
+    print("   Generarla una vez en el runner de referencia y commitear el archivo:")
+    print(f"   {command} --update-baseline")
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"scenarios": results}, f, indent=2, sort_keys=True)
+
+
+def missing_from_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any]) -> List[str]:
+    """Escenarios medidos que no tienen línea base (no se pueden comparar)"""
+    known = baseline.get("scenarios", {})
+    return [scenario for scenario in results if not known.get(scenario)]
+
+
+def compare_with_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Any],
+    tolerances: Optional[Dict[str, float]] = None
+) -> List[str]:
+    """Devuelve una descripción por cada métrica que empeoró más de su tolerancia"""
+    tolerances = tolerances or DEFAULT_TOLERANCES
+    regressions = []
+
+    for scenario, metrics in results.items():
+        base_metrics = baseline.get("scenarios", {}).get(scenario)
+        if not base_metrics:
+            continue
+
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            tolerance = _lookup(tolerances, metric)
+            if base is None or tolerance is None or not isinstance(value, (int, float)):
+                continue
+
+            higher_is_better = metric.endswith(HIGHER_IS_BETTER)
+            delta = (base - value) if higher_is_better else (value - base)
+            if delta <= abs(base) * tolerance:
+                continue
+            if delta <= (_lookup(MIN_ABSOLUTE_DELTA, metric) or 0.0):
+                continue
+
+            regressions.append(
+                f"{scenario} :: {metric}: {value:.4g} vs baseline {base:.4g} "
+                f"({'-' if higher_is_better else '+'}{delta / abs(base) * 100 if base else float('inf'):.1f}%, tolerancia {tolerance * 100:.0f}%)"
+            )
+
+    return regressions
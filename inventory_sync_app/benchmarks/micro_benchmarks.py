@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de las rutas calientes por fila
+
+Mide, sobre datasets sintéticos (fakes.erp_catalog) de 10k a 1M filas:
+  - SmartChangeDetector.detect_inventory_changes
+  - SmartChangeDetector._map_almacen_to_location
+  - ShardedChangeDetector.detect_inventory_changes (unidades por ubicación en
+    un pool de procesos; comparar contra detect_inventory_changes)
+  - ERPDataExtractor._build_product (KordataProduct + safe_int/safe_float/safe_str)
+  - ERPRowDecoder.decode_rows / decode_columns (misma conversión, por lotes;
+    comparar contra kordata_product_construction)
+  - ERPDataExtractor.safe_int / safe_float / safe_str por separado
+  - PostgreSQLInventoryRepository._to_cache_level (materialización de CacheInventoryLevel)
+
+Reporta ns/fila (mejor y promedio de --repeat corridas), el costo relativo
+a una calibración fija de Python puro medida intercalada con cada corrida
+y asignaciones por fila (bloques retenidos y pico de bytes según
+tracemalloc). Los ns/fila son informativos: varían con la máquina y con
+la carga del host. Se comparan relative_cost y las asignaciones contra
+benchmarks/micro_baseline.json y termina con código 1 si hay regresiones
+(en particular en la velocidad de detección) o si algún benchmark no
+tiene línea base. Sin línea base termina con código 3 (ver
+benchmarks.baseline).
+
+La línea base commiteada es el peor valor de cada métrica en --rounds
+corridas completas del runner de referencia, para que el ruido de una
+corrida no se tome como regresión. Regenerarla con:
+    python -m benchmarks.micro_benchmarks --rounds 4 --update-baseline
+
+Uso (desde inventory_sync_app/):
+    python -m benchmarks.micro_benchmarks --sizes 10000,100000
+    python -m benchmarks.micro_benchmarks --sizes 1000000 --repeat 3
+"""
+
+from typing import Callable, Dict, Any, List, Tuple
+from contextlib import redirect_stdout
+from datetime import datetime
+import argparse
+import asyncio
+import gc
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(APP_DIR, "src"))
+
+from infrastructure.SmartChangeDetector import SmartChangeDetector
+from infrastructure.ShardedChangeDetector import ShardedChangeDetector
+from infrastructure.ERPDataExtractor import ERPDataExtractor
+from infrastructure.ERPRowDecoder import ERPRowDecoder
+from infrastructure.PostgreSQLInventoryRepository import PostgreSQLInventoryRepository
+from domain.entities.CacheInventoryLevel import CacheInventoryLevel
+from domain.entities.KordataProduct import KordataProduct
+
+from fakes.erp_catalog import ERPCatalogGenerator, ALMACENES
+from benchmarks.baseline import (
+    load_baseline, save_baseline, compare_with_baseline, missing_from_baseline,
+    has_baseline, print_bootstrap_instructions, NO_BASELINE_EXIT_CODE
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "micro_baseline.json")
+
+
+def calibration_workload(rows: int) -> Callable[[], Any]:
+    """Trabajo fijo de Python puro (dict por clave compuesta y float por fila) para normalizar la velocidad de la máquina"""
+    keys = [(f"SKU-{i:07d}", i % len(ALMACENES)) for i in range(rows)]
+
+    def workload():
+        levels = {key: float(i) for i, key in enumerate(keys)}
+        return sum(1 for key in keys if levels[key] >= 0.0)
+
+    return workload
+
+
+def _timed(fn: Callable[[], Any]) -> int:
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter_ns()
+        fn()
+        return time.perf_counter_ns() - started
+    finally:
+        gc.enable()
+
+
+def measure(fn: Callable[[], Any], rows: int, repeat: int, calibration: Callable[[], Any]) -> Dict[str, float]:
+    """ns/fila con gc deshabilitado, costo relativo a la calibración y asignaciones por fila con tracemalloc (en una corrida aparte)
+
+    La calibración se intercala con cada corrida: si la máquina se frena o se
+    acelera a mitad del benchmark ambos tiempos se mueven juntos y
+    relative_cost (la métrica que se compara) no cambia.
+    """
+    timings = []
+    calibration_timings = []
+    for _ in range(repeat):
+        calibration_timings.append(_timed(calibration))
+        timings.append(_timed(fn))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = fn()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+
+    return {
+        "ns_per_row": min(timings) / rows,
+        "mean_ns_per_row": statistics.mean(timings) / rows,
+        "relative_cost": min(timings) / min(calibration_timings),
+        "allocated_blocks_per_row": blocks / rows,
+        "peak_bytes_per_row": peak / rows
+    }
+
+
+def build_dataset(rows: int, seed: int, churn: float) -> Tuple[List[Dict[str, Any]], List[KordataProduct], List[Dict[str, Any]], List[CacheInventoryLevel]]:
+    """Filas crudas del ERP, productos ERP, filas del cache (como asyncpg.Record) y entidades del cache"""
+    generator = ERPCatalogGenerator(rows=rows, seed=seed)
+    now = datetime.now()
+
+    cache_rows = [
+        {
+            "inventory_level_id": i + 1,
+            "pos_sku": sku,
+            "id_location": id_location,
+            "shopify_inventory_level_gid": f"gid://shopify/InventoryLevel/{i + 1}",
+            "quantities_available": float(quantity),
+            "updated_at": now,
+            "sync_op": "UPDATE",
+            "shopify_location_gid": f"gid://shopify/Location/{id_location}",
+            "shopify_inventory_item_gid": f"gid://shopify/InventoryItem/{i // len(ALMACENES) + 1}",
+            "title": f"Producto {sku}",
+            "price": 999.0,
+            "price_compare": 0.0
+        }
+        for i, (sku, id_location, quantity) in enumerate(generator.iter_cache_rows())
+    ]
+    cache_levels = [PostgreSQLInventoryRepository._to_cache_level(row) for row in cache_rows]
+
+    generator.advance(churn=churn)
+    erp_rows = list(generator.iter_rows())
+    extractor = ERPDataExtractor(endpoint_url="http://localhost", bearer_token="")
+    erp_products = [extractor._build_product(row) for row in erp_rows]
+
+    return erp_rows, erp_products, cache_rows, cache_levels
+
+
+def run_size(rows: int, repeat: int, seed: int, churn: float) -> Dict[str, Dict[str, float]]:
+    erp_rows, erp_products, cache_rows, cache_levels = build_dataset(rows, seed, churn)
+    extractor = ERPDataExtractor(endpoint_url="http://localhost", bearer_token="")
+    decoder = ERPRowDecoder()
+    # El pool de procesos se crea una vez (como en modo daemon) y se reutiliza entre corridas
+    sharded_detector = ShardedChangeDetector(min_rows_for_processes=0)
+    loop = asyncio.new_event_loop()
+    results: Dict[str, Dict[str, float]] = {}
+
+    def detect():
+        # El detector imprime totales y guarda JSON/CSV en el cwd; se mide tal cual pero sin ensuciar la terminal
+        with redirect_stdout(io.StringIO()):
+            return loop.run_until_complete(SmartChangeDetector().detect_inventory_changes(erp_products, cache_levels))
+
+    def sharded_detect():
+        with redirect_stdout(io.StringIO()):
+            return loop.run_until_complete(sharded_detector.detect_inventory_changes(erp_products, cache_levels))
+
+    def map_almacen():
+        detector = SmartChangeDetector()
+        return [detector._map_almacen_to_location(product.almacen) for product in erp_products]
+
+    def build_products():
+        return [extractor._build_product(row) for row in erp_rows]
+
+    existencias = [row["Existencia"] for row in erp_rows]
+    ids = [row["id"] for row in erp_rows]
+    nombres = [row["Nombre"] for row in erp_rows]
+
+    benchmarks = {
+        "detect_inventory_changes": detect,
+        "sharded_detect_inventory_changes": sharded_detect,
+        "map_almacen_to_location": map_almacen,
+        "kordata_product_construction": build_products,
+        "erp_row_decoder_products": lambda: decoder.decode_rows(erp_rows),
+        "erp_row_decoder_columns": lambda: decoder.decode_columns(erp_rows),
+        "safe_int": lambda: [extractor.safe_int(value) for value in ids],
+        "safe_float": lambda: [extractor.safe_float(value) for value in existencias],
+        "safe_str": lambda: [extractor.safe_str(value) for value in nombres],
+        "cache_level_materialization": lambda: [PostgreSQLInventoryRepository._to_cache_level(row) for row in cache_rows]
+    }
+
+    calibration = calibration_workload(rows)
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                for name, fn in benchmarks.items():
+                    results[f"{name}[rows={rows}]"] = measure(fn, rows, repeat, calibration)
+            finally:
+                os.chdir(cwd)
+    finally:
+        sharded_detector.close()
+        loop.close()
+
+    return results
+
+
+def worst_of(rounds: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Peor valor por métrica entre varias corridas (todas las métricas son "menos es mejor")"""
+    return {
+        name: {metric: max(r[name][metric] for r in rounds) for metric in metrics}
+        for name, metrics in rounds[0].items()
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de detección y construcción de entidades")
+    parser.add_argument("--sizes", default="10000,100000", help="Filas separadas por coma (hasta 1000000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--churn", type=float, default=0.01, help="Proporción de filas con cambio para la detección")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--rounds", type=int, default=1, help="Corridas completas; se reporta el peor valor de cada métrica")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    rounds: List[Dict[str, Dict[str, float]]] = []
+    for round_number in range(args.rounds):
+        results: Dict[str, Dict[str, float]] = {}
+        for size in args.sizes.split(","):
+            print(f"🔄 Dataset de {int(size)} filas (corrida {round_number + 1}/{args.rounds})...")
+            results.update(run_size(int(size), args.repeat, args.seed, args.churn))
+        rounds.append(results)
+    results = worst_of(rounds)
+
+    print(f"\n{'benchmark':<52} {'ns/fila':>12} {'prom ns/fila':>14} {'costo rel.':>11} {'bloques/fila':>13} {'pico B/fila':>12}")
+    for name, metrics in results.items():
+        print(f"{name:<52} {metrics['ns_per_row']:>12.1f} {metrics['mean_ns_per_row']:>14.1f} {metrics['relative_cost']:>11.2f} "
+              f"{metrics['allocated_blocks_per_row']:>13.2f} {metrics['peak_bytes_per_row']:>12.1f}")
+
+    if args.update_baseline:
+        baseline = load_baseline(args.baseline)
+        save_baseline(args.baseline, {**baseline.get("scenarios", {}), **results})
+        print(f"\n✅ Línea base actualizada: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not has_baseline(baseline):
+        print_bootstrap_instructions(args.baseline, "python -m benchmarks.micro_benchmarks --rounds 4")
+        return NO_BASELINE_EXIT_CODE
+
+    missing = missing_from_baseline(results, baseline)
+    if missing:
+        print(f"\n⚠️ Benchmarks sin línea base en {args.baseline}: {', '.join(missing)}")
+        print("   Ejecutar con --update-baseline para registrarlos")
+        return 1
+
+    regressions = compare_with_baseline(results, baseline)
+    if regressions:
+        print("\n❌ REGRESIONES DETECTADAS:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+
+    print("\n✅ Sin regresiones contra la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los backends JSON (shared.serialization)
+
+Por cada backend instalado (orjson, msgspec, json) mide, sobre documentos
+con la forma de los reales:
+  - erp_report: respuesta del reporte de inventarios (fakes.erp_catalog)
+  - shopify_responses: respuestas de inventorySetQuantities con la extensión
+    de costo, una por cambio (como las recibe el updater)
+  - change_report: el reporte JSON con sangría que guarda el detector
+
+Reporta ms por MB al decodificar y al codificar (mejor de --repeat
+corridas) y la aceleración contra json. Es informativo: no hay línea base
+ni código de salida por regresión.
+
+Uso (desde inventory_sync_app/):
+    python -m benchmarks.serialization_benchmark --rows 100000
+"""
+
+from typing import Any, Callable, Dict, List
+import argparse
+import gc
+import os
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(APP_DIR, "src"))
+
+from shared.serialization import available_backends
+from fakes.erp_catalog import ERPCatalogGenerator
+
+MB = 1024 * 1024
+
+
+def shopify_responses(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "data": {
+                "inventorySetQuantities": {
+                    "inventoryAdjustmentGroup": {
+                        "createdAt": "2024-10-01T12:00:00+00:00",
+                        "reason": "correction",
+                        "referenceDocumentUri": None,
+                        "changes": [{"name": "available", "delta": i % 7 - 3}]
+                    },
+                    "userErrors": []
+                }
+            },
+            "extensions": {
+                "cost": {
+                    "requestedQueryCost": 11,
+                    "actualQueryCost": 11,
+                    "throttleStatus": {"maximumAvailable": 2000.0, "currentlyAvailable": 1989.0, "restoreRate": 100.0}
+                }
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def change_report(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "metadata": {"total_changes": len(rows), "critical_changes": 0},
+        "changes": [
+            {"sku": row["SKU"], "id_location": 1, "old_quantity": 1.0, "new_quantity": float(row["Existencia"]),
+             "priority": 3, "sync_op": "UPDATE", "title": row["Nombre"], "price": row["Precio venta"]}
+            for row in rows
+        ]
+    }
+
+
+def best_seconds(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Decodificación/codificación JSON por MB y backend")
+    parser.add_argument("--rows", type=int, default=100_000, help="Filas del reporte del ERP")
+    parser.add_argument("--responses", type=int, default=5_000, help="Respuestas de Shopify")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    generator = ERPCatalogGenerator(rows=args.rows)
+    rows = list(generator.iter_rows())
+    reference = available_backends()["json"]
+    documents = {
+        "erp_report": generator.payload_bytes(),
+        "shopify_responses": [reference.dumps(response) for response in shopify_responses(args.responses)],
+        "change_report": reference.dumps_pretty(change_report(rows[: args.rows // 10]))
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    for backend in available_backends().values():
+        for name, document in documents.items():
+            if isinstance(document, list):
+                size = sum(len(body) for body in document)
+                decoded = [backend.loads(body) for body in document]
+                decode = lambda: [backend.loads(body) for body in document]
+                encode = lambda: [backend.dumps(value) for value in decoded]
+            else:
+                size = len(document)
+                decoded = backend.loads(document)
+                decode = lambda: backend.loads(document)
+                encode = (lambda: backend.dumps_pretty(decoded)) if name == "change_report" else (lambda: backend.dumps(decoded))
+            results[f"{name}[{backend.name}]"] = {
+                "mb": size / MB,
+                "decode_ms_per_mb": best_seconds(decode, args.repeat) * 1000 / (size / MB),
+                "encode_ms_per_mb": best_seconds(encode, args.repeat) * 1000 / (size / MB)
+            }
+
+    print(f"\n{'documento[backend]':<32} {'MB':>8} {'decode ms/MB':>13} {'encode ms/MB':>13} {'x json (dec)':>13}")
+    for key, metrics in results.items():
+        baseline = results[key.split("[")[0] + "[json]"]
+        speedup = baseline["decode_ms_per_mb"] / metrics["decode_ms_per_mb"]
+        print(f"{key:<32} {metrics['mb']:>8.2f} {metrics['decode_ms_per_mb']:>13.2f} "
+              f"{metrics['encode_ms_per_mb']:>13.2f} {speedup:>13.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,159 @@
 import sys
 import os
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
 
 # Agregar el directorio src al Python path
 project_root = os.path.dirname(os.path.abspath(__file__))
 src_path = os.path.join(project_root, 'src')
-sys.path.insert(0, src_path)
\ No newline at end of file
+sys.path.insert(0, src_path)
+
+from fakes.shopify_graphql_server import FakeShopifyGraphQLServer
+from src.infrastructure.ShopifyThrottleBudget import ShopifyThrottleBudget
+from src.domain.entities.InventoryChange import InventoryChange
+from src.domain.entities.ProductSyncLog import ProductSyncLog
+from src.domain.entities.ShopiProduct import ShopiProduct
+
+LOCATION = "gid://shopify/Location/1"
+
+
+def _make_change(
+    sku,
+    sync_op="UPDATE",
+    new_quantity=4,
+    inventory_item="gid://shopify/InventoryItem/1",
+    priority=3,
+    old_quantity=5,
+    title=None,
+    id_location=1
+):
+    return InventoryChange(
+        sku=sku, id_location=id_location, shopify_location_gid=LOCATION,
+        old_quantity=old_quantity, new_quantity=new_quantity, shopify_inventory_item=inventory_item,
+        sync_op=sync_op, title=f"Producto {sku}" if title is None else title,
+        price=99.0, price_compare=0.0, priority=priority
+    )
+
+
+class FakeUpdater:
+    """
+    Updater en memoria: registra el orden de envío
+
+    failing_skus responden FAILED; existing_skus son los que
+    reconcile_pending_create encuentra ya creados en Shopify.
+    """
+
+    # Un envío a la vez (el orden de `pushed` es el de despacho)
+    concurrency_limit = 1
+    accepting_requests = True
+
+    def __init__(self, failing_skus=(), existing_skus=()):
+        self.throttle_budget = ShopifyThrottleBudget(maximum_available=10000, restore_rate=10000)
+        self.pushed = []
+        self.reconciled = []
+        self._failing_skus = set(failing_skus)
+        self._existing_skus = set(existing_skus)
+
+    async def push_change(self, change):
+        self.pushed.append(change.sku)
+        status = "FAILED" if change.sku in self._failing_skus else "SUCCESS"
+        sync_log = ProductSyncLog(
+            sync_id=0,
+            sku_pos=change.sku,
+            sync_info="ok" if status == "SUCCESS" else "error",
+            before_sync=change.old_quantity,
+            after_sync=change.new_quantity,
+            synced_at=datetime.now(),
+            synced_status=status,
+            sync_type=change.sync_op
+        )
+        shopi_product = None if status == "FAILED" else ShopiProduct(pos_sku=change.sku, id_location=change.id_location)
+        return sync_log, shopi_product
+
+    async def push_changes(self, to_update, to_create, on_result=None):
+        results = [[], [], [], []]
+        for change in to_update + to_create:
+            sync_log, shopi_product = await self.push_change(change)
+            if on_result is not None:
+                await on_result(change, sync_log, shopi_product)
+            offset = 2 if change.sync_op == "CREATE" else 0
+            results[offset].append(sync_log)
+            if shopi_product is not None:
+                results[offset + 1].append(shopi_product)
+        return results
+
+    async def reconcile_pending_create(self, change):
+        self.reconciled.append(change.sku)
+        if change.sku not in self._existing_skus:
+            return None
+        return ShopiProduct(pos_sku=change.sku, id_location=change.id_location, shopify_variant_gid="gid://shopify/ProductVariant/9")
+
+    def get_time_to_shopify_report(self):
+        return {}
+
+    def get_api_budget(self):
+        return self.throttle_budget.get_status()
+
+
+class RecordingSleep:
+    """Reemplaza asyncio.sleep: registra las esperas sin dormir"""
+
+    def __init__(self):
+        self.delays = []
+
+    async def __call__(self, delay):
+        self.delays.append(delay)
+
+
+class FlakyShopifyServer(FakeShopifyGraphQLServer):
+    """Servidor falso que responde 500 en los requests indicados (1-based)"""
+
+    def __init__(self, fail_on=(), **kwargs):
+        super().__init__(**kwargs)
+        self.fail_on = set(fail_on)
+
+    async def handle(self, request):
+        if self.stats["requests"] + 1 in self.fail_on:
+            self.stats["requests"] += 1
+            self.stats["failures"] += 1
+            return web.json_response({"errors": "Internal Server Error"}, status=500)
+        return await super().handle(request)
+
+
+@pytest.fixture
+def make_change():
+    """Fábrica de InventoryChange con valores por defecto razonables"""
+    return _make_change
+
+
+@pytest.fixture
+def make_updater():
+    """Fábrica de FakeUpdater"""
+    return FakeUpdater
+
+
+@pytest.fixture
+def make_sleep():
+    """Fábrica de RecordingSleep (para RetryPolicy(sleep=...))"""
+    return RecordingSleep
+
+
+@pytest_asyncio.fixture
+async def flaky_shopify():
+    """Servidor falso que responde 500 en los requests de flaky_shopify.fail_on"""
+    server = FlakyShopifyServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def fake_shopify():
+    """Servidor GraphQL de Shopify falso (token "token")"""
+    server = FakeShopifyGraphQLServer(access_token="token")
+    await server.start()
+    yield server
+    await server.stop()
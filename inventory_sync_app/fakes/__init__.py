@@ -0,0 +1,10 @@
+"""
+Servidores locales que imitan a los sistemas externos (Shopify, ERP)
+para medir throughput y throttling sin tocar una tienda real.
+"""
+
+from .shopify_graphql_server import FakeShopifyGraphQLServer
+from .erp_catalog import ERPCatalogGenerator
+from .erp_report_server import FakeERPReportServer
+
+__all__ = ["FakeShopifyGraphQLServer", "ERPCatalogGenerator", "FakeERPReportServer"]
@@ -0,0 +1,159 @@
+"""
+Generador de catálogos sintéticos con la forma del reporte de Kordata
+
+Produce filas de resultadoReporteHashmap (SKU, Almacén, Existencia, Talla,
+Color, ...) de forma determinista a partir de una semilla, de 10k a 2M
+filas, y aplica churn controlado entre snapshots. Las existencias viven
+en un array compacto y las filas se renderizan al vuelo, por lo que el
+payload se puede emitir en chunks sin armarlo completo en memoria.
+"""
+
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from array import array
+import json
+import random
+
+# Mismo orden que el mapeo de SmartChangeDetector (posición + 1 = id_location)
+ALMACENES = [
+    "CEDIS", "COACALCO", "PUEBLA", "QUERETARO", "LOS REYES",
+    "TIJUANA", "TOLUCA", "TOREO/PERICENTRO", "EJE CENTRAL"
+]
+TALLAS = ["22", "23", "24", "25", "26", "27", "28", "29", "CH", "M", "G", "XG"]
+COLORES = ["NEGRO", "BLANCO", "ROJO", "AZUL", "GRIS", "CAFE", "ROSA", "VERDE"]
+CATEGORIAS = ["CALZADO", "ROPA", "ACCESORIOS", "DEPORTIVO"]
+MARCAS = ["NIKE", "ADIDAS", "PUMA", "VANS", "CONVERSE", "REEBOK"]
+PROVEEDORES = ["DISTRIBUIDORA NORTE", "IMPORTADORA CENTRO", "GRUPO SUR"]
+
+# Prefijo/sufijo de la respuesta GraphQL del ERP
+PAYLOAD_PREFIX = b'{"data":{"BasesReportesGenerarReportePorId":{"resultadoReporteHashmap":['
+PAYLOAD_SUFFIX = b']}}}'
+
+
+class ERPCatalogGenerator:
+    """
+    Catálogo sintético reproducible
+
+    rows: filas (SKU x almacén) del reporte
+    almacenes: almacenes en los que existe cada SKU
+    seed: semilla para que dos generadores iguales produzcan el mismo reporte
+    """
+
+    def __init__(self, rows: int = 10_000, almacenes: Optional[List[str]] = None, seed: int = 0):
+        self.rows = rows
+        self.almacenes = almacenes or ALMACENES
+        self.seed = seed
+        self.snapshot = 0
+
+        rng = random.Random(seed)
+        self._price = array("f", (round(rng.uniform(199, 2999), 2) for _ in range(self.product_count)))
+        self._existencia = array("i", (self._initial_quantity(rng) for _ in range(rows)))
+
+    @property
+    def product_count(self) -> int:
+        return (self.rows + len(self.almacenes) - 1) // len(self.almacenes)
+
+    @staticmethod
+    def _initial_quantity(rng: random.Random) -> int:
+        # ~15% agotados, el resto con poca existencia (como una tienda real)
+        return 0 if rng.random() < 0.15 else rng.randint(1, 30)
+
+    # ---- Identidad de cada fila ----
+
+    def sku(self, product_index: int) -> str:
+        modelo = product_index // (len(TALLAS) * len(COLORES))
+        talla = TALLAS[product_index % len(TALLAS)]
+        color = COLORES[(product_index // len(TALLAS)) % len(COLORES)]
+        return f"M{modelo:06d}-{talla}-{color[:3]}"
+
+    def row_identity(self, index: int) -> Tuple[str, str]:
+        """(SKU, almacén) de la fila index"""
+        return self.sku(index // len(self.almacenes)), self.almacenes[index % len(self.almacenes)]
+
+    def quantity(self, index: int) -> int:
+        return self._existencia[index]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Fila con las mismas llaves que el reporte de Kordata"""
+        product_index = index // len(self.almacenes)
+        existencia = self._existencia[index]
+        reservado = existencia % 3 if existencia > 5 else 0
+        precio = float(self._price[product_index])
+
+        return {
+            "id": str(index + 1),
+            "SKU": self.sku(product_index),
+            "Modelo": f"M{product_index // (len(TALLAS) * len(COLORES)):06d}",
+            "Talla": TALLAS[product_index % len(TALLAS)],
+            "Color": COLORES[(product_index // len(TALLAS)) % len(COLORES)],
+            "Nombre": f"{CATEGORIAS[product_index % len(CATEGORIAS)].title()} {MARCAS[product_index % len(MARCAS)].title()} {product_index}",
+            "Categoría": CATEGORIAS[product_index % len(CATEGORIAS)],
+            "Proveedor": PROVEEDORES[product_index % len(PROVEEDORES)],
+            "Marca": MARCAS[product_index % len(MARCAS)],
+            "Almacén": self.almacenes[index % len(self.almacenes)],
+            "Costo": f"{precio * 0.55:.2f}",
+            "Precio venta": f"{precio:.2f}",
+            "Existencia": f"{existencia:.1f}",
+            "Reservado": f"{reservado:.1f}",
+            "Disponible": f"{existencia - reservado:.1f}"
+        }
+
+    def header_row(self) -> Dict[str, Any]:
+        """Primera fila del reporte (el extractor la descarta)"""
+        return {key: key for key in self.row(0)}
+
+    # ---- Snapshots ----
+
+    def advance(self, churn: float = 0.01, stockout_fraction: float = 0.1) -> int:
+        """
+        Genera el siguiente snapshot cambiando la existencia de churn * rows filas
+
+        stockout_fraction de los cambios son agotados/reabastos (cambios
+        críticos), el resto son ventas o entradas pequeñas. Devuelve el
+        número de filas cuya existencia cambió.
+        """
+        self.snapshot += 1
+        rng = random.Random(self.seed * 1_000_003 + self.snapshot)
+        changed = 0
+
+        for index in rng.sample(range(self.rows), int(self.rows * churn)):
+            current = self._existencia[index]
+            if rng.random() < stockout_fraction:
+                new = rng.randint(1, 30) if current == 0 else 0
+            else:
+                new = max(0, current + rng.choice((-3, -2, -1, 1, 2, 5)))
+            if new != current:
+                self._existencia[index] = new
+                changed += 1
+        return changed
+
+    # ---- Payload ----
+
+    def iter_rows(self, almacenes: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Filas del snapshot actual (opcionalmente filtradas por almacén)"""
+        for index in range(self.rows):
+            if almacenes is None or self.almacenes[index % len(self.almacenes)] in almacenes:
+                yield self.row(index)
+
+    def iter_payload(self, chunk_rows: int = 5000, almacenes: Optional[List[str]] = None) -> Iterator[bytes]:
+        """Respuesta JSON completa del ERP emitida en chunks de bytes"""
+        yield PAYLOAD_PREFIX + json.dumps(self.header_row(), ensure_ascii=False).encode("utf-8")
+
+        buffer: List[str] = []
+        for row in self.iter_rows(almacenes):
+            buffer.append(json.dumps(row, ensure_ascii=False))
+            if len(buffer) >= chunk_rows:
+                yield ("," + ",".join(buffer)).encode("utf-8")
+                buffer = []
+        if buffer:
+            yield ("," + ",".join(buffer)).encode("utf-8")
+
+        yield PAYLOAD_SUFFIX
+
+    def payload_bytes(self, almacenes: Optional[List[str]] = None) -> bytes:
+        return b"".join(self.iter_payload(almacenes=almacenes))
+
+    def iter_cache_rows(self) -> Iterator[Tuple[str, int, int]]:
+        """(pos_sku, id_location, cantidad) para precargar el cache de PostgreSQL"""
+        for index in range(self.rows):
+            sku, almacen = self.row_identity(index)
+            yield sku, ALMACENES.index(almacen) + 1, self._existencia[index]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita el endpoint de reportes de Kordata
+
+Sirve el snapshot actual de un ERPCatalogGenerator con la misma forma que
+BasesReportesGenerarReportePorId, opcionalmente comprimido con gzip y/o
+con transferencia chunked (recomendado a partir de ~200k filas para no
+armar el payload completo en memoria). Con etag=True responde ETag por
+snapshot y 304 cuando el cliente manda el ETag vigente en If-None-Match.
+
+El parámetro almacenId del reporte filtra por almacén: el id N es el
+N-ésimo almacén del generador (1 = CEDIS). partition_latency agrega una
+demora por almacén para simular uno lento.
+
+Uso:
+    python -m fakes.erp_report_server --rows 500000 --gzip --chunked --port 8788
+    curl -X POST "http://127.0.0.1:8788/_admin/advance?churn=0.02"   # siguiente snapshot
+"""
+
+from typing import Optional, Dict, Any, List
+from aiohttp import web
+import argparse
+import asyncio
+import json
+import re
+import zlib
+
+from .erp_catalog import ERPCatalogGenerator
+
+ALMACEN_PARAMETER = re.compile(r'clave: "almacenId", valor: "([^"]*)"')
+
+class FakeERPReportServer:
+    """Servidor HTTP del reporte de inventario sintético"""
+
+    def __init__(
+        self,
+        generator: ERPCatalogGenerator,
+        gzip: bool = False,
+        chunked: bool = False,
+        latency_seconds: float = 0.0,
+        bearer_token: Optional[str] = None,
+        etag: bool = False,
+        partition_latency: Optional[Dict[str, float]] = None
+    ):
+        self.generator = generator
+        self.gzip = gzip
+        self.chunked = chunked
+        self.latency_seconds = latency_seconds
+        self.bearer_token = bearer_token
+        self.etag = etag
+        self.partition_latency = partition_latency or {}
+        self.stats: Dict[str, Any] = {"requests": 0, "bytes_sent": 0, "not_modified": 0, "by_almacen": {}}
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/_admin/advance", self.handle_advance)
+        app.router.add_post("/{tail:.*}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}/graphql"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle_advance(self, request: web.Request) -> web.Response:
+        churn = float(request.query.get("churn", "0.01"))
+        stockout_fraction = float(request.query.get("stockout_fraction", "0.1"))
+        changed = self.generator.advance(churn=churn, stockout_fraction=stockout_fraction)
+        return web.json_response({"snapshot": self.generator.snapshot, "changed_rows": changed})
+
+    def _requested_almacenes(self, body: bytes) -> Optional[List[str]]:
+        """Almacén pedido en almacenId (None = todos)"""
+        try:
+            query = json.loads(body).get("query", "")
+        except (ValueError, AttributeError):
+            return None
+        match = ALMACEN_PARAMETER.search(query)
+        if not match or match.group(1) in ("", "null"):
+            return None
+        return [self.generator.almacenes[int(match.group(1)) - 1]]
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.stats["requests"] += 1
+
+        if self.bearer_token and request.headers.get("Authorization") != f"Bearer {self.bearer_token}":
+            return web.json_response({"errors": [{"message": "Unauthorized"}]}, status=401)
+
+        almacenes = self._requested_almacenes(await request.read())
+        partition = almacenes[0] if almacenes else "all"
+        self.stats["by_almacen"][partition] = self.stats["by_almacen"].get(partition, 0) + 1
+        latency = self.latency_seconds + self.partition_latency.get(partition, 0.0)
+        if latency:
+            await asyncio.sleep(latency)
+
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if self.etag:
+            headers["ETag"] = f'"snapshot-{self.generator.snapshot}"'
+            if request.headers.get("If-None-Match") == headers["ETag"]:
+                self.stats["not_modified"] += 1
+                return web.Response(status=304, headers={"ETag": headers["ETag"]})
+        if self.gzip:
+            headers["Content-Encoding"] = "gzip"
+
+        if not self.chunked:
+            body = self.generator.payload_bytes(almacenes)
+            if self.gzip:
+                body = zlib.compress(body, wbits=31)
+            self.stats["bytes_sent"] += len(body)
+            return web.Response(body=body, headers=headers)
+
+        response = web.StreamResponse(headers=headers)
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        compressor = zlib.compressobj(wbits=31) if self.gzip else None
+        for chunk in self.generator.iter_payload(almacenes=almacenes):
+            data = compressor.compress(chunk) if compressor else chunk
+            if data:
+                self.stats["bytes_sent"] += len(data)
+                await response.write(data)
+        if compressor:
+            tail = compressor.flush()
+            self.stats["bytes_sent"] += len(tail)
+            await response.write(tail)
+
+        await response.write_eof()
+        return response
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    generator = ERPCatalogGenerator(rows=args.rows, seed=args.seed)
+    server = FakeERPReportServer(generator, gzip=args.gzip, chunked=args.chunked, latency_seconds=args.latency, etag=args.etag)
+    url = await server.start(args.host, args.port)
+    print(f"🏭 Reporte ERP falso ({args.rows} filas) escuchando en {url}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita el reporte de inventario de Kordata")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8788)
+    parser.add_argument("--rows", type=int, default=10_000, help="Filas (SKU x almacén) del reporte")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gzip", action="store_true", help="Comprimir la respuesta con gzip")
+    parser.add_argument("--chunked", action="store_true", help="Transferencia chunked (sin armar el payload completo)")
+    parser.add_argument("--etag", action="store_true", help="Responder ETag y 304 si el snapshot no cambió")
+    parser.add_argument("--latency", type=float, default=0.0, help="Demora antes de responder (segundos)")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
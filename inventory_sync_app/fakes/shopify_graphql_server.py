@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita el endpoint Admin GraphQL de Shopify
+
+Entiende las operaciones que envía ShopifyInventoryUpdater
+(inventorySetQuantities, productCreate, productUpdate, productVariantsBulkUpdate,
+inventoryActivate, la búsqueda productVariants por SKU y products por
+tag) y simula el
+bucket de costo de Shopify, devolviendo extensions.cost.throttleStatus
+en cada respuesta y errores THROTTLED cuando el bucket se agota.
+
+Uso:
+    python -m fakes.shopify_graphql_server --port 8787 --latency 0.05 --failure-rate 0.01
+    SHOPIFY_SHOP_DOMAIN=http://127.0.0.1:8787/admin/api/2024-10/graphql.json python run.py
+"""
+
+from typing import Dict, Any, Optional, List, Tuple
+from collections import defaultdict
+from datetime import datetime, timezone
+from aiohttp import web
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+
+# Costo solicitado por operación (similar al de la API real)
+OPERATION_COSTS = {
+    "inventorySetQuantities": 11,
+    "productCreate": 12,
+    "productUpdate": 10,
+    "productVariantsBulkUpdate": 11,
+    "inventoryActivate": 11,
+    "productVariants": 12,
+    "products": 4
+}
+
+# Término de búsqueda campo:valor, con el valor entre comillas (\" y \\ escapados) o sin espacios
+SEARCH_TERM = re.compile(r"""^(\w+):(?:"((?:[^"\\]|\\.)*)"|'([^']*)'|(\S+))$""")
+
+
+def parse_search(search: str) -> Tuple[Optional[str], Optional[str]]:
+    """(campo, valor) de una búsqueda de un solo término; (None, None) si no se entiende"""
+    match = SEARCH_TERM.match(search.strip())
+    if not match:
+        return None, None
+    field, quoted, single_quoted, bare = match.groups()
+    if quoted is not None:
+        return field, re.sub(r"\\(.)", r"\1", quoted)
+    return field, single_quoted if single_quoted is not None else bare
+
+
+class FakeShopifyGraphQLServer:
+    """
+    Imitación en memoria de la tienda Shopify
+
+    latency_seconds / latency_jitter_seconds: demora por request
+    failure_rate: probabilidad de responder 500 antes de procesar
+    throttle_max / restore_rate: bucket de costo (puntos y puntos/segundo)
+    strict: si es False, inventorySetQuantities acepta inventory items
+            desconocidos (útil para cargas con gids de un cache real)
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        throttle_max: float = 1000.0,
+        restore_rate: float = 50.0,
+        access_token: Optional[str] = None,
+        strict: bool = False,
+        seed: Optional[int] = None
+    ):
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.failure_rate = failure_rate
+        self.throttle_max = throttle_max
+        self.restore_rate = restore_rate
+        self.access_token = access_token
+        self.strict = strict
+        self._random = random.Random(seed)
+
+        # Bucket de costo
+        self._available = throttle_max
+        self._last_refill = time.monotonic()
+
+        # Estado de la tienda
+        self._ids = itertools.count(1000)
+        self.products: Dict[str, Dict[str, Any]] = {}
+        self.variants: Dict[str, Dict[str, Any]] = {}
+        self.inventory_items: Dict[str, Dict[str, Any]] = {}
+        self.inventory_levels: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "throttled": 0,
+            "failures": 0,
+            "by_operation": defaultdict(int)
+        }
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    # ---- Aplicación HTTP ----
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/{tail:.*}", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Levanta el servidor y devuelve la URL del endpoint GraphQL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}/admin/api/2024-10/graphql.json"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+
+        if self.access_token and request.headers.get("X-Shopify-Access-Token") != self.access_token:
+            return web.json_response({"errors": "[API] Invalid API key or access token"}, status=401)
+
+        delay = self.latency_seconds + self._random.uniform(0, self.latency_jitter_seconds)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.stats["failures"] += 1
+            return web.json_response({"errors": "Internal Server Error"}, status=500)
+
+        try:
+            body = await request.json()
+        except (ValueError, json.JSONDecodeError):
+            return web.json_response({"errors": [{"message": "Invalid JSON"}]}, status=400)
+
+        query = body.get("query") or ""
+        variables = body.get("variables") or {}
+        operation = self._detect_operation(query)
+        if operation is None:
+            return web.json_response({"errors": [{"message": "Unsupported operation"}]}, status=400)
+
+        cost = OPERATION_COSTS[operation]
+        if not self._debit(cost):
+            self.stats["throttled"] += 1
+            return web.json_response({
+                "errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}],
+                "extensions": self._cost_extension(cost, 0)
+            })
+
+        self.stats["by_operation"][operation] += 1
+        data = getattr(self, f"_op_{operation}")(variables)
+        return web.json_response({"data": data, "extensions": self._cost_extension(cost, cost)})
+
+    def _detect_operation(self, query: str) -> Optional[str]:
+        # Las mutaciones se detectan por el campo raíz (productVariantsBulkUpdate antes que productVariants)
+        for operation in ("inventorySetQuantities", "productCreate", "productUpdate", "productVariantsBulkUpdate", "inventoryActivate"):
+            if f"{operation}(" in query:
+                return operation
+        if "productVariants(" in query:
+            return "productVariants"
+        if "products(" in query:
+            return "products"
+        return None
+
+    # ---- Bucket de costo ----
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.throttle_max, self._available + (now - self._last_refill) * self.restore_rate)
+        self._last_refill = now
+
+    def _debit(self, cost: float) -> bool:
+        self._refill()
+        if cost > self._available:
+            return False
+        self._available -= cost
+        return True
+
+    def _cost_extension(self, requested: float, actual: float) -> Dict[str, Any]:
+        return {
+            "cost": {
+                "requestedQueryCost": requested,
+                "actualQueryCost": actual,
+                "throttleStatus": {
+                    "maximumAvailable": self.throttle_max,
+                    "currentlyAvailable": round(self._available, 1),
+                    "restoreRate": self.restore_rate
+                }
+            }
+        }
+
+    # ---- Operaciones ----
+
+    def _gid(self, kind: str) -> str:
+        return f"gid://shopify/{kind}/{next(self._ids)}"
+
+    def _level_gid(self, item_gid: str, location_gid: str) -> str:
+        item_id = item_gid.rsplit("/", 1)[-1]
+        location_id = location_gid.rsplit("/", 1)[-1]
+        return f"gid://shopify/InventoryLevel/{location_id}?inventory_item_id={item_id}"
+
+    def _op_productCreate(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        product_input = variables.get("product") or {}
+        if not product_input.get("title"):
+            return {"productCreate": {"product": None, "userErrors": [{"field": ["title"], "message": "Title can't be blank"}]}}
+
+        product_gid = self._gid("Product")
+        variant_gid = self._gid("ProductVariant")
+        item_gid = self._gid("InventoryItem")
+
+        self.products[product_gid] = {
+            "id": product_gid,
+            "title": product_input["title"],
+            "status": product_input.get("status", "ACTIVE"),
+            "tags": list(product_input.get("tags") or [])
+        }
+        self.variants[variant_gid] = {"id": variant_gid, "product_id": product_gid, "inventory_item_id": item_gid, "price": "0.00"}
+        self.inventory_items[item_gid] = {"id": item_gid, "tracked": False, "sku": None, "variant_id": variant_gid}
+
+        return {
+            "productCreate": {
+                "product": {
+                    "id": product_gid,
+                    "variants": {"edges": [{"node": {
+                        "id": variant_gid,
+                        "inventoryItem": {"id": item_gid, "tracked": False, "inventoryLevels": {"edges": []}}
+                    }}]}
+                },
+                "userErrors": []
+            }
+        }
+
+    def _op_productUpdate(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        product_input = variables.get("product") or {}
+        product = self.products.get(product_input.get("id"))
+        if product is None:
+            return {"productUpdate": {"product": None, "userErrors": [{"field": ["id"], "message": "Product does not exist"}]}}
+        if "title" in product_input:
+            if not product_input["title"]:
+                return {"productUpdate": {"product": None, "userErrors": [{"field": ["title"], "message": "Title can't be blank"}]}}
+            product["title"] = product_input["title"]
+        return {"productUpdate": {"product": {"id": product["id"], "title": product["title"]}, "userErrors": []}}
+
+    def _op_productVariantsBulkUpdate(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        product_gid = variables.get("productId")
+        if product_gid not in self.products:
+            return {"productVariantsBulkUpdate": {"product": None, "productVariants": None,
+                                                  "userErrors": [{"field": ["productId"], "message": "Product does not exist"}]}}
+
+        updated = []
+        for variant_input in variables.get("variants") or []:
+            variant = self.variants.get(variant_input.get("id"))
+            if variant is None:
+                continue
+            if "price" in variant_input:
+                variant["price"] = str(variant_input["price"])
+            item = self.inventory_items[variant["inventory_item_id"]]
+            item_input = variant_input.get("inventoryItem") or {}
+            item["tracked"] = item_input.get("tracked", item["tracked"])
+            item["sku"] = item_input.get("sku", item["sku"])
+            updated.append({"id": variant["id"], "inventoryItem": {"id": item["id"], "tracked": item["tracked"]}})
+
+        return {"productVariantsBulkUpdate": {"product": {"id": product_gid}, "productVariants": updated, "userErrors": []}}
+
+    def _op_inventoryActivate(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        item_gid = variables.get("inventoryItemId")
+        location_gid = variables.get("locationId")
+        if self.strict and item_gid not in self.inventory_items:
+            return {"inventoryActivate": {"inventoryLevel": None,
+                                          "userErrors": [{"field": ["inventoryItemId"], "message": "Inventory item does not exist"}]}}
+
+        level = self.inventory_levels.setdefault((item_gid, location_gid), {
+            "id": self._level_gid(item_gid, location_gid),
+            "available": 0
+        })
+        if variables.get("available") is not None:
+            level["available"] = int(variables["available"])
+
+        return {
+            "inventoryActivate": {
+                "inventoryLevel": {
+                    "id": level["id"],
+                    "quantities": [{"name": "available", "quantity": level["available"]}],
+                    "item": {"id": item_gid},
+                    "location": {"id": location_gid}
+                },
+                "userErrors": []
+            }
+        }
+
+    def _op_inventorySetQuantities(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        set_input = variables.get("input") or {}
+        changes = []
+        user_errors = []
+
+        for i, quantity in enumerate(set_input.get("quantities") or []):
+            key = (quantity.get("inventoryItemId"), quantity.get("locationId"))
+            if self.strict and key not in self.inventory_levels:
+                user_errors.append({
+                    "field": ["input", "quantities", str(i), "locationId"],
+                    "message": "The specified inventory item is not stocked at the location."
+                })
+                continue
+
+            level = self.inventory_levels.setdefault(key, {"id": self._level_gid(*key), "available": 0})
+            delta = int(quantity["quantity"]) - level["available"]
+            level["available"] = int(quantity["quantity"])
+            changes.append({"name": set_input.get("name", "available"), "delta": delta})
+
+        if user_errors:
+            return {"inventorySetQuantities": {"inventoryAdjustmentGroup": None, "userErrors": user_errors}}
+
+        return {
+            "inventorySetQuantities": {
+                "inventoryAdjustmentGroup": {
+                    "createdAt": datetime.now(timezone.utc).isoformat(),
+                    "reason": set_input.get("reason"),
+                    "referenceDocumentUri": None,
+                    "changes": changes
+                },
+                "userErrors": []
+            }
+        }
+
+    def _op_productVariants(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Como en Shopify, sku: no es exacto: devuelve las variantes cuyo SKU empieza con el valor"""
+        field, sku = parse_search(variables.get("query") or "")
+        location_gid = variables.get("locationId")
+
+        edges: List[Dict[str, Any]] = []
+        for item in self.inventory_items.values():
+            if field != "sku" or not (item["sku"] or "").startswith(sku):
+                continue
+            variant = self.variants[item["variant_id"]]
+            level = self.inventory_levels.get((item["id"], location_gid))
+            edges.append({"node": {
+                "id": variant["id"],
+                "sku": item["sku"],
+                "product": {"id": variant["product_id"]},
+                "inventoryItem": {"id": item["id"], "inventoryLevel": {"id": level["id"]} if level else None}
+            }})
+            if len(edges) == 5:
+                break
+
+        return {"productVariants": {"edges": edges}}
+
+    def _op_products(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Solo soporta la búsqueda por tag exacto: tag:"<tag>" (o entre comillas simples)"""
+        field, tag = parse_search(variables.get("query") or "")
+        tag = tag if field == "tag" else None
+
+        edges: List[Dict[str, Any]] = []
+        for product in self.products.values():
+            if tag is None or tag not in product["tags"]:
+                continue
+            variants = [variant for variant in self.variants.values() if variant["product_id"] == product["id"]]
+            edges.append({"node": {
+                "id": product["id"],
+                "variants": {"edges": [{"node": {
+                    "id": variant["id"],
+                    "sku": self.inventory_items[variant["inventory_item_id"]]["sku"],
+                    "inventoryItem": {"id": variant["inventory_item_id"]}
+                }} for variant in variants[:1]]}
+            }})
+            break
+
+        return {"products": {"edges": edges}}
+
+    # ---- Consultas para pruebas / benchmarks ----
+
+    def get_available(self, inventory_item_gid: str, location_gid: str) -> Optional[int]:
+        level = self.inventory_levels.get((inventory_item_gid, location_gid))
+        return level["available"] if level else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "by_operation": dict(self.stats["by_operation"]), "currently_available": self._available}
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = FakeShopifyGraphQLServer(
+        latency_seconds=args.latency,
+        latency_jitter_seconds=args.jitter,
+        failure_rate=args.failure_rate,
+        throttle_max=args.throttle_max,
+        restore_rate=args.restore_rate,
+        strict=args.strict,
+        seed=args.seed
+    )
+    url = await server.start(args.host, args.port)
+    print(f"🛍️ Shopify GraphQL falso escuchando en {url}")
+    try:
+        while True:
+            await asyncio.sleep(30)
+            print(f"📊 {server.get_stats()}")
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita Shopify Admin GraphQL")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia base por request (segundos)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latencia adicional aleatoria máxima (segundos)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probabilidad de responder 500")
+    parser.add_argument("--throttle-max", type=float, default=1000.0, help="Tamaño del bucket de costo")
+    parser.add_argument("--restore-rate", type=float, default=50.0, help="Puntos restaurados por segundo")
+    parser.add_argument("--strict", action="store_true", help="Rechazar inventory items desconocidos")
+    parser.add_argument("--seed", type=int, default=None)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
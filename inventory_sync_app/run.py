@@ -2,16 +2,41 @@
 import sys
 import os
 import asyncio
+import argparse
 
 # Agregar src al path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.presentation.main import main
+from src.presentation.daemon import run_daemon
 from src.shared.config.config_manager import get_config, print_config_status
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincronización de inventario ERP -> Shopify")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Ejecutar como proceso de larga duración con scheduler asíncrono"
+    )
+    parser.add_argument(
+        "--continuous",
+        action="store_true",
+        help="Modo daemon con sincronizaciones continuas e intervalo adaptativo"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Perfilar cada ejecución (pilas plegadas y asignaciones por etapa en LOG_DIR/profiles)"
+    )
+    args = parser.parse_args()
+
     config = get_config()
+    if args.profile:
+        config.profiling_enabled = True
 
     #print_config_status()
 
-    asyncio.run(main(config=config))
\ No newline at end of file
+    if args.daemon or args.continuous:
+        asyncio.run(run_daemon(config=config, continuous=args.continuous))
+    else:
+        asyncio.run(main(config=config))
\ No newline at end of file
@@ -0,0 +1,99 @@
+from typing import Dict, Any, Optional
+from datetime import datetime
+
+class AdaptiveSyncInterval:
+    """
+    POLÍTICA: Calcula la espera entre sincronizaciones continuas
+
+    Cada sincronización es una re-sincronización completa (reporte entero del
+    ERP contra el cache); lo único adaptativo es la frecuencia.
+
+    - Se acorta cuando el ERP muestra muchos cambios y se alarga cuando no hay.
+    - Fuera del horario de tienda la espera se multiplica por off_hours_factor.
+    - Si el presupuesto de la API de Shopify está bajo, espera a que se restaure.
+    """
+
+    def __init__(
+        self,
+        min_interval_seconds: float = 30.0,
+        max_interval_seconds: float = 900.0,
+        target_changes_per_run: int = 200,
+        store_open_hour: int = 9,
+        store_close_hour: int = 21,
+        off_hours_factor: float = 4.0,
+        budget_low_watermark: float = 0.3,
+        smoothing: float = 0.5
+    ):
+        self._min_interval = min_interval_seconds
+        self._max_interval = max_interval_seconds
+        self._target_changes_per_run = target_changes_per_run
+        self._store_open_hour = store_open_hour
+        self._store_close_hour = store_close_hour
+        self._off_hours_factor = off_hours_factor
+        self._budget_low_watermark = budget_low_watermark
+        self._smoothing = smoothing
+
+        self._current_interval = min_interval_seconds
+        self._change_rate: Optional[float] = None  # Cambios por segundo (EWMA)
+
+    @property
+    def change_rate(self) -> float:
+        """Tasa de cambios observada (cambios por segundo)"""
+        return self._change_rate or 0.0
+
+    def is_store_hours(self, now: datetime) -> bool:
+        """Regla de negocio: ¿Estamos en horario de tienda?"""
+        return self._store_open_hour <= now.hour < self._store_close_hour
+
+    def next_interval(
+        self,
+        changes_detected: int,
+        elapsed_seconds: float,
+        api_budget: Optional[Dict[str, Any]],
+        now: datetime
+    ) -> float:
+        """
+        Calcula los segundos a esperar antes de la siguiente ejecución
+
+        Args:
+            changes_detected: Cambios detectados en la última ejecución
+            elapsed_seconds: Tiempo cubierto por esa ejecución (espera + duración)
+            api_budget: Estado del bucket de Shopify (get_api_budget)
+            now: Hora local de la tienda
+        """
+        observed_rate = changes_detected / max(elapsed_seconds, 1.0)
+        if self._change_rate is None:
+            self._change_rate = observed_rate
+        else:
+            self._change_rate = self._smoothing * observed_rate + (1 - self._smoothing) * self._change_rate
+
+        if self._change_rate > 0:
+            # Espera suficiente para acumular ~target_changes_per_run cambios
+            interval = self._target_changes_per_run / self._change_rate
+        else:
+            # Sin cambios: alargar gradualmente
+            interval = self._current_interval * 1.5
+
+        interval = min(max(interval, self._min_interval), self._max_interval)
+
+        if not self.is_store_hours(now):
+            interval = min(interval * self._off_hours_factor, self._max_interval * self._off_hours_factor)
+
+        interval = max(interval, self._budget_wait(api_budget))
+
+        self._current_interval = interval
+        return interval
+
+    def _budget_wait(self, api_budget: Optional[Dict[str, Any]]) -> float:
+        """Segundos para que el bucket de Shopify vuelva sobre la marca baja"""
+        if not api_budget:
+            return 0.0
+
+        maximum = api_budget.get("maximum_available") or 0.0
+        available = api_budget.get("currently_available") or 0.0
+        restore_rate = api_budget.get("restore_rate") or 0.0
+        threshold = self._budget_low_watermark * maximum
+
+        if available >= threshold or restore_rate <= 0:
+            return 0.0
+        return (threshold - available) / restore_rate
@@ -0,0 +1,82 @@
+from domain.repositories.ILocationLeaseRepository import ILocationLeaseRepository
+
+from typing import List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger("inventory_sync.sync")
+
+class LocationShardCoordinator:
+    """
+    POLÍTICA: Qué ubicaciones (id_location) sincroniza este worker
+
+    Varios procesos u hosts sincronizan ubicaciones disjuntas. Cada uno toma
+    hasta max_locations leases al iniciar una ejecución y los mantiene
+    renovándolos cada tercio del TTL mientras el proceso vive (en el daemon
+    también entre ejecuciones, así conserva sus ubicaciones). Si un worker
+    cae, sus leases vencen y los toma otro en su siguiente ejecución.
+    """
+
+    def __init__(
+        self,
+        lease_repo: ILocationLeaseRepository,
+        owner: str,
+        candidates: Optional[List[int]] = None,
+        max_locations: int = 0,
+        lease_ttl_seconds: float = 300.0
+    ):
+        self._lease_repo = lease_repo
+        self._owner = owner
+        self._candidates = candidates or []
+        self._max_locations = max_locations  # 0 = sin límite
+        self._lease_ttl_seconds = lease_ttl_seconds
+        self._locations: List[int] = []
+        self._keep_alive_task: Optional[asyncio.Task] = None
+
+    @property
+    def owner(self) -> str:
+        return self._owner
+
+    @property
+    def locations(self) -> List[int]:
+        """Ubicaciones con lease vigente según la última toma o renovación"""
+        return list(self._locations)
+
+    async def acquire(self) -> List[int]:
+        """Renueva las ubicaciones del worker y toma libres hasta max_locations"""
+        candidates = self._candidates or await self._lease_repo.get_location_ids()
+        max_locations = self._max_locations or len(candidates)
+        self._locations = await self._lease_repo.acquire_locations(
+            self._owner, candidates, max_locations, self._lease_ttl_seconds
+        )
+        if self._locations and (self._keep_alive_task is None or self._keep_alive_task.done()):
+            self._keep_alive_task = asyncio.create_task(self._keep_alive())
+        return self.locations
+
+    async def _keep_alive(self) -> None:
+        """Renueva solo las ubicaciones que ya tiene (no toma nuevas a mitad de una ejecución)"""
+        while True:
+            await asyncio.sleep(self._lease_ttl_seconds / 3)
+            if not self._locations:
+                continue
+            try:
+                renewed = await self._lease_repo.acquire_locations(
+                    self._owner, self._locations, len(self._locations), self._lease_ttl_seconds
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron renovar los leases de {self._owner}: {e}")
+                continue
+            lost = set(self._locations) - set(renewed)
+            if lost:
+                logger.warning(f"⚠️ {self._owner} perdió las ubicaciones {sorted(lost)} (lease vencido)")
+            self._locations = renewed
+
+    async def release(self) -> None:
+        """Deja de renovar y libera las ubicaciones para otros workers"""
+        if self._keep_alive_task is not None:
+            self._keep_alive_task.cancel()
+            await asyncio.gather(self._keep_alive_task, return_exceptions=True)
+            self._keep_alive_task = None
+        if self._locations:
+            await self._lease_repo.release_locations(self._owner)
+            self._locations = []
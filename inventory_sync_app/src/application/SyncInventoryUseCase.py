@@ -3,9 +3,20 @@ from domain.repositories.IInventoryLevelRepository import IInventoryLevelReposit
 from domain.repositories.ISyncLogRepository import ISyncLogRepository
 from domain.repositories.IChangeDetector import IChangeDetector
 from domain.repositories.IShopifyUpdater import IShopifyUpdater
+from domain.repositories.ISyncJournalRepository import ISyncJournalRepository
+from domain.entities.InventoryChange import InventoryChange
+from domain.entities.ProductSyncLog import ProductSyncLog
+from domain.entities.ShopiProduct import ShopiProduct
+from application.LocationShardCoordinator import LocationShardCoordinator
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from shared.metrics import get_metrics
+from shared.tracing import get_tracer, traced
+from shared.profiling import get_profiler
+
+from typing import List, Optional, Dict, Any, Set
+from contextlib import aclosing
+from datetime import datetime, timedelta
+import time
 
 class SyncInventoryUseCase:
     """CASO DE USO PRINCIPAL: Sincronizar inventario ERP -> Shopify"""
@@ -16,7 +27,11 @@ class SyncInventoryUseCase:
         inventory_repo: IInventoryLevelRepository,  # Dependencia inyectada
         sync_log_repo: ISyncLogRepository,          # Dependencia inyectada
         change_detector: IChangeDetector,           # Dependencia inyectada
-        shopify_updater: IShopifyUpdater            # Dependencia inyectada
+        shopify_updater: IShopifyUpdater,           # Dependencia inyectada
+        sync_journal: Optional[ISyncJournalRepository] = None,  # Journal para reanudar ejecuciones interrumpidas
+        resume_max_attempts: int = 3,
+        resume_max_age: timedelta = timedelta(hours=24),
+        location_shard: Optional[LocationShardCoordinator] = None  # Modo por ubicaciones (varios workers)
     ):
         # PRINCIPIO DE INVERSIÓN DE DEPENDENCIAS
         # El caso de uso depende de ABSTRACCIONES, no de implementaciones concretas
@@ -25,29 +40,137 @@ class SyncInventoryUseCase:
         self._sync_log_repo = sync_log_repo
         self._change_detector = change_detector
         self._shopify_updater = shopify_updater
+        self._sync_journal = sync_journal
+        self._resume_max_attempts = resume_max_attempts
+        self._resume_max_age = resume_max_age
+        self._location_shard = location_shard
+        # Ubicaciones de la ejecución anterior (si cambian, no se omiten particiones sin cambios)
+        self._previous_locations: Optional[Set[int]] = None
+        # Momento de la extracción ERP anterior (para acotar el lag ERP -> Shopify)
+        self._previous_snapshot_at: Optional[datetime] = None
+        # La ejecución anterior aplicó todo lo detectado (sin fallas ni pendientes)
+        self._last_run_clean = False
+        # Versión del cache al terminar la ejecución limpia anterior (webhooks u otros workers la cambian)
+        self._clean_cache_version: Optional[Any] = None
     
+    @traced("sync.run")
     async def execute(self) -> Dict[str, Any]:
         """Ejecuta el caso de uso completo"""
+        tracer = get_tracer()
         operation_start = datetime.now()
+        previous_snapshot_at = self._previous_snapshot_at
+        self._previous_snapshot_at = operation_start
+        sync_lag = {"sync_lag_seconds": 0.0, "sync_lag_upper_bound_seconds": 0.0}
+        run_id: Optional[int] = None
+        location_info: Dict[str, Any] = {}
+        last_run_clean = self._last_run_clean
+        self._last_run_clean = False
+
+        # Tiempo de pared por etapa (para benchmarks y diagnóstico)
+        stage_seconds: Dict[str, float] = {}
+        stage_started = time.perf_counter()
+
+        def lap(stage: str) -> None:
+            nonlocal stage_started
+            now = time.perf_counter()
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + (now - stage_started)
+            stage_started = now
+            get_profiler().mark_stage(stage)
         
         try:
-            # PASO 1: Extraer productos del ERP (12 segundos)
+            # Modo por ubicaciones: este worker solo sincroniza las ubicaciones con lease
+            owned_locations: Optional[Set[int]] = None
+            if self._location_shard is not None:
+                owned_locations = set(await self._location_shard.acquire())
+                location_info = {"worker": self._location_shard.owner, "locations": sorted(owned_locations)}
+                if owned_locations != self._previous_locations:
+                    last_run_clean = False
+                self._previous_locations = owned_locations
+                lap("acquire_locations")
+                if not owned_locations:
+                    print("ℹ️ Todas las ubicaciones tienen lease de otros workers, no hay nada que sincronizar")
+                    self._record_run_metrics("SUCCESS", stage_seconds)
+                    return self._build_result("SUCCESS", operation_start, stage_seconds, sync_lag, **location_info)
+                print(f"📍 {self._location_shard.owner} sincroniza las ubicaciones {sorted(owned_locations)}")
+
+            # El cache cambió desde la ejecución limpia anterior (un webhook registró una
+            # edición manual en Shopify, otro worker escribió): hay que detectar aunque el ERP no cambie
+            if last_run_clean:
+                cache_version = await self._inventory_repo.get_cache_version()
+                if cache_version is None or cache_version != self._clean_cache_version:
+                    last_run_clean = False
+                lap("cache_version")
+
+            # PASO 0: Reanudar una ejecución interrumpida (Shopify actualizado, cache no)
+            # Un fallo aquí no debe impedir la sincronización de hoy
+            with tracer.span("sync.resume") as span:
+                try:
+                    resumed = await self._resume_interrupted_run()
+                except Exception as e:
+                    span.record_exception(e)
+                    print(f"⚠️ No se pudo reanudar la ejecución interrumpida: {e}")
+                    resumed = {"resume_error": str(e)}
+            lap("resume")
+
+            # PASOS 1-3: Extraer el reporte del ERP por partición (almacén) y detectar cada una al llegar;
+            # el cache se carga mientras siguen en curso las demás particiones
             print("🔄 Extrayendo productos del ERP...")
-            erp_products = await self._erp_extractor.extract_products()
-            print(f"✅ Extraídos {len(erp_products)} productos del ERP")
+            # Una partición igual a la anterior no trae cambios si aquella ejecución dejó todo aplicado.
+            # Si quedaron fallas, pendientes o se reanudó una ejecución, se detecta igual para reintentarlos.
+            can_skip_unchanged = last_run_clean and not resumed
+            erp_products_count = 0
+            partitions_detected = 0
+            inventory_index = None
+            changes: List[InventoryChange] = []
+            with tracer.span("sync.extract_erp") as extract_span:
+                # Con sharding solo se piden las particiones de las ubicaciones de este worker
+                async with aclosing(self._erp_extractor.iter_product_partitions(locations=owned_locations)) as partitions:
+                    async for partition in partitions:
+                        erp_products_count += len(partition.products)
+                        lap("extract_erp")
+                        if can_skip_unchanged and partition.unchanged:
+                            continue
 
-            #print(erp_products)
-            
-            # # PASO 2: Obtener estado actual del inventario (PostgreSQL cache)
-            print("🔄 Obteniendo inventario actual desde PostgreSQL...")
-            current_inventory = await self._inventory_repo.get_current_inventory_levels()
-            print(f"✅ Inventario actual: {len(current_inventory)} registros")
-            
-            # # PASO 3: Detectar cambios (lógica de dominio)
-            print("🔄 Detectando cambios de inventario...")
-            changes = await self._change_detector.detect_inventory_changes(
-                erp_products, current_inventory
-            )
+                        if inventory_index is None:
+                            # # PASO 2: Obtener estado actual del inventario (PostgreSQL cache)
+                            print("🔄 Obteniendo inventario actual desde PostgreSQL...")
+                            with tracer.span("sync.load_cache") as span:
+                                current_inventory = await self._inventory_repo.get_current_inventory_levels()
+                                if owned_locations is not None:
+                                    # Sin nivel en el cache, las filas de otras ubicaciones no generan cambios
+                                    current_inventory = [level for level in current_inventory if level.id_location in owned_locations]
+                                span.set_attribute("cache.rows", len(current_inventory))
+                                inventory_index = self._change_detector.index_inventory(current_inventory)
+                            lap("load_cache")
+                            get_metrics().cache_rows_loaded.set(len(current_inventory))
+                            print(f"✅ Inventario actual: {len(current_inventory)} registros")
+
+                        # # PASO 3: Detectar cambios (lógica de dominio)
+                        with tracer.span("sync.detect_changes", **{"erp.partition": partition.partition or "all"}) as span:
+                            partition_changes = await self._change_detector.detect_partition_changes(
+                                partition.products, inventory_index, locations=owned_locations
+                            )
+                            span.set_attribute("changes.detected", len(partition_changes))
+                        changes.extend(partition_changes)
+                        partitions_detected += 1
+                        lap("detect_changes")
+                extract_span.set_attributes({"erp.products": erp_products_count, "erp.partitions_detected": partitions_detected})
+            print(f"✅ Extraídos {erp_products_count} productos del ERP")
+
+            if inventory_index is None:
+                print("ℹ️ El reporte del ERP no cambió desde la última ejecución, se omite la detección")
+                self._last_run_clean = True
+                self._record_run_metrics("SUCCESS", stage_seconds)
+                return self._build_result(
+                    "SUCCESS", operation_start, stage_seconds, sync_lag,
+                    erp_products_extracted=erp_products_count, erp_unchanged=True, **location_info
+                )
+
+            with tracer.span("sync.detect_changes") as span:
+                changes = self._change_detector.finalize_changes(changes)
+                span.set_attributes({"changes.detected": len(changes), "changes.critical": sum(1 for c in changes if c.priority <= 1)})
+            lap("detect_changes")
+            self._record_detected_changes(changes)
             print(f"✅ Detectados {len(changes)} cambios")
             
             # PASO 4: Filtrar cambios que valen la pena (reglas de negocio)
@@ -62,18 +185,33 @@ class SyncInventoryUseCase:
 
             
             #PASO 5: Actualizar Shopify (con rate limiting)
+            all_applied = True
             if to_create or to_update:
+                on_result = None
+                if self._sync_journal is not None:
+                    run_id = await self._sync_journal.start_run(to_update + to_create)
+                    on_result = self._journal_callback(run_id)
+
                 print("🔄 Actualizando inventario en Shopify...")
-                [sync_results_to_update, sync_update_db_to_update] = await self._shopify_updater.update_inventory_batch(to_update)
-                [sync_results_to_create, sync_update_db_to_create] = await self._shopify_updater.create_inventory_batch(to_create)
+                # Los críticos (stock-out/stock-in/creaciones) se envían primero sin importar su tipo
+                with tracer.span("sync.push_shopify", **{"batch.updates": len(to_update), "batch.creates": len(to_create)}):
+                    [sync_results_to_update, sync_update_db_to_update,
+                     sync_results_to_create, sync_update_db_to_create] = await self._shopify_updater.push_changes(to_update, to_create, on_result=on_result)
+                lap("push_shopify")
 
 
-                sync_db_results_to_update = await self._inventory_repo.update_inventory_level(sync_update_db_to_update)
-                sync_db_results_to_create = await self._inventory_repo.products_created_on_shopify(sync_update_db_to_create)
+                with tracer.span("sync.update_cache"):
+                    sync_db_results_to_update = await self._inventory_repo.update_inventory_level(sync_update_db_to_update)
+                    sync_db_results_to_create = await self._inventory_repo.products_created_on_shopify(sync_update_db_to_create)
+                    if run_id is not None:
+                        await self._sync_journal.mark_confirmed(run_id, sync_update_db_to_update + sync_update_db_to_create)
+                lap("update_cache")
                
                 # PASO 6: Guardar logs de sincronización
-                save_logs_to_update = await self._sync_log_repo.create_sync_logs(sync_results_to_update)
-                save_logs_to_create = await self._sync_log_repo.create_sync_logs(sync_results_to_create)
+                with tracer.span("sync.save_logs"):
+                    save_logs_to_update = await self._sync_log_repo.create_sync_logs(sync_results_to_update)
+                    save_logs_to_create = await self._sync_log_repo.create_sync_logs(sync_results_to_create)
+                lap("save_logs")
                 
                 successful_updates = [r for r in sync_results_to_update if r.was_successful()]
                 successful_creates = [r for r in sync_results_to_create if r.was_successful()]
@@ -82,9 +220,15 @@ class SyncInventoryUseCase:
                 #print(sync_db_results)
                 print(f"✅ Actualizaciones exitosas: {len(successful_updates)}/{len(sync_results_to_update)}")
                 print(f"✅ Creaciones exitosas: {len(successful_creates)}/{len(sync_results_to_create)}")
+
+                sync_lag = self._compute_sync_lag(successful_updates + successful_creates, operation_start, previous_snapshot_at)
+                all_applied = len(successful_updates) + len(successful_creates) == len(sync_results_to_update) + len(sync_results_to_create)
             else:
                 print("ℹ️ No hay cambios significativos para actualizar")
                 sync_results = []
+
+            if run_id is not None:
+                await self._sync_journal.finish_run(run_id)
             
             # # # Resultado final
             operation_time = (datetime.now() - operation_start).total_seconds()
@@ -97,17 +241,179 @@ class SyncInventoryUseCase:
             #     "successful_updates": len([r for r in sync_results if r.was_successful()])
             # }
 
-            return {
-                "status": "SUCCESS",
-                "operation_time_seconds": operation_time,
-                "erp_products_extracted": len(erp_products),
-                "changes_detected": len(changes),
-                "worthy_changes": len(changes)
-            }
+            time_to_shopify = self._shopify_updater.get_time_to_shopify_report()
+            self._last_run_clean = all_applied and not any(report.get("pending") for report in time_to_shopify.values())
+            if self._last_run_clean:
+                # Incluye las escrituras de esta ejecución al cache
+                self._clean_cache_version = await self._inventory_repo.get_cache_version()
+
+            self._record_run_metrics("SUCCESS", stage_seconds, sync_lag)
+            return self._build_result(
+                "SUCCESS", operation_start, stage_seconds, sync_lag,
+                operation_time_seconds=operation_time,
+                erp_products_extracted=erp_products_count,
+                changes_detected=len(changes),
+                worthy_changes=len(changes),
+                journal_run_id=run_id,
+                time_to_shopify=time_to_shopify,
+                **location_info,
+                **resumed
+            )
             
         except Exception as e:
-            return {
-                "status": "FAILED",
-                "error": str(e),
-                "operation_time_seconds": (datetime.now() - operation_start).total_seconds()
-            }
\ No newline at end of file
+            # El fallo se devuelve como resultado: marcar el span raíz a mano
+            tracer.current_span().record_exception(e)
+            self._record_run_metrics("FAILED", stage_seconds)
+            return self._build_result("FAILED", operation_start, stage_seconds, sync_lag, error=str(e), **location_info)
+
+    def _build_result(
+        self,
+        status: str,
+        operation_start: datetime,
+        stage_seconds: Dict[str, float],
+        sync_lag: Dict[str, float],
+        **fields: Any
+    ) -> Dict[str, Any]:
+        """
+        Resultado de execute con las mismas llaves en todos los caminos
+
+        Las salidas tempranas (sin ubicaciones, reporte sin cambios) y las
+        fallidas también traen el lag, el tiempo a Shopify y el presupuesto de
+        la API, así el daemon y los benchmarks no distinguen casos. fields
+        reemplaza los valores por defecto y agrega llaves propias del camino
+        (erp_unchanged, error, worker/locations, resumed_run_id, ...).
+        """
+        result: Dict[str, Any] = {
+            "status": status,
+            "operation_time_seconds": (datetime.now() - operation_start).total_seconds(),
+            "erp_products_extracted": 0,
+            "changes_detected": 0,
+            "worthy_changes": 0,
+            "journal_run_id": None,
+            "stage_seconds": stage_seconds,
+            **sync_lag
+        }
+        result.update(fields)
+        if "time_to_shopify" not in result:
+            result["time_to_shopify"] = self._shopify_updater.get_time_to_shopify_report()
+        result["shopify_api_budget"] = self._shopify_updater.get_api_budget()
+        return result
+
+    async def _resume_interrupted_run(self) -> Dict[str, Any]:
+        """
+        Aplica al cache lo que una ejecución interrumpida ya envió a Shopify
+
+        Los cambios PUSHED se aplican directo en PostgreSQL y las creaciones
+        que quedaron PENDING se reconcilian buscando el SKU (o el producto
+        huérfano que quedó sin SKU) en Shopify; así la detección posterior ya
+        no los vuelve a enviar. Las actualizaciones PENDING no requieren nada:
+        se vuelven a detectar y fijar una cantidad absoluta en Shopify es
+        idempotente.
+
+        Cada intento se cuenta en el journal antes de empezar. Si la ejecución
+        ya falló resume_max_attempts veces o es más vieja que resume_max_age
+        se marca ABANDONED y no se vuelve a intentar.
+        """
+        if self._sync_journal is None:
+            return {}
+
+        interrupted_run = await self._sync_journal.get_open_run()
+        if interrupted_run is None:
+            return {}
+
+        if interrupted_run.should_abandon(self._resume_max_attempts, self._resume_max_age, datetime.now()):
+            await self._sync_journal.finish_run(interrupted_run.run_id, "ABANDONED")
+            print(
+                f"⚠️ Ejecución interrumpida #{interrupted_run.run_id} abandonada "
+                f"({interrupted_run.resume_attempts} intentos, iniciada {interrupted_run.started_at:%Y-%m-%d %H:%M})"
+            )
+            return {"abandoned_run_id": interrupted_run.run_id}
+
+        await self._sync_journal.register_resume_attempt(interrupted_run.run_id)
+
+        print(f"♻️ Reanudando ejecución interrumpida #{interrupted_run.run_id} ({len(interrupted_run.changes)} cambios)")
+        pushed = [entry for entry in interrupted_run.changes if entry.is_pushed()]
+        updated = [entry.to_shopi_product() for entry in pushed if entry.sync_op == "UPDATE"]
+        created = [entry.to_shopi_product() for entry in pushed if entry.sync_op == "CREATE"]
+
+        for entry in interrupted_run.changes:
+            if entry.is_pending_create():
+                shopi_product = await self._shopify_updater.reconcile_pending_create(entry.to_inventory_change())
+                if shopi_product is not None:
+                    created.append(shopi_product)
+
+        await self._inventory_repo.update_inventory_level(updated)
+        await self._inventory_repo.products_created_on_shopify(created)
+        await self._sync_journal.mark_confirmed(interrupted_run.run_id, updated + created)
+        await self._sync_journal.finish_run(interrupted_run.run_id, "RECOVERED")
+
+        print(f"✅ Recuperados {len(updated)} actualizaciones y {len(created)} creaciones sin reenviar a Shopify")
+        return {
+            "resumed_run_id": interrupted_run.run_id,
+            "resumed_changes": len(updated) + len(created)
+        }
+
+    def close(self) -> None:
+        """Libera los recursos de las dependencias que los tengan (procesos del detector)"""
+        self._change_detector.close()
+
+    async def release_locations(self) -> None:
+        """Libera los leases de ubicaciones para que otro worker las tome (al detener el proceso)"""
+        if self._location_shard is not None:
+            await self._location_shard.release()
+
+    def _journal_callback(self, run_id: int):
+        """Registra en el journal el resultado de cada cambio conforme se envía"""
+        async def on_result(change: InventoryChange, sync_log: ProductSyncLog, shopi_product: Optional[ShopiProduct]) -> None:
+            if sync_log.was_successful() and shopi_product is not None:
+                await self._sync_journal.mark_pushed(run_id, change, shopi_product)
+            else:
+                await self._sync_journal.mark_failed(run_id, change)
+        return on_result
+
+    def _record_detected_changes(self, changes: List[InventoryChange]) -> None:
+        """Cambios detectados por prioridad (1 = crítico)"""
+        by_priority: Dict[str, int] = {}
+        for change in changes:
+            by_priority[str(change.priority)] = by_priority.get(str(change.priority), 0) + 1
+        metrics = get_metrics()
+        for priority, count in by_priority.items():
+            metrics.changes_detected.labels(priority).inc(count)
+
+    def _record_run_metrics(
+        self,
+        status: str,
+        stage_seconds: Dict[str, float],
+        sync_lag: Optional[Dict[str, float]] = None
+    ) -> None:
+        """Duración por etapa, resultado de la ejecución y lag ERP -> Shopify"""
+        metrics = get_metrics()
+        for stage, seconds in stage_seconds.items():
+            metrics.stage_seconds.labels(stage).observe(seconds)
+        metrics.runs.labels(status).inc()
+        if status == "SUCCESS":
+            metrics.last_success_timestamp.set_to_current_time()
+        if sync_lag:
+            metrics.lag_seconds.set(sync_lag["sync_lag_seconds"])
+            metrics.lag_upper_bound_seconds.set(sync_lag["sync_lag_upper_bound_seconds"])
+
+    def _compute_sync_lag(
+        self,
+        successful_logs: List[ProductSyncLog],
+        snapshot_at: datetime,
+        previous_snapshot_at: Optional[datetime]
+    ) -> Dict[str, float]:
+        """
+        Lag entre el movimiento en el ERP y su actualización en Shopify
+
+        El ERP no expone la hora del movimiento: sync_lag_seconds se mide desde
+        la extracción que lo detectó, y sync_lag_upper_bound_seconds desde la
+        extracción anterior (el movimiento ocurrió en algún punto entre ambas).
+        """
+        if not successful_logs:
+            return {"sync_lag_seconds": 0.0, "sync_lag_upper_bound_seconds": 0.0}
+
+        last_synced_at = max(log.synced_at for log in successful_logs)
+        lag = (last_synced_at - snapshot_at).total_seconds()
+        upper_bound = (last_synced_at - (previous_snapshot_at or snapshot_at)).total_seconds()
+        return {"sync_lag_seconds": lag, "sync_lag_upper_bound_seconds": upper_bound}
\ No newline at end of file
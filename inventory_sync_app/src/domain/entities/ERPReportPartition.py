@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from domain.entities.KordataProduct import KordataProduct
+
+@dataclass
+class ERPReportPartition:
+    """Entidad que representa una parte del reporte del ERP (un almacén, o el reporte completo)"""
+    partition: Optional[str]  # valor del filtro del reporte (p. ej. almacenId); None = sin particionar
+    products: List[KordataProduct]
+    unchanged: bool = False  # mismo contenido que en la extracción anterior
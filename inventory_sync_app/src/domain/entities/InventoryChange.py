@@ -21,6 +21,7 @@ class InventoryChange:
     price_compare: float
     priority: int = 3  # 1=crítico, 2=alto, 3=normal
     estimated_cost: Decimal = Decimal('0.01')
+    detected_at: datetime = field(default_factory=datetime.now)  # Para medir tiempo hasta Shopify
     
     
     def get_quantity_delta(self) -> int:
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+@dataclass
+class ShopifyInventoryEvent:
+    """Entidad que representa un webhook inventory_levels/update de Shopify"""
+    inventory_item_gid: str
+    location_gid: str
+    available: int
+    updated_at: datetime
+    inventory_level_gid: Optional[str] = None
+
+    def key(self) -> str:
+        """Identidad del nivel de inventario (para coalescer eventos)"""
+        return f"{self.inventory_item_gid}|{self.location_gid}"
+
+    def is_newer_than(self, other: "ShopifyInventoryEvent") -> bool:
+        """Regla de negocio: ¿Este evento reemplaza al anterior?"""
+        return self.updated_at >= other.updated_at
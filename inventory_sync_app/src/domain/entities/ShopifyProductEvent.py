@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+@dataclass
+class ShopifyProductEvent:
+    """Entidad que representa una variante recibida en un webhook products/create de Shopify"""
+    pos_sku: str
+    title: str
+    price: float
+    shopify_product_gid: str
+    shopify_variant_gid: str
+    shopify_inventory_item_gid: str
+    updated_at: datetime
+    # El producto trae el tag pos-sku:<sku> (lo creó la sincronización)
+    pos_sku_tagged: bool = False
+
+    def is_newer_than(self, other: "ShopifyProductEvent") -> bool:
+        """Regla de negocio: ¿Este evento reemplaza al anterior?"""
+        return self.updated_at >= other.updated_at
@@ -0,0 +1,22 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+from domain.entities.SyncRunChange import SyncRunChange
+
+@dataclass
+class SyncRun:
+    """Entidad que representa una ejecución registrada en el journal (tabla sync_run)"""
+    run_id: int
+    status: str  # RUNNING -> COMPLETED | RECOVERED | ABANDONED
+    started_at: datetime
+    changes: List[SyncRunChange] = field(default_factory=list)
+    resume_attempts: int = 0  # Reanudaciones intentadas (la actual no cuenta)
+
+    def is_open(self) -> bool:
+        """Regla de negocio: La ejecución se interrumpió antes de terminar"""
+        return self.status == "RUNNING"
+
+    def should_abandon(self, max_attempts: int, max_age: timedelta, now: datetime) -> bool:
+        """Regla de negocio: Reanudar falló demasiadas veces o el journal es demasiado viejo"""
+        return self.resume_attempts >= max_attempts or now - self.started_at > max_age
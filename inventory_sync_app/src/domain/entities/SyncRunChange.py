@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from domain.entities.InventoryChange import InventoryChange
+from domain.entities.ShopiProduct import ShopiProduct
+
+
+@dataclass
+class SyncRunChange:
+    """Entidad que representa un cambio dentro del journal de una ejecución (tabla sync_run_change)"""
+    run_id: int
+    pos_sku: str
+    id_location: int
+    sync_op: str
+    new_quantity: int
+    shopify_location_gid: Optional[str] = None
+    status: str = "PENDING"  # PENDING -> PUSHED -> CONFIRMED | FAILED
+    shopify_product_gid: Optional[str] = None
+    shopify_variant_gid: Optional[str] = None
+    shopify_inventory_item_gid: Optional[str] = None
+    shopify_inventory_level_gid: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    def to_inventory_change(self) -> InventoryChange:
+        """Reconstruye el cambio (lo necesario para reconciliar con Shopify)"""
+        return InventoryChange(
+            sku=self.pos_sku,
+            id_location=self.id_location,
+            shopify_location_gid=self.shopify_location_gid or "",
+            old_quantity=0,
+            new_quantity=self.new_quantity,
+            shopify_inventory_item=self.shopify_inventory_item_gid or "",
+            sync_op=self.sync_op,
+            title=self.pos_sku,
+            price=0.0,
+            price_compare=0.0
+        )
+
+    def is_pushed(self) -> bool:
+        """Regla de negocio: Shopify ya aplicó el cambio pero el cache no"""
+        return self.status == "PUSHED"
+
+    def is_pending_create(self) -> bool:
+        """Regla de negocio: Creación interrumpida (pudo quedar a medias en Shopify)"""
+        return self.status == "PENDING" and self.sync_op == "CREATE"
+
+    def to_shopi_product(self) -> ShopiProduct:
+        """Datos necesarios para aplicar el cambio en el cache"""
+        return ShopiProduct(
+            pos_sku=self.pos_sku,
+            id_location=self.id_location,
+            new_quantity=self.new_quantity,
+            shopify_product_gid=self.shopify_product_gid or "",
+            shopify_variant_gid=self.shopify_variant_gid or "",
+            shopify_inventory_item_gid=self.shopify_inventory_item_gid or "",
+            shopify_inventory_level_gid=self.shopify_inventory_level_gid or ""
+        )
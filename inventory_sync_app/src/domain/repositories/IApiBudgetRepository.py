@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+class IApiBudgetRepository(ABC):
+    """Contrato para el bucket de costo de Shopify compartido entre workers"""
+    @abstractmethod
+    async def try_acquire(
+        self,
+        bucket: str,
+        cost: float,
+        amount: float,
+        capacity: float,
+        restore_rate: float,
+        observed_available: float
+    ) -> float:
+        pass
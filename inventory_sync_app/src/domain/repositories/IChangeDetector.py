@@ -2,7 +2,7 @@ from domain.entities.KordataProduct import KordataProduct
 from domain.entities.CacheInventoryLevel import CacheInventoryLevel
 from domain.entities.InventoryChange import InventoryChange
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 from abc import ABC, abstractmethod
 
 class IChangeDetector(ABC):
@@ -13,4 +13,31 @@ class IChangeDetector(ABC):
         erp_products: List[KordataProduct],
         current_inventory: List[CacheInventoryLevel]
     ) -> List[InventoryChange]:
-        pass
\ No newline at end of file
+        pass
+
+    def index_inventory(self, current_inventory: List[CacheInventoryLevel]) -> Any:
+        """Prepara el cache una sola vez para detectar varias particiones del reporte"""
+        return current_inventory
+
+    async def detect_partition_changes(
+        self,
+        erp_products: List[KordataProduct],
+        inventory_index: Any,
+        locations: Optional[Set[int]] = None
+    ) -> List[InventoryChange]:
+        """
+        Cambios de una partición del reporte (por defecto, la detección completa)
+
+        Con locations (las ubicaciones de este worker) las filas del ERP de
+        otras ubicaciones se descartan antes de detectar: no son cambios de
+        este worker ni filas sin cache.
+        """
+        return await self.detect_inventory_changes(erp_products, inventory_index)
+
+    def finalize_changes(self, changes: List[InventoryChange]) -> List[InventoryChange]:
+        """Une el resultado de las particiones: críticos primero"""
+        return sorted(changes, key=lambda change: change.priority)
+
+    def close(self) -> None:
+        """Libera los recursos del detector (procesos, etc.)"""
+        pass
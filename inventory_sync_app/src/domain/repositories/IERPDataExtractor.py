@@ -1,6 +1,7 @@
 from domain.entities.KordataProduct import KordataProduct
+from domain.entities.ERPReportPartition import ERPReportPartition
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Set
 from abc import ABC, abstractmethod
 
 class IERPDataExtractor(ABC):
@@ -11,4 +12,18 @@ class IERPDataExtractor(ABC):
     
     @abstractmethod
     async def get_extraction_metadata(self) -> Dict[str, Any]:
-        pass
\ No newline at end of file
+        pass
+
+    def last_extraction_unchanged(self) -> bool:
+        """True si la última extracción trajo el mismo reporte que la anterior (nada que detectar)"""
+        return False
+
+    async def iter_product_partitions(self, locations: Optional[Set[int]] = None) -> AsyncIterator[ERPReportPartition]:
+        """
+        Partes del reporte conforme llegan (por defecto, el reporte completo en una sola parte)
+
+        locations son las ubicaciones de este worker: un extractor que sabe a
+        qué ubicación corresponde cada partición puede omitir las demás.
+        """
+        products = await self.extract_products()
+        yield ERPReportPartition(partition=None, products=products, unchanged=self.last_extraction_unchanged())
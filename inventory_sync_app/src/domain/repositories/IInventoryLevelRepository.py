@@ -1,5 +1,7 @@
 from domain.entities.CacheInventoryLevel import CacheInventoryLevel
 from domain.entities.ShopiProduct import ShopiProduct
+from domain.entities.ShopifyInventoryEvent import ShopifyInventoryEvent
+from domain.entities.ShopifyProductEvent import ShopifyProductEvent
 
 from typing import List, Optional, Dict, Any
 from abc import ABC, abstractmethod
@@ -16,4 +18,16 @@ class IInventoryLevelRepository(ABC):
 
     @abstractmethod
     async def update_inventory_level(self, inventory: CacheInventoryLevel) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def apply_shopify_inventory_events(self, events: List[ShopifyInventoryEvent]) -> int:
+        pass
+
+    @abstractmethod
+    async def apply_shopify_product_events(self, events: List[ShopifyProductEvent]) -> int:
+        pass
+
+    async def get_cache_version(self) -> Optional[Any]:
+        """Valor que cambia con cualquier escritura al cache; None si el repositorio no puede saberlo"""
+        return None
@@ -0,0 +1,16 @@
+from typing import List
+from abc import ABC, abstractmethod
+
+class ILocationLeaseRepository(ABC):
+    """Contrato para repartir ubicaciones entre workers (leases con vencimiento)"""
+    @abstractmethod
+    async def get_location_ids(self) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def acquire_locations(self, owner: str, candidates: List[int], max_locations: int, ttl_seconds: float) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def release_locations(self, owner: str) -> None:
+        pass
@@ -2,23 +2,65 @@ from domain.entities.InventoryChange import InventoryChange
 from domain.entities.ProductSyncLog import ProductSyncLog
 from domain.entities.ShopiProduct import ShopiProduct
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
 from abc import ABC, abstractmethod
 
+# Callback por cambio enviado (journal de la ejecución)
+PushResultCallback = Callable[[InventoryChange, ProductSyncLog, Optional[ShopiProduct]], Awaitable[None]]
+
 class IShopifyUpdater(ABC):
     """Contrato para actualizar Shopify"""
     @abstractmethod
     async def update_inventory_batch(self, changes: List[InventoryChange]) -> List[ProductSyncLog]:
         pass
-    
+
     @abstractmethod
     async def create_inventory_batch(self, changes: List[InventoryChange]) -> List[ShopiProduct]:
         pass
 
+    @abstractmethod
+    async def push_change(self, change: InventoryChange) -> Tuple[ProductSyncLog, Optional[ShopiProduct]]:
+        pass
+
+    async def push_changes(
+        self,
+        to_update: List[InventoryChange],
+        to_create: List[InventoryChange],
+        on_result: Optional[PushResultCallback] = None
+    ) -> List[List[Any]]:
+        """Envía actualizaciones y creaciones; por defecto primero actualizaciones y luego creaciones"""
+        if on_result is None:
+            [update_logs, updated] = await self.update_inventory_batch(to_update)
+            [create_logs, created] = await self.create_inventory_batch(to_create)
+            return [update_logs, updated, create_logs, created]
+
+        # Con callback se envía cambio por cambio para registrar cada resultado
+        results = [[], [], [], []]
+        for change in to_update + to_create:
+            sync_log, shopi_product = await self.push_change(change)
+            await on_result(change, sync_log, shopi_product)
+            logs, products = (results[2], results[3]) if change.sync_op == "CREATE" else (results[0], results[1])
+            logs.append(sync_log)
+            if shopi_product is not None:
+                products.append(shopi_product)
+        return results
+
+    async def reconcile_pending_create(self, change: InventoryChange) -> Optional[ShopiProduct]:
+        """Completa una creación interrumpida (None si no hay nada que reconciliar)"""
+        return None
+
+    def get_time_to_shopify_report(self) -> Dict[str, Dict[str, float]]:
+        """Tiempo desde la detección hasta Shopify por clase de prioridad (si se mide)"""
+        return {}
+
+    @abstractmethod
+    def get_api_budget(self) -> Dict[str, float]:
+        pass
+
     @abstractmethod
     async def _update_single_inventory(self, change: InventoryChange) -> bool:
         pass
 
     @abstractmethod
     async def _create_single_inventory(self, change: InventoryChange) -> bool:
-        pass
\ No newline at end of file
+        pass
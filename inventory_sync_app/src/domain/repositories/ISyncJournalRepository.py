@@ -0,0 +1,36 @@
+from domain.entities.InventoryChange import InventoryChange
+from domain.entities.ShopiProduct import ShopiProduct
+from domain.entities.SyncRun import SyncRun
+
+from typing import List, Optional
+from abc import ABC, abstractmethod
+
+class ISyncJournalRepository(ABC):
+    """Contrato para el journal de ejecuciones (checkpoint/resume)"""
+    @abstractmethod
+    async def get_open_run(self) -> Optional[SyncRun]:
+        pass
+
+    @abstractmethod
+    async def start_run(self, changes: List[InventoryChange]) -> int:
+        pass
+
+    @abstractmethod
+    async def register_resume_attempt(self, run_id: int) -> int:
+        pass
+
+    @abstractmethod
+    async def mark_pushed(self, run_id: int, change: InventoryChange, shopi_product: ShopiProduct) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_failed(self, run_id: int, change: InventoryChange) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_confirmed(self, run_id: int, shopi_products: List[ShopiProduct]) -> None:
+        pass
+
+    @abstractmethod
+    async def finish_run(self, run_id: int, status: str = "COMPLETED") -> None:
+        pass
@@ -1,8 +1,13 @@
 from domain.entities.ProductSyncLog import ProductSyncLog
+from typing import Dict
 from abc import ABC, abstractmethod
 
 class ISyncLogRepository(ABC):
     """Contrato para manejar logs de sincronización"""
     @abstractmethod
     async def create_sync_logs(self, sync_log: ProductSyncLog) -> int:
-        pass
\ No newline at end of file
+        pass
+
+    async def maintain_partitions(self, months_ahead: int, retention_months: int) -> Dict[str, int]:
+        """Prepara los periodos siguientes del log y descarta los vencidos (sin particiones no hay nada que hacer)"""
+        return {"created": 0, "dropped": 0}
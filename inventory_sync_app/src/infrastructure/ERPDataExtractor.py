@@ -1,22 +1,113 @@
 from domain.repositories.IERPDataExtractor import IERPDataExtractor
 
 from domain.entities.KordataProduct import KordataProduct
+from domain.entities.ERPReportPartition import ERPReportPartition
 
-from typing import List, Optional, Dict, Any
+from infrastructure.ERPRowDecoder import ERPRowDecoder
+
+from shared.metrics import get_metrics
+from shared.serialization import dumps
+from shared.tracing import get_tracer, traced, KIND_CLIENT
+from shared.exceptions import RetryableError, ERPUnavailableError, ERPRequestError
+from shared.resilience import UpstreamGuard, CircuitBreaker, AdaptiveConcurrencyLimiter
+
+from typing import List, Optional, Dict, Any, AsyncIterator, Set
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 
 import aiohttp
 import asyncio
+import hashlib
+import importlib.util
+
+# Lo que cuenta como falla del ERP para el circuito y el limitador AIMD
+ERP_FAILURE_TYPES = (RetryableError, aiohttp.ClientError, asyncio.TimeoutError)
+
+# Tiempo máximo para establecer la conexión (el total lo define `timeout`)
+ERP_CONNECT_TIMEOUT_SECONDS = 30.0
+
+# aiohttp solo descomprime brotli si está instalado el paquete Brotli
+ACCEPT_ENCODING = "gzip, deflate, br" if importlib.util.find_spec("brotli") else "gzip, deflate"
+
+# Parámetros del reporte 1144 (inventarios) en el orden en que los pide el ERP
+REPORT_ID = 1144
+REPORT_PARAMETERS = {
+    "productoId": "null",
+    "modelo": "null",
+    "categoriaId": "null",
+    "almacenId": "null",
+    "proveedorId": "null",
+    "marcaId": "null",
+    "tipoProductoId": "null",
+    "existenciaMenorCero": "false",
+    "existenciaMayorCero": "false"
+}
+
+
+def build_report_query(filters: Optional[Dict[str, str]] = None) -> str:
+    """Query GraphQL del reporte de inventarios (filters reemplaza parámetros, p. ej. almacenId)"""
+    values = {**REPORT_PARAMETERS, **(filters or {})}
+    parameters = ", ".join(f'{{clave: "{key}", valor: "{value}"}}' for key, value in values.items())
+    return f"query reporteInventarios {{ BasesReportesGenerarReportePorId(data: {{id: {REPORT_ID}}} valoresParametros: [{parameters}]) {{ resultadoReporteHashmap }} }}"
+
+
+@dataclass
+class _ReportState:
+    """Último reporte recibido de una partición: validadores HTTP, hash y productos ya construidos"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    products: Optional[List[KordataProduct]] = None
 
 class ERPDataExtractor(IERPDataExtractor):
     """IMPLEMENTACIÓN CONCRETA: Extrae datos de tu endpoint ERP"""
     
-    def __init__(self, endpoint_url: str, bearer_token: str, timeout: int = 20000):
+    def __init__(
+        self,
+        endpoint_url: str,
+        bearer_token: str,
+        timeout: float = 300.0,
+        session: Optional[aiohttp.ClientSession] = None,
+        guard: Optional[UpstreamGuard] = None,
+        partition_key: str = "almacenId",
+        partition_values: Optional[List[str]] = None,
+        partition_locations: Optional[Dict[str, int]] = None,
+        max_concurrency: int = 4
+    ):
         self._endpoint_url = endpoint_url
         self._timeout = timeout
         self._last_extraction_time = 0.0
         self._bearer_token = bearer_token
+        self._session = session  # Sesión compartida (modo daemon)
+        # Sin valores de partición se pide el reporte completo en un solo request
+        self._partition_key = partition_key
+        self._partition_values: List[Optional[str]] = list(partition_values) if partition_values else [None]
+        # id_location de cada valor de partición (para pedir solo las de las ubicaciones del worker)
+        self._partition_locations: Dict[str, int] = dict(partition_locations or {})
+        self._reports: Dict[Optional[str], _ReportState] = {}
+        self._last_unchanged = False
+        self._stats = {"requests": 0, "not_modified": 0, "unchanged": 0, "transfer_bytes": 0, "body_bytes": 0, "rows_rejected": 0}
+        self._decoder = ERPRowDecoder()
+        # Hasta max_concurrency particiones a la vez; el circuito evita martillar un ERP caído
+        self._guard = guard or UpstreamGuard(
+            "erp",
+            breaker=CircuitBreaker("erp", failure_threshold=3, reset_timeout_seconds=120.0),
+            limiter=AdaptiveConcurrencyLimiter(
+                initial_limit=max_concurrency, max_limit=max_concurrency, latency_target_seconds=timeout
+            ),
+            failure_types=ERP_FAILURE_TYPES
+        )
+
+    @asynccontextmanager
+    async def _get_session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Reutiliza la sesión HTTP compartida o abre una temporal"""
+        if self._session is not None and not self._session.closed:
+            yield self._session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
 
     # 1. PROBLEMA: int('') falla
     # SOLUCIÓN: Función helper para conversión segura
@@ -44,69 +135,175 @@ class ERPDataExtractor(IERPDataExtractor):
             return ''
         return str(value).strip()
     
+    def _build_product(self, item: Dict[str, Any]) -> KordataProduct:
+        """Convierte una fila del reporte en entidad de dominio (ruta por fila; el reporte usa ERPRowDecoder)"""
+        return KordataProduct(
+            id=self.safe_int(item.get('id')),
+            sku=item.get('SKU'),
+            modelo=self.safe_str(item.get('Modelo')),
+            talla=self.safe_str(item.get('Talla')),
+            color=self.safe_str(item.get('Color')),
+            nombre=self.safe_str(item.get('Nombre')),
+            categoria=self.safe_str(item.get('Categoría')),
+            proveedor=self.safe_str(item.get('Proveedor')),
+            marca=self.safe_str(item.get('Marca')),
+            almacen=self.safe_str(item.get('Almacén')),
+            costo=self.safe_float(item.get('Costo')),
+            precio_venta=self.safe_float(item.get('Precio venta')),
+            existencia=self.safe_float(item.get('Existencia')),
+            reservado=self.safe_float(item.get('Reservado')),
+            disponible=self.safe_float(item.get('Disponible'))
+        )
+    
+    @traced("erp.extract_products", kind=KIND_CLIENT)
     async def extract_products(self) -> List[KordataProduct]:
-        """Implementación real: llama a tu endpoint ERP"""
+        """Implementación real: llama a tu endpoint ERP (todas las particiones, unidas)"""
+        partitions = [partition async for partition in self.iter_product_partitions()]
+        if len(partitions) == 1:
+            return partitions[0].products
+        return [product for partition in partitions for product in partition.products]
+
+    def _partitions_for(self, locations: Optional[Set[int]]) -> List[Optional[str]]:
+        """Valores de partición a pedir: sin ubicaciones (o sin mapeo conocido) se piden todas"""
+        if locations is None:
+            return self._partition_values
+        return [
+            value for value in self._partition_values
+            if value not in self._partition_locations or self._partition_locations[value] in locations
+        ]
+
+    async def iter_product_partitions(self, locations: Optional[Set[int]] = None) -> AsyncIterator[ERPReportPartition]:
+        """
+        Pide el reporte de cada partición en paralelo y las entrega conforme terminan
+
+        Con partition_values (p. ej. los almacenId del ERP) hay un request por
+        valor, limitados por el limitador del guard; una partición lenta no
+        retrasa la entrega de las demás. Si alguna falla se cancelan las que
+        siguen en curso y se propaga el error.
+
+        Con locations (sharding por ubicación) solo se piden las particiones
+        mapeadas a esas ubicaciones en partition_locations; las que no tienen
+        mapeo se piden siempre.
+        """
         start_time = datetime.now()
+        self._last_unchanged = False
+        tasks = [asyncio.create_task(self._fetch_partition(value)) for value in self._partitions_for(locations)]
+        all_unchanged = True
+        rows = 0
+        try:
+            for next_partition in asyncio.as_completed(tasks):
+                partition = await next_partition
+                all_unchanged = all_unchanged and partition.unchanged
+                rows += len(partition.products)
+                yield partition
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Esperar a que terminen de cancelarse: que no queden requests ni excepciones sin recoger
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-        payload = { "query": "query reporteInventarios { BasesReportesGenerarReportePorId(data: {id: 1144} valoresParametros: [{clave: \"productoId\", valor: \"null\"}, {clave: \"modelo\", valor: \"null\"}, {clave: \"categoriaId\", valor: \"null\"}, {clave: \"almacenId\", valor: \"null\"}, {clave: \"proveedorId\", valor: \"null\"}, {clave: \"marcaId\", valor: \"null\"}, {clave: \"tipoProductoId\", valor: \"null\"}, {clave: \"existenciaMenorCero\", valor: \"false\"}, {clave: \"existenciaMayorCero\", valor: \"false\"}]) { resultadoReporteHashmap } }" }
+        self._last_unchanged = all_unchanged
+        self._last_extraction_time = (datetime.now() - start_time).total_seconds()
+        metrics = get_metrics()
+        metrics.erp_extraction_seconds.observe(self._last_extraction_time)
+        metrics.erp_rows_extracted.set(rows)
+
+    @traced("erp.fetch_report", kind=KIND_CLIENT)
+    async def _fetch_partition(self, value: Optional[str]) -> ERPReportPartition:
+        """
+        Descarga el reporte de una partición (None = reporte completo)
+
+        Pide la respuesta comprimida y, si ya hay un reporte anterior de la
+        partición, la condiciona con If-None-Match / If-Modified-Since. Si el
+        ERP responde 304, o el cuerpo tiene el mismo hash que el anterior, no
+        se parsea: se devuelven los productos anteriores marcados unchanged.
+        El estado vive en memoria (sirve en modo daemon).
+        """
+        state = self._reports.setdefault(value, _ReportState())
+        filters = {self._partition_key: value} if value is not None else None
+        payload = {"query": build_report_query(filters)}
 
         headers = {
             'Content-Type': 'application/json',
             'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Authorization': f"Bearer {self._bearer_token}"
         }
+        if state.products is not None:
+            if state.etag:
+                headers['If-None-Match'] = state.etag
+            if state.last_modified:
+                headers['If-Modified-Since'] = state.last_modified
         
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(self._timeout)) as session:
-            async with session.post(self._endpoint_url, json=payload, headers=headers) as response:
-                if response.status != 200:
-                    raise Exception(f"ERP endpoint failed: {response.status} - {response.reason}")
-                
-                data = await response.json()
-                
-                products = data['data']['BasesReportesGenerarReportePorId']['resultadoReporteHashmap']
-                # Convertir JSON del ERP a entidades de dominio
-                erp_products = []
-                
-                for index, item in enumerate(products):  # Tu JSON tiene esta estructura
-
-                    # new_existencia = float(item["Existencia"])
-
-                    if index >= 1:
-
-                        print(item)
-
-                        try:
-                            erp_product = KordataProduct(
-                                    id=self.safe_int(item.get('id')),
-                                    sku=item.get('SKU'),
-                                    modelo=self.safe_str(item.get('Modelo')),
-                                    talla=self.safe_str(item.get('Talla')),
-                                    color=self.safe_str(item.get('Color')),
-                                    nombre=self.safe_str(item.get('Nombre')),
-                                    categoria=self.safe_str(item.get('Categoría')),
-                                    proveedor=self.safe_str(item.get('Proveedor')),
-                                    marca=self.safe_str(item.get('Marca')),
-                                    almacen=self.safe_str(item.get('Almacén')),
-                                    costo=self.safe_float(item.get('Costo')),
-                                    precio_venta=self.safe_float(item.get('Precio venta')),
-                                    existencia=self.safe_float(item.get('Existencia')),
-                                    reservado=self.safe_float(item.get('Reservado')),
-                                    disponible=self.safe_float(item.get('Disponible'))
-                                )
-                        
-                            # Solo agregar productos válidos (regla de negocio)
-                            erp_products.append(erp_product)
-
-                        except Exception as e:
-                            print(f"Error creando KordataProduct: {e}")
-                            print(f"Item problemático: {item}")
-                            continue  # o manejar según tu lógica
-                
-                self._last_extraction_time = (datetime.now() - start_time).total_seconds()
-                return erp_products
+        timeout = aiohttp.ClientTimeout(total=self._timeout, sock_connect=ERP_CONNECT_TIMEOUT_SECONDS)
+        try:
+            async with self._guard.slot(), self._get_session() as session:
+                async with session.post(self._endpoint_url, data=dumps(payload), headers=headers, timeout=timeout) as response:
+                    if response.status == 429 or response.status >= 500:
+                        raise ERPUnavailableError(f"ERP endpoint failed: {response.status} - {response.reason}")
+                    not_modified = response.status == 304 and state.products is not None
+                    if response.status != 200 and not not_modified:
+                        raise ERPRequestError(f"ERP endpoint failed: {response.status} - {response.reason}")
+
+                    body = b"" if not_modified else await response.read()
+                    # Con Content-Length se conoce lo que viajó comprimido; en chunked no
+                    transfer_bytes = response.content_length or 0
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ERPUnavailableError(f"ERP transport error: {type(e).__name__}: {e}") from e
+
+        metrics = get_metrics()
+        metrics.erp_extraction_bytes.inc(len(body))
+        metrics.erp_transfer_bytes.inc(transfer_bytes)
+        self._stats["requests"] += 1
+        self._stats["transfer_bytes"] += transfer_bytes
+        self._stats["body_bytes"] += len(body)
+        state.etag = etag or (state.etag if not_modified else None)
+        state.last_modified = last_modified or (state.last_modified if not_modified else None)
+
+        content_hash = None if not_modified else hashlib.blake2b(body, digest_size=16).hexdigest()
+        if not_modified or content_hash == state.content_hash:
+            result = "not_modified" if not_modified else "unchanged"
+            self._stats[result] += 1
+        else:
+            result = "changed"
+            state.products = self._parse_report(body, value)
+            state.content_hash = content_hash
+
+        metrics.erp_report_fetches.labels(result).inc()
+        get_tracer().current_span().set_attributes({
+            "erp.partition": value or "all",
+            "erp.bytes": len(body),
+            "erp.transfer_bytes": transfer_bytes,
+            "erp.report": result,
+            "erp.rows": len(state.products)
+        })
+        return ERPReportPartition(partition=value, products=state.products, unchanged=result != "changed")
+
+    def _parse_report(self, body: bytes, partition: Optional[str]) -> List[KordataProduct]:
+        """Convierte el reporte en entidades de dominio (una pasada; las filas inválidas se resumen)"""
+        products, summary = self._decoder.decode_payload(body)
+        if summary.rejected or summary.coerced:
+            get_metrics().erp_rows_rejected.inc(summary.rejected)
+            self._stats["rows_rejected"] += summary.rejected
+            print(f"⚠️ Reporte del ERP ({partition or 'completo'}): {summary.describe()}")
+            for index, sample in summary.samples:
+                print(f"   fila {index}: {sample}")
+        return products
+
+    def last_extraction_unchanged(self) -> bool:
+        """True si la última extracción devolvió el mismo reporte que la anterior"""
+        return self._last_unchanged
     
     async def get_extraction_metadata(self) -> Dict[str, Any]:
+        requests = self._stats["requests"]
+        hits = self._stats["not_modified"] + self._stats["unchanged"]
         return {
             "last_extraction_time": self._last_extraction_time,
-            "endpoint": self._endpoint_url
+            "endpoint": self._endpoint_url,
+            "partitions": len(self._partition_values),
+            "last_extraction_unchanged": self._last_unchanged,
+            "report_cache_hit_rate": hits / requests if requests else 0.0,
+            **self._stats
         }
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Decodificador por lotes de las filas del reporte de inventarios del ERP
+Ubicación: src/infrastructure/ERPRowDecoder.py
+
+La especificación de campos (ERP_ROW_FIELDS) se compila una sola vez en una
+función que recorre la página completa: cada conversión queda en línea (sin
+llamar a safe_int/safe_float/safe_str por campo) y con el mismo resultado
+que ellas. Las filas que no se pueden convertir se juntan en un resumen
+(DecodeSummary) en lugar de imprimirse una por una.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
+
+from domain.entities.KordataProduct import KordataProduct
+
+from shared.serialization import loads as json_loads
+
+# Tipos de conversión (mismas reglas que ERPDataExtractor.safe_*)
+INT = "int"      # None si no es entero
+FLOAT = "float"  # 0.0 si no es número
+STR = "str"      # '' si falta; sin espacios alrededor
+RAW = "raw"      # tal cual (el SKU)
+
+# Filas de ejemplo que guarda el resumen
+MAX_REJECT_SAMPLES = 5
+
+
+class ERPRowField(NamedTuple):
+    """Atributo de KordataProduct, llave en la fila del reporte y conversión"""
+    attribute: str
+    key: str
+    kind: str
+
+
+# En el orden de los campos de KordataProduct
+ERP_ROW_FIELDS: Tuple[ERPRowField, ...] = (
+    ERPRowField("id", "id", INT),
+    ERPRowField("sku", "SKU", RAW),
+    ERPRowField("modelo", "Modelo", STR),
+    ERPRowField("talla", "Talla", STR),
+    ERPRowField("color", "Color", STR),
+    ERPRowField("nombre", "Nombre", STR),
+    ERPRowField("categoria", "Categoría", STR),
+    ERPRowField("proveedor", "Proveedor", STR),
+    ERPRowField("marca", "Marca", STR),
+    ERPRowField("almacen", "Almacén", STR),
+    ERPRowField("costo", "Costo", FLOAT),
+    ERPRowField("precio_venta", "Precio venta", FLOAT),
+    ERPRowField("existencia", "Existencia", FLOAT),
+    ERPRowField("reservado", "Reservado", FLOAT),
+    ERPRowField("disponible", "Disponible", FLOAT)
+)
+
+# Valores que el ERP usa para "sin dato" (no cuentan como inválidos)
+_MISSING = (None, "", "None")
+
+
+@dataclass
+class DecodeSummary:
+    """Resultado de decodificar una página: filas rechazadas y valores inválidos por campo"""
+    rows: int = 0
+    rejected: int = 0
+    reasons: Counter = field(default_factory=Counter)
+    # Valores presentes que no se pudieron convertir (se usó el valor por defecto)
+    coerced: Counter = field(default_factory=Counter)
+    samples: List[Tuple[int, str]] = field(default_factory=list)
+
+    def reject(self, index: int, row: Any, error: Exception) -> None:
+        reason = type(error).__name__
+        self.rejected += 1
+        self.reasons[reason] += 1
+        if len(self.samples) < MAX_REJECT_SAMPLES:
+            self.samples.append((index, f"{reason}: {error} en {str(row)[:200]}"))
+
+    def merge(self, other: "DecodeSummary") -> None:
+        self.rows += other.rows
+        self.rejected += other.rejected
+        self.reasons.update(other.reasons)
+        self.coerced.update(other.coerced)
+        self.samples.extend(other.samples[:MAX_REJECT_SAMPLES - len(self.samples)])
+
+    def describe(self) -> str:
+        """Una línea para el log"""
+        parts = [f"{self.rejected}/{self.rows} filas rechazadas"]
+        if self.reasons:
+            parts.append(", ".join(f"{reason}={count}" for reason, count in self.reasons.most_common()))
+        if self.coerced:
+            parts.append("valores inválidos: " + ", ".join(f"{name}={count}" for name, count in self.coerced.most_common()))
+        return "; ".join(parts)
+
+
+def _conversion(kind: str, value: str, target: str, attribute: str) -> List[str]:
+    """Líneas de código que convierten `value` en `target` según el tipo del campo"""
+    if kind == RAW:
+        return [f"{target} = {value}"]
+    if kind == STR:
+        return [
+            f"if {value}.__class__ is str:",
+            f"    {target} = '' if {value} == 'None' else {value}.strip()",
+            f"else:",
+            f"    {target} = '' if {value} is None else str({value}).strip()"
+        ]
+    default = "None" if kind == INT else "0.0"
+    return [
+        f"try:",
+        f"    {target} = {kind}({value})",
+        f"except (ValueError, TypeError):",
+        f"    {target} = {default}",
+        f"    if {value} not in _MISSING:",
+        f"        _coerced[{attribute!r}] += 1"
+    ]
+
+
+def _compile(fields: Tuple[ERPRowField, ...], emit: str, name: str) -> Callable:
+    """
+    Genera la función de decodificación de una página
+
+    emit es la línea que recibe los valores ya convertidos (v0, v1, ...):
+    construir la entidad o agregarlos a las columnas.
+    """
+    body = [
+        f"def {name}(rows, start, summary, _new, _columns):",
+        "    _coerced = summary.coerced",
+        "    out = []",
+        "    _append = out.append",
+        "    index = start - 1",
+        "    for index, row in enumerate(rows, start):",
+        "        try:",
+        "            _get = row.get"
+    ]
+    for position, spec in enumerate(fields):
+        body.append(f"            raw = _get({spec.key!r})")
+        body.extend("            " + line for line in _conversion(spec.kind, "raw", f"v{position}", spec.attribute))
+    body.append("            " + emit)
+    body.extend([
+        "        except Exception as error:",
+        "            summary.reject(index, row, error)",
+        "    summary.rows += index - start + 1",
+        "    return out"
+    ])
+    namespace: Dict[str, Any] = {"_MISSING": _MISSING}
+    exec("\n".join(body), namespace)
+    return namespace[name]
+
+
+class ERPRowDecoder:
+    """Convierte páginas del reporte del ERP en KordataProduct o en columnas"""
+
+    def __init__(self, fields: Tuple[ERPRowField, ...] = ERP_ROW_FIELDS):
+        self.fields = fields
+        values = ", ".join(f"v{position}" for position in range(len(fields)))
+        self._decode_products = _compile(fields, f"_append(_new({values}))", "decode_products")
+        self._decode_columns = _compile(
+            fields,
+            "; ".join(f"_columns[{position}](v{position})" for position in range(len(fields))),
+            "decode_columns"
+        )
+
+    def decode_rows(self, rows: Iterable[Dict[str, Any]], start: int = 0) -> Tuple[List[KordataProduct], DecodeSummary]:
+        """
+        Filas del reporte -> KordataProduct
+
+        Args:
+            rows: Filas ya decodificadas del JSON (dict por fila)
+            start: Índice de la primera fila (para ubicar las rechazadas en el reporte)
+        """
+        summary = DecodeSummary()
+        products = self._decode_products(rows, start, summary, KordataProduct, None)
+        return products, summary
+
+    def decode_columns(self, rows: Iterable[Dict[str, Any]], start: int = 0) -> Tuple[Dict[str, List[Any]], DecodeSummary]:
+        """Filas del reporte -> una lista por atributo (la fila i está en la posición i de cada columna)"""
+        summary = DecodeSummary()
+        columns: List[List[Any]] = [[] for _ in self.fields]
+        # Los valores se agregan cuando la fila ya se convirtió completa: una rechazada no deja columnas disparejas
+        self._decode_columns(rows, start, summary, None, [column.append for column in columns])
+        return {spec.attribute: column for spec, column in zip(self.fields, columns)}, summary
+
+    def decode_payload(self, body: bytes, loads: Optional[Callable[[bytes], Any]] = None) -> Tuple[List[KordataProduct], DecodeSummary]:
+        """Cuerpo completo de la respuesta del ERP -> KordataProduct (la primera fila es el encabezado)"""
+        data = (loads or json_loads)(body)
+        rows = data['data']['BasesReportesGenerarReportePorId']['resultadoReporteHashmap']
+        return self.decode_rows(islice(rows, 1, None), start=1)
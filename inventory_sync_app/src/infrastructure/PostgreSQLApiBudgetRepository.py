@@ -0,0 +1,67 @@
+from domain.repositories.IApiBudgetRepository import IApiBudgetRepository
+from infrastructure.PostgreSQLBaseRepository import PostgreSQLBaseRepository
+
+from shared.tracing import traced, KIND_CLIENT
+
+class PostgreSQLApiBudgetRepository(PostgreSQLBaseRepository, IApiBudgetRepository):
+    """
+    IMPLEMENTACIÓN CONCRETA: Token bucket compartido en PostgreSQL (shopify_api_budget)
+
+    La fila del bucket se recarga a restore_rate por segundo según el reloj
+    de la base (el mismo para todos los hosts) y cada toma es un solo UPDATE
+    con la fila bloqueada, así dos workers no gastan los mismos puntos.
+    """
+
+    @traced(kind=KIND_CLIENT)
+    async def try_acquire(
+        self,
+        bucket: str,
+        cost: float,
+        amount: float,
+        capacity: float,
+        restore_rate: float,
+        observed_available: float
+    ) -> float:
+        """
+        Descuenta cost si el bucket tiene al menos amount puntos (cost + reserva)
+
+        observed_available es lo que reportó Shopify al worker: si es menor
+        (otra app gasta del mismo bucket) manda sobre la cuenta de la tabla.
+
+        Returns:
+            float: 0.0 si se descontó; si no, segundos estimados para alcanzar amount
+        """
+        async with self._connection() as conn:
+            for _ in range(2):
+                row = await conn.fetchrow("""
+                    WITH current AS (
+                        SELECT LEAST(
+                            $4::float8,
+                            $6::float8,
+                            available + restore_rate * EXTRACT(EPOCH FROM (clock_timestamp() - updated_at))
+                        ) AS refilled
+                        FROM shopify_api_budget
+                        WHERE bucket = $1
+                        FOR UPDATE
+                    )
+                    UPDATE shopify_api_budget AS b
+                    SET available = c.refilled - CASE WHEN c.refilled >= $3::float8 THEN $2::float8 ELSE 0 END,
+                        updated_at = clock_timestamp(),
+                        capacity = $4,
+                        restore_rate = $5::float8
+                    FROM current c
+                    WHERE b.bucket = $1
+                    RETURNING c.refilled >= $3::float8 AS granted, c.refilled;
+                """, bucket, cost, amount, capacity, restore_rate, observed_available)
+                if row is not None:
+                    break
+                # Primer uso del bucket: se crea lleno (Shopify corrige con su throttleStatus)
+                await conn.execute("""
+                    INSERT INTO shopify_api_budget (bucket, capacity, available, restore_rate)
+                    VALUES ($1, $2, $2, $3)
+                    ON CONFLICT (bucket) DO NOTHING;
+                """, bucket, capacity, restore_rate)
+
+        if row is None or row['granted'] or restore_rate <= 0:
+            return 0.0
+        return (amount - row['refilled']) / restore_rate
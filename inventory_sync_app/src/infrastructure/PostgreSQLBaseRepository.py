@@ -0,0 +1,48 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncpg
+
+from shared.metrics import get_metrics
+
+class PostgreSQLBaseRepository:
+    """BASE COMÚN: Manejo de conexiones PostgreSQL (pool compartido o conexión por llamada)"""
+
+    def __init__(self, connection_string: str, pool: Optional[asyncpg.Pool] = None):
+        self._connection_string = connection_string
+        # En modo daemon se inyecta un pool que vive entre ejecuciones;
+        # en modo one-shot se abre y cierra una conexión por operación
+        self._pool = pool
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[asyncpg.Connection]:
+        """Entrega una conexión del pool si existe, si no abre una temporal"""
+        if self._pool is not None:
+            async with self._pool.acquire() as conn:
+                async with self._instrumented(conn):
+                    yield conn
+        else:
+            conn = await asyncpg.connect(self._connection_string)
+            try:
+                async with self._instrumented(conn):
+                    yield conn
+            finally:
+                await conn.close()
+
+    @asynccontextmanager
+    async def _instrumented(self, conn: asyncpg.Connection) -> AsyncIterator[None]:
+        """Registra la latencia de cada sentencia mientras el repositorio usa la conexión"""
+        conn.add_query_logger(self._log_query)
+        try:
+            yield
+        finally:
+            conn.remove_query_logger(self._log_query)
+
+    def _log_query(self, record) -> None:
+        """Query logger de asyncpg: una observación por sentencia, etiquetada por verbo SQL"""
+        metrics = get_metrics()
+        words = record.query.split(None, 1)
+        statement = words[0].upper() if words else "UNKNOWN"
+        repository = type(self).__name__
+        metrics.db_statement_seconds.labels(repository, statement).observe(record.elapsed)
+        if record.exception is not None:
+            metrics.db_statement_errors.labels(repository, statement).inc()
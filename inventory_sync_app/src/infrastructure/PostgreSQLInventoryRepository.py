@@ -1,68 +1,192 @@
 from domain.repositories.IInventoryLevelRepository import IInventoryLevelRepository
+from infrastructure.PostgreSQLBaseRepository import PostgreSQLBaseRepository
 
 from domain.entities.CacheInventoryLevel import CacheInventoryLevel
 from domain.entities.ShopiProduct import ShopiProduct
 from domain.entities.InventoryChange import InventoryChange
+from domain.entities.ShopifyInventoryEvent import ShopifyInventoryEvent
+from domain.entities.ShopifyProductEvent import ShopifyProductEvent
+from shared.tracing import traced, KIND_CLIENT
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from shared.metrics import get_metrics
+
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
 import asyncpg
+import time
 
-class PostgreSQLInventoryRepository(IInventoryLevelRepository):
-    """IMPLEMENTACIÓN CONCRETA: PostgreSQL para inventario"""
-    
-    def __init__(self, connection_string: str):
-        self._connection_string = connection_string
+class PostgreSQLInventoryRepository(PostgreSQLBaseRepository, IInventoryLevelRepository):
+    """
+    IMPLEMENTACIÓN CONCRETA: PostgreSQL para inventario
+
+    Con incremental=True (modo daemon) los niveles se quedan en memoria entre
+    ejecuciones y cada lectura trae solo las filas de inventory_cache con
+    refreshed_at mayor a la marca de agua. La marca se toma del reloj de la
+    base (nunca del host) y cada lectura vuelve a pedir skew_margin_seconds
+    hacia atrás: cubre transacciones que escribieron con un clock_timestamp()
+    anterior pero confirmaron después de la lectura previa. Cada
+    full_resync_seconds se relee todo, lo que también quita los niveles
+    borrados (una baja no deja fila que leer).
+    """
+
+    # Lectura caliente: index-only scan sobre el índice que cubre inventory_cache
+    CACHE_TABLE_QUERY = """
+        SELECT inventory_level_id, pos_sku, id_location, shopify_inventory_level_gid,
+               quantities_available, updated_at, sync_op, shopify_location_gid,
+               shopify_inventory_item_gid, title, price, price_compare
+        FROM inventory_cache
+        ORDER BY pos_sku, id_location;
+    """
+
+    # Lectura incremental: índice sobre refreshed_at
+    CHANGED_SINCE_QUERY = """
+        SELECT inventory_level_id, pos_sku, id_location, shopify_inventory_level_gid,
+               quantities_available, updated_at, sync_op, shopify_location_gid,
+               shopify_inventory_item_gid, title, price, price_compare, refreshed_at
+        FROM inventory_cache
+        WHERE refreshed_at > $1;
+    """
+
+    # Versión del cache: última escritura (índice sobre refreshed_at)
+    CACHE_VERSION_QUERY = "SELECT max(refreshed_at) FROM inventory_cache;"
+
+    # Marca de agua antes de una lectura completa (lo que cambie durante la lectura se vuelve a pedir)
+    HIGH_WATER_MARK_QUERY = "SELECT COALESCE(max(refreshed_at), LOCALTIMESTAMP) FROM inventory_cache;"
+
+    # Misma forma desde las tablas base (bases sin la migración de inventory_cache)
+    JOIN_QUERY = """
+        SELECT 
+            sil.inventory_level_id, 
+            sil.pos_sku, 
+            sil.id_location,
+            sil.shopify_inventory_level_gid,
+            sil.quantities_available,
+            sil.updated_at,
+            sp.sync_op,
+            sl.shopify_location_gid,
+            sp.shopify_inventory_item_gid,
+            sp.title,
+            sp.price,
+            sp.price_compare
+        FROM shopify_inventory_level sil
+        JOIN shopify_product sp on sil.pos_sku = sp.pos_sku
+        JOIN shopify_location sl on sil.id_location = sl.id_location;
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        pool: Optional[asyncpg.Pool] = None,
+        incremental: bool = False,
+        skew_margin_seconds: float = 60.0,
+        full_resync_seconds: float = 3600.0
+    ):
+        super().__init__(connection_string, pool)
+        # Se apaga la primera vez que la base no tiene inventory_cache
+        self._cache_table_available = True
+
+        self._incremental = incremental
+        self._skew_margin = timedelta(seconds=skew_margin_seconds)
+        self._full_resync_seconds = full_resync_seconds
+        # Modo incremental: niveles en memoria por (pos_sku, id_location) y marca de agua (reloj de la base)
+        self._levels: Dict[Tuple[str, int], CacheInventoryLevel] = {}
+        self._high_water_mark: Optional[datetime] = None
+        self._last_full_read: Optional[float] = None
     
+    @traced(kind=KIND_CLIENT)
     async def get_current_inventory_levels(self) -> List[CacheInventoryLevel]:
-        """SELECT de tu tabla shopify_inventory_level"""
-        conn = await asyncpg.connect(self._connection_string)
+        """Niveles del cache con su producto y ubicación (tabla desnormalizada inventory_cache)"""
+        async with self._connection() as conn:
+            if self._high_water_mark is not None and not self._full_resync_due():
+                return await self._read_changed_levels(conn)
+
+            rows = None
+            high_water_mark = None
+            if self._cache_table_available:
+                try:
+                    if self._incremental:
+                        high_water_mark = await self._read_high_water_mark(conn)
+                    rows = await conn.fetch(self.CACHE_TABLE_QUERY)
+                except asyncpg.UndefinedTableError:
+                    print("⚠️ inventory_cache no existe (falta aplicar schemas_db.sql), se lee con el JOIN de las tablas base")
+                    self._cache_table_available = False
+                    high_water_mark = None
+            if rows is None:
+                rows = await conn.fetch(self.JOIN_QUERY)
+
+            levels = [self._to_cache_level(row) for row in rows]
+            get_metrics().cache_rows_fetched.labels(mode="full").inc(len(levels))
+            if high_water_mark is not None:
+                self._levels = {(level.pos_sku, level.id_location): level for level in levels}
+                self._high_water_mark = high_water_mark
+                self._last_full_read = time.monotonic()
+            return levels
+
+    @traced(kind=KIND_CLIENT)
+    async def get_cache_version(self) -> Optional[datetime]:
+        """
+        Hora de la última escritura a inventory_cache (sincronización, webhooks, otros workers)
+
+        None sin la migración de inventory_cache: no se puede saber si el
+        cache cambió.
+        """
+        if not self._cache_table_available:
+            return None
+        async with self._connection() as conn:
+            try:
+                return await conn.fetchval(self.CACHE_VERSION_QUERY)
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+                return None
+
+    def _full_resync_due(self) -> bool:
+        return (
+            self._last_full_read is None
+            or time.monotonic() - self._last_full_read >= self._full_resync_seconds
+        )
+
+    async def _read_high_water_mark(self, conn: Any) -> Optional[datetime]:
         try:
-            rows = await conn.fetch("""SELECT 
-                                            sil.inventory_level_id, 
-                                            sil.pos_sku, 
-                                            sil.id_location,
-                                            sil.shopify_inventory_level_gid,
-                                            sil.quantities_available,
-                                            sil.updated_at,
-                                            sp.sync_op,
-                                            sl.shopify_location_gid,
-                                            sp.shopify_inventory_item_gid,
-                                            sp.title,
-                                            sp.price,
-                                            sp.price_compare
-                                        FROM shopify_inventory_level sil
-                                        JOIN shopify_product sp on sil.pos_sku = sp.pos_sku
-                                        JOIN shopify_location sl on sil.id_location = sl.id_location; 
-                                        """)
-            inventory_levels = []
-            
-            for row in rows:
-                inventory_level = CacheInventoryLevel(
-                    inventory_level_id=row['inventory_level_id'],
-                    pos_sku=row['pos_sku'],
-                    shopify_inventory_level_gid=row['shopify_inventory_level_gid'],
-                    id_location=row['id_location'],
-                    quantities_available=row['quantities_available'],
-                    updated_at=row['updated_at'],  # Tu typo en la DB
-                    sync_op=row['sync_op'],
-                    shopify_location_gid=row['shopify_location_gid'],
-                    shopify_inventory_item_gid=row['shopify_inventory_item_gid'],
-                    price=row['price'],
-                    price_compare=row['price_compare'],
-                    title=row['title']
-                )
-                inventory_levels.append(inventory_level)
-                #print(f"Producto Cache: {inventory_level.pos_sku} - {inventory_level.id_location} - {inventory_level.shopify_location_gid}")
-            
-            return inventory_levels
-        finally:
-            await conn.close()
+            return await conn.fetchval(self.HIGH_WATER_MARK_QUERY)
+        except asyncpg.UndefinedColumnError:
+            # Base con la primera versión de inventory_cache: sin marca de agua, lecturas completas
+            print("⚠️ inventory_cache sin refreshed_at (falta aplicar schemas_db.sql), se lee completo en cada ejecución")
+            self._incremental = False
+            return None
+
+    async def _read_changed_levels(self, conn: Any) -> List[CacheInventoryLevel]:
+        """Aplica a los niveles en memoria las filas cambiadas desde la marca de agua (menos el margen)"""
+        rows = await conn.fetch(self.CHANGED_SINCE_QUERY, self._high_water_mark - self._skew_margin)
+        for row in rows:
+            level = self._to_cache_level(row)
+            self._levels[(level.pos_sku, level.id_location)] = level
+            if row['refreshed_at'] > self._high_water_mark:
+                self._high_water_mark = row['refreshed_at']
+
+        get_metrics().cache_rows_fetched.labels(mode="incremental").inc(len(rows))
+        return list(self._levels.values())
+    
+    @staticmethod
+    def _to_cache_level(row: Any) -> CacheInventoryLevel:
+        """Materializa una fila de shopify_inventory_level (con producto y ubicación)"""
+        return CacheInventoryLevel(
+            inventory_level_id=row['inventory_level_id'],
+            pos_sku=row['pos_sku'],
+            shopify_inventory_level_gid=row['shopify_inventory_level_gid'],
+            id_location=row['id_location'],
+            quantities_available=row['quantities_available'],
+            updated_at=row['updated_at'],  # Tu typo en la DB
+            sync_op=row['sync_op'],
+            shopify_location_gid=row['shopify_location_gid'],
+            shopify_inventory_item_gid=row['shopify_inventory_item_gid'],
+            price=row['price'],
+            price_compare=row['price_compare'],
+            title=row['title']
+        )
     
+    @traced(kind=KIND_CLIENT)
     async def products_created_on_shopify(self, shopi_products: List[ShopiProduct]) -> None:
         """UPDATE gids del producto nuevo"""
-        conn = await asyncpg.connect(self._connection_string)
-        try:
+        async with self._connection() as conn:
             for shopi_product in shopi_products:
                 await conn.execute("""
                     UPDATE shopify_product
@@ -79,13 +203,11 @@ class PostgreSQLInventoryRepository(IInventoryLevelRepository):
                     WHERE pos_sku = $2 and id_location = $3;
                 """, shopi_product.shopify_inventory_level_gid, shopi_product.pos_sku, shopi_product.id_location)
 
-        finally:
-            await conn.close()
     
+    @traced(kind=KIND_CLIENT)
     async def update_inventory_level(self, updated_inv: List[ShopiProduct]) -> None:
         """UPDATE de tu tabla shopify_inventory_level"""
-        conn = await asyncpg.connect(self._connection_string)
-        try:
+        async with self._connection() as conn:
             for update in updated_inv:
                 await conn.execute("""
                     UPDATE shopify_inventory_level 
@@ -93,5 +215,83 @@ class PostgreSQLInventoryRepository(IInventoryLevelRepository):
                     WHERE pos_sku = $2 AND id_location = $3;
                 """, update.new_quantity, 
                     update.pos_sku, update.id_location)
-        finally:
-            await conn.close()
\ No newline at end of file
+
+    @traced(kind=KIND_CLIENT)
+    async def apply_shopify_inventory_events(self, events: List[ShopifyInventoryEvent]) -> int:
+        """
+        UPSERT en lote de niveles recibidos por webhook (inventory_levels/update)
+
+        Un evento que no es más nuevo que la última escritura de la fila
+        (shopify_event_at si la escribió un webhook, updated_at si fue una
+        escritura local) no la pisa: los webhooks pueden llegar desordenados o
+        después de una escritura de la sincronización. shopify_event_at queda
+        con la hora del evento.
+        """
+        if not events:
+            return 0
+
+        async with self._connection() as conn:
+            status = await conn.execute("""
+                INSERT INTO shopify_inventory_level
+                (pos_sku, id_location, quantities_available, shopify_inventory_level_gid, shopify_event_at)
+                SELECT sp.pos_sku, sl.id_location, ev.available, ev.inventory_level_gid, ev.updated_at::timestamp
+                FROM unnest($1::varchar[], $2::varchar[], $3::float8[], $4::varchar[], $5::timestamptz[])
+                    AS ev(inventory_item_gid, location_gid, available, inventory_level_gid, updated_at)
+                JOIN shopify_product sp ON sp.shopify_inventory_item_gid = ev.inventory_item_gid
+                JOIN shopify_location sl ON sl.shopify_location_gid = ev.location_gid
+                ON CONFLICT (pos_sku, id_location) DO UPDATE SET
+                    quantities_available = EXCLUDED.quantities_available,
+                    shopify_inventory_level_gid = COALESCE(
+                        shopify_inventory_level.shopify_inventory_level_gid,
+                        EXCLUDED.shopify_inventory_level_gid
+                    ),
+                    shopify_event_at = EXCLUDED.shopify_event_at
+                WHERE EXCLUDED.shopify_event_at > COALESCE(
+                    shopify_inventory_level.shopify_event_at,
+                    shopify_inventory_level.updated_at
+                );
+            """,
+            [event.inventory_item_gid for event in events],
+            [event.location_gid for event in events],
+            [float(event.available) for event in events],
+            [event.inventory_level_gid for event in events],
+            [event.updated_at for event in events])
+
+        return int(status.split()[-1])
+
+    @traced(kind=KIND_CLIENT)
+    async def apply_shopify_product_events(self, events: List[ShopifyProductEvent]) -> int:
+        """
+        Enlaza productos creados en Shopify (products/create) con su fila del POS
+
+        Solo actualiza filas que ya existen en shopify_product, y solo si el
+        producto trae el tag pos-sku:<sku> (lo creó la sincronización) o ya
+        estaba enlazado a ese producto: un producto creado a mano en el admin
+        con un SKU cualquiera no entra al cache. Misma guarda de orden que los
+        niveles.
+        """
+        if not events:
+            return 0
+
+        async with self._connection() as conn:
+            status = await conn.execute("""
+                UPDATE shopify_product sp
+                SET shopify_product_gid = ev.product_gid,
+                    shopify_variant_gid = ev.variant_gid,
+                    shopify_inventory_item_gid = ev.inventory_item_gid,
+                    sync_op = 'UPDATE',
+                    shopify_event_at = ev.updated_at::timestamp
+                FROM unnest($1::varchar[], $2::varchar[], $3::varchar[], $4::varchar[], $5::bool[], $6::timestamptz[])
+                    AS ev(pos_sku, product_gid, variant_gid, inventory_item_gid, pos_sku_tagged, updated_at)
+                WHERE sp.pos_sku = ev.pos_sku
+                  AND (ev.pos_sku_tagged OR sp.shopify_product_gid = ev.product_gid)
+                  AND ev.updated_at::timestamp > COALESCE(sp.shopify_event_at, sp.updated_at);
+            """,
+            [event.pos_sku for event in events],
+            [event.shopify_product_gid for event in events],
+            [event.shopify_variant_gid for event in events],
+            [event.shopify_inventory_item_gid for event in events],
+            [event.pos_sku_tagged for event in events],
+            [event.updated_at for event in events])
+
+        return int(status.split()[-1])
@@ -0,0 +1,80 @@
+from domain.repositories.ILocationLeaseRepository import ILocationLeaseRepository
+from infrastructure.PostgreSQLBaseRepository import PostgreSQLBaseRepository
+
+from shared.tracing import traced, KIND_CLIENT
+
+from typing import List
+
+class PostgreSQLLocationLeaseRepository(PostgreSQLBaseRepository, ILocationLeaseRepository):
+    """
+    IMPLEMENTACIÓN CONCRETA: Leases de ubicaciones en PostgreSQL (sync_location_lease)
+
+    Cada worker renueva sus leases y, si le faltan ubicaciones, toma las que
+    están libres o vencidas. Las tomas se serializan con un advisory lock de
+    transacción para que dos workers que arrancan juntos no rebasen
+    max_locations entre los dos. El lease (no un advisory lock de sesión)
+    es lo que marca la propiedad: sobrevive a conexiones del pool que se
+    reciclan y vence solo si el worker deja de renovarlo.
+    """
+
+    # Llave del advisory lock que serializa las tomas de ubicaciones
+    CLAIM_LOCK_KEY = "sync_location_lease"
+
+    @traced(kind=KIND_CLIENT)
+    async def get_location_ids(self) -> List[int]:
+        async with self._connection() as conn:
+            rows = await conn.fetch("SELECT id_location FROM shopify_location ORDER BY id_location;")
+        return [row['id_location'] for row in rows]
+
+    @traced(kind=KIND_CLIENT)
+    async def acquire_locations(self, owner: str, candidates: List[int], max_locations: int, ttl_seconds: float) -> List[int]:
+        """Renueva los leases de owner y toma ubicaciones libres hasta max_locations"""
+        async with self._connection() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1));", self.CLAIM_LOCK_KEY)
+
+                # Las ubicaciones que ya eran del worker se conservan primero (afinidad)
+                owned = await conn.fetch("""
+                    UPDATE sync_location_lease
+                    SET lease_until = CURRENT_TIMESTAMP + make_interval(secs => $3)
+                    WHERE owner = $1 AND id_location = ANY($2::int[])
+                    RETURNING id_location;
+                """, owner, candidates, ttl_seconds)
+                locations = sorted(row['id_location'] for row in owned)[:max_locations]
+
+                # Lo que sobre del límite (p. ej. si bajó max_locations) se libera para otro worker
+                await conn.execute("""
+                    DELETE FROM sync_location_lease
+                    WHERE owner = $1 AND id_location <> ALL($2::int[]);
+                """, owner, locations)
+
+                missing = max_locations - len(locations)
+                if missing > 0:
+                    claimed = await conn.fetch("""
+                        WITH free AS (
+                            SELECT c.id_location
+                            FROM unnest($2::int[]) AS c(id_location)
+                            LEFT JOIN sync_location_lease l ON l.id_location = c.id_location
+                            WHERE c.id_location <> ALL($3::int[])
+                              AND (l.id_location IS NULL OR l.lease_until < CURRENT_TIMESTAMP)
+                            ORDER BY c.id_location
+                            LIMIT $4
+                        )
+                        INSERT INTO sync_location_lease (id_location, owner, lease_until)
+                        SELECT id_location, $1, CURRENT_TIMESTAMP + make_interval(secs => $5)
+                        FROM free
+                        ON CONFLICT (id_location) DO UPDATE
+                        SET owner = EXCLUDED.owner,
+                            lease_until = EXCLUDED.lease_until,
+                            acquired_at = CURRENT_TIMESTAMP
+                        WHERE sync_location_lease.lease_until < CURRENT_TIMESTAMP
+                        RETURNING id_location;
+                    """, owner, candidates, locations, missing, ttl_seconds)
+                    locations = sorted(locations + [row['id_location'] for row in claimed])
+
+        return locations
+
+    @traced(kind=KIND_CLIENT)
+    async def release_locations(self, owner: str) -> None:
+        async with self._connection() as conn:
+            await conn.execute("DELETE FROM sync_location_lease WHERE owner = $1;", owner)
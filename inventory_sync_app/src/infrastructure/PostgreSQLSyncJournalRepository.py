@@ -0,0 +1,145 @@
+from domain.repositories.ISyncJournalRepository import ISyncJournalRepository
+from infrastructure.PostgreSQLBaseRepository import PostgreSQLBaseRepository
+
+from domain.entities.InventoryChange import InventoryChange
+from domain.entities.ShopiProduct import ShopiProduct
+from domain.entities.SyncRun import SyncRun
+from domain.entities.SyncRunChange import SyncRunChange
+from shared.tracing import traced, KIND_CLIENT
+
+from typing import List, Optional
+import asyncpg
+import math
+
+class PostgreSQLSyncJournalRepository(PostgreSQLBaseRepository, ISyncJournalRepository):
+    """IMPLEMENTACIÓN CONCRETA: Journal de ejecuciones en PostgreSQL (sync_run / sync_run_change)"""
+
+    def __init__(self, connection_string: str, pool: Optional[asyncpg.Pool] = None, owner: Optional[str] = None):
+        super().__init__(connection_string, pool)
+        # Con varios workers por ubicación cada uno reanuda solo sus ejecuciones (None = worker único)
+        self._owner = owner
+
+    @traced(kind=KIND_CLIENT)
+    async def get_open_run(self) -> Optional[SyncRun]:
+        """Última ejecución que no llegó a terminar, con sus cambios"""
+        async with self._connection() as conn:
+            run_row = await conn.fetchrow("""
+                SELECT run_id, status, started_at, resume_attempts
+                FROM sync_run
+                WHERE status = 'RUNNING' AND owner IS NOT DISTINCT FROM $1
+                ORDER BY run_id DESC
+                LIMIT 1;
+            """, self._owner)
+            if run_row is None:
+                return None
+
+            rows = await conn.fetch("""
+                SELECT run_id, pos_sku, id_location, sync_op, new_quantity, shopify_location_gid, status,
+                       shopify_product_gid, shopify_variant_gid,
+                       shopify_inventory_item_gid, shopify_inventory_level_gid, updated_at
+                FROM sync_run_change
+                WHERE run_id = $1;
+            """, run_row['run_id'])
+
+        return SyncRun(
+            run_id=run_row['run_id'],
+            status=run_row['status'],
+            started_at=run_row['started_at'],
+            changes=[SyncRunChange(**dict(row)) for row in rows],
+            resume_attempts=run_row['resume_attempts']
+        )
+
+    @traced(kind=KIND_CLIENT)
+    async def start_run(self, changes: List[InventoryChange]) -> int:
+        """Registra la ejecución y todos sus cambios como PENDING"""
+        async with self._connection() as conn:
+            async with conn.transaction():
+                run_id = await conn.fetchval("""
+                    INSERT INTO sync_run (total_changes, owner)
+                    VALUES ($1, $2)
+                    RETURNING run_id;
+                """, len(changes), self._owner)
+
+                await conn.execute("""
+                    INSERT INTO sync_run_change (run_id, pos_sku, id_location, sync_op, new_quantity, shopify_location_gid)
+                    SELECT $1, ch.pos_sku, ch.id_location, ch.sync_op, ch.new_quantity, ch.shopify_location_gid
+                    FROM unnest($2::varchar[], $3::int[], $4::varchar[], $5::int[], $6::varchar[])
+                        AS ch(pos_sku, id_location, sync_op, new_quantity, shopify_location_gid)
+                    ON CONFLICT (run_id, pos_sku, id_location) DO NOTHING;
+                """,
+                run_id,
+                [change.sku for change in changes],
+                [change.id_location for change in changes],
+                [change.sync_op for change in changes],
+                [int(math.ceil(change.new_quantity)) for change in changes],
+                [change.shopify_location_gid for change in changes])
+
+        return run_id
+
+    @traced(kind=KIND_CLIENT)
+    async def register_resume_attempt(self, run_id: int) -> int:
+        """Cuenta un intento de reanudación (persistido antes de intentarlo)"""
+        async with self._connection() as conn:
+            return await conn.fetchval("""
+                UPDATE sync_run
+                SET resume_attempts = resume_attempts + 1
+                WHERE run_id = $1
+                RETURNING resume_attempts;
+            """, run_id)
+
+    @traced(kind=KIND_CLIENT)
+    async def mark_pushed(self, run_id: int, change: InventoryChange, shopi_product: ShopiProduct) -> None:
+        """Shopify confirmó el cambio: se guardan los gids para poder reanudar"""
+        async with self._connection() as conn:
+            await conn.execute("""
+                UPDATE sync_run_change
+                SET status = 'PUSHED',
+                    shopify_product_gid = NULLIF($4, ''),
+                    shopify_variant_gid = NULLIF($5, ''),
+                    shopify_inventory_item_gid = NULLIF($6, ''),
+                    shopify_inventory_level_gid = NULLIF($7, ''),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = $1 AND pos_sku = $2 AND id_location = $3;
+            """,
+            run_id, change.sku, change.id_location,
+            shopi_product.shopify_product_gid,
+            shopi_product.shopify_variant_gid,
+            shopi_product.shopify_inventory_item_gid,
+            shopi_product.shopify_inventory_level_gid)
+
+    @traced(kind=KIND_CLIENT)
+    async def mark_failed(self, run_id: int, change: InventoryChange) -> None:
+        async with self._connection() as conn:
+            await conn.execute("""
+                UPDATE sync_run_change
+                SET status = 'FAILED', updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = $1 AND pos_sku = $2 AND id_location = $3;
+            """, run_id, change.sku, change.id_location)
+
+    @traced(kind=KIND_CLIENT)
+    async def mark_confirmed(self, run_id: int, shopi_products: List[ShopiProduct]) -> None:
+        """El cache ya refleja los cambios (cierra el ciclo PENDING -> PUSHED -> CONFIRMED)"""
+        if not shopi_products:
+            return
+
+        async with self._connection() as conn:
+            await conn.execute("""
+                UPDATE sync_run_change src
+                SET status = 'CONFIRMED', updated_at = CURRENT_TIMESTAMP
+                FROM unnest($2::varchar[], $3::int[]) AS ch(pos_sku, id_location)
+                WHERE src.run_id = $1
+                  AND src.pos_sku = ch.pos_sku
+                  AND src.id_location = ch.id_location;
+            """,
+            run_id,
+            [product.pos_sku for product in shopi_products],
+            [product.id_location for product in shopi_products])
+
+    @traced(kind=KIND_CLIENT)
+    async def finish_run(self, run_id: int, status: str = "COMPLETED") -> None:
+        async with self._connection() as conn:
+            await conn.execute("""
+                UPDATE sync_run
+                SET status = $2, finished_at = CURRENT_TIMESTAMP
+                WHERE run_id = $1;
+            """, run_id, status)
@@ -1,37 +1,42 @@
 from domain.repositories.ISyncLogRepository import ISyncLogRepository
+from infrastructure.PostgreSQLBaseRepository import PostgreSQLBaseRepository
 
 from domain.entities.ProductSyncLog import ProductSyncLog
+from shared.tracing import traced, KIND_CLIENT
 
-from typing import List
+from typing import Dict, List
 import asyncpg
 
-class PostgreSQLSyncLogRepository(ISyncLogRepository):
+class PostgreSQLSyncLogRepository(PostgreSQLBaseRepository, ISyncLogRepository):
     """ IMPLEMENTACION CONCRETA: PostgreSQL para inventario """
 
-    def __init__(self, connection_string: str):
-        self._connection_string = connection_string
-
+    @traced(kind=KIND_CLIENT)
     async def create_sync_logs(self, sync_logs: List[ProductSyncLog]) -> None:
-        conn = await asyncpg.connect(self._connection_string)
-
-        try:
-            for sync_log in sync_logs:
-                await conn.execute("""
-                    INSERT INTO product_sync_log
-                    (pos_sku, sync_info, before_sync, after_sync, synced_status, sync_type)
-                    VALUES ($1,$2,$3,$4,$5,$6)               
-                """, 
-                sync_log.sku_pos, 
-                sync_log.sync_info, 
-                sync_log.before_sync, 
-                sync_log.after_sync, 
-                sync_log.synced_status, 
-                sync_log.sync_type)
-
-        finally:
-            await conn.close()
-
-    
-    
-
-
+        """INSERT en lote (una sentencia por ejecución, la partición del mes se resuelve una vez)"""
+        if not sync_logs:
+            return
+
+        async with self._connection() as conn:
+            await conn.execute("""
+                INSERT INTO product_sync_log
+                (pos_sku, sync_info, before_sync, after_sync, synced_status, sync_type)
+                SELECT * FROM unnest($1::varchar[], $2::text[], $3::float8[], $4::float8[], $5::varchar[], $6::varchar[])
+            """,
+            [sync_log.sku_pos for sync_log in sync_logs],
+            [sync_log.sync_info for sync_log in sync_logs],
+            [sync_log.before_sync for sync_log in sync_logs],
+            [sync_log.after_sync for sync_log in sync_logs],
+            [sync_log.synced_status for sync_log in sync_logs],
+            [sync_log.sync_type for sync_log in sync_logs])
+
+    @traced(kind=KIND_CLIENT)
+    async def maintain_partitions(self, months_ahead: int, retention_months: int) -> Dict[str, int]:
+        """Crea las particiones mensuales siguientes y quita las más viejas que la retención"""
+        async with self._connection() as conn:
+            try:
+                created = await conn.fetchval("SELECT create_product_sync_log_partitions($1);", months_ahead)
+                dropped = await conn.fetchval("SELECT drop_product_sync_log_partitions($1);", retention_months)
+            except asyncpg.UndefinedFunctionError:
+                print("⚠️ product_sync_log no está particionada (falta aplicar schemas_db.sql), se omite la retención")
+                return {"created": 0, "dropped": 0}
+        return {"created": created, "dropped": dropped}
@@ -0,0 +1,232 @@
+from domain.repositories.IShopifyUpdater import IShopifyUpdater, PushResultCallback
+from domain.entities.InventoryChange import InventoryChange
+from domain.entities.ProductSyncLog import ProductSyncLog
+from domain.entities.ShopiProduct import ShopiProduct
+from infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater
+from infrastructure.ShopifyGraphQLOperations import UPDATE_CHANGE_COST, CREATE_CHANGE_COST
+from shared.tracing import get_tracer, traced
+
+from typing import List, Optional, Dict, Any, Tuple, Deque, Set
+from collections import defaultdict, deque
+from datetime import datetime
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+# Mismo logger que get_component_logger('shopify') (nivel SHOPIFY_LOG_LEVEL)
+logger = logging.getLogger("inventory_sync.shopify")
+
+# Costo estimado (puntos del bucket GraphQL) de enviar cada tipo de cambio
+OPERATION_COSTS = {
+    "UPDATE": UPDATE_CHANGE_COST,   # inventorySetQuantities
+    "CREATE": CREATE_CHANGE_COST    # productCreate + productVariantsBulkUpdate + inventoryActivate + inventorySetQuantities
+}
+
+PRIORITY_NAMES = {1: "critical", 2: "high", 3: "normal"}
+
+class PriorityUpdateScheduler(IShopifyUpdater):
+    """
+    IMPLEMENTACIÓN CONCRETA: Carril rápido para cambios críticos
+
+    Envuelve a ShopifyInventoryUpdater y envía los cambios en orden de
+    prioridad (1 = stock-out/stock-in/creación) sin importar su sync_op.
+    Los cambios normales no pueden consumir la reserva del bucket de
+    Shopify destinada a los críticos y, si se agota su tiempo por
+    ejecución, quedan pendientes: en la siguiente ejecución los críticos
+    nuevos pasan antes que ellos.
+
+    Los pendientes viven solo en memoria. En el daemon sobreviven entre
+    ejecuciones; en una ejecución única (run.py sin --daemon) se pierden al
+    terminar el proceso. No se pierde el cambio en sí: el cache solo se
+    actualiza con lo que Shopify confirmó, así que la siguiente ejecución lo
+    vuelve a detectar, pero con una nueva hora de detección (el reporte de
+    tiempo hasta Shopify no cuenta la espera anterior).
+
+    Los envíos se despachan en orden de prioridad pero hasta
+    updater.concurrency_limit a la vez (límite AIMD del updater). Si el
+    circuito hacia Shopify se abre, se deja de despachar y el resto queda
+    pendiente.
+    """
+
+    def __init__(
+        self,
+        updater: ShopifyInventoryUpdater,
+        critical_reserve_fraction: float = 0.25,
+        normal_lane_max_seconds: Optional[float] = None,
+        samples_per_priority: int = 1000
+    ):
+        self._updater = updater
+        self._critical_reserve_fraction = critical_reserve_fraction
+        self._normal_lane_max_seconds = normal_lane_max_seconds
+
+        # Cambios pendientes por nivel de inventario (sku-ubicación), sobreviven entre ejecuciones
+        self._pending: Dict[str, InventoryChange] = {}
+        self._sequence = itertools.count()
+        self._time_to_shopify: Dict[int, Deque[float]] = defaultdict(lambda: deque(maxlen=samples_per_priority))
+
+    def _key(self, change: InventoryChange) -> str:
+        return f"{change.sku}-{change.id_location}"
+
+    def _merge_pending(self, changes: List[InventoryChange], sync_ops: Tuple[str, ...]) -> None:
+        """
+        Los cambios detectados reemplazan a los pendientes de los mismos sync_op
+
+        Un pendiente de esos sync_op que ya no se detecta dejó de ser necesario
+        (ERP y cache coinciden) y se descarta; si se vuelve a detectar conserva
+        la hora de su primera detección para medir el tiempo real hasta
+        Shopify. Los pendientes de otros sync_op no se tocan (así
+        update_inventory_batch no descarta las creaciones diferidas).
+        """
+        pending = {key: change for key, change in self._pending.items() if change.sync_op not in sync_ops}
+        for change in changes:
+            key = self._key(change)
+            previous = self._pending.get(key)
+            if previous is not None and previous.detected_at < change.detected_at:
+                change.detected_at = previous.detected_at
+            pending[key] = change
+        self._pending = pending
+
+    async def push_changes(
+        self,
+        to_update: List[InventoryChange],
+        to_create: List[InventoryChange],
+        on_result: Optional[PushResultCallback] = None
+    ) -> List[List[Any]]:
+        """Envía creaciones y actualizaciones en orden de prioridad"""
+        return await self._push_pending(to_update + to_create, ("UPDATE", "CREATE"), on_result)
+
+    @traced("shopify.push_changes")
+    async def _push_pending(
+        self,
+        changes: List[InventoryChange],
+        sync_ops: Tuple[str, ...],
+        on_result: Optional[PushResultCallback] = None
+    ) -> List[List[Any]]:
+        """Integra los cambios a los pendientes y envía los de sync_ops por prioridad"""
+        self._merge_pending(changes, sync_ops)
+        span = get_tracer().current_span()
+        span.set_attributes({
+            "batch.updates": sum(1 for change in changes if change.sync_op == "UPDATE"),
+            "batch.creates": sum(1 for change in changes if change.sync_op == "CREATE"),
+            "batch.pending": len(self._pending)
+        })
+
+        queue = [
+            (change.priority, change.detected_at, next(self._sequence), key)
+            for key, change in self._pending.items()
+            if change.sync_op in sync_ops
+        ]
+        heapq.heapify(queue)
+
+        update_logs, updated, create_logs, created = [], [], [], []
+        budget = self._updater.throttle_budget
+        normal_lane_started: Optional[float] = None
+        in_flight: Set[asyncio.Task] = set()
+
+        async def send(key: str, change: InventoryChange, priority: int) -> None:
+            sync_log, shopi_product = await self._updater.push_change(change)
+            del self._pending[key]
+            if on_result is not None:
+                await on_result(change, sync_log, shopi_product)
+
+            if sync_log.was_successful():
+                self._time_to_shopify[priority].append((sync_log.synced_at - change.detected_at).total_seconds())
+
+            if change.sync_op == "CREATE":
+                create_logs.append(sync_log)
+                if shopi_product is not None:
+                    created.append(shopi_product)
+            else:
+                update_logs.append(sync_log)
+                if shopi_product is not None:
+                    updated.append(shopi_product)
+
+        try:
+            while queue:
+                priority, _, _, key = heapq.heappop(queue)
+                change = self._pending[key]
+                is_critical = priority <= 1
+
+                if not is_critical:
+                    if normal_lane_started is None:
+                        normal_lane_started = time.monotonic()
+                    elif self._normal_lane_max_seconds and time.monotonic() - normal_lane_started > self._normal_lane_max_seconds:
+                        # El resto queda pendiente para la siguiente ejecución
+                        break
+
+                # Hasta concurrency_limit envíos a la vez (el límite AIMD sube y baja con la salud de Shopify)
+                while len(in_flight) >= max(1, self._updater.concurrency_limit):
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        in_flight.discard(task)
+                        task.result()
+
+                if not self._updater.accepting_requests:
+                    # Circuito abierto: no se insiste, lo que falta queda pendiente
+                    span.add_event("circuit.open", left_in_queue=len(queue) + 1)
+                    logger.warning("⛔ Circuito hacia Shopify abierto, se difieren los cambios restantes")
+                    break
+
+                reserve = 0.0 if is_critical else self._critical_reserve_fraction * budget.maximum_available
+                waited = await budget.acquire(OPERATION_COSTS.get(change.sync_op, OPERATION_COSTS["UPDATE"]), reserve=reserve)
+                if waited > 0:
+                    span.add_event("throttle.wait", sku=change.sku, priority=priority, wait_seconds=waited)
+
+                in_flight.add(asyncio.create_task(send(key, change, priority)))
+
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        span.set_attribute("batch.left_pending", len(self._pending))
+        if self._pending:
+            logger.info(f"⏳ Quedan {len(self._pending)} cambios pendientes para la siguiente ejecución")
+
+        return [update_logs, updated, create_logs, created]
+
+    def get_time_to_shopify_report(self) -> Dict[str, Dict[str, float]]:
+        """Tiempo desde la detección hasta Shopify por clase de prioridad"""
+        pending_by_priority: Dict[int, int] = defaultdict(int)
+        for change in self._pending.values():
+            pending_by_priority[change.priority] += 1
+
+        report = {}
+        for priority in sorted(set(self._time_to_shopify) | set(pending_by_priority)):
+            samples = sorted(self._time_to_shopify.get(priority, []))
+            name = PRIORITY_NAMES.get(priority, f"priority_{priority}")
+            report[name] = {
+                "count": len(samples),
+                "avg_seconds": sum(samples) / len(samples) if samples else 0.0,
+                "p95_seconds": samples[int(0.95 * (len(samples) - 1))] if samples else 0.0,
+                "max_seconds": samples[-1] if samples else 0.0,
+                "pending": pending_by_priority.get(priority, 0)
+            }
+        return report
+
+    async def update_inventory_batch(self, changes: List[InventoryChange]) -> List[List[Any]]:
+        [update_logs, updated, _, _] = await self._push_pending(changes, ("UPDATE",))
+        return [update_logs, updated]
+
+    async def create_inventory_batch(self, changes: List[InventoryChange]) -> List[List[Any]]:
+        [_, _, create_logs, created] = await self._push_pending(changes, ("CREATE",))
+        return [create_logs, created]
+
+    async def push_change(self, change: InventoryChange) -> Tuple[ProductSyncLog, Optional[ShopiProduct]]:
+        return await self._updater.push_change(change)
+
+    async def reconcile_pending_create(self, change: InventoryChange) -> Optional[ShopiProduct]:
+        return await self._updater.reconcile_pending_create(change)
+
+    def get_api_budget(self) -> Dict[str, float]:
+        return self._updater.get_api_budget()
+
+    async def _update_single_inventory(self, change: InventoryChange) -> bool:
+        return await self._updater._update_single_inventory(change)
+
+    async def _create_single_inventory(self, change: InventoryChange) -> bool:
+        return await self._updater._create_single_inventory(change)
@@ -0,0 +1,236 @@
+"""
+Detección de cambios repartida en procesos (catálogos de millones de filas)
+Ubicación: src/infrastructure/ShardedChangeDetector.py
+
+El cache se agrupa en bloques por (ubicación, cubeta del hash del SKU) y
+las filas del ERP se reparten en unidades por ubicación (shard_by="location")
+o por cubeta del SKU (shard_by="sku"); cada unidad se detecta en un
+ProcessPoolExecutor. Con el reporte del ERP particionado por almacén una
+partición trae una sola ubicación: si trae menos ubicaciones que workers,
+en modo location la unidad es (ubicación, cubeta) para repartirla igual.
+Cada bloque del cache viaja solo en la unidad de sus llaves.
+
+A los procesos no viajan entidades: cada unidad va como bloques compactos (SKUs unidos en un solo str, cantidades en
+array('d'), sync_op como bytes e índices en array('q')) y regresan solo los
+índices (fila del ERP, nivel del cache) y la prioridad de cada cambio. Los
+InventoryChange se construyen en el proceso principal, ordenados por la fila
+del ERP, así finalize_changes deja exactamente el mismo orden que
+SmartChangeDetector.
+
+Con un cache de menos de min_rows_for_processes filas (el tamaño de la
+ejecución, no de cada partición) las unidades se detectan en el mismo
+proceso (mismo código, sin costo de serializar).
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import math
+import multiprocessing
+import os
+
+from domain.entities.KordataProduct import KordataProduct
+from domain.entities.CacheInventoryLevel import CacheInventoryLevel
+from domain.entities.InventoryChange import InventoryChange
+from infrastructure.SmartChangeDetector import SmartChangeDetector
+from shared.metrics import get_metrics
+
+SHARD_BY_LOCATION = "location"
+SHARD_BY_SKU = "sku"
+
+# sync_op del cache como un byte por fila
+_UPDATE = ord("U")
+_CREATE = ord("C")
+_OTHER = ord("O")
+_SYNC_OP_CODES = {"UPDATE": _UPDATE, "CREATE": _CREATE}
+
+# Separador de los SKUs unidos en un solo str
+_SEPARATOR = "\x00"
+
+# (id_location, SKUs unidos, cantidades, sync_op, índice en la lista del cache)
+CacheBlock = Tuple[int, str, array, bytes, array]
+# (índice de la fila del ERP, SKUs unidos, id_location, existencia)
+ERPBlock = Tuple[array, str, array, array]
+# (índices del ERP, índices del cache, prioridades, filas sin cache)
+UnitResult = Tuple[array, array, array, int]
+
+
+def detect_unit(cache_blocks: List[CacheBlock], erp_block: ERPBlock) -> UnitResult:
+    """
+    Detecta una unidad (se ejecuta en un proceso del pool)
+
+    Mismas reglas que CacheInventoryLevel: should_update (UPDATE y la
+    cantidad redondeada hacia arriba cambió), is_new_product (CREATE) e
+    is_critical_change (agotado, reabasto o CREATE) para la prioridad 1.
+    """
+    index: Dict[Tuple[str, int], Tuple[float, int, int]] = {}
+    for location, skus, quantities, sync_ops, cache_indices in cache_blocks:
+        for sku, quantity, sync_op, cache_index in zip(skus.split(_SEPARATOR), quantities, sync_ops, cache_indices):
+            index[(sku, location)] = (quantity, sync_op, cache_index)
+
+    erp_indices, skus, locations, new_quantities = erp_block
+    changed_erp = array("q")
+    changed_cache = array("q")
+    priorities = array("b")
+    misses = 0
+    lookup = index.get
+    for erp_index, sku, location, new_quantity in zip(erp_indices, skus.split(_SEPARATOR), locations, new_quantities):
+        entry = lookup((sku, location))
+        if entry is None:
+            misses += 1
+            continue
+        quantity, sync_op, cache_index = entry
+        if sync_op == _CREATE or (sync_op == _UPDATE and abs(quantity - math.ceil(new_quantity)) > 0):
+            critical = (quantity > 0 and new_quantity == 0) or (quantity == 0 and new_quantity > 0) or sync_op == _CREATE
+            changed_erp.append(erp_index)
+            changed_cache.append(cache_index)
+            priorities.append(1 if critical else 3)
+    return changed_erp, changed_cache, priorities, misses
+
+
+# (id_location, cubeta del hash del SKU)
+BlockKey = Tuple[int, int]
+
+
+class ShardedInventoryIndex:
+    """Cache en bloques compactos por (ubicación, cubeta del SKU), listo para enviarse a los procesos"""
+
+    def __init__(self, levels: List[CacheInventoryLevel], blocks: Dict[BlockKey, CacheBlock]):
+        self.levels = levels
+        self.blocks = blocks
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+
+class ShardedChangeDetector(SmartChangeDetector):
+    """IMPLEMENTACIÓN CONCRETA: Detección de cambios en varios procesos"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        shard_by: str = SHARD_BY_LOCATION,
+        min_rows_for_processes: int = 200_000,
+        start_method: str = "spawn"
+    ):
+        super().__init__()
+        if shard_by not in (SHARD_BY_LOCATION, SHARD_BY_SKU):
+            raise ValueError(f"shard_by inválido: {shard_by}")
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.shard_by = shard_by
+        self.min_rows_for_processes = min_rows_for_processes
+        # spawn: el proceso principal tiene hilos (event loop, perfilador) y fork no es seguro con ellos
+        self._start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _block_key(self, sku: str, location: int) -> BlockKey:
+        return location, hash(sku) % self.workers
+
+    def _unit_of(self, key: BlockKey, locations_in_partition: int) -> object:
+        location, bucket = key
+        if self.shard_by == SHARD_BY_SKU:
+            return bucket
+        if locations_in_partition >= self.workers:
+            return location
+        # Pocas ubicaciones en la partición (p. ej. un almacén): también se reparte por SKU
+        return key
+
+    def index_inventory(self, current_inventory: List[CacheInventoryLevel]) -> ShardedInventoryIndex:
+        """Agrupa el cache en bloques compactos (una vez por ejecución)"""
+        grouped: Dict[BlockKey, Tuple[List[str], List[float], bytearray, array]] = {}
+        for cache_index, level in enumerate(current_inventory):
+            key = self._block_key(str(level.pos_sku), level.id_location)
+            group = grouped.get(key)
+            if group is None:
+                group = grouped[key] = ([], [], bytearray(), array("q"))
+            group[0].append(str(level.pos_sku))
+            group[1].append(level.quantities_available)
+            group[2].append(_SYNC_OP_CODES.get(level.sync_op, _OTHER))
+            group[3].append(cache_index)
+
+        blocks = {
+            key: (key[0], _SEPARATOR.join(skus), array("d", quantities), bytes(sync_ops), cache_indices)
+            for key, (skus, quantities, sync_ops, cache_indices) in grouped.items()
+        }
+
+        print(f"Total inventory items: {len(current_inventory)} ({len(blocks)} bloques, reparto por {self.shard_by})")
+        self._cache_misses = 0
+        return ShardedInventoryIndex(current_inventory, blocks)
+
+    async def detect_partition_changes(
+        self,
+        erp_products: List[KordataProduct],
+        inventory_index: ShardedInventoryIndex,
+        locations: Optional[Set[int]] = None
+    ) -> List[InventoryChange]:
+        """Reparte las filas del ERP por unidad, detecta cada una y une el resultado en el orden del ERP"""
+        by_key: Dict[BlockKey, Tuple[array, List[str], array]] = {}
+        for erp_index, product in enumerate(erp_products):
+            location = self._map_almacen_to_location(product.almacen)
+            if location is None or (locations is not None and location not in locations):
+                continue
+            sku = str(product.sku)
+            key = self._block_key(sku, location)
+            group = by_key.get(key)
+            if group is None:
+                group = by_key[key] = (array("q"), [], array("d"))
+            group[0].append(erp_index)
+            group[1].append(sku)
+            group[2].append(product.existencia)
+
+        locations_in_partition = len({location for location, _ in by_key})
+        units: Dict[object, List[BlockKey]] = {}
+        for key in by_key:
+            units.setdefault(self._unit_of(key, locations_in_partition), []).append(key)
+
+        tasks = []
+        for keys in units.values():
+            erp_indices, skus, locations, quantities = array("q"), [], array("i"), array("d")
+            for key in keys:
+                key_indices, key_skus, key_quantities = by_key[key]
+                erp_indices.extend(key_indices)
+                skus.extend(key_skus)
+                locations.extend(array("i", [key[0]]) * len(key_indices))
+                quantities.extend(key_quantities)
+            # Solo los bloques del cache de las llaves de la unidad
+            cache_blocks = [inventory_index.blocks[key] for key in keys if key in inventory_index.blocks]
+            tasks.append((cache_blocks, (erp_indices, _SEPARATOR.join(skus), locations, quantities)))
+
+        if len(inventory_index) < self.min_rows_for_processes or len(tasks) < 2:
+            results = [detect_unit(*task) for task in tasks]
+        else:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            results = await asyncio.gather(*(loop.run_in_executor(executor, detect_unit, *task) for task in tasks))
+
+        found: List[Tuple[int, int, int]] = []
+        cache_misses = 0
+        for changed_erp, changed_cache, priorities, misses in results:
+            found.extend(zip(changed_erp, changed_cache, priorities))
+            cache_misses += misses
+        found.sort()
+
+        levels = inventory_index.levels
+        changes = [
+            self._build_change(erp_products[erp_index].sku, erp_products[erp_index].existencia, levels[cache_index], priority)
+            for erp_index, cache_index, priority in found
+        ]
+
+        get_metrics().detector_cache_misses.inc(cache_misses)
+        self._cache_misses += cache_misses
+        return changes
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Pool de procesos (se crea al primer uso y se reutiliza en modo daemon)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(self._start_method)
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Termina los procesos del pool"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,43 @@
+from domain.repositories.IApiBudgetRepository import IApiBudgetRepository
+from infrastructure.ShopifyThrottleBudget import ShopifyThrottleBudget
+
+import logging
+
+# Mismo logger que get_component_logger('shopify') (nivel SHOPIFY_LOG_LEVEL)
+logger = logging.getLogger("inventory_sync.shopify")
+
+class SharedThrottleBudget(ShopifyThrottleBudget):
+    """
+    Bucket de costo de Shopify compartido entre workers (modo por ubicaciones)
+
+    Todos los workers gastan del mismo bucket de la tienda. Además de la
+    estimación local (throttleStatus de las respuestas propias), cada envío
+    reserva sus puntos en el token bucket de PostgreSQL; si la base no
+    responde se sigue solo con la estimación local y Shopify marca el
+    límite real con THROTTLED.
+    """
+
+    def __init__(
+        self,
+        repository: IApiBudgetRepository,
+        bucket: str,
+        maximum_available: float = 1000.0,
+        restore_rate: float = 50.0
+    ):
+        super().__init__(maximum_available=maximum_available, restore_rate=restore_rate)
+        self._repository = repository
+        self._bucket = bucket
+
+    async def _reserve_shared(self, cost: float, amount: float) -> float:
+        try:
+            return await self._repository.try_acquire(
+                self._bucket,
+                cost,
+                amount,
+                self._maximum_available,
+                self._restore_rate,
+                self.estimated_available()
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Bucket compartido no disponible, se usa solo el presupuesto local: {e}")
+            return 0.0
@@ -0,0 +1,114 @@
+"""
+Registro de las operaciones GraphQL que se envían a Shopify
+Ubicación: src/infrastructure/ShopifyGraphQLOperations.py
+
+Cada query vive una sola vez aquí. Al registrarla se precalcula el inicio
+del cuerpo ya serializado ({"query":"...","variables":), así armar un
+request es pegar ese prefijo con las variables serializadas. También se
+guarda el costo estimado (puntos del bucket de Shopify), que usa el
+scheduler para reservar presupuesto antes de enviar, y el sha256 de la
+query en el formato de persisted queries (extensions.persistedQuery).
+
+La Admin API de Shopify no acepta persisted queries: el updater siempre
+envía la query completa y el hash solo identifica la operación en spans.
+"""
+
+from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+import hashlib
+
+from shared.serialization import dumps
+
+
+@dataclass(frozen=True)
+class GraphQLOperation:
+    """Query GraphQL registrada con su prefijo serializado y costo estimado"""
+    name: str  # Campo raíz de la operación (etiqueta de métricas y userErrors)
+    query: str
+    estimated_cost: float
+    sha256: str = field(init=False)
+    _body_prefix: bytes = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "sha256", hashlib.sha256(self.query.encode("utf-8")).hexdigest())
+        object.__setattr__(self, "_body_prefix", b'{"query":' + dumps(self.query) + b',"variables":')
+
+    def build_body(self, variables: Dict[str, Any]) -> bytes:
+        """Cuerpo JSON del request (solo se serializan las variables)"""
+        return self._body_prefix + dumps(variables) + b"}"
+
+    def persisted_query_extension(self) -> Dict[str, Any]:
+        """extensions de un request por hash, para APIs con persisted queries"""
+        return {"persistedQuery": {"version": 1, "sha256Hash": self.sha256}}
+
+
+SHOPIFY_OPERATIONS: Dict[str, GraphQLOperation] = {}
+
+
+def register_operation(name: str, query: str, estimated_cost: float) -> GraphQLOperation:
+    """
+    Registra una operación (una por campo raíz)
+
+    Raises:
+        ValueError: Ya hay otra query registrada con ese nombre
+    """
+    existing: Optional[GraphQLOperation] = SHOPIFY_OPERATIONS.get(name)
+    if existing is not None:
+        if existing.query != query:
+            raise ValueError(f"Operación GraphQL duplicada con otra query: {name}")
+        return existing
+    operation = GraphQLOperation(name, query, estimated_cost)
+    SHOPIFY_OPERATIONS[name] = operation
+    return operation
+
+
+# Costos estimados como los calcula Shopify: 10 por mutación + objetos seleccionados
+PRODUCTS_BY_SKU_TAG = register_operation(
+    "products",
+    "query ProductBySkuTag($query: String!) { products(first: 1, query: $query) { edges { node { id variants(first: 1) { edges { node { id sku inventoryItem { id } } } } } } } }",
+    estimated_cost=4
+)
+
+VARIANTS_BY_SKU = register_operation(
+    "productVariants",
+    "query VariantBySku($query: String!, $locationId: ID!) { productVariants(first: 5, query: $query) { edges { node { id sku product { id } inventoryItem { id inventoryLevel(locationId: $locationId) { id } } } } } }",
+    estimated_cost=12
+)
+
+PRODUCT_CREATE = register_operation(
+    "productCreate",
+    "mutation ProductCreate($product: ProductCreateInput!) { productCreate(product: $product) { product { id variants(first: 10) { edges { node { id inventoryItem { id tracked inventoryLevels(first: 6) { edges { node { id location { name } quantities(names: \"available\") { name quantity } } } } } } } } } userErrors { field message } } }",
+    estimated_cost=12
+)
+
+PRODUCT_UPDATE = register_operation(
+    "productUpdate",
+    "mutation ProductUpdate($product: ProductUpdateInput!) { productUpdate(product: $product) { product { id title } userErrors { field message } } }",
+    estimated_cost=10
+)
+
+PRODUCT_VARIANTS_BULK_UPDATE = register_operation(
+    "productVariantsBulkUpdate",
+    "mutation ProductVariantsBulkUpdate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) { productVariantsBulkUpdate(productId: $productId, variants: $variants) { product { id } productVariants { id inventoryItem{ id tracked } } userErrors { field message } } }",
+    estimated_cost=11
+)
+
+INVENTORY_ACTIVATE = register_operation(
+    "inventoryActivate",
+    "mutation ActivateInventoryItem($inventoryItemId: ID!, $locationId: ID!, $available: Int) { inventoryActivate(inventoryItemId: $inventoryItemId, locationId: $locationId, available: $available) { inventoryLevel { id quantities(names: [\"available\"]) { name quantity } item { id } location { id } } userErrors { field message } } }",
+    estimated_cost=11
+)
+
+INVENTORY_SET_QUANTITIES = register_operation(
+    "inventorySetQuantities",
+    "mutation InventorySet($input: InventorySetQuantitiesInput!) { inventorySetQuantities(input: $input) { inventoryAdjustmentGroup { createdAt reason referenceDocumentUri changes { name delta } } userErrors { field message } } }",
+    estimated_cost=11
+)
+
+# Costo de enviar un cambio completo (lo que reserva el scheduler)
+UPDATE_CHANGE_COST = INVENTORY_SET_QUANTITIES.estimated_cost
+CREATE_CHANGE_COST = (
+    PRODUCT_CREATE.estimated_cost + PRODUCT_VARIANTS_BULK_UPDATE.estimated_cost
+    + INVENTORY_ACTIVATE.estimated_cost + INVENTORY_SET_QUANTITIES.estimated_cost
+)
+RECONCILE_COST = VARIANTS_BY_SKU.estimated_cost + INVENTORY_SET_QUANTITIES.estimated_cost
@@ -2,304 +2,524 @@ from domain.repositories.IShopifyUpdater import IShopifyUpdater
 from domain.entities.InventoryChange import InventoryChange
 from domain.entities.ProductSyncLog import ProductSyncLog
 from domain.entities.ShopiProduct import ShopiProduct
+from infrastructure.ShopifyThrottleBudget import ShopifyThrottleBudget
+from infrastructure.ShopifyGraphQLOperations import (
+    GraphQLOperation,
+    PRODUCTS_BY_SKU_TAG,
+    PRODUCT_UPDATE,
+    VARIANTS_BY_SKU,
+    PRODUCT_CREATE,
+    PRODUCT_VARIANTS_BULK_UPDATE,
+    INVENTORY_ACTIVATE,
+    INVENTORY_SET_QUANTITIES,
+    UPDATE_CHANGE_COST,
+    CREATE_CHANGE_COST,
+    RECONCILE_COST
+)
+from shared.metrics import get_metrics
+from shared.tracing import get_tracer, traced, KIND_CLIENT
+from shared.exceptions import (
+    RetryableError, ShopifyThrottledError, ShopifyServerError,
+    ShopifyTransportError, ShopifyRequestError, ShopifyUserError, CircuitOpenError
+)
+from shared.resilience import RetryPolicy, UpstreamGuard
+from shared.serialization import loads
 
 import math
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
+from contextlib import asynccontextmanager
 from datetime import datetime
 import aiohttp
 import asyncio
 import logging
+import time
+
+# Tag con el SKU del POS que se pone al crear el producto: permite encontrarlo
+# aunque la creación se interrumpa antes de asignar el SKU a la variante
+POS_SKU_TAG_PREFIX = "pos-sku:"
+
+# Lo que cuenta como falla de Shopify para el circuito y el limitador AIMD
+SHOPIFY_FAILURE_TYPES = (RetryableError, aiohttp.ClientError, asyncio.TimeoutError)
 
 class ShopifyInventoryUpdater(IShopifyUpdater):
     """IMPLEMENTACIÓN CONCRETA: Actualiza inventario en Shopify"""
     
-    def __init__(self, shop_url: str, access_token: str, timeout: int = 30):
+    def __init__(
+        self,
+        shop_url: str,
+        access_token: str,
+        timeout: int = 30,
+        session: Optional[aiohttp.ClientSession] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        guard: Optional[UpstreamGuard] = None,
+        throttle_budget: Optional[ShopifyThrottleBudget] = None
+    ):
         self._shop_url = shop_url
         self._access_token = access_token
         self._timeout = timeout  # ✅ AGREGADO: Faltaba inicializar timeout
         self._rate_limit_calls = 0
         self._rate_limit_max = 40  # Por segundo
+        self._session = session  # Sesión compartida (modo daemon)
+        # Con varios workers se inyecta el bucket compartido (SharedThrottleBudget)
+        self._throttle_budget = throttle_budget or ShopifyThrottleBudget()
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._guard = guard or UpstreamGuard("shopify", failure_types=SHOPIFY_FAILURE_TYPES)
+        # Los headers no cambian entre requests: se arman una sola vez
+        self._headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'X-Shopify-Access-Token': self._access_token
+        }
+
+    @asynccontextmanager
+    async def _get_session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Reutiliza la sesión HTTP compartida o abre una temporal"""
+        if self._session is not None and not self._session.closed:
+            yield self._session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+
+    def get_api_budget(self) -> Dict[str, float]:
+        """Presupuesto restante de la API según el último throttleStatus recibido"""
+        return self._throttle_budget.get_status()
     
+    @property
+    def throttle_budget(self) -> ShopifyThrottleBudget:
+        """Bucket de costo compartido con el scheduler de prioridades"""
+        return self._throttle_budget
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Cambios que el scheduler puede enviar a la vez (límite AIMD actual)"""
+        return self._guard.limiter.limit
+
+    @property
+    def accepting_requests(self) -> bool:
+        """False mientras el circuito hacia Shopify esté abierto"""
+        return self._guard.accepting_requests()
+
+    @traced("shopify.push_change")
+    async def push_change(self, change: InventoryChange) -> Tuple[ProductSyncLog, Optional[ShopiProduct]]:
+        """Envía un cambio (UPDATE o CREATE) a Shopify y construye su log de sincronización"""
+        span = get_tracer().current_span()
+        span.set_attributes({
+            "sku": change.sku,
+            "location.id": change.id_location,
+            "sync.op": change.sync_op,
+            "priority": change.priority,
+            "quantity.old": change.old_quantity,
+            "quantity.new": change.new_quantity
+        })
+        try:
+            success = None
+            sync_op = change.sync_op
+            sync_res = ""
+
+            if sync_op == "UPDATE":
+                success = await self._update_single_inventory(change)
+                sync_res = f"Updated from {change.old_quantity} to {change.new_quantity}"
+            elif sync_op == "CREATE":
+                success = await self._create_single_inventory(change)
+                sync_res = f"Create from {change.old_quantity} to {change.new_quantity}"
+
+            if not success:
+                sync_res = f"Failed to {sync_op}"
+            span.set_attribute("sync.status", "SUCCESS" if success else "FAILED")
+
+            sync_log = ProductSyncLog(
+                sync_id=0, 
+                sku_pos=change.sku, 
+                sync_info=sync_res,  
+                before_sync=change.old_quantity,  
+                after_sync=change.new_quantity,   
+                synced_at=datetime.now(),
+                synced_status="SUCCESS" if success else "FAILED",
+                sync_type=sync_op
+            )
+            return sync_log, success
+
+        except Exception as e:
+            span.set_attribute("sync.status", "FAILED")
+            kind = "retryable" if isinstance(e, RetryableError) else "fatal"
+            sync_log = ProductSyncLog(
+                sync_id=0,
+                sku_pos=change.sku,
+                sync_info=f"Error ({kind}): {str(e)}",
+                before_sync=change.old_quantity,
+                after_sync=change.new_quantity,
+                synced_at=datetime.now(),
+                synced_status="FAILED",
+                sync_type=change.sync_op
+            )
+            return sync_log, None
+    
+    @traced("shopify.graphql", kind=KIND_CLIENT)
+    async def _post_graphql(self, operation: GraphQLOperation, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envía una operación GraphQL (un solo intento) y devuelve 'data'
+
+        Pasa por el circuit breaker y el limitador de concurrencia de Shopify.
+
+        Raises:
+            RetryableError: 429/5xx, THROTTLED, timeout, error de conexión o circuito abierto
+            FatalError: Cualquier otro rechazo (4xx, errores GraphQL)
+        """
+        metrics = get_metrics()
+        span = get_tracer().current_span()
+        span.set_attributes({"graphql.operation": operation.name, "graphql.operation_hash": operation.sha256[:16]})
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            async with self._guard.slot(), self._get_session() as session:
+                async with session.post(self._shop_url, data=operation.build_body(variables), headers=self._headers, timeout=aiohttp.ClientTimeout(self._timeout)) as response:
+                    span.set_attribute("http.status_code", response.status)
+                    if response.status == 429 or response.status >= 500:
+                        outcome = "http_error"
+                        raise ShopifyServerError(
+                            f"GraphQL request failed: {response.status} - {response.reason}",
+                            status=response.status,
+                            retry_after=self._parse_retry_after(response.headers.get('Retry-After'))
+                        )
+                    if response.status != 200:
+                        outcome = "http_error"
+                        raise ShopifyRequestError(f"GraphQL request failed: {response.status} - {response.reason}")
+
+                    data = loads(await response.read())
+                    self._throttle_budget.update_from_response(data)
+                    self._record_cost(operation.name, data)
+
+                    if 'errors' in data:
+                        throttled = any(
+                            (error.get('extensions') or {}).get('code') == 'THROTTLED'
+                            for error in data['errors'] if isinstance(error, dict)
+                        )
+                        outcome = "throttled" if throttled else "graphql_error"
+                        if throttled:
+                            requested = ((data.get('extensions') or {}).get('cost') or {}).get('requestedQueryCost')
+                            raise ShopifyThrottledError(
+                                f"GraphQL errors: {data['errors']}",
+                                retry_after=self._throttle_budget.seconds_until_available(float(requested or operation.estimated_cost))
+                            )
+                        raise ShopifyRequestError(f"GraphQL errors: {data['errors']}")
+
+                    outcome = "success"
+                    return data.get('data') or {}
+        except CircuitOpenError:
+            outcome = "circuit_open"
+            raise
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            outcome = "transport_error"
+            raise ShopifyTransportError(f"GraphQL transport error: {type(e).__name__}: {e}") from e
+        finally:
+            span.set_attribute("graphql.outcome", outcome)
+            metrics.shopify_request_seconds.labels(operation.name).observe(time.perf_counter() - started)
+            metrics.shopify_requests.labels(operation.name, outcome).inc()
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After en segundos (se ignora el formato de fecha HTTP)"""
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _raise_user_errors(data: Dict[str, Any], mutation: str) -> None:
+        user_errors = (data.get(mutation) or {}).get('userErrors') or []
+        if user_errors:
+            raise ShopifyUserError(f"User errors: {user_errors}", user_errors)
+
+    async def _with_retries(self, operation: str, attempt_fn, retry_cost: float) -> Any:
+        """
+        Ejecuta attempt_fn con la política de reintentos
+
+        Antes de cada reintento se vuelve a pedir presupuesto al bucket de
+        costo (el scheduler solo lo reservó para el primer intento): el
+        último costo reportado por Shopify o, si aún no hay, retry_cost.
+        """
+        async def before_retry(attempt: int, error: RetryableError, delay: float) -> None:
+            reason = type(error).__name__
+            get_metrics().shopify_retries.labels(operation, reason).inc()
+            get_tracer().current_span().add_event("retry", attempt=attempt, reason=reason, delay_seconds=delay, error=str(error))
+            await self._throttle_budget.acquire(self._throttle_budget.get_status()["last_query_cost"] or retry_cost)
+
+        return await self._retry_policy.run(attempt_fn, before_retry=before_retry)
+
+    def _record_cost(self, operation: str, data: Dict[str, Any]) -> None:
+        """Acumula el costo reportado en extensions.cost y el presupuesto restante"""
+        cost = (data.get('extensions') or {}).get('cost') or {}
+        query_cost = cost.get('actualQueryCost', cost.get('requestedQueryCost'))
+        metrics = get_metrics()
+        span = get_tracer().current_span()
+        if query_cost is not None:
+            metrics.shopify_query_cost.labels(operation).inc(float(query_cost))
+            span.set_attribute("graphql.cost", float(query_cost))
+        available = (cost.get('throttleStatus') or {}).get('currentlyAvailable')
+        if available is not None:
+            metrics.shopify_budget_available.set(float(available))
+            span.set_attribute("graphql.budget_available", float(available))
+
+    async def reconcile_pending_create(self, change: InventoryChange) -> Optional[ShopiProduct]:
+        """
+        Completa una creación interrumpida buscando la variante por SKU
+
+        Si la variante ya existe (el SKU se asigna en el paso 2 de la creación)
+        se activa o ajusta su inventario en la ubicación y se devuelven sus gids.
+        Si no, se busca el producto huérfano por el tag del SKU (la creación se
+        cortó entre productCreate y la asignación del SKU) y se terminan sus
+        pasos pendientes. Si tampoco existe devuelve None y el cambio se vuelve
+        a crear normalmente.
+        """
+        shopi_product = await self._with_retries("reconcile", lambda: self._reconcile_by_sku(change), RECONCILE_COST)
+        if shopi_product is not None:
+            return shopi_product
+
+        orphan = await self._with_retries("reconcile", lambda: self._find_orphan_product(change), PRODUCTS_BY_SKU_TAG.estimated_cost)
+        if orphan is None:
+            return None
+        return await self._create_single_inventory(change, existing=orphan)
+
+    @staticmethod
+    def _sku_tag(sku: str) -> str:
+        return f"{POS_SKU_TAG_PREFIX}{sku}"
+
+    @staticmethod
+    def _has_known_title(change: InventoryChange) -> bool:
+        """El journal no guarda el título: SyncRunChange.to_inventory_change usa el SKU"""
+        return bool(change.title) and change.title != change.sku
+
+    @staticmethod
+    def _search_term(field: str, value: str) -> str:
+        """Término de la sintaxis de búsqueda de Shopify con el valor entre comillas (espacios, ':' o comillas en el SKU)"""
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        return f'{field}:"{escaped}"'
+
+    async def _find_orphan_product(self, change: InventoryChange) -> Optional[ShopiProduct]:
+        """Producto creado con el tag del SKU del POS (un intento de la búsqueda)"""
+        data = await self._post_graphql(PRODUCTS_BY_SKU_TAG, {"query": self._search_term("tag", self._sku_tag(change.sku))})
+
+        edges = data.get('products', {}).get('edges', [])
+        if not edges:
+            return None
+
+        node = edges[0]['node']
+        variant = node['variants']['edges'][0]['node']
+        return ShopiProduct(
+            pos_sku=change.sku,
+            id_location=change.id_location,
+            shopify_product_gid=node['id'],
+            shopify_variant_gid=variant['id'],
+            shopify_inventory_item_gid=variant['inventoryItem']['id']
+        )
+
+    async def _reconcile_by_sku(self, change: InventoryChange) -> Optional[ShopiProduct]:
+        """Un intento de reconcile_pending_create (la búsqueda y el ajuste son idempotentes)"""
+        data = await self._post_graphql(VARIANTS_BY_SKU, {
+            "query": self._search_term("sku", change.sku),
+            "locationId": change.shopify_location_gid
+        })
+
+        # La búsqueda sku: de Shopify no es exacta (ABC-1 también trae ABC-10): solo cuenta el SKU idéntico
+        edges = data.get('productVariants', {}).get('edges', [])
+        node = next((edge['node'] for edge in edges if edge['node'].get('sku') == str(change.sku)), None)
+        if node is None:
+            return None
+
+        quantity = int(math.ceil(change.new_quantity))
+        shopi_product = ShopiProduct(
+            pos_sku=change.sku,
+            id_location=change.id_location,
+            new_quantity=quantity,
+            shopify_product_gid=node['product']['id'],
+            shopify_variant_gid=node['id'],
+            shopify_inventory_item_gid=node['inventoryItem']['id']
+        )
+
+        inventory_level = node['inventoryItem'].get('inventoryLevel')
+        if inventory_level is None:
+            data = await self._post_graphql(INVENTORY_ACTIVATE, {
+                "inventoryItemId": shopi_product.shopify_inventory_item_gid,
+                "locationId": change.shopify_location_gid,
+                "available": quantity
+            })
+            self._raise_user_errors(data, 'inventoryActivate')
+            shopi_product.shopify_inventory_level_gid = data['inventoryActivate']['inventoryLevel']['id']
+        else:
+            data = await self._post_graphql(INVENTORY_SET_QUANTITIES, {
+                "input": {
+                    "ignoreCompareQuantity": True,
+                    "name": "available",
+                    "reason": "movement_updated",
+                    "quantities": [{
+                        "inventoryItemId": shopi_product.shopify_inventory_item_gid,
+                        "locationId": change.shopify_location_gid,
+                        "quantity": quantity
+                    }]
+                }
+            })
+            self._raise_user_errors(data, 'inventorySetQuantities')
+            shopi_product.shopify_inventory_level_gid = inventory_level['id']
+
+        return shopi_product
+
     async def update_inventory_batch(self, changes: List[InventoryChange]) -> List[List[Any]]:
         """Actualiza inventario respetando rate limits"""
-        sync_results = []
-        sync_update_db = []
-        
-        for change in changes:
-            
-            
-            try:
-                success = None
-                sync_op = change.sync_op
-                sync_res = ""
-
-                if sync_op == "UPDATE":
-                    success = await self._update_single_inventory(change)
-                    sync_res = f"Updated from {change.old_quantity} to {change.new_quantity}"
-
-                if not success:
-                    sync_res = f"Failed to {sync_op}"
-                
-                
-                sync_log = ProductSyncLog(
-                    sync_id=0, 
-                    sku_pos=change.sku, 
-                    sync_info=sync_res,  
-                    before_sync=change.old_quantity,  
-                    after_sync=change.new_quantity,   
-                    synced_at=datetime.now(),
-                    synced_status="SUCCESS" if success else "FAILED",
-                    sync_type=sync_op
-                )
-                sync_results.append(sync_log)
-                
-                sync_update_db.append(success)
-                
-                
-                
-            except Exception as e:
-                sync_log = ProductSyncLog(
-                    sync_id=0,
-                    sku_pos=change.sku,
-                    sync_info=f"Error: {str(e)}",
-                    before_sync=change.old_quantity,
-                    after_sync=change.new_quantity,
-                    synced_at=datetime.now(),
-                    synced_status="FAILED",
-                    sync_type=change.sync_op
-                )
-                sync_results.append(sync_log)
-            
-            await asyncio.sleep(4)  # Esperar 1 segundo
-        
-        return [sync_results, sync_update_db]
+        return await self._push_batch([change for change in changes if change.sync_op == "UPDATE"])
     
     async def create_inventory_batch(self, changes: List[InventoryChange]) -> List[List[Any]]:
         """Crear los productos nuevos en shopify respetando rate limits"""
+        return await self._push_batch([change for change in changes if change.sync_op == "CREATE"])
+
+    async def _push_batch(self, changes: List[InventoryChange]) -> List[List[Any]]:
+        """Envía los cambios en serie con pausa fija entre llamadas"""
         sync_results = []
         sync_update_db = []
 
         for change in changes:
-
-            try:
-                sync_op = change.sync_op
-                success = None
-                sync_res = ""
-
-                if sync_op == "CREATE":
-                    success = await self._create_single_inventory(change)
-                    sync_res = f"Create from {change.old_quantity} to {change.new_quantity}"
-                
-                if success == None:
-                    sync_res = f"Failed to {sync_op}"
-                
-
-                sync_log = ProductSyncLog(
-                    sync_id=0, 
-                    sku_pos=change.sku, 
-                    sync_info=sync_res,  
-                    before_sync=change.old_quantity,  
-                    after_sync=change.new_quantity,   
-                    synced_at=datetime.now(),
-                    synced_status="SUCCESS" if success else "FAILED",
-                    sync_type=sync_op
-                )
-                sync_results.append(sync_log)
-                sync_update_db.append(success)
-
-                
-
-            except Exception as e:
-                sync_log = ProductSyncLog(
-                    sync_id=0,
-                    sku_pos=change.sku,
-                    sync_info=f"Error: {str(e)}",
-                    before_sync=change.old_quantity,
-                    after_sync=change.new_quantity,
-                    synced_at=datetime.now(),
-                    synced_status="FAILED",
-                    sync_type=change.sync_op
-                )
-                sync_results.append(sync_log)
+            sync_log, shopi_product = await self.push_change(change)
+            sync_results.append(sync_log)
+            if shopi_product is not None:
+                sync_update_db.append(shopi_product)
 
             await asyncio.sleep(4)  # Esperar 1 segundo
 
         return [sync_results, sync_update_db]
     
-    async def _update_single_inventory(self, change: InventoryChange) -> bool:
-        """Llamada real a Shopify API para actualizar inventario"""
-        shopi_product = ShopiProduct(pos_sku=change.sku,id_location=change.id_location, new_quantity=int(math.ceil(change.new_quantity)))
-        try:
-            payload = {
-                "query": "mutation InventorySet($input: InventorySetQuantitiesInput!) { inventorySetQuantities(input: $input) { inventoryAdjustmentGroup { createdAt reason referenceDocumentUri changes { name delta } } userErrors { field message } } }",
-                "variables": {
-                    "input": {
-                        "ignoreCompareQuantity": True,
-                        "name": "available",
-                        "reason": "movement_updated",
-                        "quantities": [{
-                            "inventoryItemId": change.shopify_inventory_item,  
-                            "locationId": change.shopify_location_gid,  
-                            "quantity": int(change.new_quantity)  
-                        }]
-                    }
-                }
-            }
+    async def _update_single_inventory(self, change: InventoryChange) -> ShopiProduct:
+        """
+        Llamada real a Shopify API para actualizar inventario
 
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json',
-                'X-Shopify-Access-Token': self._access_token
+        Fijar una cantidad absoluta es idempotente, así que el request completo
+        se reintenta ante errores transitorios. Si se agotan los intentos o el
+        error es fatal la excepción llega a push_change (log FAILED).
+        """
+        shopi_product = ShopiProduct(pos_sku=change.sku,id_location=change.id_location, new_quantity=int(math.ceil(change.new_quantity)))
+        variables = {
+            "input": {
+                "ignoreCompareQuantity": True,
+                "name": "available",
+                "reason": "movement_updated",
+                "quantities": [{
+                    "inventoryItemId": change.shopify_inventory_item,  
+                    "locationId": change.shopify_location_gid,  
+                    "quantity": int(change.new_quantity)  
+                }]
             }
+        }
 
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(self._timeout)) as session:
-                async with session.post(self._shop_url, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"Update inventory failed: {response.status} - {response.reason}")
-                    
-                    data = await response.json()
-                    
-                    print("Update Data: ", data)
-                    
-                    if 'errors' in data:
-                        raise Exception(f"GraphQL errors: {data['errors']}")
-                    
-                    user_errors = data.get('data', {}).get('inventorySetQuantities', {}).get('userErrors', [])
-                    if user_errors:
-                        raise Exception(f"User errors: {user_errors}")
-                    
-                    return shopi_product
-                    
-        except Exception as e:
+        async def attempt() -> ShopiProduct:
+            data = await self._post_graphql(INVENTORY_SET_QUANTITIES, variables)
+            self._raise_user_errors(data, 'inventorySetQuantities')
             return shopi_product
+
+        return await self._with_retries("update", attempt, UPDATE_CHANGE_COST)
     
-    async def _create_single_inventory(self, change: InventoryChange) -> bool:
-        """Llamada real a Shopify API para crear producto e inventario"""
+    async def _create_single_inventory(self, change: InventoryChange, existing: Optional[ShopiProduct] = None) -> ShopiProduct:
+        """
+        Llamada real a Shopify API para crear producto e inventario
 
-        shopi_product = ShopiProduct(pos_sku=change.sku,id_location=change.id_location)
+        Cada intento retoma desde el primer paso que no se completó (los gids
+        obtenidos quedan en shopi_product), así un error transitorio en el paso
+        3 no vuelve a crear el producto. Si el error llegó antes de conocer el
+        producto, el reintento busca primero el SKU en Shopify y, si ya existe,
+        lo reconcilia en lugar de crear un duplicado; si no, busca el producto
+        huérfano por el tag del SKU y continúa desde el paso 2.
 
-        try:
-            
-            
+        Un huérfano adoptado conserva el título con el que se creó; si el
+        cambio trae título se actualiza antes del paso 2 (que asigna el precio).
+
+        Args:
+            existing: Producto huérfano ya creado (se retoma desde el paso 2)
+        """
+
+        shopi_product = existing or ShopiProduct(pos_sku=change.sku,id_location=change.id_location)
+        attempts = 0
+        tracking_enabled = False
+        # Al reanudar desde el journal el título es el SKU (no se conoce): no se toca
+        title_pending = existing is not None and self._has_known_title(change)
+
+        async def attempt() -> ShopiProduct:
+            nonlocal attempts, tracking_enabled, title_pending
+            attempts += 1
+
+            if not shopi_product.shopify_product_gid and attempts > 1:
+                reconciled = await self._reconcile_by_sku(change)
+                if reconciled is not None:
+                    return reconciled
+                orphan = await self._find_orphan_product(change)
+                if orphan is not None:
+                    shopi_product.shopify_product_gid = orphan.shopify_product_gid
+                    shopi_product.shopify_variant_gid = orphan.shopify_variant_gid
+                    shopi_product.shopify_inventory_item_gid = orphan.shopify_inventory_item_gid
+                    title_pending = self._has_known_title(change)
 
             # 1. Crear producto
-            payloadCreateProduct = {
-                "query": "mutation ProductCreate($product: ProductCreateInput!) { productCreate(product: $product) { product { id variants(first: 10) { edges { node { id inventoryItem { id tracked inventoryLevels(first: 6) { edges { node { id location { name } quantities(names: \"available\") { name quantity } } } } } } } } } } }",
-                "variables": {
+            if not shopi_product.shopify_product_gid:
+                data = await self._post_graphql(PRODUCT_CREATE, {
                     "product": {
                         "title": change.title,  
-                        "status": "ACTIVE"
+                        "status": "ACTIVE",
+                        "tags": [self._sku_tag(change.sku)]
                     }
-                }
-            }
+                })
+                self._raise_user_errors(data, 'productCreate')
 
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json',
-                'X-Shopify-Access-Token': self._access_token
-            }
+                product_data = data['productCreate']['product']
+                shopi_product.shopify_product_gid = product_data['id']
+                shopi_product.shopify_variant_gid = product_data['variants']['edges'][0]['node']['id']
+                shopi_product.shopify_inventory_item_gid = product_data['variants']['edges'][0]['node']['inventoryItem']['id']
 
-            # Crear producto
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(self._timeout)) as session:
-                async with session.post(self._shop_url, json=payloadCreateProduct, headers=headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"Create Product failed: {response.status} - {response.reason}")
-                    
-                    data = await response.json()
-                    print("Create:", data)
-                    
-                    if 'errors' in data:
-                        raise Exception(f"GraphQL errors: {data['errors']}")
-                    
-                    product_data = data['data']['productCreate']['product']
-                    shopi_product.shopify_product_gid = product_data['id']
-                    shopi_product.shopify_variant_gid = product_data['variants']['edges'][0]['node']['id']
-                    shopi_product.shopify_inventory_item_gid = product_data['variants']['edges'][0]['node']['inventoryItem']['id']
-
-            # 2. Habilitar tracking de inventario
-            payloadVariantBulkUpdate = {
-                "query": "mutation ProductVariantsBulkUpdate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) { productVariantsBulkUpdate(productId: $productId, variants: $variants) { product { id } productVariants { id inventoryItem{ id tracked } } userErrors { field message } } }",
-                "variables": {
+            # 1b. Huérfano adoptado: el título del cambio
+            if title_pending:
+                data = await self._post_graphql(PRODUCT_UPDATE, {
+                    "product": {"id": shopi_product.shopify_product_gid, "title": change.title}
+                })
+                self._raise_user_errors(data, 'productUpdate')
+                title_pending = False
+
+            # 2. Habilitar tracking de inventario y asignar el SKU (y el precio)
+            if not tracking_enabled:
+                data = await self._post_graphql(PRODUCT_VARIANTS_BULK_UPDATE, {
                     "productId": shopi_product.shopify_product_gid,
                     "variants": [{
                         "id": shopi_product.shopify_variant_gid,
-                        "price": change.price,
                         "inventoryItem": {
                             "tracked": True,
                             "sku": change.sku
-                        }
+                        },
+                        # Al reanudar desde el journal no se conoce el precio: no se toca
+                        **({"price": change.price} if change.price else {})
                     }]
-                }
-            }
-
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(self._timeout)) as session:
-                async with session.post(self._shop_url, json=payloadVariantBulkUpdate, headers=headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"Update Inventory tracking failed: {response.status} - {response.reason}")
-                    
-                    data = await response.json()
-                    print("Activate Variant Info:", data)
-                    if 'errors' in data:
-                        raise Exception(f"GraphQL errors: {data['errors']}")
+                })
+                self._raise_user_errors(data, 'productVariantsBulkUpdate')
+                tracking_enabled = True
 
             # 3. Activar inventario en ubicación
-            payloadActivateInventoryItem = {
-                "query": "mutation ActivateInventoryItem($inventoryItemId: ID!, $locationId: ID!, $available: Int) { inventoryActivate(inventoryItemId: $inventoryItemId, locationId: $locationId, available: $available) { inventoryLevel { id quantities(names: [\"available\"]) { name quantity } item { id } location { id } } } }",
-                "variables": {
+            if not shopi_product.shopify_inventory_level_gid:
+                data = await self._post_graphql(INVENTORY_ACTIVATE, {
                     "inventoryItemId": shopi_product.shopify_inventory_item_gid,
                     "locationId": change.shopify_location_gid,  
                     "available": 1  
-                }
-            }
-            
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(self._timeout)) as session:
-                async with session.post(self._shop_url, json=payloadActivateInventoryItem, headers=headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"Activate Inventory failed: {response.status} - {response.reason}")
-                    
-                    data = await response.json()
-                    print("Activate Location: ", data)
-                    if 'errors' in data:
-                        raise Exception(f"GraphQL errors: {data['errors']}")
-                    
-                    shopi_product.shopify_inventory_level_gid = data['data']['inventoryActivate']['inventoryLevel']['id']
+                })
+                self._raise_user_errors(data, 'inventoryActivate')
+                shopi_product.shopify_inventory_level_gid = data['inventoryActivate']['inventoryLevel']['id']
 
             # 4. Establecer cantidad final
-            payloadInventorySet = {
-                "query": "mutation InventorySet($input: InventorySetQuantitiesInput!) { inventorySetQuantities(input: $input) { inventoryAdjustmentGroup { createdAt reason referenceDocumentUri changes { name delta } } userErrors { field message } } }",
-                "variables": {
-                    "input": {
-                        "ignoreCompareQuantity": True,
-                        "name": "available",
-                        "reason": "movement_updated",
-                        "quantities": [{
-                            "inventoryItemId": shopi_product.shopify_inventory_item_gid,
-                            "locationId": change.shopify_location_gid,  
-                            "quantity": int(change.new_quantity)  
-                        }]
-                    }
+            data = await self._post_graphql(INVENTORY_SET_QUANTITIES, {
+                "input": {
+                    "ignoreCompareQuantity": True,
+                    "name": "available",
+                    "reason": "movement_updated",
+                    "quantities": [{
+                        "inventoryItemId": shopi_product.shopify_inventory_item_gid,
+                        "locationId": change.shopify_location_gid,  
+                        "quantity": int(change.new_quantity)  
+                    }]
                 }
-            }
+            })
+            self._raise_user_errors(data, 'inventorySetQuantities')
 
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(self._timeout)) as session:
-                async with session.post(self._shop_url, json=payloadInventorySet, headers=headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"Inventory Set failed: {response.status} - {response.reason}")
-                    
-                    data = await response.json()
-                    print("Update Quantities", data)
-                    if 'errors' in data:
-                        raise Exception(f"GraphQL errors: {data['errors']}")
-                    
-                    user_errors = data.get('data', {}).get('inventorySetQuantities', {}).get('userErrors', [])
-                    if user_errors:
-                        raise Exception(f"User errors: {user_errors}")
-
-            # ✅ AGREGADO: Guardar el producto creado en la base de datos
-            # Aquí deberías llamar a tu repositorio para guardar shopi_product
-            # await self._product_repository.save(shopi_product)
-            
             return shopi_product
 
-        except Exception as e:
-            return shopi_product
\ No newline at end of file
+        return await self._with_retries("create", attempt, CREATE_CHANGE_COST)
@@ -0,0 +1,99 @@
+from typing import Dict, Any, Optional
+import asyncio
+import time
+
+from shared.metrics import get_metrics
+
+class ShopifyThrottleBudget:
+    """
+    Estado del bucket de costo de la API GraphQL de Shopify
+
+    Se alimenta de extensions.cost.throttleStatus en cada respuesta y
+    estima el presupuesto disponible entre respuestas usando restoreRate.
+    """
+
+    def __init__(self, maximum_available: float = 1000.0, restore_rate: float = 50.0):
+        self._maximum_available = maximum_available
+        self._currently_available = maximum_available
+        self._restore_rate = restore_rate
+        self._observed_at = time.monotonic()
+        self._last_query_cost: Optional[float] = None
+
+    def update_from_response(self, data: Dict[str, Any]) -> None:
+        """Actualiza el estado con la respuesta GraphQL (si trae extensions.cost)"""
+        if not isinstance(data, dict):
+            return
+        cost = (data.get('extensions') or {}).get('cost') or {}
+        throttle_status = cost.get('throttleStatus')
+        if not throttle_status:
+            return
+
+        self._maximum_available = float(throttle_status.get('maximumAvailable', self._maximum_available))
+        self._currently_available = float(throttle_status.get('currentlyAvailable', self._currently_available))
+        self._restore_rate = float(throttle_status.get('restoreRate', self._restore_rate))
+        self._observed_at = time.monotonic()
+
+        if cost.get('actualQueryCost') is not None:
+            self._last_query_cost = float(cost['actualQueryCost'])
+
+    def estimated_available(self) -> float:
+        """Presupuesto estimado ahora (el bucket se restaura a restoreRate por segundo)"""
+        elapsed = time.monotonic() - self._observed_at
+        return min(self._maximum_available, self._currently_available + elapsed * self._restore_rate)
+
+    def fraction_available(self) -> float:
+        """Fracción del bucket disponible (0.0 - 1.0)"""
+        if self._maximum_available <= 0:
+            return 0.0
+        return self.estimated_available() / self._maximum_available
+
+    def seconds_until_available(self, amount: float) -> float:
+        """Segundos necesarios para que el bucket alcance `amount` puntos"""
+        missing = amount - self.estimated_available()
+        if missing <= 0:
+            return 0.0
+        return missing / self._restore_rate if self._restore_rate > 0 else float('inf')
+
+    @property
+    def maximum_available(self) -> float:
+        return self._maximum_available
+
+    async def acquire(self, cost: float, reserve: float = 0.0) -> float:
+        """
+        Espera hasta tener `cost` puntos por encima de `reserve` y los descuenta
+
+        El descuento es optimista (se corrige con el siguiente throttleStatus)
+        para que varias corrutinas no gasten el mismo presupuesto.
+
+        Returns:
+            float: Segundos esperados por presupuesto
+        """
+        waited = 0.0
+        while True:
+            # Nunca pedir más que la capacidad del bucket (esperaría para siempre)
+            amount = min(cost + reserve, self._maximum_available)
+            wait = self.seconds_until_available(amount)
+            # Sin restoreRate el bucket nunca se recupera: se deja que Shopify decida
+            if wait <= 0 or wait == float('inf'):
+                wait = await self._reserve_shared(cost, amount)
+            if wait <= 0:
+                self._currently_available = self.estimated_available() - cost
+                self._observed_at = time.monotonic()
+                get_metrics().shopify_throttle_wait_seconds.observe(waited)
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def _reserve_shared(self, cost: float, amount: float) -> float:
+        """Reserva en el bucket compartido con otros workers (sin otros workers no hay nada que esperar)"""
+        return 0.0
+
+    def get_status(self) -> Dict[str, float]:
+        """Snapshot serializable del presupuesto"""
+        return {
+            "maximum_available": self._maximum_available,
+            "currently_available": self.estimated_available(),
+            "restore_rate": self._restore_rate,
+            "fraction_available": self.fraction_available(),
+            "last_query_cost": self._last_query_cost
+        }
@@ -0,0 +1,302 @@
+from domain.repositories.IInventoryLevelRepository import IInventoryLevelRepository
+from domain.entities.ShopifyInventoryEvent import ShopifyInventoryEvent
+from domain.entities.ShopifyProductEvent import ShopifyProductEvent
+from infrastructure.ShopifyInventoryUpdater import POS_SKU_TAG_PREFIX
+
+from shared.serialization import loads
+
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple
+from dataclasses import asdict
+from datetime import datetime
+from aiohttp import web
+import asyncpg
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+dead_letter_logger = logging.getLogger("inventory_sync.webhooks.dead_letter")
+
+INVENTORY_LEVELS_UPDATE = "inventory_levels/update"
+PRODUCTS_CREATE = "products/create"
+
+# Fallas de infraestructura (PostgreSQL caído o sin conexiones): no son culpa del evento
+TRANSIENT_DB_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
+
+class ShopifyWebhookReceiver:
+    """
+    IMPLEMENTACIÓN CONCRETA: Recibe webhooks de Shopify para mantener fresco el cache
+
+    Verifica el HMAC de cada webhook, coalesce los eventos en memoria
+    (se conserva el más reciente por nivel de inventario / SKU) y los
+    aplica en lote en PostgreSQL cada flush_interval_seconds o cuando
+    se acumulan max_pending eventos.
+
+    Si PostgreSQL no está disponible el lote completo se reencola. Si el
+    lote falla por otro motivo se aplica evento por evento para aislar al
+    que lo rompe; un evento que falla max_event_attempts vaciados se
+    descarta y se registra en el logger de dead letters.
+    """
+
+    def __init__(
+        self,
+        inventory_repo: IInventoryLevelRepository,
+        secret: str,
+        flush_interval_seconds: float = 2.0,
+        max_pending: int = 500,
+        max_event_attempts: int = 3,
+        path: str = "/webhooks/shopify"
+    ):
+        self._inventory_repo = inventory_repo
+        self._secret = secret.encode("utf-8")
+        self._flush_interval = flush_interval_seconds
+        self._max_pending = max_pending
+        self._max_event_attempts = max(1, max_event_attempts)
+        self._path = path
+
+        self._pending_levels: Dict[str, ShopifyInventoryEvent] = {}
+        self._pending_products: Dict[str, ShopifyProductEvent] = {}
+        # "<tipo>|<clave>" -> (evento, vaciados fallidos); un evento más nuevo reinicia la cuenta
+        self._failed_attempts: Dict[str, Tuple[Any, int]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats = {
+            "received": 0,
+            "rejected": 0,
+            "coalesced": 0,
+            "levels_applied": 0,
+            "products_applied": 0,
+            "flush_errors": 0,
+            "malformed": 0,
+            "dead_lettered": 0
+        }
+
+    @staticmethod
+    def compute_hmac(secret: bytes, body: bytes) -> str:
+        """Firma de Shopify: base64(HMAC-SHA256(secret, body))"""
+        digest = hmac.new(secret, body, hashlib.sha256).digest()
+        return base64.b64encode(digest).decode("utf-8")
+
+    def verify_hmac(self, body: bytes, received_hmac: Optional[str]) -> bool:
+        """Valida el header X-Shopify-Hmac-Sha256 en tiempo constante"""
+        if not received_hmac:
+            return False
+        return hmac.compare_digest(self.compute_hmac(self._secret, body), received_hmac)
+
+    def add_routes(self, app: web.Application) -> None:
+        """Registra la ruta del webhook en una aplicación aiohttp"""
+        app.router.add_post(self._path, self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Endpoint HTTP: valida, coalesce y responde de inmediato"""
+        body = await request.read()
+
+        if not self.verify_hmac(body, request.headers.get("X-Shopify-Hmac-Sha256")):
+            self._stats["rejected"] += 1
+            return web.Response(status=401, text="invalid hmac")
+
+        topic = request.headers.get("X-Shopify-Topic", "")
+        if topic not in (INVENTORY_LEVELS_UPDATE, PRODUCTS_CREATE):
+            return web.Response(status=200, text="ignored")
+
+        try:
+            payload = loads(body)
+        except ValueError:
+            return web.Response(status=400, text="invalid json")
+
+        try:
+            self.ingest(topic, payload)
+        except (TypeError, ValueError, AttributeError, KeyError) as e:
+            self._stats["malformed"] += 1
+            logger.warning(f"Webhook {topic} con payload inválido: {e}")
+            return web.Response(status=400, text="invalid payload")
+        return web.Response(status=200, text="ok")
+
+    def ingest(self, topic: str, payload: Dict[str, Any]) -> None:
+        """
+        Convierte el payload a entidades y las coalesce en memoria
+
+        Raises:
+            TypeError, ValueError: Payload con forma o valores inválidos
+        """
+        if not isinstance(payload, dict):
+            raise TypeError(f"se esperaba un objeto JSON, llegó {type(payload).__name__}")
+        self._stats["received"] += 1
+
+        if topic == INVENTORY_LEVELS_UPDATE:
+            event = self._parse_inventory_level(payload)
+            if event is not None:
+                self._coalesce(self._pending_levels, event.key(), event)
+        elif topic == PRODUCTS_CREATE:
+            for event in self._parse_product(payload):
+                self._coalesce(self._pending_products, event.pos_sku, event)
+
+        if len(self._pending_levels) + len(self._pending_products) >= self._max_pending:
+            self._flush_requested.set()
+
+    def _coalesce(self, pending: Dict[str, Any], key: str, event: Any) -> None:
+        previous = pending.get(key)
+        if previous is not None:
+            self._stats["coalesced"] += 1
+            if not event.is_newer_than(previous):
+                return
+        pending[key] = event
+
+    def _parse_timestamp(self, value: Optional[str]) -> datetime:
+        """Hora del evento, siempre con zona horaria (sin zona se asume la local)"""
+        try:
+            return datetime.fromisoformat(value).astimezone()
+        except (TypeError, ValueError):
+            return datetime.now().astimezone()
+
+    def _parse_inventory_level(self, payload: Dict[str, Any]) -> Optional[ShopifyInventoryEvent]:
+        """inventory_levels/update -> ShopifyInventoryEvent (None si no es rastreable)"""
+        if payload.get("available") is None or not payload.get("inventory_item_id") or not payload.get("location_id"):
+            return None
+
+        return ShopifyInventoryEvent(
+            inventory_item_gid=f"gid://shopify/InventoryItem/{payload['inventory_item_id']}",
+            location_gid=f"gid://shopify/Location/{payload['location_id']}",
+            available=int(payload["available"]),
+            updated_at=self._parse_timestamp(payload.get("updated_at")),
+            inventory_level_gid=payload.get("admin_graphql_api_id")
+        )
+
+    def _parse_product(self, payload: Dict[str, Any]) -> List[ShopifyProductEvent]:
+        """products/create -> una entidad por variante con SKU"""
+        events = []
+        updated_at = self._parse_timestamp(payload.get("updated_at") or payload.get("created_at"))
+        tags = payload.get("tags") or ""
+        tags = {tag.strip() for tag in (tags.split(",") if isinstance(tags, str) else tags)}
+
+        for variant in payload.get("variants") or []:
+            sku = (variant.get("sku") or "").strip()
+            # Sin SKU no hay forma de relacionarlo con el POS (pos_sku VARCHAR(30))
+            if not sku or len(sku) > 30 or not variant.get("inventory_item_id"):
+                continue
+
+            try:
+                price = float(variant.get("price") or 0.0)
+            except (TypeError, ValueError):
+                price = 0.0
+
+            events.append(ShopifyProductEvent(
+                pos_sku=sku,
+                title=payload.get("title") or sku,
+                price=price,
+                shopify_product_gid=payload.get("admin_graphql_api_id") or f"gid://shopify/Product/{payload.get('id')}",
+                shopify_variant_gid=variant.get("admin_graphql_api_id") or f"gid://shopify/ProductVariant/{variant.get('id')}",
+                shopify_inventory_item_gid=f"gid://shopify/InventoryItem/{variant['inventory_item_id']}",
+                updated_at=updated_at,
+                pos_sku_tagged=f"{POS_SKU_TAG_PREFIX}{sku}" in tags
+            ))
+        return events
+
+    async def flush(self) -> Dict[str, int]:
+        """Aplica en PostgreSQL los eventos coalescidos"""
+        async with self._flush_lock:
+            levels, self._pending_levels = self._pending_levels, {}
+            products, self._pending_products = self._pending_products, {}
+
+            applied = {"levels": 0, "products": 0}
+            if not levels and not products:
+                return applied
+
+            # Primero productos: los niveles se relacionan por shopify_inventory_item_gid
+            applied["products"] = await self._apply(
+                "product", products, self._pending_products, self._inventory_repo.apply_shopify_product_events
+            )
+            applied["levels"] = await self._apply(
+                "level", levels, self._pending_levels, self._inventory_repo.apply_shopify_inventory_events
+            )
+
+            self._stats["levels_applied"] += applied["levels"]
+            self._stats["products_applied"] += applied["products"]
+            return applied
+
+    async def _apply(
+        self,
+        kind: str,
+        events: Dict[str, Any],
+        pending: Dict[str, Any],
+        apply_batch: Callable[[List[Any]], Awaitable[int]]
+    ) -> int:
+        """Aplica un lote; si falla aísla los eventos que lo rompen"""
+        if not events:
+            return 0
+
+        try:
+            applied = await apply_batch(list(events.values()))
+        except TRANSIENT_DB_ERRORS as e:
+            self._stats["flush_errors"] += 1
+            logger.error(f"PostgreSQL no disponible aplicando webhooks ({kind}): {e}")
+            self._requeue(pending, events)
+            return 0
+        except Exception as e:
+            self._stats["flush_errors"] += 1
+            logger.error(f"Error aplicando el lote de webhooks ({kind}), se aplican uno por uno: {e}")
+        else:
+            for key in events:
+                self._failed_attempts.pop(f"{kind}|{key}", None)
+            return applied
+
+        applied = 0
+        for key, event in events.items():
+            attempt_key = f"{kind}|{key}"
+            try:
+                applied += await apply_batch([event])
+                self._failed_attempts.pop(attempt_key, None)
+            except TRANSIENT_DB_ERRORS:
+                self._requeue(pending, {key: event})
+            except Exception as e:
+                failed_event, attempts = self._failed_attempts.get(attempt_key, (None, 0))
+                attempts = (attempts if failed_event is event else 0) + 1
+                if attempts < self._max_event_attempts:
+                    self._failed_attempts[attempt_key] = (event, attempts)
+                    self._requeue(pending, {key: event})
+                    continue
+                self._failed_attempts.pop(attempt_key, None)
+                self._stats["dead_lettered"] += 1
+                dead_letter_logger.error(
+                    f"Webhook descartado tras {attempts} intentos ({kind} {key}): {e} | evento: {asdict(event)}"
+                )
+        return applied
+
+    def _requeue(self, pending: Dict[str, Any], events: Dict[str, Any]) -> None:
+        """Reencola sin pisar eventos más nuevos recibidos mientras tanto"""
+        for key, event in events.items():
+            previous = pending.get(key)
+            if previous is None or not previous.is_newer_than(event):
+                pending[key] = event
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        """Arranca el vaciado periódico"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Detiene el vaciado periódico y aplica lo pendiente"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Contadores del receptor"""
+        return {
+            **self._stats,
+            "pending": len(self._pending_levels) + len(self._pending_products)
+        }
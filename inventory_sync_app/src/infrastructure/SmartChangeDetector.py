@@ -3,16 +3,24 @@ from domain.entities.KordataProduct import KordataProduct
 from domain.entities.CacheInventoryLevel import CacheInventoryLevel
 from domain.entities.InventoryChange import InventoryChange
 
-from typing import List, Optional, Dict, Any
+from shared.metrics import get_metrics
+from shared.serialization import dumps_pretty
+
+from typing import List, Optional, Dict, Any, Set
 from decimal import Decimal
 import math
-import json
 import os
 import csv
 from datetime import datetime
 
 class SmartChangeDetector(IChangeDetector):
     """IMPLEMENTACIÓN CONCRETA: Detecta cambios inteligentemente"""
+
+    def __init__(self):
+        # Índice en memoria almacén -> id_location; en modo daemon sobrevive entre ejecuciones
+        self._location_by_almacen: Dict[str, Optional[int]] = {}
+        # Filas del ERP sin nivel en el cache desde el último index_inventory
+        self._cache_misses = 0
     
     async def detect_inventory_changes(
         self, 
@@ -20,13 +28,29 @@ class SmartChangeDetector(IChangeDetector):
         current_inventory: List[CacheInventoryLevel]
     ) -> List[InventoryChange]:
         """Compara ERP vs estado actual y detecta cambios"""
-        changes = []
-        
+        inventory_index = self.index_inventory(current_inventory)
+        changes = await self.detect_partition_changes(erp_products, inventory_index)
+        return self.finalize_changes(changes)
+
+    def index_inventory(self, current_inventory: List[CacheInventoryLevel]) -> Dict[str, CacheInventoryLevel]:
+        """Índice sku-ubicación del cache (se arma una vez y sirve para todas las particiones)"""
         # Crear un diccionario para búsqueda rápida
         inventory_by_sku = {f"{inv.pos_sku}-{inv.id_location}": inv for inv in current_inventory}
         
         print(f"Total inventory items: {len(inventory_by_sku)}")
         print("Sample inventory keys:", list(inventory_by_sku.keys())[:5])
+        self._cache_misses = 0
+        return inventory_by_sku
+
+    async def detect_partition_changes(
+        self,
+        erp_products: List[KordataProduct],
+        inventory_by_sku: Dict[str, CacheInventoryLevel],
+        locations: Optional[Set[int]] = None
+    ) -> List[InventoryChange]:
+        """Cambios de una parte del reporte del ERP contra el índice del cache (sin ordenar ni guardar)"""
+        changes = []
+        cache_misses = 0
         
         # OPCIÓN 1: Si el ERP product ya tiene la ubicación definida
         for erp_product in erp_products:
@@ -37,44 +61,50 @@ class SmartChangeDetector(IChangeDetector):
             if location_id is None:
                 #print(f"No se pudo mapear almacen '{erp_product.almacen}' para SKU {erp_product.sku}")
                 continue
+            if locations is not None and location_id not in locations:
+                # Ubicación de otro worker: su nivel no está en este cache y no es un faltante
+                continue
                 
             sku = erp_product.sku
             new_quantity = erp_product.existencia
             code = f"{sku}-{location_id}"
             
-            print(f"Buscando: {code}")
-            
             if code in inventory_by_sku:
                 current_inv = inventory_by_sku[code]
-                old_quantity = current_inv.quantities_available
-                
-                print(f"Encontrado {code}: old={old_quantity}, new={new_quantity}")
                 
                 # APLICAR REGLAS DE NEGOCIO DE LA ENTIDAD
                 if current_inv.should_update(new_quantity) or current_inv.is_new_product():
                     priority = 1 if current_inv.is_critical_change(new_quantity) else 3
-                    
-                    change = InventoryChange(
-                        sku=sku,
-                        id_location=current_inv.id_location,
-                        old_quantity=old_quantity,
-                        new_quantity=new_quantity,
-                        priority=priority,
-                        estimated_cost=Decimal('0.01'),
-                        sync_op="CREATE" if current_inv.sync_op == "CREATE" else "UPDATE",
-                        shopify_inventory_item=current_inv.shopify_inventory_item_gid,
-                        title=current_inv.title,
-                        price=current_inv.price,
-                        price_compare=current_inv.price_compare,
-                        shopify_location_gid=current_inv.shopify_location_gid
-                    )
-                    changes.append(change)
-                    print(f"Change detected for {change.sku}: {old_quantity} -> {new_quantity}")
+                    changes.append(self._build_change(sku, new_quantity, current_inv, priority))
             else:
-                print(f"No encontrado en cache: {code}")
-        
+                cache_misses += 1
         
-        print(f"Total changes detected: {len(changes)}")
+        # Un print por fila dominaba el tiempo de detección; solo se reportan totales
+        get_metrics().detector_cache_misses.inc(cache_misses)
+        self._cache_misses += cache_misses
+        return changes
+
+    @staticmethod
+    def _build_change(sku: str, new_quantity: float, current_inv: CacheInventoryLevel, priority: int) -> InventoryChange:
+        """Cambio de inventario de una fila del ERP contra su nivel en el cache"""
+        return InventoryChange(
+            sku=sku,
+            id_location=current_inv.id_location,
+            old_quantity=current_inv.quantities_available,
+            new_quantity=new_quantity,
+            priority=priority,
+            estimated_cost=Decimal('0.01'),
+            sync_op="CREATE" if current_inv.sync_op == "CREATE" else "UPDATE",
+            shopify_inventory_item=current_inv.shopify_inventory_item_gid,
+            title=current_inv.title,
+            price=current_inv.price,
+            price_compare=current_inv.price_compare,
+            shopify_location_gid=current_inv.shopify_location_gid
+        )
+
+    def finalize_changes(self, changes: List[InventoryChange]) -> List[InventoryChange]:
+        """Ordena los cambios de todas las particiones por prioridad y los guarda en JSON/CSV"""
+        print(f"Total changes detected: {len(changes)} (sin cache: {self._cache_misses})")
         
         # Ordenar por prioridad (críticos primero)
         changes.sort(key=lambda x: x.priority)
@@ -86,7 +116,16 @@ class SmartChangeDetector(IChangeDetector):
         return changes
     
     def _map_almacen_to_location(self, almacen: str) -> Optional[int]:
-        """Mapea el nombre del almacén del ERP a id_location"""
+        """Mapea el nombre del almacén del ERP a id_location (con memoria por nombre)"""
+        if almacen in self._location_by_almacen:
+            return self._location_by_almacen[almacen]
+
+        location_id = self._resolve_almacen(almacen)
+        self._location_by_almacen[almacen] = location_id
+        return location_id
+
+    def _resolve_almacen(self, almacen: str) -> Optional[int]:
+        """Resuelve el almacén contra el mapeo de ubicaciones"""
         # Define tu mapeo según tu lógica de negocio
         almacen_mapping = {
             "CEDIS": 1,
@@ -169,8 +208,8 @@ class SmartChangeDetector(IChangeDetector):
         
         # Guardar archivo JSON
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            with open(filepath, 'wb') as f:
+                f.write(dumps_pretty(json_data))
             
             print(f"✅ Cambios guardados en: {filepath}")
             print(f"📊 Total de cambios: {len(changes)}")
@@ -429,8 +468,8 @@ class SmartChangeDetectorDebug(IChangeDetector):
         
         # Guardar archivo JSON
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            with open(filepath, 'wb') as f:
+                f.write(dumps_pretty(json_data))
             
             print(f"✅ Cambios guardados en: {filepath}")
             print(f"📊 Total de cambios: {len(changes)}")
@@ -0,0 +1,338 @@
+from presentation.main import build_sync_use_case, setup_tracing, run_profiler
+from application.SyncInventoryUseCase import SyncInventoryUseCase
+from application.AdaptiveSyncInterval import AdaptiveSyncInterval
+from infrastructure.PostgreSQLInventoryRepository import PostgreSQLInventoryRepository
+from infrastructure.PostgreSQLSyncLogRepository import PostgreSQLSyncLogRepository
+from infrastructure.ShopifyWebhookReceiver import ShopifyWebhookReceiver
+
+from shared.config.config_manager import ApplicationConfig, get_config
+from shared.metrics import get_metrics as get_sync_metrics
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from aiohttp import web
+import aiohttp
+import asyncpg
+import asyncio
+import logging
+import signal
+
+logger = logging.getLogger(__name__)
+
+class SyncDaemon:
+    """
+    Proceso de larga duración para la sincronización programada
+
+    Mantiene vivos entre ejecuciones un único event loop, el pool de
+    PostgreSQL, la sesión HTTP y el grafo de objetos del caso de uso
+    (incluyendo el memo almacén -> ubicación del detector). El índice de
+    niveles de inventario NO es residente: cada ejecución lo reconstruye
+    desde el cache de PostgreSQL, que es la fuente de verdad (los webhooks
+    lo actualizan entre ejecuciones).
+
+    En modo continuo no usa horarios fijos: encadena re-sincronizaciones
+    completas (cada una descarga el reporte entero del ERP y lo compara con
+    el cache) separadas por una espera calculada por AdaptiveSyncInterval.
+
+    Si hay secreto de webhooks configurado, expone además el receptor
+    de webhooks de Shopify para mantener fresco el cache entre ejecuciones.
+
+    Con METRICS_PORT configurado expone GET /metrics en formato Prometheus
+    (por defecto solo en 127.0.0.1; METRICS_HOST lo abre a la red).
+    """
+
+    def __init__(self, config: ApplicationConfig, continuous: bool = False):
+        self._config = config
+        self._sync_config = config.sync
+        self._continuous = continuous
+        self._scheduler: Optional[AsyncIOScheduler] = None
+        self._db_pool: Optional[asyncpg.Pool] = None
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._use_case: Optional[SyncInventoryUseCase] = None
+        self._webhook_receiver: Optional[ShopifyWebhookReceiver] = None
+        self._web_runner: Optional[web.AppRunner] = None
+        self._metrics_runner: Optional[web.AppRunner] = None
+
+        # Protección contra ejecuciones superpuestas y drenado ordenado
+        self._run_lock = asyncio.Lock()
+        self._current_run: Optional[asyncio.Task] = None
+        self._stop_event = asyncio.Event()
+        self._stopping = False
+        self._last_result: Optional[Dict[str, Any]] = None
+        self._metrics: Dict[str, float] = {
+            "sync_lag_seconds": 0.0,
+            "sync_lag_upper_bound_seconds": 0.0,
+            "next_interval_seconds": 0.0,
+            "change_rate_per_second": 0.0
+        }
+
+    async def start(self) -> None:
+        """Crea los recursos compartidos y arranca el scheduler"""
+        self._db_pool = await asyncpg.create_pool(
+            self._config.database.database_url,
+            min_size=self._sync_config.db_pool_min_size,
+            max_size=self._sync_config.db_pool_max_size
+        )
+        self._http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self._sync_config.http_pool_limit)
+        )
+        self._use_case = build_sync_use_case(
+            self._config,
+            db_pool=self._db_pool,
+            http_session=self._http_session
+        )
+        await self._start_webhook_receiver()
+        await self._start_metrics_server()
+
+        self._scheduler = AsyncIOScheduler(timezone=self._sync_config.timezone)
+        self._schedule_log_maintenance()
+        if self._continuous:
+            self._scheduler.start()
+            logger.info("Daemon iniciado en modo continuo (intervalo adaptativo)")
+            return
+
+        for i, (hour, minute) in enumerate(self._sync_config.get_sync_times()):
+            self._scheduler.add_job(
+                self.run_sync,
+                CronTrigger(hour=hour, minute=minute, timezone=self._sync_config.timezone),
+                id=f'inventory_sync_{i}',
+                name=f'Sincronización {hour:02d}:{minute:02d}',
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=self._sync_config.misfire_grace_seconds,
+                replace_existing=True
+            )
+        self._scheduler.start()
+
+        schedule_times = [f"{h:02d}:{m:02d}" for h, m in self._sync_config.get_sync_times()]
+        logger.info(f"Daemon iniciado. Ejecutará en los horarios: {', '.join(schedule_times)}")
+
+    def _schedule_log_maintenance(self) -> None:
+        """Mantenimiento diario de las particiones de product_sync_log (también en modo continuo)"""
+        hour, minute = self._sync_config.get_sync_log_maintenance_time()
+        self._scheduler.add_job(
+            self.run_log_maintenance,
+            CronTrigger(hour=hour, minute=minute, timezone=self._sync_config.timezone),
+            id='sync_log_maintenance',
+            name=f'Mantenimiento de product_sync_log {hour:02d}:{minute:02d}',
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=self._sync_config.misfire_grace_seconds,
+            replace_existing=True
+        )
+
+    async def run_log_maintenance(self) -> Optional[Dict[str, int]]:
+        """Crea las particiones de los meses siguientes y quita las vencidas"""
+        sync_log_repo = PostgreSQLSyncLogRepository(
+            connection_string=self._config.database.database_url,
+            pool=self._db_pool
+        )
+        try:
+            result = await sync_log_repo.maintain_partitions(
+                self._sync_config.sync_log_partition_months_ahead,
+                self._sync_config.sync_log_retention_months
+            )
+        except Exception as e:
+            logger.error(f"Error en el mantenimiento de product_sync_log: {str(e)}")
+            return None
+        logger.info(f"product_sync_log: {result['created']} particiones creadas, {result['dropped']} quitadas por retención")
+        return result
+
+    async def _start_webhook_receiver(self) -> None:
+        """Levanta el servidor HTTP de webhooks (solo si hay secreto configurado)"""
+        shopify_config = self._config.shopify
+        if not shopify_config.webhook_secret:
+            return
+
+        self._webhook_receiver = ShopifyWebhookReceiver(
+            inventory_repo=PostgreSQLInventoryRepository(
+                connection_string=self._config.database.database_url,
+                pool=self._db_pool
+            ),
+            secret=shopify_config.webhook_secret,
+            flush_interval_seconds=shopify_config.webhook_flush_interval_seconds,
+            max_pending=shopify_config.webhook_max_pending,
+            max_event_attempts=shopify_config.webhook_max_event_attempts
+        )
+        app = web.Application()
+        self._webhook_receiver.add_routes(app)
+
+        self._web_runner = web.AppRunner(app)
+        await self._web_runner.setup()
+        await web.TCPSite(self._web_runner, shopify_config.webhook_host, shopify_config.webhook_port).start()
+        await self._webhook_receiver.start()
+        logger.info(f"Receptor de webhooks escuchando en {shopify_config.webhook_host}:{shopify_config.webhook_port}")
+
+    async def _start_metrics_server(self) -> None:
+        """Levanta el endpoint /metrics (solo si hay puerto configurado)"""
+        if not self._sync_config.metrics_port:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+
+        self._metrics_runner = web.AppRunner(app)
+        await self._metrics_runner.setup()
+        await web.TCPSite(self._metrics_runner, self._sync_config.metrics_host, self._sync_config.metrics_port).start()
+        logger.info(f"Métricas Prometheus en {self._sync_config.metrics_host}:{self._sync_config.metrics_port}/metrics")
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        sync_metrics = get_sync_metrics()
+        return web.Response(body=sync_metrics.render(), headers={"Content-Type": sync_metrics.CONTENT_TYPE})
+
+    async def run_sync(self) -> Optional[Dict[str, Any]]:
+        """Ejecuta una sincronización si no hay otra en curso"""
+        if self._stopping:
+            logger.info("Daemon en proceso de cierre, se omite la ejecución")
+            return None
+
+        if self._run_lock.locked():
+            logger.warning("Sincronización anterior aún en curso, se omite esta ejecución")
+            return None
+
+        async with self._run_lock:
+            self._current_run = asyncio.current_task()
+            try:
+                logger.info("Iniciando sincronización de inventario...")
+                with run_profiler(self._config):
+                    result = await self._use_case.execute()
+                self._last_result = result
+                self._metrics["sync_lag_seconds"] = result.get("sync_lag_seconds", 0.0)
+                self._metrics["sync_lag_upper_bound_seconds"] = result.get("sync_lag_upper_bound_seconds", 0.0)
+                logger.info(f"Sincronización terminada: {result.get('status')} en {result.get('operation_time_seconds')}s")
+                return result
+            except Exception as e:
+                logger.error(f"Error durante la sincronización: {str(e)}")
+                return None
+            finally:
+                self._current_run = None
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Métricas del daemon (lag ERP -> Shopify, intervalo actual, tasa de cambios)"""
+        return dict(self._metrics)
+
+    async def run_continuous(self) -> None:
+        """Encadena re-sincronizaciones completas con intervalo adaptativo"""
+        policy = AdaptiveSyncInterval(
+            min_interval_seconds=self._sync_config.continuous_min_interval_seconds,
+            max_interval_seconds=self._sync_config.continuous_max_interval_seconds,
+            target_changes_per_run=self._sync_config.continuous_target_changes_per_run,
+            store_open_hour=self._sync_config.store_open_hour,
+            store_close_hour=self._sync_config.store_close_hour,
+            off_hours_factor=self._sync_config.off_hours_factor,
+            budget_low_watermark=self._sync_config.api_budget_low_watermark
+        )
+        interval = 0.0
+
+        while not self._stopping:
+            result = await self.run_sync() or {}
+
+            interval = policy.next_interval(
+                changes_detected=result.get("changes_detected", 0),
+                elapsed_seconds=interval + result.get("operation_time_seconds", 0.0),
+                api_budget=result.get("shopify_api_budget"),
+                now=datetime.now(self._scheduler.timezone)
+            )
+            self._metrics["next_interval_seconds"] = interval
+            self._metrics["change_rate_per_second"] = policy.change_rate
+            get_sync_metrics().next_interval_seconds.set(interval)
+            get_sync_metrics().change_rate_per_second.set(policy.change_rate)
+            logger.info(
+                f"Lag ERP -> Shopify: {self._metrics['sync_lag_seconds']:.1f}s "
+                f"(cota superior {self._metrics['sync_lag_upper_bound_seconds']:.1f}s). "
+                f"Siguiente sincronización en {interval:.0f}s"
+            )
+
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _should_run_on_start(self) -> bool:
+        """Ejecuta al inicio solo si no hay una ejecución programada pronto"""
+        now = datetime.now(self._scheduler.timezone)
+        window = timedelta(minutes=self._sync_config.startup_run_window_minutes)
+
+        for job in self._scheduler.get_jobs():
+            if not job.id.startswith('inventory_sync_'):
+                continue
+            if job.next_run_time is not None and job.next_run_time - now < window:
+                minutes = int((job.next_run_time - now).total_seconds() / 60)
+                logger.info(f"Próxima ejecución programada en {minutes} minutos. Esperando...")
+                return False
+        return True
+
+    def request_stop(self) -> None:
+        """Marca el daemon para detenerse (llamado desde el manejador de señales)"""
+        logger.info("Recibida señal de terminación. Drenando ejecución en curso...")
+        self._stopping = True
+        self._stop_event.set()
+
+    async def shutdown(self) -> None:
+        """Detiene el scheduler, espera la ejecución en curso y libera recursos"""
+        self._stopping = True
+        if self._scheduler is not None and self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+
+        current_run = self._current_run
+        if current_run is not None and not current_run.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(current_run), timeout=self._sync_config.drain_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.error("La ejecución en curso excedió el tiempo de drenado, cancelando")
+                current_run.cancel()
+                await asyncio.gather(current_run, return_exceptions=True)
+
+        # Dejar de aceptar webhooks y aplicar los pendientes antes de cerrar el pool
+        if self._web_runner is not None:
+            await self._web_runner.cleanup()
+        if self._webhook_receiver is not None:
+            await self._webhook_receiver.stop()
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+
+        if self._use_case is not None:
+            try:
+                await self._use_case.release_locations()
+            except Exception as e:
+                logger.warning(f"No se pudieron liberar las ubicaciones (vencerán solas): {e}")
+            self._use_case.close()
+        if self._http_session is not None:
+            await self._http_session.close()
+        if self._db_pool is not None:
+            await self._db_pool.close()
+        logger.info("Daemon cerrado")
+
+    async def serve(self) -> None:
+        """Punto de entrada: arranca, espera señal de terminación y drena"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.request_stop)
+
+        await self.start()
+        background: Optional[asyncio.Task] = None
+        try:
+            if self._continuous:
+                background = asyncio.create_task(self.run_continuous())
+            elif self._should_run_on_start():
+                logger.info("Ejecutando sincronización inicial...")
+                # Registrada como ejecución en curso para que shutdown() la drene
+                self._current_run = asyncio.create_task(self.run_sync())
+
+            await self._stop_event.wait()
+        finally:
+            await self.shutdown()
+            if background is not None:
+                await asyncio.gather(background, return_exceptions=True)
+
+async def run_daemon(config: ApplicationConfig = None, continuous: bool = False):
+    """Arranca el daemon de sincronización"""
+    if config is None:
+        config = get_config()
+
+    setup_tracing(config)
+    daemon = SyncDaemon(config, continuous=continuous)
+    await daemon.serve()
@@ -1,61 +1,214 @@
-from infrastructure.ERPDataExtractor import ERPDataExtractor
+from infrastructure.ERPDataExtractor import ERPDataExtractor, ERP_FAILURE_TYPES
 from infrastructure.PostgreSQLInventoryRepository import PostgreSQLInventoryRepository
 from infrastructure.SmartChangeDetector import SmartChangeDetector
-from infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater
+from infrastructure.ShardedChangeDetector import ShardedChangeDetector
+from infrastructure.PostgreSQLLocationLeaseRepository import PostgreSQLLocationLeaseRepository
+from infrastructure.PostgreSQLApiBudgetRepository import PostgreSQLApiBudgetRepository
+from infrastructure.SharedThrottleBudget import SharedThrottleBudget
+from application.LocationShardCoordinator import LocationShardCoordinator
+from infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater, SHOPIFY_FAILURE_TYPES
+from infrastructure.PriorityUpdateScheduler import PriorityUpdateScheduler
 from application.SyncInventoryUseCase import SyncInventoryUseCase
 from infrastructure.PostgreSQLSyncLogRepository import PostgreSQLSyncLogRepository
+from infrastructure.PostgreSQLSyncJournalRepository import PostgreSQLSyncJournalRepository
 
 from shared.config.config_manager import ApplicationConfig, get_config
 from shared.logging.logging_setup import setup_logging
+from shared.metrics import get_metrics
+from shared.tracing import configure_tracing, JSONFileSpanExporter
+from shared.profiling import profile_run
+from shared.resilience import RetryPolicy, UpstreamGuard, CircuitBreaker, AdaptiveConcurrencyLimiter
 
+from typing import Optional, ContextManager
+from datetime import timedelta
+from contextlib import nullcontext
+import aiohttp
+import asyncpg
 import asyncio
+import os
 
-async def main(config: ApplicationConfig = None):
-    """COMPOSICIÓN: Aquí se ensambla toda la aplicación"""
-    
-    if config is None:
-        config = get_config()
+def build_sync_use_case(
+    config: ApplicationConfig,
+    db_pool: Optional[asyncpg.Pool] = None,
+    http_session: Optional[aiohttp.ClientSession] = None
+) -> SyncInventoryUseCase:
+    """COMPOSICIÓN: Ensambla el caso de uso (con pool/sesión compartidos si se proporcionan)"""
 
-
-    
     # 1. CREAR IMPLEMENTACIONES CONCRETAS (INFRASTRUCTURE)
+    erp_config = config.erp
     erp_extractor = ERPDataExtractor(
-        endpoint_url=config.erp.endpoint_url,
-        bearer_token=config.erp.api_key
+        endpoint_url=erp_config.endpoint_url,
+        bearer_token=erp_config.api_key,
+        timeout=erp_config.timeout_seconds,
+        session=http_session,
+        partition_key=erp_config.partition_key,
+        partition_values=erp_config.get_partition_values(),
+        partition_locations=erp_config.get_partition_locations(),
+        max_concurrency=erp_config.max_concurrency,
+        guard=UpstreamGuard(
+            "erp",
+            breaker=CircuitBreaker(
+                "erp",
+                failure_threshold=erp_config.circuit_failure_threshold,
+                reset_timeout_seconds=erp_config.circuit_reset_seconds
+            ),
+            limiter=AdaptiveConcurrencyLimiter(
+                initial_limit=erp_config.max_concurrency,
+                max_limit=erp_config.max_concurrency,
+                latency_target_seconds=erp_config.timeout_seconds
+            ),
+            failure_types=ERP_FAILURE_TYPES
+        )
     )
-    
+
+    sync_config = config.sync
+    # Con pool (daemon) el repositorio vive entre ejecuciones y puede conservar el cache en memoria
     inventory_repo = PostgreSQLInventoryRepository(
-        connection_string=f"postgresql://{config.database.user}:{config.database.password}@{config.database.host}/{config.database.name}"
+        connection_string=config.database.database_url,
+        pool=db_pool,
+        incremental=db_pool is not None and sync_config.inventory_cache_incremental,
+        skew_margin_seconds=sync_config.inventory_cache_skew_margin_seconds,
+        full_resync_seconds=sync_config.inventory_cache_full_resync_seconds
     )
-    
+
     sync_log_repo = PostgreSQLSyncLogRepository(  # No implementé esta clase por brevedad
-        connection_string=f"postgresql://{config.database.user}:{config.database.password}@{config.database.host}/{config.database.name}"
+        connection_string=config.database.database_url,
+        pool=db_pool
     )
-    
-    change_detector = SmartChangeDetector()
-    
-    shopify_updater = ShopifyInventoryUpdater(
-        shop_url=config.shopify.shop_domain,
-        access_token=config.shopify.access_token
+
+    # Modo por ubicaciones: leases por worker, journal por worker y bucket de Shopify compartido
+    location_shard = None
+    throttle_budget = None
+    if sync_config.location_sharding:
+        location_shard = LocationShardCoordinator(
+            PostgreSQLLocationLeaseRepository(connection_string=config.database.database_url, pool=db_pool),
+            owner=sync_config.get_worker_id(),
+            candidates=sync_config.get_shard_locations(),
+            max_locations=sync_config.shard_max_locations,
+            lease_ttl_seconds=sync_config.shard_lease_ttl_seconds
+        )
+        throttle_budget = SharedThrottleBudget(
+            PostgreSQLApiBudgetRepository(connection_string=config.database.database_url, pool=db_pool),
+            bucket=config.shopify.shop_domain
+        )
+
+    sync_journal = PostgreSQLSyncJournalRepository(
+        connection_string=config.database.database_url,
+        pool=db_pool,
+        owner=location_shard.owner if location_shard is not None else None
     )
-    
+
+    if sync_config.detector_workers > 0:
+        change_detector = ShardedChangeDetector(
+            workers=sync_config.detector_workers,
+            shard_by=sync_config.detector_shard_by,
+            min_rows_for_processes=sync_config.detector_min_rows_per_process
+        )
+    else:
+        change_detector = SmartChangeDetector()
+
+    shopify_config = config.shopify
+    shopify_updater = PriorityUpdateScheduler(
+        ShopifyInventoryUpdater(
+            shop_url=shopify_config.shop_domain,
+            access_token=shopify_config.access_token,
+            session=http_session,
+            retry_policy=RetryPolicy(
+                max_attempts=shopify_config.retry_max_attempts,
+                base_delay_seconds=shopify_config.retry_base_delay_seconds,
+                max_delay_seconds=shopify_config.retry_max_delay_seconds
+            ),
+            guard=UpstreamGuard(
+                "shopify",
+                breaker=CircuitBreaker(
+                    "shopify",
+                    failure_threshold=shopify_config.circuit_failure_threshold,
+                    reset_timeout_seconds=shopify_config.circuit_reset_seconds
+                ),
+                limiter=AdaptiveConcurrencyLimiter(
+                    initial_limit=shopify_config.concurrency_initial,
+                    max_limit=shopify_config.concurrency_max,
+                    latency_target_seconds=shopify_config.latency_target_seconds
+                ),
+                failure_types=SHOPIFY_FAILURE_TYPES
+            ),
+            throttle_budget=throttle_budget
+        ),
+        critical_reserve_fraction=shopify_config.critical_reserve_fraction,
+        normal_lane_max_seconds=shopify_config.normal_lane_max_seconds
+    )
+
     # 2. INYECTAR DEPENDENCIAS EN EL CASO DE USO (APPLICATION)
-    sync_use_case = SyncInventoryUseCase(
+    return SyncInventoryUseCase(
         erp_extractor=erp_extractor,
         inventory_repo=inventory_repo,
         sync_log_repo=sync_log_repo,
         change_detector=change_detector,
-        shopify_updater=shopify_updater
+        shopify_updater=shopify_updater,
+        sync_journal=sync_journal,
+        resume_max_attempts=config.sync.resume_max_attempts,
+        resume_max_age=timedelta(hours=config.sync.resume_max_age_hours),
+        location_shard=location_shard
+    )
+
+def setup_tracing(config: ApplicationConfig) -> None:
+    """Activa la exportación de spans a log_dir si TRACING_ENABLED está encendido"""
+    logging_config = config.logging
+    if logging_config.tracing_enabled:
+        configure_tracing(JSONFileSpanExporter(os.path.join(logging_config.log_dir, logging_config.tracing_filename)))
+
+def run_profiler(config: ApplicationConfig) -> ContextManager:
+    """Perfilado de una ejecución si PROFILING_ENABLED (o --profile) está activo"""
+    logging_config = config.logging
+    if not logging_config.profiling_enabled:
+        return nullcontext()
+    return profile_run(
+        os.path.join(logging_config.log_dir, "profiles"),
+        interval_seconds=logging_config.profiling_interval_seconds,
+        top_n=logging_config.profiling_top_n
     )
-    
+
+async def main(config: ApplicationConfig = None):
+    """COMPOSICIÓN: Aquí se ensambla toda la aplicación"""
+
+    if config is None:
+        config = get_config()
+
+    setup_tracing(config)
+
+    sync_use_case = build_sync_use_case(config)
+
     # 3. EJECUTAR EL CASO DE USO
     print("🚀 Iniciando sincronización ERP -> Shopify...")
-    result = await sync_use_case.execute()
-    
+    try:
+        with run_profiler(config):
+            result = await sync_use_case.execute()
+    finally:
+        # Ejecución única: las ubicaciones quedan libres para el siguiente worker que arranque
+        await sync_use_case.release_locations()
+        sync_use_case.close()
+
     print("\n📊 RESULTADO:")
     for key, value in result.items():
         print(f"   {key}: {value}")
 
+    # Sin daemon, cada ejecución mantiene las particiones de product_sync_log
+    sync_config = config.sync
+    try:
+        maintenance = await PostgreSQLSyncLogRepository(connection_string=config.database.database_url).maintain_partitions(
+            sync_config.sync_log_partition_months_ahead,
+            sync_config.sync_log_retention_months
+        )
+        print(f"🗂️ product_sync_log: {maintenance['created']} particiones creadas, {maintenance['dropped']} quitadas por retención")
+    except Exception as e:
+        print(f"⚠️ No se pudo mantener product_sync_log: {e}")
+
+    # En ejecución única no hay endpoint /metrics: se deja el archivo para el textfile collector
+    metrics_textfile = config.sync.metrics_textfile
+    if metrics_textfile:
+        get_metrics().write_textfile(metrics_textfile)
+        print(f"📈 Métricas escritas en {metrics_textfile}")
+
 # Ejecutar la aplicación
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -3,11 +3,22 @@
 # ===================================================
 """
 Módulo de utilidades compartidas
-Contiene configuración, logging y excepciones
+Contiene configuración, logging, métricas y excepciones
+
+Los símbolos de configuración y logging se cargan al primer uso: importar
+shared.metrics desde la infraestructura no debe exigir que la configuración
+(variables de entorno) esté disponible.
 """
 
-from .config.config_manager import get_config, ApplicationConfig
-from .logging.logging_setup import setup_logging, get_logger, get_component_logger
+import importlib
+
+_LAZY_EXPORTS = {
+    "get_config": ".config.config_manager",
+    "ApplicationConfig": ".config.config_manager",
+    "setup_logging": ".logging.logging_setup",
+    "get_logger": ".logging.logging_setup",
+    "get_component_logger": ".logging.logging_setup",
+}
 
 __all__ = [
     "get_config",
@@ -15,4 +26,11 @@ __all__ = [
     "setup_logging",
     "get_logger",
     "get_component_logger"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
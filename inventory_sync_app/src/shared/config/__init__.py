@@ -10,6 +10,7 @@ from .config_manager import (
     DatabaseConfig,
     ERPConfig,
     ShopifyConfig,
+    SyncConfig,
     LoggingConfig,
     get_config,
     reload_config,
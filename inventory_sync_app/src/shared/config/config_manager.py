@@ -4,7 +4,8 @@ Ubicación: src/shared/config/config_manager.py
 """
 
 import os
-from typing import Optional
+import socket
+from typing import Optional, List, Tuple, Dict
 from pydantic import field_validator, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from enum import Enum
@@ -44,7 +45,7 @@ class DatabaseConfig(BaseSettings):
     @property
     def database_url(self) -> str:
         """Construye la URL de conexión a la base de datos"""
-        return f"postgresql://{self.user}:{self.password}@{self.host}/{self.name}"
+        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
 
 
 class ERPConfig(BaseSettings):
@@ -58,6 +59,22 @@ class ERPConfig(BaseSettings):
     
     endpoint_url: str = Field(..., description="URL del endpoint del ERP")
     api_key: Optional[str] = Field(None, description="API Key del ERP")
+    timeout_seconds: float = Field(300.0, description="Tiempo máximo de descarga del reporte")
+    circuit_failure_threshold: int = Field(3, description="Fallas consecutivas que abren el circuito hacia el ERP")
+    circuit_reset_seconds: float = Field(120.0, description="Tiempo con el circuito abierto antes de probar de nuevo")
+    partition_key: str = Field("almacenId", description="Parámetro del reporte por el que se divide la extracción")
+    partition_values: str = Field("", description="Valores de la partición separados por coma (vacío = un solo reporte completo)")
+    partition_locations: str = Field("", description="valor:id_location separados por coma; con sharding por ubicación cada worker pide solo las particiones de sus ubicaciones")
+    max_concurrency: int = Field(4, description="Particiones del reporte descargadas a la vez")
+
+    def get_partition_values(self) -> List[str]:
+        """Convierte partition_values en lista (sin vacíos)"""
+        return [value.strip() for value in self.partition_values.split(",") if value.strip()]
+
+    def get_partition_locations(self) -> Dict[str, int]:
+        """Convierte partition_locations ("12:1,13:2") en {valor de partición: id_location}"""
+        pairs = [pair.split(":", 1) for pair in self.partition_locations.split(",") if pair.strip()]
+        return {value.strip(): int(location) for value, location in pairs}
 
 
 class ShopifyConfig(BaseSettings):
@@ -71,6 +88,111 @@ class ShopifyConfig(BaseSettings):
     
     access_token: str = Field(..., description="Token de acceso de Shopify")
     shop_domain: str = Field(..., description="Dominio de la tienda Shopify")
+    critical_reserve_fraction: float = Field(0.25, description="Fracción del bucket de costo reservada para cambios críticos")
+    normal_lane_max_seconds: Optional[float] = Field(None, description="Tiempo máximo por ejecución para cambios normales (None = sin límite)")
+    
+    # Reintentos (429/5xx/THROTTLED/timeouts)
+    retry_max_attempts: int = Field(4, description="Intentos por cambio antes de marcarlo FAILED")
+    retry_base_delay_seconds: float = Field(0.5, description="Base del backoff exponencial con jitter")
+    retry_max_delay_seconds: float = Field(30.0, description="Espera máxima entre intentos")
+    
+    # Circuit breaker y concurrencia adaptativa (AIMD)
+    concurrency_initial: int = Field(4, description="Envíos simultáneos al arrancar")
+    concurrency_max: int = Field(16, description="Tope de envíos simultáneos")
+    latency_target_seconds: float = Field(2.0, description="Latencia por encima de la cual se reduce la concurrencia")
+    circuit_failure_threshold: int = Field(5, description="Fallas consecutivas que abren el circuito hacia Shopify")
+    circuit_reset_seconds: float = Field(30.0, description="Tiempo con el circuito abierto antes de probar de nuevo")
+    
+    # Webhooks (inventory_levels/update, products/create)
+    webhook_secret: Optional[str] = Field(None, description="Secreto para validar el HMAC de los webhooks (None = receptor deshabilitado)")
+    webhook_host: str = Field("0.0.0.0", description="Host del receptor de webhooks")
+    webhook_port: int = Field(8080, description="Puerto del receptor de webhooks")
+    webhook_flush_interval_seconds: float = Field(2.0, description="Cada cuánto se aplican los webhooks acumulados en PostgreSQL")
+    webhook_max_pending: int = Field(500, description="Eventos acumulados que fuerzan un vaciado inmediato")
+    webhook_max_event_attempts: int = Field(3, description="Vaciados fallidos de un evento antes de descartarlo (dead letter)")
+
+
+class SyncConfig(BaseSettings):
+    """Configuración del proceso de sincronización (modo daemon)"""
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore"
+    )
+    
+    sync_times: str = Field("09:30,13:00,16:30,19:45", description="Horarios de ejecución HH:MM separados por coma")
+    timezone: str = Field("America/Mexico_City", description="Zona horaria del scheduler")
+    startup_run_window_minutes: int = Field(30, description="No ejecutar al inicio si hay una ejecución programada dentro de esta ventana")
+    misfire_grace_seconds: int = Field(600, description="Tolerancia para ejecuciones atrasadas del scheduler")
+    drain_timeout_seconds: float = Field(300.0, description="Tiempo máximo para terminar la ejecución en curso al recibir SIGTERM")
+    resume_max_attempts: int = Field(3, description="Intentos de reanudar una ejecución interrumpida antes de abandonarla")
+    resume_max_age_hours: float = Field(24.0, description="Antigüedad máxima de una ejecución interrumpida para reanudarla")
+    
+    # Pools compartidos entre ejecuciones
+    db_pool_min_size: int = Field(1, description="Conexiones mínimas del pool PostgreSQL")
+    db_pool_max_size: int = Field(5, description="Conexiones máximas del pool PostgreSQL")
+    http_pool_limit: int = Field(20, description="Conexiones HTTP simultáneas del pool compartido")
+    
+    # Modo continuo (intervalo adaptativo)
+    continuous_min_interval_seconds: float = Field(30.0, description="Espera mínima entre sincronizaciones continuas")
+    continuous_max_interval_seconds: float = Field(900.0, description="Espera máxima en horario de tienda")
+    continuous_target_changes_per_run: int = Field(200, description="Cambios objetivo por ejecución para calcular la espera")
+    store_open_hour: int = Field(9, description="Hora de apertura de tienda (zona horaria del scheduler)")
+    store_close_hour: int = Field(21, description="Hora de cierre de tienda")
+    off_hours_factor: float = Field(4.0, description="Multiplicador de la espera fuera de horario")
+    api_budget_low_watermark: float = Field(0.3, description="Fracción del bucket de Shopify bajo la cual se espera su restauración")
+    
+    # Detección de cambios en varios procesos (catálogos grandes)
+    detector_workers: int = Field(0, description="Procesos para detectar cambios (0 = en el proceso principal)")
+    detector_shard_by: str = Field("location", description="Reparto de la detección entre procesos: location o sku")
+    detector_min_rows_per_process: int = Field(200000, description="Filas de una partición del ERP a partir de las cuales se usan los procesos")
+    
+    # Modo por ubicaciones (varios workers/hosts con ubicaciones disjuntas)
+    location_sharding: bool = Field(False, description="Cada worker sincroniza solo las ubicaciones de las que tiene lease")
+    worker_id: Optional[str] = Field(None, description="Identificador estable del worker (por defecto el hostname); distinto por proceso en un mismo host")
+    shard_locations: str = Field("", description="id_location candidatos separados por coma (vacío = todas las de shopify_location)")
+    shard_max_locations: int = Field(0, description="Máximo de ubicaciones por worker (0 = sin límite)")
+    shard_lease_ttl_seconds: float = Field(300.0, description="Vigencia de un lease sin renovar (se renueva cada tercio)")
+    
+    # Lectura incremental del cache de inventario (solo modo daemon)
+    inventory_cache_incremental: bool = Field(False, description="En modo daemon conservar el cache en memoria y leer solo las filas cambiadas")
+    inventory_cache_skew_margin_seconds: float = Field(60.0, description="Margen hacia atrás de la marca de agua en cada lectura incremental")
+    inventory_cache_full_resync_seconds: float = Field(3600.0, description="Cada cuánto se relee el cache completo (también quita niveles borrados)")
+    
+    # Particiones y retención de product_sync_log
+    sync_log_partition_months_ahead: int = Field(2, description="Meses siguientes con partición ya creada en product_sync_log")
+    sync_log_retention_months: int = Field(12, description="Meses de product_sync_log que se conservan (0 = todos)")
+    sync_log_maintenance_time: str = Field("03:15", description="Hora HH:MM del mantenimiento diario de particiones en modo daemon")
+    
+    # Métricas (formato Prometheus)
+    metrics_host: str = Field("127.0.0.1", description="Host del endpoint /metrics en modo daemon (solo local por defecto)")
+    metrics_port: Optional[int] = Field(None, description="Puerto del endpoint /metrics (deshabilitado si no se define)")
+    metrics_textfile: Optional[str] = Field("logs/sync_metrics.prom", description="Archivo de métricas escrito al terminar una ejecución única")
+    
+    def get_shard_locations(self) -> List[int]:
+        """Convierte shard_locations en lista de id_location"""
+        return [int(value) for value in self.shard_locations.split(",") if value.strip()]
+
+    def get_worker_id(self) -> str:
+        """worker_id o, si no se definió, el hostname (estable entre reinicios para reanudar su journal)"""
+        return self.worker_id or socket.gethostname()
+
+    def get_sync_log_maintenance_time(self) -> Tuple[int, int]:
+        """Convierte sync_log_maintenance_time en (hora, minuto)"""
+        hour, minute = self.sync_log_maintenance_time.strip().split(":")
+        return int(hour), int(minute)
+
+    def get_sync_times(self) -> List[Tuple[int, int]]:
+        """Convierte sync_times en tuplas (hora, minuto)"""
+        times = []
+        for value in self.sync_times.split(","):
+            value = value.strip()
+            if not value:
+                continue
+            hour, minute = value.split(":")
+            times.append((int(hour), int(minute)))
+        return times
 
 
 class LoggingConfig(BaseSettings):
@@ -99,6 +221,15 @@ class LoggingConfig(BaseSettings):
     erp_log_level: LogLevel = Field(LogLevel.INFO, description="Nivel de log para ERP")
     shopify_log_level: LogLevel = Field(LogLevel.INFO, description="Nivel de log para Shopify")
     database_log_level: LogLevel = Field(LogLevel.WARNING, description="Nivel de log para base de datos")
+    
+    # Trazado (spans OTLP/JSON)
+    tracing_enabled: bool = Field(False, description="Exportar spans de cada etapa, llamada a Shopify y repositorio")
+    tracing_filename: str = Field("traces.jsonl", description="Archivo OTLP/JSON de spans dentro de log_dir")
+    
+    # Perfilado por muestreo (pilas plegadas + tracemalloc por etapa en log_dir/profiles)
+    profiling_enabled: bool = Field(False, description="Perfilar cada ejecución de la sincronización")
+    profiling_interval_seconds: float = Field(0.005, description="Intervalo de muestreo de pilas")
+    profiling_top_n: int = Field(25, description="Líneas por etapa en el reporte de asignaciones")
 
 
 class ApplicationConfig(BaseSettings):
@@ -126,10 +257,69 @@ class ApplicationConfig(BaseSettings):
     # ERP
     erp_endpoint_url: str = Field(..., alias="ERP_ENDPOINT_URL")
     erp_api_key: Optional[str] = Field(None, alias="ERP_API_KEY")
+    erp_timeout_seconds: float = Field(300.0, alias="ERP_TIMEOUT_SECONDS")
+    erp_circuit_failure_threshold: int = Field(3, alias="ERP_CIRCUIT_FAILURE_THRESHOLD")
+    erp_circuit_reset_seconds: float = Field(120.0, alias="ERP_CIRCUIT_RESET_SECONDS")
+    erp_partition_key: str = Field("almacenId", alias="ERP_PARTITION_KEY")
+    erp_partition_values: str = Field("", alias="ERP_PARTITION_VALUES")
+    erp_partition_locations: str = Field("", alias="ERP_PARTITION_LOCATIONS")
+    erp_max_concurrency: int = Field(4, alias="ERP_MAX_CONCURRENCY")
     
     # Shopify
     shopify_access_token: str = Field(..., alias="SHOPIFY_ACCESS_TOKEN")
     shopify_shop_domain: str = Field(..., alias="SHOPIFY_SHOP_DOMAIN")
+    shopify_critical_reserve_fraction: float = Field(0.25, alias="SHOPIFY_CRITICAL_RESERVE_FRACTION")
+    shopify_normal_lane_max_seconds: Optional[float] = Field(None, alias="SHOPIFY_NORMAL_LANE_MAX_SECONDS")
+    shopify_retry_max_attempts: int = Field(4, alias="SHOPIFY_RETRY_MAX_ATTEMPTS")
+    shopify_retry_base_delay_seconds: float = Field(0.5, alias="SHOPIFY_RETRY_BASE_DELAY_SECONDS")
+    shopify_retry_max_delay_seconds: float = Field(30.0, alias="SHOPIFY_RETRY_MAX_DELAY_SECONDS")
+    shopify_concurrency_initial: int = Field(4, alias="SHOPIFY_CONCURRENCY_INITIAL")
+    shopify_concurrency_max: int = Field(16, alias="SHOPIFY_CONCURRENCY_MAX")
+    shopify_latency_target_seconds: float = Field(2.0, alias="SHOPIFY_LATENCY_TARGET_SECONDS")
+    shopify_circuit_failure_threshold: int = Field(5, alias="SHOPIFY_CIRCUIT_FAILURE_THRESHOLD")
+    shopify_circuit_reset_seconds: float = Field(30.0, alias="SHOPIFY_CIRCUIT_RESET_SECONDS")
+    shopify_webhook_secret: Optional[str] = Field(None, alias="SHOPIFY_WEBHOOK_SECRET")
+    shopify_webhook_host: str = Field("0.0.0.0", alias="SHOPIFY_WEBHOOK_HOST")
+    shopify_webhook_port: int = Field(8080, alias="SHOPIFY_WEBHOOK_PORT")
+    shopify_webhook_flush_interval_seconds: float = Field(2.0, alias="SHOPIFY_WEBHOOK_FLUSH_INTERVAL_SECONDS")
+    shopify_webhook_max_pending: int = Field(500, alias="SHOPIFY_WEBHOOK_MAX_PENDING")
+    shopify_webhook_max_event_attempts: int = Field(3, alias="SHOPIFY_WEBHOOK_MAX_EVENT_ATTEMPTS")
+    
+    # Sincronización / daemon
+    sync_times: str = Field("09:30,13:00,16:30,19:45", alias="SYNC_TIMES")
+    sync_timezone: str = Field("America/Mexico_City", alias="SYNC_TIMEZONE")
+    sync_startup_run_window_minutes: int = Field(30, alias="SYNC_STARTUP_RUN_WINDOW_MINUTES")
+    sync_misfire_grace_seconds: int = Field(600, alias="SYNC_MISFIRE_GRACE_SECONDS")
+    sync_drain_timeout_seconds: float = Field(300.0, alias="SYNC_DRAIN_TIMEOUT_SECONDS")
+    sync_resume_max_attempts: int = Field(3, alias="SYNC_RESUME_MAX_ATTEMPTS")
+    sync_resume_max_age_hours: float = Field(24.0, alias="SYNC_RESUME_MAX_AGE_HOURS")
+    db_pool_min_size: int = Field(1, alias="DB_POOL_MIN_SIZE")
+    db_pool_max_size: int = Field(5, alias="DB_POOL_MAX_SIZE")
+    http_pool_limit: int = Field(20, alias="HTTP_POOL_LIMIT")
+    continuous_min_interval_seconds: float = Field(30.0, alias="CONTINUOUS_MIN_INTERVAL_SECONDS")
+    continuous_max_interval_seconds: float = Field(900.0, alias="CONTINUOUS_MAX_INTERVAL_SECONDS")
+    continuous_target_changes_per_run: int = Field(200, alias="CONTINUOUS_TARGET_CHANGES_PER_RUN")
+    store_open_hour: int = Field(9, alias="STORE_OPEN_HOUR")
+    store_close_hour: int = Field(21, alias="STORE_CLOSE_HOUR")
+    off_hours_factor: float = Field(4.0, alias="OFF_HOURS_FACTOR")
+    api_budget_low_watermark: float = Field(0.3, alias="API_BUDGET_LOW_WATERMARK")
+    detector_workers: int = Field(0, alias="DETECTOR_WORKERS")
+    detector_shard_by: str = Field("location", alias="DETECTOR_SHARD_BY")
+    detector_min_rows_per_process: int = Field(200000, alias="DETECTOR_MIN_ROWS_PER_PROCESS")
+    location_sharding: bool = Field(False, alias="LOCATION_SHARDING")
+    worker_id: Optional[str] = Field(None, alias="WORKER_ID")
+    shard_locations: str = Field("", alias="SHARD_LOCATIONS")
+    shard_max_locations: int = Field(0, alias="SHARD_MAX_LOCATIONS")
+    shard_lease_ttl_seconds: float = Field(300.0, alias="SHARD_LEASE_TTL_SECONDS")
+    inventory_cache_incremental: bool = Field(False, alias="INVENTORY_CACHE_INCREMENTAL")
+    inventory_cache_skew_margin_seconds: float = Field(60.0, alias="INVENTORY_CACHE_SKEW_MARGIN_SECONDS")
+    inventory_cache_full_resync_seconds: float = Field(3600.0, alias="INVENTORY_CACHE_FULL_RESYNC_SECONDS")
+    sync_log_partition_months_ahead: int = Field(2, alias="SYNC_LOG_PARTITION_MONTHS_AHEAD")
+    sync_log_retention_months: int = Field(12, alias="SYNC_LOG_RETENTION_MONTHS")
+    sync_log_maintenance_time: str = Field("03:15", alias="SYNC_LOG_MAINTENANCE_TIME")
+    metrics_host: str = Field("127.0.0.1", alias="METRICS_HOST")
+    metrics_port: Optional[int] = Field(None, alias="METRICS_PORT")
+    metrics_textfile: Optional[str] = Field("logs/sync_metrics.prom", alias="METRICS_TEXTFILE")
     
     # Logging
     log_level: LogLevel = Field(LogLevel.INFO, alias="LOG_LEVEL")
@@ -145,6 +335,11 @@ class ApplicationConfig(BaseSettings):
     erp_log_level: LogLevel = Field(LogLevel.INFO, alias="ERP_LOG_LEVEL")
     shopify_log_level: LogLevel = Field(LogLevel.INFO, alias="SHOPIFY_LOG_LEVEL")
     database_log_level: LogLevel = Field(LogLevel.WARNING, alias="DB_LOG_LEVEL")
+    tracing_enabled: bool = Field(False, alias="TRACING_ENABLED")
+    tracing_filename: str = Field("traces.jsonl", alias="TRACING_FILENAME")
+    profiling_enabled: bool = Field(False, alias="PROFILING_ENABLED")
+    profiling_interval_seconds: float = Field(0.005, alias="PROFILING_INTERVAL_SECONDS")
+    profiling_top_n: int = Field(25, alias="PROFILING_TOP_N")
     
     @field_validator("environment")
     @classmethod
@@ -178,7 +373,14 @@ class ApplicationConfig(BaseSettings):
         """Configuración del ERP"""
         return ERPConfig(
             endpoint_url=self.erp_endpoint_url,
-            api_key=self.erp_api_key
+            api_key=self.erp_api_key,
+            timeout_seconds=self.erp_timeout_seconds,
+            circuit_failure_threshold=self.erp_circuit_failure_threshold,
+            circuit_reset_seconds=self.erp_circuit_reset_seconds,
+            partition_key=self.erp_partition_key,
+            partition_values=self.erp_partition_values,
+            partition_locations=self.erp_partition_locations,
+            max_concurrency=self.erp_max_concurrency
         )
     
     @property
@@ -186,7 +388,63 @@ class ApplicationConfig(BaseSettings):
         """Configuración de Shopify"""
         return ShopifyConfig(
             access_token=self.shopify_access_token,
-            shop_domain=self.shopify_shop_domain
+            shop_domain=self.shopify_shop_domain,
+            critical_reserve_fraction=self.shopify_critical_reserve_fraction,
+            normal_lane_max_seconds=self.shopify_normal_lane_max_seconds,
+            retry_max_attempts=self.shopify_retry_max_attempts,
+            retry_base_delay_seconds=self.shopify_retry_base_delay_seconds,
+            retry_max_delay_seconds=self.shopify_retry_max_delay_seconds,
+            concurrency_initial=self.shopify_concurrency_initial,
+            concurrency_max=self.shopify_concurrency_max,
+            latency_target_seconds=self.shopify_latency_target_seconds,
+            circuit_failure_threshold=self.shopify_circuit_failure_threshold,
+            circuit_reset_seconds=self.shopify_circuit_reset_seconds,
+            webhook_secret=self.shopify_webhook_secret,
+            webhook_host=self.shopify_webhook_host,
+            webhook_port=self.shopify_webhook_port,
+            webhook_flush_interval_seconds=self.shopify_webhook_flush_interval_seconds,
+            webhook_max_pending=self.shopify_webhook_max_pending,
+            webhook_max_event_attempts=self.shopify_webhook_max_event_attempts
+        )
+    
+    @property
+    def sync(self) -> SyncConfig:
+        """Configuración del proceso de sincronización"""
+        return SyncConfig(
+            sync_times=self.sync_times,
+            timezone=self.sync_timezone,
+            startup_run_window_minutes=self.sync_startup_run_window_minutes,
+            misfire_grace_seconds=self.sync_misfire_grace_seconds,
+            drain_timeout_seconds=self.sync_drain_timeout_seconds,
+            resume_max_attempts=self.sync_resume_max_attempts,
+            resume_max_age_hours=self.sync_resume_max_age_hours,
+            db_pool_min_size=self.db_pool_min_size,
+            db_pool_max_size=self.db_pool_max_size,
+            http_pool_limit=self.http_pool_limit,
+            continuous_min_interval_seconds=self.continuous_min_interval_seconds,
+            continuous_max_interval_seconds=self.continuous_max_interval_seconds,
+            continuous_target_changes_per_run=self.continuous_target_changes_per_run,
+            store_open_hour=self.store_open_hour,
+            store_close_hour=self.store_close_hour,
+            off_hours_factor=self.off_hours_factor,
+            api_budget_low_watermark=self.api_budget_low_watermark,
+            detector_workers=self.detector_workers,
+            detector_shard_by=self.detector_shard_by,
+            detector_min_rows_per_process=self.detector_min_rows_per_process,
+            location_sharding=self.location_sharding,
+            worker_id=self.worker_id,
+            shard_locations=self.shard_locations,
+            shard_max_locations=self.shard_max_locations,
+            shard_lease_ttl_seconds=self.shard_lease_ttl_seconds,
+            inventory_cache_incremental=self.inventory_cache_incremental,
+            inventory_cache_skew_margin_seconds=self.inventory_cache_skew_margin_seconds,
+            inventory_cache_full_resync_seconds=self.inventory_cache_full_resync_seconds,
+            sync_log_partition_months_ahead=self.sync_log_partition_months_ahead,
+            sync_log_retention_months=self.sync_log_retention_months,
+            sync_log_maintenance_time=self.sync_log_maintenance_time,
+            metrics_host=self.metrics_host,
+            metrics_port=self.metrics_port,
+            metrics_textfile=self.metrics_textfile
         )
     
     @property
@@ -202,7 +460,12 @@ class ApplicationConfig(BaseSettings):
             backup_count=self.log_backup_count,
             erp_log_level=self.erp_log_level,
             shopify_log_level=self.shopify_log_level,
-            database_log_level=self.database_log_level
+            database_log_level=self.database_log_level,
+            tracing_enabled=self.tracing_enabled,
+            tracing_filename=self.tracing_filename,
+            profiling_enabled=self.profiling_enabled,
+            profiling_interval_seconds=self.profiling_interval_seconds,
+            profiling_top_n=self.profiling_top_n
         )
 
 
@@ -0,0 +1,34 @@
+# ===================================================
+# src/shared/exceptions/__init__.py
+# ===================================================
+"""
+Excepciones de la sincronización (reintentables vs fatales)
+"""
+
+from .sync_exceptions import (
+    SyncError,
+    RetryableError,
+    FatalError,
+    ShopifyThrottledError,
+    ShopifyServerError,
+    ShopifyTransportError,
+    ShopifyRequestError,
+    ShopifyUserError,
+    CircuitOpenError,
+    ERPUnavailableError,
+    ERPRequestError
+)
+
+__all__ = [
+    "SyncError",
+    "RetryableError",
+    "FatalError",
+    "ShopifyThrottledError",
+    "ShopifyServerError",
+    "ShopifyTransportError",
+    "ShopifyRequestError",
+    "ShopifyUserError",
+    "CircuitOpenError",
+    "ERPUnavailableError",
+    "ERPRequestError"
+]
@@ -0,0 +1,71 @@
+"""
+Excepciones de la sincronización
+Ubicación: src/shared/exceptions/sync_exceptions.py
+
+Toda falla de un sistema externo se clasifica como reintentable (el mismo
+request puede funcionar más tarde: 429, 5xx, THROTTLED, timeouts, conexión)
+o fatal (reintentar no cambia el resultado: userErrors, credenciales,
+requests inválidos). RetryPolicy solo reintenta las primeras.
+"""
+
+from typing import Any, List, Optional
+
+
+class SyncError(Exception):
+    """Base de los errores de la sincronización"""
+
+
+class RetryableError(SyncError):
+    """Falla transitoria; retry_after es la espera mínima sugerida por el servidor"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FatalError(SyncError):
+    """Falla permanente: no se reintenta"""
+
+
+class ShopifyThrottledError(RetryableError):
+    """Shopify respondió THROTTLED (bucket de costo agotado)"""
+
+
+class ShopifyServerError(RetryableError):
+    """HTTP 429 o 5xx de la API de Shopify"""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message, retry_after)
+        self.status = status
+
+
+class ShopifyTransportError(RetryableError):
+    """Timeout o error de conexión hacia Shopify"""
+
+
+class ShopifyRequestError(FatalError):
+    """Request rechazado por Shopify (HTTP 4xx o errores GraphQL no transitorios)"""
+
+
+class ShopifyUserError(FatalError):
+    """La mutación respondió userErrors"""
+
+    def __init__(self, message: str, user_errors: List[Any]):
+        super().__init__(message)
+        self.user_errors = user_errors
+
+
+class CircuitOpenError(RetryableError):
+    """El circuito del sistema externo está abierto: no se envía el request"""
+
+    def __init__(self, message: str, upstream: str, retry_after: Optional[float] = None):
+        super().__init__(message, retry_after)
+        self.upstream = upstream
+
+
+class ERPUnavailableError(RetryableError):
+    """HTTP 429/5xx, timeout o error de conexión hacia el ERP"""
+
+
+class ERPRequestError(FatalError):
+    """Request rechazado por el ERP (HTTP 4xx o respuesta sin el reporte)"""
@@ -5,7 +5,6 @@ Ubicación: src/shared/logging/logging_setup.py
 
 import logging
 import logging.handlers
-import json
 import os
 import sys
 from datetime import datetime
@@ -13,6 +12,8 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 
 from src.shared.config.config_manager import get_config, LogLevel
+from ..tracing import get_tracer
+from ..serialization import dumps_str
 
 
 class JSONFormatter(logging.Formatter):
@@ -58,7 +59,7 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, 'store_id'):
             log_data["store_id"] = record.store_id
         
-        return json.dumps(log_data, ensure_ascii=False)
+        return dumps_str(log_data)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -296,10 +297,13 @@ class LogOperation:
     """
     Context manager para loggear operaciones completas
     
+    Además abre un span de trazado con extra_fields como atributos, así
+    que con el trazado activo cada operación queda también en la traza.
+    
     Usage:
-        with LogOperation("sync_inventory", logger, sync_id="12345"):
+        with LogOperation("sync_inventory", logger, sync_id="12345") as op:
             # tu código aquí
-            pass
+            op.set_attribute("changes", 10)
     """
     
     def __init__(self, operation: str, logger: logging.Logger, **extra_fields):
@@ -307,9 +311,21 @@ class LogOperation:
         self.logger = logger
         self.extra_fields = extra_fields
         self.start_time = None
+        self.span = None
+        self._span_context = None
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Agrega un atributo al span (y a los campos del log de cierre)"""
+        self.extra_fields[key] = value
+        if self.span is not None:
+            self.span.set_attribute(key, value)
     
     def __enter__(self):
         self.start_time = datetime.now()
+        self._span_context = get_tracer().span(self.operation, **self.extra_fields)
+        self.span = self._span_context.__enter__()
+        if self.span.is_recording:
+            self.extra_fields = {**self.extra_fields, 'trace_id': self.span.trace_id, 'span_id': self.span.span_id}
         self.logger.info(
             f"Iniciando operación: {self.operation}",
             extra={'extra_fields': self.extra_fields}
@@ -334,4 +350,8 @@ class LogOperation:
                 exc_info=True
             )
         
+        if self._span_context is not None:
+            self._span_context.__exit__(exc_type, exc_val, exc_tb)
+            self._span_context = None
+        
         return False  # No suprimir excepciones
\ No newline at end of file
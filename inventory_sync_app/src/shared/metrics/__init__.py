@@ -0,0 +1,16 @@
+# ===================================================
+# src/shared/metrics/__init__.py
+# ===================================================
+"""
+Métricas de la sincronización en formato Prometheus
+"""
+
+from .metrics_registry import (
+    SyncMetrics,
+    get_metrics
+)
+
+__all__ = [
+    "SyncMetrics",
+    "get_metrics"
+]
@@ -0,0 +1,138 @@
+"""
+Métricas de la sincronización en formato Prometheus
+Ubicación: src/shared/metrics/metrics_registry.py
+
+Todas las métricas viven en un CollectorRegistry propio (no en el global de
+prometheus_client) para que el endpoint /metrics y el archivo de texto de las
+ejecuciones únicas expongan solo lo que mide este proceso.
+"""
+
+from typing import Optional
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest, write_to_textfile
+
+# Buckets en segundos por tipo de operación
+ERP_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+
+
+class SyncMetrics:
+    """Contadores, histogramas y gauges de cada etapa de la sincronización"""
+
+    CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+    def __init__(self, registry: Optional[CollectorRegistry] = None):
+        self.registry = registry or CollectorRegistry()
+        r = self.registry
+
+        # Extracción del ERP
+        self.erp_extraction_seconds = Histogram(
+            "sync_erp_extraction_seconds", "Duración de la extracción del reporte del ERP",
+            buckets=ERP_BUCKETS, registry=r)
+        self.erp_extraction_bytes = Counter(
+            "sync_erp_extraction_bytes", "Bytes recibidos del ERP (cuerpo ya descomprimido)", registry=r)
+        self.erp_transfer_bytes = Counter(
+            "sync_erp_transfer_bytes", "Bytes del ERP en la red (Content-Length, comprimido; 0 si es chunked)", registry=r)
+        self.erp_report_fetches = Counter(
+            "sync_erp_report_fetches", "Descargas del reporte por resultado (not_modified, unchanged, changed)",
+            ["result"], registry=r)
+        self.erp_rows_rejected = Counter(
+            "sync_erp_rows_rejected", "Filas del reporte del ERP descartadas por no poder convertirse", registry=r)
+        self.erp_rows_extracted = Gauge(
+            "sync_erp_rows_extracted", "Filas (SKU x almacén) de la última extracción", registry=r)
+
+        # Cache y detección de cambios
+        self.cache_rows_loaded = Gauge(
+            "sync_cache_rows_loaded", "Niveles de inventario cargados del cache en la última ejecución", registry=r)
+        self.cache_rows_fetched = Counter(
+            "sync_cache_rows_fetched", "Filas leídas de la base para el cache de inventario (full o incremental)", ["mode"], registry=r)
+        self.changes_detected = Counter(
+            "sync_changes_detected", "Cambios de inventario detectados por prioridad", ["priority"], registry=r)
+        self.detector_cache_misses = Counter(
+            "sync_detector_cache_misses", "Filas del ERP sin nivel correspondiente en el cache", registry=r)
+
+        # Shopify
+        self.shopify_request_seconds = Histogram(
+            "sync_shopify_request_seconds", "Latencia de las llamadas GraphQL a Shopify",
+            ["operation"], buckets=HTTP_BUCKETS, registry=r)
+        self.shopify_requests = Counter(
+            "sync_shopify_requests", "Llamadas GraphQL a Shopify por resultado",
+            ["operation", "outcome"], registry=r)
+        self.shopify_query_cost = Counter(
+            "sync_shopify_query_cost", "Costo GraphQL (actualQueryCost) consumido por operación",
+            ["operation"], registry=r)
+        self.shopify_retries = Counter(
+            "sync_shopify_retries", "Reintentos de llamadas a Shopify por flujo y tipo de error",
+            ["operation", "reason"], registry=r)
+        self.shopify_throttle_wait_seconds = Histogram(
+            "sync_shopify_throttle_wait_seconds", "Espera por el presupuesto de costo de Shopify antes de cada llamada",
+            buckets=(0.0, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0), registry=r)
+        self.shopify_budget_available = Gauge(
+            "sync_shopify_budget_available", "Puntos de costo disponibles según el último throttleStatus", registry=r)
+
+        # Protección de sistemas externos (circuit breaker + concurrencia adaptativa)
+        self.upstream_concurrency_limit = Gauge(
+            "sync_upstream_concurrency_limit", "Requests simultáneos permitidos por el limitador AIMD",
+            ["upstream"], registry=r)
+        self.upstream_in_flight = Gauge(
+            "sync_upstream_in_flight", "Requests en curso hacia el sistema externo", ["upstream"], registry=r)
+        self.upstream_circuit_state = Gauge(
+            "sync_upstream_circuit_state", "Estado del circuito (0 = cerrado, 1 = medio abierto, 2 = abierto)",
+            ["upstream"], registry=r)
+        self.upstream_circuit_rejections = Counter(
+            "sync_upstream_circuit_rejections", "Requests no enviados por circuito abierto", ["upstream"], registry=r)
+
+        # Base de datos
+        self.db_statement_seconds = Histogram(
+            "sync_db_statement_seconds", "Latencia de las sentencias PostgreSQL",
+            ["repository", "statement"], buckets=DB_BUCKETS, registry=r)
+        self.db_statement_errors = Counter(
+            "sync_db_statement_errors", "Sentencias PostgreSQL que terminaron en error",
+            ["repository", "statement"], registry=r)
+
+        # Ejecución completa
+        self.stage_seconds = Histogram(
+            "sync_stage_seconds", "Duración de cada etapa de la sincronización",
+            ["stage"], buckets=STAGE_BUCKETS, registry=r)
+        self.runs = Counter(
+            "sync_runs", "Ejecuciones de la sincronización por resultado", ["status"], registry=r)
+        self.last_success_timestamp = Gauge(
+            "sync_last_success_timestamp_seconds", "Fin de la última sincronización exitosa (epoch)", registry=r)
+        self.lag_seconds = Gauge(
+            "sync_lag_seconds", "Tiempo entre el inicio de la extracción y la confirmación en Shopify de la última ejecución",
+            registry=r)
+        self.lag_upper_bound_seconds = Gauge(
+            "sync_lag_upper_bound_seconds", "Cota superior del lag ERP -> Shopify (desde la extracción anterior)",
+            registry=r)
+
+        # Modo continuo del daemon
+        self.next_interval_seconds = Gauge(
+            "sync_next_interval_seconds", "Espera calculada hasta la siguiente sincronización continua", registry=r)
+        self.change_rate_per_second = Gauge(
+            "sync_change_rate_per_second", "Tasa de cambios estimada por el intervalo adaptativo", registry=r)
+
+    def render(self) -> bytes:
+        """Exposición en formato de texto de Prometheus"""
+        return generate_latest(self.registry)
+
+    def write_textfile(self, path: str) -> None:
+        """Escribe las métricas en un archivo (textfile collector de node_exporter)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_to_textfile(path, self.registry)
+
+
+_metrics: Optional[SyncMetrics] = None
+
+
+def get_metrics() -> SyncMetrics:
+    """Instancia compartida por todo el proceso"""
+    global _metrics
+    if _metrics is None:
+        _metrics = SyncMetrics()
+    return _metrics
@@ -0,0 +1,18 @@
+# ===================================================
+# src/shared/profiling/__init__.py
+# ===================================================
+"""
+Perfilado opcional por muestreo y asignaciones por etapa
+"""
+
+from .run_profiler import (
+    RunProfiler,
+    get_profiler,
+    profile_run
+)
+
+__all__ = [
+    "RunProfiler",
+    "get_profiler",
+    "profile_run"
+]
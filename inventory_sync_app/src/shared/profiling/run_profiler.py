@@ -0,0 +1,216 @@
+"""
+Perfilado opcional de ejecuciones reales
+Ubicación: src/shared/profiling/run_profiler.py
+
+Dos piezas independientes, ambas solo con la biblioteca estándar:
+  - Un perfilador por muestreo: un hilo lee cada `interval_seconds` la pila
+    del hilo del event loop (sys._current_frames) y acumula pilas plegadas
+    ("stage:x;func (archivo:línea);... N"), el formato que aceptan
+    flamegraph.pl, speedscope e inferno.
+  - Snapshots de tracemalloc al cerrar cada etapa: el reporte lista las N
+    líneas que más memoria retuvieron durante esa etapa y el pico.
+
+El caso de uso avisa el fin de cada etapa con get_profiler().mark_stage();
+sin un perfilado activo la llamada no hace nada.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Frames propios del perfilador que no deben aparecer en los reportes
+_EXCLUDED_FILES = (__file__, tracemalloc.__file__, threading.__file__)
+
+
+class RunProfiler:
+    """Muestreo de pilas y asignaciones por etapa de una ejecución"""
+
+    def __init__(self, interval_seconds: float = 0.005, top_n: int = 25, trace_allocations: bool = True):
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+        self.trace_allocations = trace_allocations
+        self.samples_by_stage: Dict[str, Counter] = {}
+        # (etapa, [(archivo, línea, bytes retenidos, bloques retenidos)], pico en bytes)
+        self.allocations_by_stage: List[Tuple[str, List[Tuple[str, int, int, int]], int]] = []
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_thread_id: Optional[int] = None
+        self._line_stats: Optional[Dict[Tuple[str, int], Tuple[int, int]]] = None
+        self._started_tracemalloc = False
+        self.started_at: Optional[datetime] = None
+        self.sample_count = 0
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Empieza a muestrear el hilo actual (el del event loop)"""
+        self.started_at = datetime.now()
+        self._target_thread_id = threading.get_ident()
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._line_stats = self._take_line_stats()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="run-profiler", daemon=True)
+        self._thread.start()
+
+    def mark_stage(self, stage: str) -> None:
+        """Cierra una etapa: le atribuye las muestras y asignaciones desde la marca anterior"""
+        if not self.active:
+            return
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        self.samples_by_stage.setdefault(stage, Counter()).update(pending)
+
+        if self.trace_allocations and self._line_stats is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            line_stats = self._take_line_stats()
+            tracemalloc.reset_peak()
+            self.allocations_by_stage.append((stage, self._diff(line_stats, self._line_stats), peak))
+            self._line_stats = line_stats
+
+    def stop(self) -> None:
+        """Detiene el muestreo; lo no atribuido a ninguna etapa queda en 'other'"""
+        if not self.active:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.mark_stage("other")
+        self._thread = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is None:
+                continue
+            stack = self._fold(frame)
+            with self._lock:
+                self._pending[stack] += 1
+            self.sample_count += 1
+
+    @staticmethod
+    def _fold(frame) -> str:
+        """Pila de la raíz a la hoja en formato plegado"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename not in _EXCLUDED_FILES:
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    @staticmethod
+    def _take_line_stats() -> Dict[Tuple[str, int], Tuple[int, int]]:
+        """
+        Memoria viva por línea de código
+
+        Se agrupa una sola vez por snapshot y se compara contra el agrupado
+        anterior: Snapshot.compare_to y filter_traces reagrupan ambos lados
+        y con cientos de miles de objetos vivos tardan segundos por etapa.
+        """
+        return {
+            (stat.traceback[0].filename, stat.traceback[0].lineno): (stat.size, stat.count)
+            for stat in tracemalloc.take_snapshot().statistics("lineno")
+        }
+
+    def _diff(self, current: Dict[Tuple[str, int], Tuple[int, int]],
+              previous: Dict[Tuple[str, int], Tuple[int, int]]) -> List[Tuple[str, int, int, int]]:
+        diffs = []
+        for key in current.keys() | previous.keys():
+            if key[0] in _EXCLUDED_FILES:
+                continue
+            size, count = current.get(key, (0, 0))
+            old_size, old_count = previous.get(key, (0, 0))
+            if size != old_size:
+                diffs.append((key[0], key[1], size - old_size, count - old_count))
+        diffs.sort(key=lambda diff: abs(diff[2]), reverse=True)
+        return diffs[:self.top_n]
+
+    def folded_lines(self) -> List[str]:
+        """Una línea 'stage:x;marco;marco N' por pila distinta"""
+        lines = []
+        for stage, samples in self.samples_by_stage.items():
+            for stack, count in samples.most_common():
+                lines.append(f"stage:{stage};{stack} {count}" if stack else f"stage:{stage} {count}")
+        return lines
+
+    def allocation_report(self) -> str:
+        """Top-N de memoria retenida por etapa (diferencia entre snapshots)"""
+        lines = [f"Reporte de asignaciones ({self.started_at:%Y-%m-%d %H:%M:%S}, top {self.top_n} por etapa)"]
+        for stage, stats, peak in self.allocations_by_stage:
+            retained = sum(size_diff for _, _, size_diff, _ in stats)
+            lines.append("")
+            lines.append(f"== {stage}: pico {peak / 1024 / 1024:.1f} MiB, retenido (top) {retained / 1024:.1f} KiB")
+            for filename, lineno, size_diff, count_diff in stats:
+                lines.append(f"  {size_diff / 1024:>10.1f} KiB {count_diff:>+9} bloques  {filename}:{lineno}")
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, output_dir: str, prefix: str = "sync") -> Tuple[str, str]:
+        """Escribe <prefix>_<fecha>.folded y <prefix>_<fecha>_alloc.txt en output_dir"""
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f"{prefix}_{self.started_at:%Y%m%d_%H%M%S}")
+        folded_path, alloc_path = f"{base}.folded", f"{base}_alloc.txt"
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded_lines()) + "\n")
+        with open(alloc_path, "w", encoding="utf-8") as f:
+            f.write(self.allocation_report())
+        return folded_path, alloc_path
+
+
+class _InactiveProfiler:
+    """Perfilador nulo usado cuando no hay perfilado en curso"""
+
+    active = False
+
+    def mark_stage(self, stage: str) -> None:
+        pass
+
+
+_INACTIVE = _InactiveProfiler()
+_profiler = _INACTIVE
+
+
+def get_profiler():
+    """Perfilador de la ejecución en curso (nulo si no hay perfilado activo)"""
+    return _profiler
+
+
+@contextmanager
+def profile_run(
+    output_dir: str,
+    interval_seconds: float = 0.005,
+    top_n: int = 25,
+    prefix: str = "sync"
+) -> Iterator[RunProfiler]:
+    """Perfila el bloque y deja los reportes en output_dir al salir"""
+    global _profiler
+    profiler = RunProfiler(interval_seconds=interval_seconds, top_n=top_n)
+    _profiler = profiler
+    profiler.start()
+    started = time.perf_counter()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _profiler = _INACTIVE
+        folded_path, alloc_path = profiler.write_reports(output_dir, prefix)
+        print(f"🔬 Perfil ({profiler.sample_count} muestras en {time.perf_counter() - started:.1f}s): {folded_path}")
+        print(f"🔬 Asignaciones por etapa: {alloc_path}")
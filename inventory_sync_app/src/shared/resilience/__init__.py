@@ -0,0 +1,22 @@
+# ===================================================
+# src/shared/resilience/__init__.py
+# ===================================================
+"""
+Políticas de resiliencia para llamadas a sistemas externos
+"""
+
+from .retry_policy import (
+    RetryPolicy,
+    BeforeRetry
+)
+from .circuit_breaker import CircuitBreaker
+from .adaptive_limiter import AdaptiveConcurrencyLimiter
+from .upstream_guard import UpstreamGuard
+
+__all__ = [
+    "RetryPolicy",
+    "BeforeRetry",
+    "CircuitBreaker",
+    "AdaptiveConcurrencyLimiter",
+    "UpstreamGuard"
+]
@@ -0,0 +1,86 @@
+"""
+Limitador de concurrencia adaptativo (AIMD)
+Ubicación: src/shared/resilience/adaptive_limiter.py
+
+Como el control de congestión de TCP: cada request exitoso y con latencia
+dentro de latency_target_seconds suma 1/limit al límite (≈ +1 por cada
+"ventana" de limit requests) y una falla o un request lento lo multiplica
+por decrease_factor. Para que una ráfaga de fallas simultáneas no lo
+colapse, solo se reduce una vez por ventana: las fallas de requests que
+empezaron antes de la última reducción no vuelven a reducirlo.
+"""
+
+from typing import Deque
+from collections import deque
+import asyncio
+
+
+class AdaptiveConcurrencyLimiter:
+    """Requests simultáneos permitidos hacia un sistema externo"""
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target_seconds: float = 2.0,
+        decrease_factor: float = 0.5
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self._in_flight = 0
+        self._epoch = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> int:
+        """
+        Espera un lugar libre
+
+        Returns:
+            int: Ventana en que empezó el request (se devuelve en release)
+        """
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Si ya lo habían despertado, el lugar pasa al siguiente
+                self._wake_waiters()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+        return self._epoch
+
+    def release(self, epoch: int, latency_seconds: float, failed: bool) -> None:
+        """Libera el lugar y ajusta el límite según el resultado"""
+        if failed or latency_seconds > self.latency_target_seconds:
+            if epoch == self._epoch:
+                self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                self._epoch += 1
+        else:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
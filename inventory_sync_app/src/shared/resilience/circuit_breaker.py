@@ -0,0 +1,97 @@
+"""
+Circuit breaker por sistema externo
+Ubicación: src/shared/resilience/circuit_breaker.py
+
+Cerrado: los requests pasan y se cuentan las fallas consecutivas. Al llegar
+a failure_threshold se abre y durante reset_timeout_seconds se rechaza todo
+sin tocar la red (CircuitOpenError, con retry_after = lo que falta). Después
+queda medio abierto: pasa un único request de prueba; si funciona el
+circuito se cierra y si falla vuelve a abrirse por otro periodo completo.
+"""
+
+from typing import Callable
+import time
+
+from shared.exceptions import CircuitOpenError
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Valor del gauge sync_upstream_circuit_state por estado
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Abre el circuito tras N fallas consecutivas y lo prueba después de una espera"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._clock = clock
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._open = False
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if not self._open:
+            return CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def seconds_until_retry(self) -> float:
+        """Tiempo hasta que se permita el request de prueba (0 si ya se puede)"""
+        if not self._open:
+            return 0.0
+        return max(0.0, self.reset_timeout_seconds - (self._clock() - self._opened_at))
+
+    def allows_requests(self) -> bool:
+        """True si before_call() dejaría pasar un request ahora"""
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def before_call(self) -> None:
+        """
+        Autoriza un request
+
+        Raises:
+            CircuitOpenError: Circuito abierto, o medio abierto con la prueba en curso
+        """
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        raise CircuitOpenError(
+            f"Circuito abierto hacia {self.name} ({self._consecutive_failures} fallas consecutivas)",
+            upstream=self.name,
+            retry_after=self.seconds_until_retry() or self.reset_timeout_seconds
+        )
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._open = False
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self._probe_in_flight or self._consecutive_failures >= self.failure_threshold:
+            # La prueba falló (o se llegó al umbral): otro periodo completo abierto
+            self._open = True
+            self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """Un request cancelado no dice nada del sistema externo: solo libera la prueba"""
+        self._probe_in_flight = False
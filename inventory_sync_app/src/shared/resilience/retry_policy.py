@@ -0,0 +1,65 @@
+"""
+Política de reintentos con backoff exponencial y jitter
+Ubicación: src/shared/resilience/retry_policy.py
+
+Se reintentan únicamente las RetryableError; cualquier otra excepción
+(FatalError incluida) se propaga en el primer intento. La espera entre
+intentos es "full jitter" (uniforme entre 0 y base * 2^intento, acotada por
+max_delay) y nunca menor que el retry_after que haya sugerido el servidor.
+"""
+
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import random
+
+from shared.exceptions import RetryableError
+
+# Hook antes de cada reintento: (número de intento que sigue, error, espera en segundos)
+BeforeRetry = Callable[[int, RetryableError, float], Awaitable[None]]
+
+
+class RetryPolicy:
+    """Ejecuta una corrutina reintentando los errores transitorios"""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay_seconds: float = 0.5,
+        max_delay_seconds: float = 30.0,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._sleep = sleep
+        self._random = rng or random.Random()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Espera antes del intento `attempt + 1` (attempt empieza en 1)"""
+        ceiling = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (attempt - 1)))
+        delay = self._random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay_seconds))
+        return delay
+
+    async def run(self, operation: Callable[[], Awaitable[Any]], before_retry: Optional[BeforeRetry] = None) -> Any:
+        """
+        Ejecuta operation() hasta max_attempts veces
+
+        Raises:
+            RetryableError: El último error transitorio si se agotan los intentos
+            Exception: Cualquier error no reintentable, sin reintentar
+        """
+        attempt = 1
+        while True:
+            try:
+                return await operation()
+            except RetryableError as e:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, e.retry_after)
+                attempt += 1
+                if before_retry is not None:
+                    await before_retry(attempt, e, delay)
+                await self._sleep(delay)
@@ -0,0 +1,86 @@
+"""
+Protección de un sistema externo: circuit breaker + concurrencia adaptativa
+Ubicación: src/shared/resilience/upstream_guard.py
+
+Cada adaptador (ERP, Shopify) envuelve sus requests en guard.slot(): se
+rechaza de inmediato si el circuito está abierto, se espera lugar en el
+limitador AIMD y al salir se registra latencia y resultado en ambos. Solo
+cuentan como falla las excepciones de failure_types (transitorias del
+sistema externo); un error fatal del request no dice nada de su salud.
+"""
+
+from typing import AsyncIterator, Optional, Tuple, Type
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+from shared.exceptions import RetryableError
+from shared.metrics import get_metrics
+
+from .circuit_breaker import CircuitBreaker, STATE_VALUES
+from .adaptive_limiter import AdaptiveConcurrencyLimiter
+
+
+class UpstreamGuard:
+    """Circuit breaker y limitador de concurrencia de un sistema externo"""
+
+    def __init__(
+        self,
+        name: str,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        failure_types: Tuple[Type[BaseException], ...] = (RetryableError, asyncio.TimeoutError, OSError)
+    ):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self._failure_types = failure_types
+
+    def accepting_requests(self) -> bool:
+        """False mientras el circuito esté abierto (o probándose)"""
+        return self.breaker.allows_requests()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Lugar para un request hacia el sistema externo
+
+        Raises:
+            CircuitOpenError: El circuito está abierto (no se espera lugar)
+        """
+        metrics = get_metrics()
+        try:
+            self.breaker.before_call()
+        except RetryableError:
+            metrics.upstream_circuit_rejections.labels(self.name).inc()
+            raise
+
+        try:
+            epoch = await self.limiter.acquire()
+        except asyncio.CancelledError:
+            self.breaker.record_cancelled()
+            raise
+        metrics.upstream_in_flight.labels(self.name).set(self.limiter.in_flight)
+
+        started = time.perf_counter()
+        failed = False
+        cancelled = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except self._failure_types:
+            failed = True
+            raise
+        finally:
+            self.limiter.release(epoch, time.perf_counter() - started, failed)
+            if cancelled:
+                self.breaker.record_cancelled()
+            elif failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            metrics.upstream_in_flight.labels(self.name).set(self.limiter.in_flight)
+            metrics.upstream_concurrency_limit.labels(self.name).set(self.limiter.limit)
+            metrics.upstream_circuit_state.labels(self.name).set(STATE_VALUES[self.breaker.state])
@@ -0,0 +1,30 @@
+# ===================================================
+# src/shared/serialization/__init__.py
+# ===================================================
+"""
+Codificación JSON compartida (orjson/msgspec si están instalados)
+"""
+
+from .json_codec import (
+    JSONBackend,
+    BACKEND_PREFERENCE,
+    available_backends,
+    get_json_backend,
+    configure_json_backend,
+    dumps,
+    dumps_str,
+    dumps_pretty,
+    loads
+)
+
+__all__ = [
+    "JSONBackend",
+    "BACKEND_PREFERENCE",
+    "available_backends",
+    "get_json_backend",
+    "configure_json_backend",
+    "dumps",
+    "dumps_str",
+    "dumps_pretty",
+    "loads"
+]
@@ -0,0 +1,139 @@
+"""
+Codec JSON de la aplicación (orjson / msgspec / biblioteca estándar)
+Ubicación: src/shared/serialization/json_codec.py
+
+Todos los adaptadores (ERP, Shopify, webhooks), los logs JSON, el exportador
+de spans y los reportes de cambios codifican y decodifican con este módulo.
+Se usa el primer backend instalado en el orden de BACKEND_PREFERENCE; sin
+orjson ni msgspec se usa json de la biblioteca estándar. Los tres producen
+UTF-8 sin escapar (como ensure_ascii=False) y convierten con str() lo que
+no es JSON nativo (datetime, Decimal), así la salida no depende del backend
+salvo por espacios (msgspec escribe datetime en ISO 8601).
+
+loads acepta bytes o str y lanza ValueError si el documento no es JSON.
+"""
+
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+import importlib.util
+import json
+
+BACKEND_PREFERENCE = ("orjson", "msgspec", "json")
+
+
+class JSONBackend(NamedTuple):
+    """Funciones de un backend: compactas a bytes, con sangría (reportes) y decodificación"""
+    name: str
+    dumps: Callable[[Any], bytes]
+    dumps_pretty: Callable[[Any], bytes]
+    loads: Callable[[Union[bytes, str]], Any]
+
+
+def _stdlib_backend() -> JSONBackend:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+    pretty_encoder = json.JSONEncoder(ensure_ascii=False, indent=2, default=str)
+    return JSONBackend(
+        name="json",
+        dumps=lambda obj: encoder.encode(obj).encode("utf-8"),
+        dumps_pretty=lambda obj: pretty_encoder.encode(obj).encode("utf-8"),
+        loads=json.loads
+    )
+
+
+def _orjson_backend() -> JSONBackend:
+    import orjson
+
+    # datetime por default=str para que el formato sea el mismo que con json
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    return JSONBackend(
+        name="orjson",
+        dumps=lambda obj: orjson.dumps(obj, default=str, option=options),
+        dumps_pretty=lambda obj: orjson.dumps(obj, default=str, option=options | orjson.OPT_INDENT_2),
+        # orjson.JSONDecodeError ya es ValueError
+        loads=orjson.loads
+    )
+
+
+def _msgspec_backend() -> JSONBackend:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return JSONBackend(
+        name="msgspec",
+        dumps=encoder.encode,
+        dumps_pretty=lambda obj: msgspec.json.format(encoder.encode(obj), indent=2),
+        loads=loads
+    )
+
+
+_FACTORIES: Dict[str, Callable[[], JSONBackend]] = {
+    "orjson": _orjson_backend,
+    "msgspec": _msgspec_backend,
+    "json": _stdlib_backend
+}
+
+
+def available_backends() -> Dict[str, JSONBackend]:
+    """Backends instalados, en orden de preferencia (json siempre está)"""
+    return {
+        name: _FACTORIES[name]()
+        for name in BACKEND_PREFERENCE
+        if name == "json" or importlib.util.find_spec(name) is not None
+    }
+
+
+_backend: Optional[JSONBackend] = None
+
+
+def get_json_backend() -> JSONBackend:
+    """Backend en uso (el primero instalado de BACKEND_PREFERENCE)"""
+    global _backend
+    if _backend is None:
+        _backend = next(iter(available_backends().values()))
+    return _backend
+
+
+def configure_json_backend(name: Optional[str] = None) -> JSONBackend:
+    """
+    Fija el backend por nombre (None = automático)
+
+    Raises:
+        ValueError: El backend no existe o no está instalado
+    """
+    global _backend
+    if name is None:
+        _backend = None
+        return get_json_backend()
+
+    backends = available_backends()
+    if name not in backends:
+        raise ValueError(f"Backend JSON no disponible: {name} (instalados: {', '.join(backends)})")
+    _backend = backends[name]
+    return _backend
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON compacto en UTF-8 (cuerpos HTTP)"""
+    return get_json_backend().dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    """JSON compacto como str (líneas de log, archivos de texto)"""
+    return get_json_backend().dumps(obj).decode("utf-8")
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """JSON con sangría de 2 espacios (reportes para leer a mano)"""
+    return get_json_backend().dumps_pretty(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decodifica un documento JSON (ValueError si no es válido)"""
+    return get_json_backend().loads(data)
@@ -0,0 +1,32 @@
+# ===================================================
+# src/shared/tracing/__init__.py
+# ===================================================
+"""
+Spans de trazado compatibles con OpenTelemetry (exportación OTLP/JSON local)
+"""
+
+from .tracer import (
+    Span,
+    Tracer,
+    SpanExporter,
+    JSONFileSpanExporter,
+    InMemorySpanExporter,
+    KIND_CLIENT,
+    KIND_INTERNAL,
+    get_tracer,
+    configure_tracing,
+    traced
+)
+
+__all__ = [
+    "Span",
+    "Tracer",
+    "SpanExporter",
+    "JSONFileSpanExporter",
+    "InMemorySpanExporter",
+    "KIND_CLIENT",
+    "KIND_INTERNAL",
+    "get_tracer",
+    "configure_tracing",
+    "traced"
+]
@@ -0,0 +1,311 @@
+"""
+Spans de trazado ligeros, compatibles con OpenTelemetry
+Ubicación: src/shared/tracing/tracer.py
+
+Los spans usan los mismos identificadores y campos que OTLP (traceId de 16
+bytes, spanId de 8 bytes, tiempos en nanosegundos, atributos tipados) y se
+exportan como líneas OTLP/JSON (un ExportTraceServiceRequest por línea), el
+formato que lee el receptor otlpjsonfile del OpenTelemetry Collector.
+
+El span actual se propaga con contextvars, así que las tareas creadas con
+asyncio.gather heredan al padre sin pasar nada explícitamente. Con el
+trazado deshabilitado span() entrega un span nulo y no asigna nada.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import functools
+import os
+import random
+import threading
+import time
+
+from ..serialization import dumps_str
+
+# Códigos de OTLP (opentelemetry.proto.trace.v1)
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+
+# Spans terminados que se acumulan antes de exportar aunque la traza no haya cerrado
+MAX_BUFFERED_SPANS = 512
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Valor de atributo en la codificación JSON de OTLP"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """Operación con duración, atributos y eventos dentro de una traza"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "kind", "attributes",
+                 "events", "status_code", "status_message", "start_time_ns", "end_time_ns")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None,
+                 kind: int = KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+
+    @property
+    def is_recording(self) -> bool:
+        return self.end_time_ns is None
+
+    @property
+    def duration_seconds(self) -> float:
+        end = self.end_time_ns if self.end_time_ns is not None else time.time_ns()
+        return (end - self.start_time_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = str(exc)
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+
+    def set_ok(self) -> None:
+        if self.status_code == STATUS_UNSET:
+            self.status_code = STATUS_OK
+
+    def end(self) -> None:
+        if self.end_time_ns is None:
+            self.end_time_ns = time.time_ns()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        if self.events:
+            span["events"] = [
+                {"name": event["name"], "timeUnixNano": str(event["time_ns"]), "attributes": _otlp_attributes(event["attributes"])}
+                for event in self.events
+            ]
+        return span
+
+
+class NoopSpan:
+    """Span nulo: misma interfaz que Span, sin costo cuando el trazado está apagado"""
+
+    name = ""
+    trace_id = ""
+    span_id = ""
+    is_recording = False
+    duration_seconds = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def set_ok(self) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("sync_current_span", default=None)
+
+
+class SpanExporter:
+    """Destino de los spans terminados"""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Guarda los spans en memoria (pruebas y benchmarks)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def by_name(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class JSONFileSpanExporter(SpanExporter):
+    """Agrega spans a un archivo de líneas OTLP/JSON"""
+
+    def __init__(self, path: str, service_name: str = "inventory-sync"):
+        self.path = path
+        self.service_name = service_name
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "inventory_sync"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(dumps_str(request) + "\n")
+
+
+class Tracer:
+    """Crea spans, mantiene el span actual y exporta al cerrar cada traza"""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self._exporter = exporter
+        self._finished: List[Span] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def set_exporter(self, exporter: Optional[SpanExporter]) -> None:
+        self.flush()
+        if self._exporter is not None:
+            self._exporter.shutdown()
+        self._exporter = exporter
+
+    def current_span(self):
+        return _current_span.get() or NOOP_SPAN
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes) -> Iterator[Any]:
+        """Abre un span hijo del actual; registra la excepción si la hay y la vuelve a lanzar"""
+        if self._exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            parent_span_id=parent.span_id if parent else None,
+            kind=kind,
+            attributes=attributes
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+            span.set_ok()
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, is_root=parent is None)
+
+    def end_span(self, span: Span, is_root: bool = False) -> None:
+        span.end()
+        with self._lock:
+            self._finished.append(span)
+            if not is_root and len(self._finished) < MAX_BUFFERED_SPANS:
+                return
+            batch, self._finished = self._finished, []
+        self._exporter.export(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._finished = self._finished, []
+        if batch and self._exporter is not None:
+            self._exporter.export(batch)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Tracer compartido por todo el proceso (deshabilitado hasta configure_tracing)"""
+    return _tracer
+
+
+def configure_tracing(exporter: Optional[SpanExporter]) -> Tracer:
+    """Activa (o con None desactiva) la exportación de spans en el tracer compartido"""
+    _tracer.set_exporter(exporter)
+    return _tracer
+
+
+def traced(name: Optional[str] = None, kind: int = KIND_INTERNAL, **attributes) -> Callable:
+    """
+    Decorador para corrutinas: un span por llamada (por defecto Clase.metodo)
+
+    Si algún argumento posicional es una lista se registra su tamaño como
+    batch.size, y el de la lista devuelta como result.size.
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return await fn(*args, **kwargs)
+
+            with tracer.span(span_name, kind=kind, **attributes) as span:
+                for arg in args:
+                    if isinstance(arg, list):
+                        span.set_attribute("batch.size", len(arg))
+                        break
+                result = await fn(*args, **kwargs)
+                if isinstance(result, list):
+                    span.set_attribute("result.size", len(result))
+                return result
+        return wrapper
+    return decorator
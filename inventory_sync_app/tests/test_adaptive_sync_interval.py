@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.application.AdaptiveSyncInterval import AdaptiveSyncInterval
+
+
+STORE_HOURS = datetime(2025, 7, 4, 13, 0)
+NIGHT = datetime(2025, 7, 4, 3, 0)
+
+
+class TestAdaptiveSyncInterval:
+
+    @pytest.fixture
+    def policy(self):
+        """Fixture con límites pequeños para facilitar las aserciones"""
+        return AdaptiveSyncInterval(
+            min_interval_seconds=30,
+            max_interval_seconds=600,
+            target_changes_per_run=100,
+            store_open_hour=9,
+            store_close_hour=21,
+            off_hours_factor=4.0,
+            budget_low_watermark=0.3
+        )
+
+    def test_shrinks_when_change_rate_is_high(self, policy):
+        """Muchos cambios por segundo llevan la espera al mínimo"""
+        interval = policy.next_interval(changes_detected=5000, elapsed_seconds=60, api_budget=None, now=STORE_HOURS)
+        assert interval == 30
+
+    def test_targets_changes_per_run(self, policy):
+        """Con 1 cambio/s y objetivo de 100 cambios la espera es ~100 s"""
+        interval = policy.next_interval(changes_detected=60, elapsed_seconds=60, api_budget=None, now=STORE_HOURS)
+        assert interval == pytest.approx(100)
+
+    def test_grows_without_changes(self, policy):
+        """Sin cambios la espera crece gradualmente hasta el máximo"""
+        intervals = [
+            policy.next_interval(changes_detected=0, elapsed_seconds=60, api_budget=None, now=STORE_HOURS)
+            for _ in range(20)
+        ]
+        assert intervals[1] > intervals[0]
+        assert intervals[-1] == 600
+
+    def test_stretches_off_hours(self, policy):
+        """Fuera de horario la espera se multiplica"""
+        day = policy.next_interval(changes_detected=60, elapsed_seconds=60, api_budget=None, now=STORE_HOURS)
+        night = policy.next_interval(changes_detected=60, elapsed_seconds=60, api_budget=None, now=NIGHT)
+        assert night == pytest.approx(day * 4)
+
+    def test_waits_for_api_budget(self, policy):
+        """Con el bucket bajo la marca se espera a su restauración"""
+        budget = {"maximum_available": 1000, "currently_available": 100, "restore_rate": 50}
+        interval = policy.next_interval(changes_detected=5000, elapsed_seconds=60, api_budget=budget, now=STORE_HOURS)
+        # (0.3 * 1000 - 100) / 50 = 4 s < mínimo de 30 s
+        assert interval == 30
+
+        budget = {"maximum_available": 1000, "currently_available": 0, "restore_rate": 5}
+        interval = policy.next_interval(changes_detected=5000, elapsed_seconds=60, api_budget=budget, now=STORE_HOURS)
+        assert interval == pytest.approx(60)
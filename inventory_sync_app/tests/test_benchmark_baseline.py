@@ -0,0 +1,65 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.baseline import compare_with_baseline, missing_from_baseline, load_baseline, has_baseline
+from benchmarks.micro_benchmarks import worst_of
+
+
+class TestCompareWithBaseline:
+
+    def test_flags_metric_over_tolerance(self):
+        baseline = {"scenarios": {"rows=10000": {"extract_erp_seconds": 2.0, "db_round_trips": 100}}}
+        results = {"rows=10000": {"extract_erp_seconds": 3.0, "db_round_trips": 105}}
+
+        regressions = compare_with_baseline(results, baseline)
+
+        assert len(regressions) == 1
+        assert "extract_erp_seconds" in regressions[0]
+
+    def test_throughput_drop_is_a_regression(self):
+        baseline = {"scenarios": {"s": {"rows_per_second": 1000.0}}}
+
+        assert compare_with_baseline({"s": {"rows_per_second": 700.0}}, baseline)
+        assert not compare_with_baseline({"s": {"rows_per_second": 1500.0}}, baseline)
+
+    def test_ignores_noise_and_unknown_scenarios(self):
+        baseline = {"scenarios": {"s": {"detect_changes_seconds": 0.01}}}
+
+        # +100% pero por debajo del umbral absoluto de ruido
+        assert not compare_with_baseline({"s": {"detect_changes_seconds": 0.02}}, baseline)
+        assert not compare_with_baseline({"nuevo": {"wall_seconds": 99.0}}, baseline)
+
+
+class TestMissingFromBaseline:
+
+    def test_reports_scenarios_without_baseline(self):
+        baseline = {"scenarios": {"s": {"wall_seconds": 1.0}, "vacio": {}}}
+        results = {"s": {"wall_seconds": 1.0}, "vacio": {"wall_seconds": 1.0}, "nuevo": {"wall_seconds": 1.0}}
+
+        assert missing_from_baseline(results, baseline) == ["vacio", "nuevo"]
+
+    def test_empty_baseline_reports_everything(self):
+        assert missing_from_baseline({"s": {"wall_seconds": 1.0}}, {"scenarios": {}}) == ["s"]
+
+    def test_missing_file_is_not_a_baseline(self, tmp_path):
+        assert not has_baseline(load_baseline(str(tmp_path / "baseline.json")))
+        assert has_baseline({"scenarios": {"s": {"wall_seconds": 1.0}}})
+
+
+class TestMicroBaselineRounds:
+
+    def test_worst_of_keeps_the_slowest_value_per_metric(self):
+        rounds = [
+            {"detect": {"relative_cost": 5.0, "peak_bytes_per_row": 120.0}},
+            {"detect": {"relative_cost": 6.5, "peak_bytes_per_row": 118.0}}
+        ]
+
+        assert worst_of(rounds) == {"detect": {"relative_cost": 6.5, "peak_bytes_per_row": 120.0}}
+
+    def test_raw_timings_are_not_compared(self):
+        baseline = {"scenarios": {"s": {"ns_per_row": 100.0, "relative_cost": 2.0}}}
+
+        assert not compare_with_baseline({"s": {"ns_per_row": 300.0, "relative_cost": 2.1}}, baseline)
+        assert compare_with_baseline({"s": {"ns_per_row": 100.0, "relative_cost": 3.0}}, baseline)
@@ -0,0 +1,70 @@
+import pytest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes.erp_catalog import ERPCatalogGenerator
+from src.infrastructure.ERPDataExtractor import ERPDataExtractor
+from src.infrastructure.ERPRowDecoder import ERPRowDecoder
+
+MESSY_ROWS = [
+    {"id": "x", "SKU": None, "Costo": "abc", "Existencia": None, "Nombre": 5, "Almacén": " CEDIS "},
+    {"id": 3.7, "Talla": "None", "Costo": "", "Disponible": "None", "Precio venta": 12},
+    {}
+]
+
+
+class TestERPRowDecoder:
+
+    def test_same_products_as_per_row_path(self):
+        rows = list(ERPCatalogGenerator(rows=300, seed=8).iter_rows()) + MESSY_ROWS
+        extractor = ERPDataExtractor(endpoint_url="http://localhost", bearer_token="")
+
+        products, summary = ERPRowDecoder().decode_rows(rows)
+
+        assert products == [extractor._build_product(row) for row in rows]
+        assert summary.rows == len(rows) and summary.rejected == 0
+
+    def test_rejected_rows_are_summarized_not_printed(self, capsys):
+        rows = list(ERPCatalogGenerator(rows=5).iter_rows())
+        rows[2:2] = ["fila rota", None]
+
+        products, summary = ERPRowDecoder().decode_rows(rows + MESSY_ROWS[:1], start=1)
+
+        assert len(products) == 6
+        assert summary.rejected == 2 and summary.reasons == {"AttributeError": 2}
+        assert [index for index, _ in summary.samples] == [3, 4]
+        # Valores presentes pero no convertibles; los vacíos no cuentan
+        assert summary.coerced == {"id": 1, "costo": 1}
+        assert capsys.readouterr().out == ""
+
+    def test_columns_stay_aligned_around_rejected_rows(self):
+        rows = list(ERPCatalogGenerator(rows=4).iter_rows())
+        rows.insert(1, 42)
+
+        columns, summary = ERPRowDecoder().decode_columns(rows)
+
+        assert summary.rejected == 1
+        assert {len(column) for column in columns.values()} == {4}
+        assert columns["existencia"] == [float(row["Existencia"]) for row in rows if isinstance(row, dict)]
+
+    def test_decode_payload_skips_header_row(self):
+        generator = ERPCatalogGenerator(rows=20, seed=1)
+
+        products, summary = ERPRowDecoder().decode_payload(generator.payload_bytes())
+
+        assert summary.rows == 20
+        assert [(p.sku, p.almacen) for p in products] == [generator.row_identity(i) for i in range(20)]
+
+    def test_decode_payload_accepts_custom_loads(self):
+        body = ERPCatalogGenerator(rows=3).payload_bytes()
+        calls = []
+
+        def loads(data):
+            calls.append(len(data))
+            return json.loads(data)
+
+        products, _ = ERPRowDecoder().decode_payload(body, loads=loads)
+        assert len(products) == 3 and calls == [len(body)]
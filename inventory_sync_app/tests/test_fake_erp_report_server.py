@@ -0,0 +1,164 @@
+import pytest
+import asyncio
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes.erp_catalog import ERPCatalogGenerator
+from fakes.erp_report_server import FakeERPReportServer
+from src.infrastructure.ERPDataExtractor import ERPDataExtractor
+
+
+class TestERPCatalogGenerator:
+
+    def test_same_seed_same_report(self):
+        assert ERPCatalogGenerator(rows=500, seed=3).payload_bytes() == ERPCatalogGenerator(rows=500, seed=3).payload_bytes()
+
+    def test_payload_shape(self):
+        generator = ERPCatalogGenerator(rows=20)
+        rows = json.loads(generator.payload_bytes())["data"]["BasesReportesGenerarReportePorId"]["resultadoReporteHashmap"]
+
+        # Primera fila de encabezado + una por SKU x almacén
+        assert len(rows) == 21
+        assert rows[1]["Almacén"] == "CEDIS" and rows[2]["Almacén"] == "COACALCO"
+        assert rows[1]["SKU"] == rows[2]["SKU"]
+
+    def test_churn_changes_expected_rows(self):
+        generator = ERPCatalogGenerator(rows=10_000, seed=1)
+        before = [generator.quantity(i) for i in range(generator.rows)]
+
+        changed = generator.advance(churn=0.05)
+
+        after = [generator.quantity(i) for i in range(generator.rows)]
+        assert changed == sum(1 for a, b in zip(before, after) if a != b)
+        assert 400 <= changed <= 500
+
+
+class TestFakeERPReportServer:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("gzip,chunked", [(False, False), (True, True)])
+    async def test_extractor_reads_every_row(self, gzip, chunked):
+        generator = ERPCatalogGenerator(rows=300, seed=2)
+        server = FakeERPReportServer(generator, gzip=gzip, chunked=chunked, bearer_token="token")
+        url = await server.start()
+        try:
+            extractor = ERPDataExtractor(endpoint_url=url, bearer_token="token")
+            products = await extractor.extract_products()
+        finally:
+            await server.stop()
+
+        assert len(products) == 300
+        sku, almacen = generator.row_identity(17)
+        assert (products[17].sku, products[17].almacen) == (sku, almacen)
+        assert products[17].existencia == generator.quantity(17)
+
+
+class TestConditionalERPFetch:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("etag", [True, False])
+    async def test_unchanged_report_is_not_parsed_again(self, etag):
+        generator = ERPCatalogGenerator(rows=200, seed=4)
+        server = FakeERPReportServer(generator, gzip=True, etag=etag)
+        url = await server.start()
+        try:
+            extractor = ERPDataExtractor(endpoint_url=url, bearer_token="token")
+            first = await extractor.extract_products()
+            assert not extractor.last_extraction_unchanged()
+
+            # Con ETag el ERP responde 304; sin él, el hash del cuerpo coincide
+            again = await extractor.extract_products()
+            assert extractor.last_extraction_unchanged()
+            assert again is first
+
+            generator.advance(churn=0.1)
+            changed = await extractor.extract_products()
+            assert not extractor.last_extraction_unchanged()
+            assert changed is not first
+
+            metadata = await extractor.get_extraction_metadata()
+        finally:
+            await server.stop()
+
+        assert server.stats["not_modified"] == (1 if etag else 0)
+        assert metadata["requests"] == 3
+        assert metadata["report_cache_hit_rate"] == pytest.approx(1 / 3)
+        # gzip sin chunked: lo transferido es menor que el JSON descomprimido
+        assert 0 < metadata["transfer_bytes"] < metadata["body_bytes"]
+
+
+class TestPartitionedERPFetch:
+
+    @pytest.mark.asyncio
+    async def test_one_request_per_almacen_returns_every_row(self):
+        generator = ERPCatalogGenerator(rows=450, seed=5)
+        server = FakeERPReportServer(generator, gzip=True)
+        url = await server.start()
+        try:
+            extractor = ERPDataExtractor(
+                endpoint_url=url, bearer_token="token", partition_values=[str(i) for i in range(1, 10)]
+            )
+            products = await extractor.extract_products()
+        finally:
+            await server.stop()
+
+        assert server.stats["by_almacen"] == {almacen: 1 for almacen in generator.almacenes}
+        assert sorted((p.sku, p.almacen) for p in products) == sorted(generator.row_identity(i) for i in range(450))
+
+    @pytest.mark.asyncio
+    async def test_partitions_are_yielded_as_they_arrive(self):
+        generator = ERPCatalogGenerator(rows=90, seed=6)
+        server = FakeERPReportServer(generator, etag=True, partition_latency={"CEDIS": 0.2})
+        url = await server.start()
+        try:
+            extractor = ERPDataExtractor(endpoint_url=url, bearer_token="token", partition_values=["1", "2", "3"])
+            first = [partition async for partition in extractor.iter_product_partitions()]
+            again = [partition async for partition in extractor.iter_product_partitions()]
+        finally:
+            await server.stop()
+
+        # El almacén lento llega al final; los demás ya se pueden detectar
+        assert [partition.partition for partition in first][-1] == "1"
+        assert {p.almacen for p in first[-1].products} == {"CEDIS"}
+        assert not any(partition.unchanged for partition in first)
+        assert all(partition.unchanged for partition in again)
+        assert extractor.last_extraction_unchanged()
+
+    @pytest.mark.asyncio
+    async def test_closing_early_waits_for_cancelled_partitions(self):
+        generator = ERPCatalogGenerator(rows=90, seed=6)
+        server = FakeERPReportServer(generator, partition_latency={"CEDIS": 5.0, "PUEBLA": 5.0})
+        url = await server.start()
+        try:
+            extractor = ERPDataExtractor(endpoint_url=url, bearer_token="token", partition_values=["1", "2", "3"])
+            partitions = extractor.iter_product_partitions()
+            first = await partitions.__anext__()
+            fetches = [task for task in asyncio.all_tasks() if "_fetch_partition" in task.get_coro().__qualname__]
+            await partitions.aclose()
+            pending = [task for task in fetches if not task.done()]
+        finally:
+            await server.stop()
+
+        assert first.partition == "2"
+        assert len(fetches) == 2 and pending == []
+
+    @pytest.mark.asyncio
+    async def test_worker_only_requests_partitions_of_its_locations(self):
+        generator = ERPCatalogGenerator(rows=90, seed=6)
+        server = FakeERPReportServer(generator)
+        url = await server.start()
+        try:
+            extractor = ERPDataExtractor(
+                endpoint_url=url, bearer_token="token", partition_values=["1", "2", "3", "9"],
+                partition_locations={"1": 1, "2": 2, "3": 3}
+            )
+            partitions = [partition async for partition in extractor.iter_product_partitions(locations={2})]
+        finally:
+            await server.stop()
+
+        # "9" no tiene ubicación mapeada: se pide igual
+        assert sorted(partition.partition for partition in partitions) == ["2", "9"]
+        assert server.stats["by_almacen"] == {"COACALCO": 1, "EJE CENTRAL": 1}
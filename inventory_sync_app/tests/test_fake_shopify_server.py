@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes.shopify_graphql_server import FakeShopifyGraphQLServer
+from src.infrastructure import ShopifyInventoryUpdater as updater_module
+from src.infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater
+
+# Las clases se toman del módulo del updater (src/ se importa sin prefijo)
+RetryPolicy = updater_module.RetryPolicy
+ShopifyThrottledError = updater_module.ShopifyThrottledError
+ShopifyServerError = updater_module.ShopifyServerError
+ShopifyRequestError = updater_module.ShopifyRequestError
+
+LOCATION = "gid://shopify/Location/1"
+
+
+class TestFakeShopifyServer:
+
+    @pytest.mark.asyncio
+    async def test_create_then_update_round_trip(self, fake_shopify, make_change):
+        """El updater real crea y actualiza contra el servidor falso"""
+        updater = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="token")
+
+        created = await updater._create_single_inventory(make_change("SKU-1", "CREATE", 7))
+        assert created.shopify_inventory_level_gid
+        assert fake_shopify.get_available(created.shopify_inventory_item_gid, LOCATION) == 7
+
+        await updater._update_single_inventory(make_change("SKU-1", "UPDATE", 2, created.shopify_inventory_item_gid))
+        assert fake_shopify.get_available(created.shopify_inventory_item_gid, LOCATION) == 2
+
+        stats = fake_shopify.get_stats()
+        assert stats["by_operation"] == {
+            "productCreate": 1, "productVariantsBulkUpdate": 1, "inventoryActivate": 1, "inventorySetQuantities": 2
+        }
+        # El updater lee el throttleStatus de las respuestas
+        assert updater.get_api_budget()["maximum_available"] == 1000
+
+    @pytest.mark.asyncio
+    async def test_reconcile_finds_variant_by_sku(self, fake_shopify, make_change):
+        updater = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="token")
+        created = await updater._create_single_inventory(make_change("SKU-2", "CREATE", 3))
+
+        reconciled = await updater.reconcile_pending_create(make_change("SKU-2", "CREATE", 5))
+        missing = await updater.reconcile_pending_create(make_change("SKU-404", "CREATE", 5))
+
+        assert reconciled.shopify_variant_gid == created.shopify_variant_gid
+        assert fake_shopify.get_available(created.shopify_inventory_item_gid, LOCATION) == 5
+        assert missing is None
+
+    @pytest.mark.asyncio
+    async def test_reconcile_only_accepts_the_exact_sku(self, fake_shopify, make_change):
+        """sku: trae coincidencias parciales (SKU-30 encuentra SKU-300); el SKU va entre comillas y escapado"""
+        updater = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="token")
+        await updater._create_single_inventory(make_change("SKU-300", "CREATE", 3))
+        quoted = await updater._create_single_inventory(make_change('TENIS "22" 1/2', "CREATE", 3))
+
+        partial = await updater.reconcile_pending_create(make_change("SKU-30", "CREATE", 5))
+        reconciled = await updater.reconcile_pending_create(make_change('TENIS "22" 1/2', "CREATE", 5))
+
+        assert partial is None
+        assert reconciled.shopify_variant_gid == quoted.shopify_variant_gid
+
+    @pytest.mark.asyncio
+    async def test_throttles_when_bucket_is_empty(self, make_change):
+        server = FakeShopifyGraphQLServer(throttle_max=20, restore_rate=0.0)
+        await server.start()
+        try:
+            # Un solo intento: el reintento del THROTTLED se prueba en test_retry_policy.py
+            updater = ShopifyInventoryUpdater(
+                shop_url=server.url, access_token="token", retry_policy=RetryPolicy(max_attempts=1)
+            )
+            change = make_change("SKU-3", "UPDATE", 1, "gid://shopify/InventoryItem/9")
+            await updater._update_single_inventory(change)
+            with pytest.raises(ShopifyThrottledError):
+                await updater._update_single_inventory(change)
+
+            assert server.get_stats()["throttled"] == 1
+            assert updater.get_api_budget()["currently_available"] == 9
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_failure_rate_and_token(self, fake_shopify, make_change):
+        fake_shopify.failure_rate = 1.0
+        single_attempt = RetryPolicy(max_attempts=1)
+        updater = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="token", retry_policy=single_attempt)
+        with pytest.raises(ShopifyServerError):
+            await updater._update_single_inventory(make_change("SKU-4", "UPDATE", 1, "gid://shopify/InventoryItem/9"))
+
+        intruder = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="otro", retry_policy=single_attempt)
+        with pytest.raises(ShopifyRequestError):
+            await intruder._update_single_inventory(make_change("SKU-4", "UPDATE", 1, "gid://shopify/InventoryItem/9"))
+
+        stats = fake_shopify.get_stats()
+        assert stats["failures"] == 1
+        assert stats["requests"] == 2
+        assert stats["by_operation"] == {}
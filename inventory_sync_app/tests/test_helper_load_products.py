@@ -0,0 +1,126 @@
+import pytest
+import csv
+import importlib
+import io
+import json
+import math
+import sys
+import os
+
+# helper_load_products.py vive en la raíz del repositorio, junto a schemas_db.sql
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+
+@pytest.fixture(scope="module")
+def loader(tmp_path_factory):
+    # Al importarse configura un FileHandler a data_import.log en el cwd
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("import_log"))
+    try:
+        return importlib.import_module("helper_load_products")
+    finally:
+        os.chdir(cwd)
+
+
+def product(**overrides):
+    row = {
+        "SKU": "ABC-1", "TITLE": "Tenis, \"edición\" negra", "SYNC_OP": "UPDATE",
+        "SHOPIFY_PRODUCT_GID": "gid://shopify/Product/1", "SHOPIFY_VARIANT_GID": "gid://shopify/ProductVariant/1",
+        "SHOPIFY_INVENTORY_ITEM_GID": "gid://shopify/InventoryItem/1",
+        "SHOPIFY_INVENTORY_LEVEL_GID": "gid://shopify/InventoryLevel/1",
+        "PRICE": 999.0, "PRICECOMPAREAT": "1299.5", "ID_LOCATION": 2.0, "QUANTITIES_AVAILABLE": 4,
+        "CATEGORY": None
+    }
+    row.update(overrides)
+    return row
+
+
+def write(tmp_path, text):
+    path = tmp_path / "products.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+class TestIterJsonArray:
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+    def test_elements_split_across_chunks(self, loader, tmp_path, chunk_size):
+        products = [product(SKU=f"SKU-{i}", TITLE="á" * i) for i in range(30)]
+        path = write(tmp_path, json.dumps(products))
+
+        assert list(loader.iter_json_array(path, chunk_size=chunk_size)) == products
+
+    def test_whitespace_and_commas_between_elements(self, loader, tmp_path):
+        path = write(tmp_path, ' \n[\n\t{"a": 1} ,\n\n  {"b": [1, 2]},{"c": "x, y"}\r\n ]\n')
+
+        assert list(loader.iter_json_array(path, chunk_size=5)) == [{"a": 1}, {"b": [1, 2]}, {"c": "x, y"}]
+        assert list(loader.iter_json_array(write(tmp_path, "[ ]"))) == []
+
+    @pytest.mark.parametrize("text", ['[{"a": 1}, {"b"', '[{"a": 1},', '[{"a": 1}'])
+    def test_truncated_file_raises(self, loader, tmp_path, text):
+        path = write(tmp_path, text)
+
+        with pytest.raises(ValueError):
+            list(loader.iter_json_array(path, chunk_size=4))
+
+    def test_rejects_non_list_and_missing_file(self, loader, tmp_path):
+        with pytest.raises(ValueError):
+            list(loader.iter_json_array(write(tmp_path, '{"SKU": "A"}')))
+        with pytest.raises(FileNotFoundError):
+            list(loader.iter_json_array(str(tmp_path / "no_existe.json")))
+
+
+class TestStagingRows:
+
+    def test_non_str_sku_is_loaded_as_text(self, loader):
+        stats = loader.ImportStats()
+
+        rows = list(loader.staging_rows([product(SKU=12345), product(SKU="ABC-2")], stats))
+
+        assert [row[1] for row in rows] == ["12345", "ABC-2"]
+        assert (stats.read, stats.valid) == (2, 2)
+
+    @pytest.mark.parametrize("location", [math.inf, -math.inf, math.nan, "inf", "nan"])
+    def test_non_finite_location_is_rejected(self, loader, location):
+        stats = loader.ImportStats()
+
+        rows = list(loader.staging_rows([product(ID_LOCATION=location), product(SKU="OK")], stats))
+
+        assert [row[1] for row in rows] == ["OK"]
+        assert stats.rejected == {"el campo 'ID_LOCATION' no es un número válido": 1}
+
+    def test_location_is_rounded_like_the_integer_cast(self, loader):
+        rows = list(loader.staging_rows([product(ID_LOCATION="2.6")], loader.ImportStats()))
+
+        assert rows[0][10] == 3
+
+
+class TestCopyStream:
+
+    def rows(self, loader, count=50):
+        products = [product(SKU=f"SKU-{i}", CATEGORY=None if i % 2 else "CALZADO") for i in range(count)]
+        return loader.staging_rows(products, loader.ImportStats())
+
+    @pytest.mark.parametrize("size", [1, 3, 17])
+    def test_small_reads_return_the_same_csv(self, loader, size):
+        expected = loader.CopyStream(self.rows(loader)).read()
+        stream = loader.CopyStream(self.rows(loader), rows_per_fill=4)
+
+        chunks = []
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            assert len(chunk) <= size
+            chunks.append(chunk)
+
+        assert "".join(chunks) == expected
+
+    def test_csv_round_trips_quotes_commas_and_null(self, loader):
+        data = loader.CopyStream(self.rows(loader, count=2)).read()
+
+        first, second = list(csv.reader(io.StringIO(data)))
+        assert first[2] == "Tenis, \"edición\" negra"
+        assert first[5] == "CALZADO" and second[5] == "\\N"
+        # NULL va sin comillas: un texto "\N" entre comillas sería un texto, no NULL
+        assert ",\\N," in data.splitlines()[1]
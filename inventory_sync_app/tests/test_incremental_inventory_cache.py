@@ -0,0 +1,125 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.PostgreSQLInventoryRepository import PostgreSQLInventoryRepository
+
+T0 = datetime(2026, 10, 1, 12, 0, 0)
+
+
+def cache_row(sku, location, quantity, refreshed_at):
+    return {
+        "inventory_level_id": location, "pos_sku": sku, "id_location": location,
+        "shopify_inventory_level_gid": None, "quantities_available": quantity, "updated_at": T0,
+        "sync_op": "UPDATE", "shopify_location_gid": f"gid://Location/{location}",
+        "shopify_inventory_item_gid": f"gid://InventoryItem/{sku}", "title": sku,
+        "price": 10.0, "price_compare": None, "refreshed_at": refreshed_at
+    }
+
+
+class FakeCacheConnection:
+    """inventory_cache en memoria: responde las consultas del repositorio por su texto"""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+
+    def put(self, sku, location, quantity, refreshed_at):
+        self.rows[(sku, location)] = cache_row(sku, location, quantity, refreshed_at)
+
+    def add_query_logger(self, callback):
+        pass
+
+    def remove_query_logger(self, callback):
+        pass
+
+    async def fetchval(self, query, *args):
+        self.queries.append("high_water_mark")
+        return max(row["refreshed_at"] for row in self.rows.values())
+
+    async def fetch(self, query, *args):
+        if "refreshed_at >" in query:
+            self.queries.append("changed")
+            return [row for row in self.rows.values() if row["refreshed_at"] > args[0]]
+        self.queries.append("full")
+        return list(self.rows.values())
+
+
+class FakePool:
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def quantities(levels):
+    return {(level.pos_sku, level.id_location): level.quantities_available for level in levels}
+
+
+@pytest.fixture
+def conn():
+    conn = FakeCacheConnection()
+    conn.put("A", 1, 5.0, T0)
+    conn.put("B", 1, 3.0, T0 + timedelta(seconds=10))
+    return conn
+
+
+def incremental_repo(conn, **kwargs):
+    return PostgreSQLInventoryRepository("postgresql://test", pool=FakePool(conn), incremental=True, **kwargs)
+
+
+class TestIncrementalInventoryCache:
+
+    @pytest.mark.asyncio
+    async def test_reads_only_rows_changed_since_the_high_water_mark(self, conn):
+        repo = incremental_repo(conn, skew_margin_seconds=0)
+        assert quantities(await repo.get_current_inventory_levels()) == {("A", 1): 5.0, ("B", 1): 3.0}
+
+        conn.put("A", 1, 0.0, T0 + timedelta(seconds=20))
+        conn.put("C", 2, 7.0, T0 + timedelta(seconds=21))
+        levels = await repo.get_current_inventory_levels()
+
+        assert conn.queries == ["high_water_mark", "full", "changed"]
+        assert quantities(levels) == {("A", 1): 0.0, ("B", 1): 3.0, ("C", 2): 7.0}
+        assert repo._high_water_mark == T0 + timedelta(seconds=21)
+
+    @pytest.mark.asyncio
+    async def test_margin_catches_rows_committed_after_the_previous_read(self, conn):
+        repo = incremental_repo(conn, skew_margin_seconds=30)
+        await repo.get_current_inventory_levels()
+
+        # Escrita antes de la marca de agua pero visible hasta ahora (transacción larga)
+        conn.put("D", 1, 2.0, T0 + timedelta(seconds=5))
+        levels = await repo.get_current_inventory_levels()
+
+        assert ("D", 1) in quantities(levels)
+        assert repo._high_water_mark == T0 + timedelta(seconds=10)
+
+    @pytest.mark.asyncio
+    async def test_periodic_full_resync_drops_deleted_levels(self, conn):
+        repo = incremental_repo(conn, full_resync_seconds=600)
+        await repo.get_current_inventory_levels()
+        del conn.rows[("B", 1)]
+
+        assert ("B", 1) in quantities(await repo.get_current_inventory_levels())
+
+        repo._last_full_read -= 600
+        levels = await repo.get_current_inventory_levels()
+
+        assert conn.queries[-2:] == ["high_water_mark", "full"]
+        assert quantities(levels) == {("A", 1): 5.0}
+
+    @pytest.mark.asyncio
+    async def test_without_incremental_every_read_is_full(self, conn):
+        repo = PostgreSQLInventoryRepository("postgresql://test", pool=FakePool(conn))
+        await repo.get_current_inventory_levels()
+        await repo.get_current_inventory_levels()
+
+        assert conn.queries == ["full", "full"]
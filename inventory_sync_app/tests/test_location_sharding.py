@@ -0,0 +1,145 @@
+import pytest
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.application.LocationShardCoordinator import LocationShardCoordinator
+from src.domain.repositories.ILocationLeaseRepository import ILocationLeaseRepository
+from src.domain.repositories.IApiBudgetRepository import IApiBudgetRepository
+from src.infrastructure.SharedThrottleBudget import SharedThrottleBudget
+
+
+class InMemoryLeaseRepo(ILocationLeaseRepository):
+    """sync_location_lease en memoria (mismas reglas que el repositorio PostgreSQL)"""
+
+    def __init__(self, location_ids=(1, 2, 3)):
+        self.location_ids = list(location_ids)
+        self.leases = {}  # id_location -> (owner, lease_until)
+        self.now = datetime(2024, 10, 1, 12, 0)
+
+    async def get_location_ids(self):
+        return list(self.location_ids)
+
+    async def acquire_locations(self, owner, candidates, max_locations, ttl_seconds):
+        lease_until = self.now + timedelta(seconds=ttl_seconds)
+        owned = sorted(loc for loc in candidates if self.leases.get(loc, (None,))[0] == owner)[:max_locations]
+        self.leases = {loc: lease for loc, lease in self.leases.items() if lease[0] != owner or loc in owned}
+        for loc in owned:
+            self.leases[loc] = (owner, lease_until)
+        for loc in sorted(candidates):
+            if len(owned) >= max_locations:
+                break
+            lease = self.leases.get(loc)
+            if loc not in owned and (lease is None or lease[1] < self.now):
+                self.leases[loc] = (owner, lease_until)
+                owned.append(loc)
+        return sorted(owned)
+
+    async def release_locations(self, owner):
+        self.leases = {loc: lease for loc, lease in self.leases.items() if lease[0] != owner}
+
+
+class TestLocationShardCoordinator:
+
+    @pytest.mark.asyncio
+    async def test_workers_get_disjoint_locations(self):
+        repo = InMemoryLeaseRepo()
+        first = LocationShardCoordinator(repo, "host-a", max_locations=2)
+        second = LocationShardCoordinator(repo, "host-b", max_locations=2)
+        try:
+            assert await first.acquire() == [1, 2]
+            assert await second.acquire() == [3]
+            # La siguiente ejecución conserva las mismas ubicaciones
+            assert await first.acquire() == [1, 2]
+        finally:
+            await first.release()
+            await second.release()
+
+    @pytest.mark.asyncio
+    async def test_released_or_expired_locations_are_taken_over(self):
+        repo = InMemoryLeaseRepo()
+        first = LocationShardCoordinator(repo, "host-a", max_locations=2, lease_ttl_seconds=60)
+        second = LocationShardCoordinator(repo, "host-b", max_locations=2, lease_ttl_seconds=60)
+        try:
+            await first.acquire()
+            await second.acquire()
+
+            await first.release()
+            assert await second.acquire() == [1, 3]
+            assert 2 not in repo.leases
+
+            # host-b deja de renovar (proceso caído): al vencer, host-a toma sus ubicaciones
+            repo.now += timedelta(seconds=61)
+            assert await first.acquire() == [1, 2]
+        finally:
+            await first.release()
+            await second.release()
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_renews_only_owned_locations(self):
+        repo = InMemoryLeaseRepo()
+        coordinator = LocationShardCoordinator(repo, "host-a", candidates=[2, 3], max_locations=1, lease_ttl_seconds=0.03)
+        try:
+            assert await coordinator.acquire() == [2]
+            first_lease = repo.leases[2][1]
+            repo.now += timedelta(seconds=10)
+            await asyncio.sleep(0.05)
+
+            assert repo.leases[2][1] > first_lease
+            assert 3 not in repo.leases
+        finally:
+            await coordinator.release()
+        assert repo.leases == {}
+
+
+class FakeBudgetRepo(IApiBudgetRepository):
+    """Bucket compartido que niega las primeras `denials` tomas"""
+
+    def __init__(self, denials=0, error=None):
+        self.denials = denials
+        self.error = error
+        self.calls = []
+
+    async def try_acquire(self, bucket, cost, amount, capacity, restore_rate, observed_available):
+        self.calls.append((bucket, cost, amount))
+        if self.error is not None:
+            raise self.error
+        if self.denials:
+            self.denials -= 1
+            return 0.01
+        return 0.0
+
+
+class TestSharedThrottleBudget:
+
+    @pytest.mark.asyncio
+    async def test_waits_for_the_shared_bucket(self):
+        repo = FakeBudgetRepo(denials=2)
+        budget = SharedThrottleBudget(repo, "tienda.myshopify.com")
+
+        waited = await budget.acquire(11, reserve=250)
+
+        assert waited == pytest.approx(0.02)
+        assert repo.calls == [("tienda.myshopify.com", 11, 261)] * 3
+        assert budget.estimated_available() < budget.maximum_available
+
+    @pytest.mark.asyncio
+    async def test_local_budget_is_checked_first(self):
+        repo = FakeBudgetRepo()
+        budget = SharedThrottleBudget(repo, "tienda", maximum_available=100, restore_rate=1000)
+        budget.update_from_response({"extensions": {"cost": {"throttleStatus": {
+            "maximumAvailable": 100, "currentlyAvailable": 0, "restoreRate": 1000
+        }}}})
+
+        await budget.acquire(20)
+
+        # Mientras el bucket local no alcanza no se reserva nada en la base
+        assert len(repo.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_database_outage_falls_back_to_local_budget(self):
+        budget = SharedThrottleBudget(FakeBudgetRepo(error=ConnectionError("sin base")), "tienda")
+        assert await budget.acquire(11) == 0.0
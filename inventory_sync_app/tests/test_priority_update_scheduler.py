@@ -0,0 +1,89 @@
+import pytest
+from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.PriorityUpdateScheduler import PriorityUpdateScheduler
+
+
+class TestPriorityUpdateScheduler:
+
+    @pytest.fixture
+    def updater(self, make_updater):
+        return make_updater()
+
+    @pytest.mark.asyncio
+    async def test_critical_changes_go_first(self, updater, make_change):
+        """Los críticos se envían antes que los normales, sean UPDATE o CREATE"""
+        scheduler = PriorityUpdateScheduler(updater)
+        to_update = [make_change("N1", priority=3), make_change("N2", priority=3), make_change("C1", priority=1)]
+        to_create = [make_change("NEW1", priority=1, sync_op="CREATE")]
+
+        [update_logs, updated, create_logs, created] = await scheduler.push_changes(to_update, to_create)
+
+        assert set(updater.pushed[:2]) == {"C1", "NEW1"}
+        assert updater.pushed[2:] == ["N1", "N2"]
+        assert len(update_logs) == 3 and len(updated) == 3
+        assert len(create_logs) == 1 and created[0].pos_sku == "NEW1"
+
+    @pytest.mark.asyncio
+    async def test_deferred_normals_wait_behind_next_run_criticals(self, updater, make_change):
+        """Los normales que no alcanzaron turno quedan detrás de los críticos de la siguiente ejecución"""
+        scheduler = PriorityUpdateScheduler(updater, normal_lane_max_seconds=1e-9)
+        first_run = [make_change("N1", priority=3), make_change("N2", priority=3)]
+
+        await scheduler.push_changes(first_run, [])
+        assert updater.pushed == ["N1"]
+        assert scheduler.get_time_to_shopify_report()["normal"]["pending"] == 1
+
+        # N2 se vuelve a detectar junto a un crítico nuevo
+        n2_again = make_change("N2", priority=3)
+        await scheduler.push_changes([n2_again, make_change("C1", priority=1)], [])
+
+        assert updater.pushed[1] == "C1"
+        # N2 conserva la hora de su primera detección
+        assert n2_again.detected_at == first_run[1].detected_at
+
+    @pytest.mark.asyncio
+    async def test_undetected_pending_changes_are_dropped(self, updater, make_change):
+        """Un pendiente que ya no se detecta no se envía"""
+        scheduler = PriorityUpdateScheduler(updater, normal_lane_max_seconds=1e-9)
+        await scheduler.push_changes([make_change("N1", priority=3), make_change("N2", priority=3)], [])
+
+        await scheduler.push_changes([make_change("C1", priority=1)], [])
+
+        assert "N2" not in updater.pushed
+        assert scheduler.get_time_to_shopify_report()["critical"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_time_to_shopify_report(self, updater, make_change):
+        """El reporte mide desde la detección hasta la confirmación de Shopify"""
+        scheduler = PriorityUpdateScheduler(updater)
+        change = make_change("C1", priority=1)
+        change.detected_at = datetime.now() - timedelta(seconds=30)
+
+        await scheduler.push_changes([change], [])
+
+        report = scheduler.get_time_to_shopify_report()
+        assert report["critical"]["count"] == 1
+        assert report["critical"]["max_seconds"] >= 30
+
+    @pytest.mark.asyncio
+    async def test_create_batch_keeps_deferred_updates(self, updater, make_change):
+        """create_inventory_batch no descarta los UPDATE diferidos por update_inventory_batch"""
+        scheduler = PriorityUpdateScheduler(updater, normal_lane_max_seconds=1e-9)
+        first_run = [make_change("N1", priority=3), make_change("N2", priority=3)]
+
+        await scheduler.update_inventory_batch(first_run)
+        [create_logs, created] = await scheduler.create_inventory_batch([make_change("NEW1", sync_op="CREATE", priority=1)])
+
+        assert updater.pushed == ["N1", "NEW1"]
+        assert len(create_logs) == 1 and created[0].pos_sku == "NEW1"
+        assert scheduler.get_time_to_shopify_report()["normal"]["pending"] == 1
+
+        n2_again = make_change("N2", priority=3)
+        await scheduler.update_inventory_batch([n2_again])
+        assert updater.pushed[-1] == "N2"
+        assert n2_again.detected_at == first_run[1].detected_at
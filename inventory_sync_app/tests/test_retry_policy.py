@@ -0,0 +1,237 @@
+import pytest
+import random
+import socket
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes.shopify_graphql_server import FakeShopifyGraphQLServer
+from src.infrastructure import ShopifyInventoryUpdater as updater_module
+from src.infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater
+
+# Las clases se toman del módulo del updater (src/ se importa sin prefijo)
+RetryPolicy = updater_module.RetryPolicy
+RetryableError = updater_module.RetryableError
+ShopifyThrottledError = updater_module.ShopifyThrottledError
+ShopifyServerError = updater_module.ShopifyServerError
+ShopifyTransportError = updater_module.ShopifyTransportError
+ShopifyUserError = updater_module.ShopifyUserError
+
+LOCATION = "gid://shopify/Location/1"
+
+
+def free_port_url():
+    """URL a un puerto local sin servidor (conexión rechazada)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/admin/api/2024-10/graphql.json"
+
+
+class TestRetryPolicyBackoff:
+
+    def test_backoff_stays_within_jitter_bounds(self):
+        policy = RetryPolicy(base_delay_seconds=0.5, max_delay_seconds=4.0, rng=random.Random(7))
+        for attempt in range(1, 10):
+            ceiling = min(4.0, 0.5 * 2 ** (attempt - 1))
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            assert all(0 <= d <= ceiling for d in delays)
+            # Full jitter: las esperas se reparten en todo el rango
+            assert max(delays) > ceiling / 2
+
+    def test_retry_after_is_a_floor_capped_by_max_delay(self):
+        policy = RetryPolicy(base_delay_seconds=0.1, max_delay_seconds=5.0, rng=random.Random(1))
+        assert all(policy.backoff(1, retry_after=2.0) >= 2.0 for _ in range(50))
+        assert policy.backoff(1, retry_after=float('inf')) == 5.0
+
+    @pytest.mark.asyncio
+    async def test_stops_after_max_attempts(self, make_sleep):
+        sleep = make_sleep()
+        policy = RetryPolicy(max_attempts=3, sleep=sleep)
+        calls = []
+
+        async def always_fails():
+            calls.append(1)
+            raise RetryableError("transitorio")
+
+        with pytest.raises(RetryableError):
+            await policy.run(always_fails)
+        assert len(calls) == 3
+        assert len(sleep.delays) == 2
+
+    @pytest.mark.asyncio
+    async def test_fatal_errors_are_not_retried(self, make_sleep):
+        sleep = make_sleep()
+        policy = RetryPolicy(max_attempts=5, sleep=sleep)
+        calls = []
+
+        async def fails_fatally():
+            calls.append(1)
+            raise ValueError("no transitorio")
+
+        with pytest.raises(ValueError):
+            await policy.run(fails_fatally)
+        assert len(calls) == 1
+        assert sleep.delays == []
+
+
+class TestShopifyErrorClassification:
+
+    @pytest.mark.asyncio
+    async def test_server_error_is_retried_until_success(self, make_sleep, flaky_shopify, make_change):
+        flaky_shopify.fail_on = {1, 2}
+        sleep = make_sleep()
+        updater = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token", retry_policy=RetryPolicy(max_attempts=4, sleep=sleep)
+        )
+        await updater._update_single_inventory(make_change("SKU-1", "UPDATE", 6, "gid://shopify/InventoryItem/9"))
+
+        assert flaky_shopify.get_available("gid://shopify/InventoryItem/9", LOCATION) == 6
+        assert flaky_shopify.get_stats()["requests"] == 3
+        assert len(sleep.delays) == 2
+
+    @pytest.mark.asyncio
+    async def test_server_error_gives_up_after_max_attempts(self, make_sleep, flaky_shopify, make_change):
+        flaky_shopify.fail_on = {1, 2, 3}
+        updater = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token",
+            retry_policy=RetryPolicy(max_attempts=3, sleep=make_sleep())
+        )
+        with pytest.raises(ShopifyServerError) as error:
+            await updater._update_single_inventory(make_change("SKU-1", "UPDATE", 6, "gid://shopify/InventoryItem/9"))
+
+        assert error.value.status == 500
+        assert flaky_shopify.get_stats()["requests"] == 3
+
+    @pytest.mark.asyncio
+    async def test_throttled_is_retryable_with_retry_after(self, make_sleep, make_change):
+        server = FakeShopifyGraphQLServer(throttle_max=20, restore_rate=0.0)
+        await server.start()
+        try:
+            sleep = make_sleep()
+            updater = ShopifyInventoryUpdater(
+                shop_url=server.url, access_token="token", retry_policy=RetryPolicy(max_attempts=2, sleep=sleep)
+            )
+            change = make_change("SKU-2", "UPDATE", 1, "gid://shopify/InventoryItem/9")
+            await updater._update_single_inventory(change)
+            with pytest.raises(ShopifyThrottledError) as error:
+                await updater._update_single_inventory(change)
+
+            # Sin restoreRate el servidor nunca se recupera: se reintentó una vez y se cortó
+            assert server.get_stats()["throttled"] == 2
+            assert error.value.retry_after == float('inf')
+            assert sleep.delays == [RetryPolicy().max_delay_seconds]
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_connection_error_is_retryable(self, make_sleep, make_change):
+        sleep = make_sleep()
+        updater = ShopifyInventoryUpdater(
+            shop_url=free_port_url(), access_token="token", retry_policy=RetryPolicy(max_attempts=3, sleep=sleep)
+        )
+        with pytest.raises(ShopifyTransportError):
+            await updater._update_single_inventory(make_change("SKU-3", "UPDATE", 1, "gid://shopify/InventoryItem/9"))
+        assert len(sleep.delays) == 2
+
+    @pytest.mark.asyncio
+    async def test_user_errors_are_fatal(self, make_sleep, flaky_shopify, make_change):
+        sleep = make_sleep()
+        updater = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token", retry_policy=RetryPolicy(max_attempts=4, sleep=sleep)
+        )
+        with pytest.raises(ShopifyUserError) as error:
+            await updater._create_single_inventory(make_change("SKU-4", "CREATE", 1, title=""))
+
+        assert error.value.user_errors[0]["message"] == "Title can't be blank"
+        assert flaky_shopify.get_stats()["requests"] == 1
+        assert sleep.delays == []
+
+    @pytest.mark.asyncio
+    async def test_push_change_logs_retryable_failure(self, make_sleep, flaky_shopify, make_change):
+        flaky_shopify.fail_on = {1, 2}
+        updater = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token",
+            retry_policy=RetryPolicy(max_attempts=2, sleep=make_sleep())
+        )
+        sync_log, product = await updater.push_change(make_change("SKU-5", "UPDATE", 1, "gid://shopify/InventoryItem/9"))
+
+        assert product is None
+        assert sync_log.synced_status == "FAILED"
+        assert sync_log.sync_info.startswith("Error (retryable)")
+
+
+class TestIdempotentCreate:
+
+    @pytest.mark.asyncio
+    async def test_retry_resumes_after_completed_steps(self, make_sleep, flaky_shopify, make_change):
+        # Falla el paso 2 (productVariantsBulkUpdate): el reintento no vuelve a crear el producto
+        flaky_shopify.fail_on = {2}
+        updater = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token",
+            retry_policy=RetryPolicy(max_attempts=3, sleep=make_sleep())
+        )
+        created = await updater._create_single_inventory(make_change("SKU-6", "CREATE", 4))
+
+        assert created.shopify_inventory_level_gid
+        assert len(flaky_shopify.products) == 1
+        assert flaky_shopify.get_available(created.shopify_inventory_item_gid, LOCATION) == 4
+        assert flaky_shopify.get_stats()["by_operation"]["productCreate"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_reconciles_existing_sku_instead_of_duplicating(self, make_sleep, flaky_shopify, make_change):
+        updater = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token",
+            retry_policy=RetryPolicy(max_attempts=3, sleep=make_sleep())
+        )
+        first = await updater._create_single_inventory(make_change("SKU-7", "CREATE", 2))
+
+        # El primer intento de la nueva creación falla antes de conocer el producto
+        flaky_shopify.fail_on = {flaky_shopify.get_stats()["requests"] + 1}
+        again = await updater._create_single_inventory(make_change("SKU-7", "CREATE", 9))
+
+        assert again.shopify_variant_gid == first.shopify_variant_gid
+        assert len(flaky_shopify.products) == 1
+        assert flaky_shopify.get_available(first.shopify_inventory_item_gid, LOCATION) == 9
+
+    @pytest.mark.asyncio
+    async def test_reconcile_adopts_orphan_product_without_sku(self, flaky_shopify, make_change):
+        """Creación cortada entre productCreate y la asignación del SKU: se retoma, no se duplica"""
+        flaky_shopify.fail_on = {2}
+        crashed = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token", retry_policy=RetryPolicy(max_attempts=1)
+        )
+        with pytest.raises(ShopifyServerError):
+            await crashed._create_single_inventory(make_change("SKU-8", "CREATE", 3))
+        [orphan] = flaky_shopify.products.values()
+        assert orphan["tags"] == ["pos-sku:SKU-8"]
+
+        updater = ShopifyInventoryUpdater(shop_url=flaky_shopify.url, access_token="token")
+        # Al reanudar desde el journal no se conoce el precio
+        adopted = await updater.reconcile_pending_create(make_change("SKU-8", "CREATE", 5, title="SKU-8"))
+
+        assert adopted.shopify_product_gid == orphan["id"]
+        assert len(flaky_shopify.products) == 1
+        assert flaky_shopify.inventory_items[adopted.shopify_inventory_item_gid]["sku"] == "SKU-8"
+        assert flaky_shopify.get_available(adopted.shopify_inventory_item_gid, LOCATION) == 5
+        # Sin título conocido se conserva el de la creación
+        assert orphan["title"] == "Producto SKU-8"
+        assert "productUpdate" not in flaky_shopify.get_stats()["by_operation"]
+
+    @pytest.mark.asyncio
+    async def test_adopted_orphan_gets_the_change_title_and_price(self, flaky_shopify, make_change):
+        flaky_shopify.fail_on = {2}
+        crashed = ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token", retry_policy=RetryPolicy(max_attempts=1)
+        )
+        with pytest.raises(ShopifyServerError):
+            await crashed._create_single_inventory(make_change("SKU-9", "CREATE", 3, title="Tenis viejos"))
+
+        updater = ShopifyInventoryUpdater(shop_url=flaky_shopify.url, access_token="token")
+        adopted = await updater.reconcile_pending_create(make_change("SKU-9", "CREATE", 5, title="Tenis nuevos"))
+
+        [orphan] = flaky_shopify.products.values()
+        assert adopted.shopify_product_gid == orphan["id"]
+        assert orphan["title"] == "Tenis nuevos"
+        assert flaky_shopify.variants[adopted.shopify_variant_gid]["price"] == "99.0"
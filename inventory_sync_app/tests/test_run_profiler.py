@@ -0,0 +1,58 @@
+import pytest
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.shared.profiling import RunProfiler, get_profiler, profile_run
+
+
+def busy_parse(seconds):
+    """Carga de CPU reconocible en las pilas"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        int("12345")
+
+
+def allocate_rows(count):
+    return [{"sku": f"SKU-{i}", "qty": i} for i in range(count)]
+
+
+class TestRunProfiler:
+
+    def test_samples_and_allocations_are_attributed_to_stages(self):
+        profiler = RunProfiler(interval_seconds=0.001, top_n=5)
+        profiler.start()
+        busy_parse(0.15)
+        profiler.mark_stage("extract_erp")
+        rows = allocate_rows(20_000)
+        profiler.mark_stage("detect_changes")
+        profiler.stop()
+
+        extract_stacks = profiler.samples_by_stage["extract_erp"]
+        assert sum(extract_stacks.values()) > 10
+        assert any("busy_parse (test_run_profiler.py" in stack for stack in extract_stacks)
+
+        stages = [stage for stage, _, _ in profiler.allocations_by_stage]
+        assert stages == ["extract_erp", "detect_changes", "other"]
+        _, detect_stats, _ = profiler.allocations_by_stage[1]
+        assert detect_stats[0][0] == __file__
+        assert len(rows) == 20_000
+
+    def test_profile_run_writes_flamegraph_and_allocation_report(self, tmp_path):
+        with profile_run(str(tmp_path), interval_seconds=0.001, top_n=3) as profiler:
+            assert get_profiler() is profiler
+            busy_parse(0.05)
+            get_profiler().mark_stage("push_shopify")
+
+        # Fuera del bloque la marca de etapa no hace nada
+        assert not get_profiler().active
+        get_profiler().mark_stage("ignored")
+
+        [folded] = tmp_path.glob("sync_*.folded")
+        [alloc] = tmp_path.glob("sync_*_alloc.txt")
+        lines = folded.read_text().splitlines()
+        assert lines and all(line.startswith("stage:") and line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any(line.startswith("stage:push_shopify;") for line in lines)
+        assert "== push_shopify:" in alloc.read_text()
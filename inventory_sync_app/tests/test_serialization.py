@@ -0,0 +1,61 @@
+import pytest
+import json
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.shared import serialization
+from src.shared.serialization import available_backends, configure_json_backend
+
+BACKENDS = list(available_backends())
+DOCUMENT = {"sku": "ZAP-Ñ-1", "existencia": 4.5, "ids": [1, 2], "vacío": None, "ok": True}
+
+
+class TestJSONCodec:
+
+    @pytest.mark.parametrize("name", BACKENDS)
+    def test_round_trip_matches_stdlib(self, name):
+        backend = available_backends()[name]
+        body = backend.dumps(DOCUMENT)
+
+        assert json.loads(body) == DOCUMENT
+        assert backend.loads(body) == backend.loads(body.decode("utf-8")) == DOCUMENT
+        # Sin escapar, como ensure_ascii=False
+        assert "ZAP-Ñ-1".encode("utf-8") in body
+
+    @pytest.mark.parametrize("name", BACKENDS)
+    def test_non_json_values_use_str(self, name):
+        backend = available_backends()[name]
+        value = {"at": datetime(2024, 10, 1, 12, 30), "price": Decimal("99.90"), 3: "llave no str"}
+
+        decoded = backend.loads(backend.dumps(value))
+
+        assert decoded["price"] == "99.90" and decoded["3"] == "llave no str"
+        if name != "msgspec":
+            assert decoded["at"] == str(value["at"])
+
+    @pytest.mark.parametrize("name", BACKENDS)
+    def test_invalid_json_raises_value_error(self, name):
+        with pytest.raises(ValueError):
+            available_backends()[name].loads(b"{no es json")
+
+    @pytest.mark.parametrize("name", BACKENDS)
+    def test_pretty_output_is_indented(self, name):
+        pretty = available_backends()[name].dumps_pretty({"changes": [1]})
+        assert pretty.decode("utf-8").splitlines()[1] == '  "changes": ['
+
+    def test_stdlib_is_always_available_and_preferred_last(self):
+        assert BACKENDS[-1] == "json"
+        assert serialization.get_json_backend().name == BACKENDS[0]
+
+    def test_configure_unknown_backend_fails(self):
+        with pytest.raises(ValueError):
+            configure_json_backend("simplejson")
+        try:
+            assert configure_json_backend("json").name == "json"
+            assert serialization.dumps_str({"a": 1}) == '{"a":1}'
+        finally:
+            configure_json_backend(None)
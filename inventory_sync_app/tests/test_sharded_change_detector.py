@@ -0,0 +1,116 @@
+import pytest
+import dataclasses
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.micro_benchmarks import build_dataset
+from src.domain.entities.ERPReportPartition import ERPReportPartition
+from src.infrastructure.SmartChangeDetector import SmartChangeDetector
+from src.infrastructure.ShardedChangeDetector import ShardedChangeDetector
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    _, erp_products, _, cache_levels = build_dataset(3000, seed=7, churn=0.2)
+    # Productos nuevos, agotados y un nivel duplicado (gana el último, como en el dict del detector)
+    cache_levels = [
+        dataclasses.replace(level, sync_op="CREATE") if i % 97 == 0
+        else dataclasses.replace(level, quantities_available=0.0) if i % 89 == 0
+        else level
+        for i, level in enumerate(cache_levels)
+    ]
+    cache_levels.append(dataclasses.replace(cache_levels[10], quantities_available=-1.0))
+    # Filas del ERP sin nivel en el cache
+    return erp_products, cache_levels[: len(cache_levels) - 40] + cache_levels[-1:]
+
+
+def without_timestamp(changes):
+    return [dataclasses.replace(change, detected_at=None) for change in changes]
+
+
+async def detect(detector, erp_products, cache_levels):
+    index = detector.index_inventory(cache_levels)
+    changes = []
+    for start in range(0, len(erp_products), 1000):
+        changes.extend(await detector.detect_partition_changes(erp_products[start:start + 1000], index))
+    return without_timestamp(changes), detector._cache_misses
+
+
+class TestShardedChangeDetector:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("shard_by", ["location", "sku"])
+    async def test_same_changes_as_single_process(self, dataset, shard_by):
+        erp_products, cache_levels = dataset
+        expected = await detect(SmartChangeDetector(), erp_products, cache_levels)
+
+        result = await detect(ShardedChangeDetector(workers=3, shard_by=shard_by), erp_products, cache_levels)
+
+        assert expected[0] and expected[1]
+        assert result == expected
+        assert {change.priority for change in result[0]} == {1, 3}
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_and_keeps_priority_order(self, dataset, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        erp_products, cache_levels = dataset
+        expected = await SmartChangeDetector().detect_inventory_changes(erp_products, cache_levels)
+
+        detector = ShardedChangeDetector(workers=2, min_rows_for_processes=0)
+        try:
+            result = await detector.detect_inventory_changes(erp_products, cache_levels)
+            assert detector._executor is not None
+        finally:
+            detector.close()
+
+        assert without_timestamp(result) == without_timestamp(expected)
+
+    @pytest.mark.asyncio
+    async def test_erp_partitions_by_almacen_reach_the_process_pool(self, dataset, tmp_path, monkeypatch):
+        """Reporte particionado por almacén (una ubicación por partición): cada partición se reparte por SKU"""
+        monkeypatch.chdir(tmp_path)
+        erp_products, cache_levels = dataset
+        expected = await SmartChangeDetector().detect_inventory_changes(erp_products, cache_levels)
+
+        by_almacen = {}
+        for product in erp_products:
+            by_almacen.setdefault(product.almacen, []).append(product)
+        partitions = [ERPReportPartition(almacen, products) for almacen, products in by_almacen.items()]
+        assert len(partitions) > 1
+
+        detector = ShardedChangeDetector(workers=2, min_rows_for_processes=len(cache_levels))
+        executor_calls = []
+        get_executor = detector._get_executor
+        monkeypatch.setattr(detector, "_get_executor", lambda: executor_calls.append(1) or get_executor())
+        try:
+            index = detector.index_inventory(cache_levels)
+            changes = []
+            for partition in partitions:
+                changes.extend(await detector.detect_partition_changes(partition.products, index))
+            result = detector.finalize_changes(changes)
+        finally:
+            detector.close()
+
+        assert len(executor_calls) == len(partitions)
+        assert sorted(without_timestamp(result), key=repr) == sorted(without_timestamp(expected), key=repr)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("detector_class", [SmartChangeDetector, ShardedChangeDetector])
+    async def test_rows_of_other_workers_locations_are_dropped(self, dataset, detector_class):
+        """Con sharding por ubicación el cache solo trae las ubicaciones propias: el resto del ERP no son faltantes"""
+        erp_products, cache_levels = dataset
+        owned = {1, 2}
+        expected = await detect(SmartChangeDetector(), [p for p in erp_products if p.almacen in ("CEDIS", "COACALCO")], cache_levels)
+
+        detector = detector_class()
+        index = detector.index_inventory([level for level in cache_levels if level.id_location in owned])
+        changes = await detector.detect_partition_changes(erp_products, index, locations=owned)
+
+        assert expected[0]
+        assert (without_timestamp(changes), detector._cache_misses) == expected
+
+    def test_invalid_shard_key(self):
+        with pytest.raises(ValueError):
+            ShardedChangeDetector(shard_by="almacen")
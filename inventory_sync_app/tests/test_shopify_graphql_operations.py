@@ -0,0 +1,47 @@
+import pytest
+import hashlib
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fakes.shopify_graphql_server import FakeShopifyGraphQLServer, OPERATION_COSTS
+from src.infrastructure import ShopifyGraphQLOperations as operations
+
+
+class TestGraphQLOperationRegistry:
+
+    def test_body_is_the_same_as_serializing_the_whole_payload(self):
+        variables = {"input": {"name": "available", "quantities": [{"inventoryItemId": "gid://1", "quantity": 3}]}}
+
+        body = operations.INVENTORY_SET_QUANTITIES.build_body(variables)
+
+        assert json.loads(body) == {"query": operations.INVENTORY_SET_QUANTITIES.query, "variables": variables}
+
+    def test_queries_with_quotes_survive_the_prefix(self):
+        body = operations.PRODUCT_CREATE.build_body({})
+        assert 'quantities(names: "available")' in json.loads(body)["query"]
+
+    @pytest.mark.parametrize("name", list(operations.SHOPIFY_OPERATIONS))
+    def test_estimates_match_the_fake_server(self, name):
+        operation = operations.SHOPIFY_OPERATIONS[name]
+        # El servidor falso reconoce la operación por su campo raíz y cobra ese costo
+        assert FakeShopifyGraphQLServer()._detect_operation(operation.query) == name
+        assert operation.estimated_cost == OPERATION_COSTS[name]
+
+    def test_persisted_query_hash(self):
+        operation = operations.VARIANTS_BY_SKU
+        expected = hashlib.sha256(operation.query.encode("utf-8")).hexdigest()
+        assert operation.persisted_query_extension() == {"persistedQuery": {"version": 1, "sha256Hash": expected}}
+
+    def test_each_query_is_registered_once(self):
+        same = operations.register_operation("products", operations.PRODUCTS_BY_SKU_TAG.query, 4)
+        assert same is operations.PRODUCTS_BY_SKU_TAG
+        with pytest.raises(ValueError):
+            operations.register_operation("products", "query Otra { products(first: 2) { edges { node { id } } } }", 4)
+
+    def test_create_cost_covers_the_four_steps(self):
+        assert operations.CREATE_CHANGE_COST == sum(
+            OPERATION_COSTS[name] for name in ("productCreate", "productVariantsBulkUpdate", "inventoryActivate", "inventorySetQuantities")
+        )
@@ -0,0 +1,203 @@
+import pytest
+import pytest_asyncio
+import json
+import sys
+import os
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer, TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.ShopifyWebhookReceiver import ShopifyWebhookReceiver
+
+SECRET = "test-secret"
+
+
+class FakeInventoryRepo:
+    """
+    Repositorio en memoria que registra los lotes aplicados
+
+    Las primeras fail_times llamadas fallan como si PostgreSQL estuviera
+    caído; un lote que contenga un inventory item de poison_items falla
+    con un error de datos.
+    """
+
+    def __init__(self, fail_times=0, poison_items=()):
+        self.level_batches = []
+        self.product_batches = []
+        self._fail_times = fail_times
+        self._poison_items = set(poison_items)
+
+    def _maybe_fail(self, events):
+        if self._fail_times:
+            self._fail_times -= 1
+            raise ConnectionError("db caída")
+        items = {getattr(event, "inventory_item_gid", None) or event.shopify_inventory_item_gid for event in events}
+        if items & self._poison_items:
+            raise ValueError("invalid input syntax")
+
+    async def apply_shopify_product_events(self, events):
+        self._maybe_fail(events)
+        self.product_batches.append(events)
+        return len(events)
+
+    async def apply_shopify_inventory_events(self, events):
+        self._maybe_fail(events)
+        self.level_batches.append(events)
+        return len(events)
+
+
+def level_payload(available, updated_at, item_id=111, location_id=222):
+    return {
+        "inventory_item_id": item_id,
+        "location_id": location_id,
+        "available": available,
+        "updated_at": updated_at,
+        "admin_graphql_api_id": f"gid://shopify/InventoryLevel/{location_id}?inventory_item_id={item_id}"
+    }
+
+
+async def post(client, topic, payload, secret=SECRET):
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "X-Shopify-Topic": topic,
+        "X-Shopify-Hmac-Sha256": ShopifyWebhookReceiver.compute_hmac(secret.encode("utf-8"), body),
+        "Content-Type": "application/json"
+    }
+    return await client.post("/webhooks/shopify", data=body, headers=headers)
+
+
+@pytest_asyncio.fixture
+async def receiver_client():
+    repo = FakeInventoryRepo()
+    receiver = ShopifyWebhookReceiver(repo, secret=SECRET, flush_interval_seconds=60)
+    app = web.Application()
+    receiver.add_routes(app)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    yield receiver, repo, client
+    await client.close()
+
+
+class TestShopifyWebhookReceiver:
+
+    @pytest.mark.asyncio
+    async def test_rejects_invalid_hmac(self, receiver_client):
+        receiver, repo, client = receiver_client
+
+        response = await post(client, "inventory_levels/update", level_payload(3, "2024-01-01T10:00:00-06:00"), secret="otro")
+
+        assert response.status == 401
+        assert receiver.get_stats()["rejected"] == 1
+        assert receiver.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_coalesces_to_latest_level(self, receiver_client):
+        """Varios webhooks del mismo nivel se aplican como uno solo, el más reciente"""
+        receiver, repo, client = receiver_client
+
+        await post(client, "inventory_levels/update", level_payload(5, "2024-01-01T10:00:02-06:00"))
+        await post(client, "inventory_levels/update", level_payload(9, "2024-01-01T10:00:01-06:00"))
+        await post(client, "inventory_levels/update", level_payload(7, "2024-01-01T10:00:00-06:00", item_id=333))
+
+        applied = await receiver.flush()
+
+        assert applied["levels"] == 2
+        levels = {event.inventory_item_gid: event.available for event in repo.level_batches[0]}
+        assert levels == {
+            "gid://shopify/InventoryItem/111": 5,
+            "gid://shopify/InventoryItem/333": 7
+        }
+
+    @pytest.mark.asyncio
+    async def test_product_create_keeps_only_variants_with_sku(self, receiver_client):
+        receiver, repo, client = receiver_client
+        payload = {
+            "id": 10,
+            "title": "Tenis",
+            "admin_graphql_api_id": "gid://shopify/Product/10",
+            "updated_at": "2024-01-01T10:00:00-06:00",
+            "tags": "oferta, pos-sku:ABC-1",
+            "variants": [
+                {"id": 1, "sku": "ABC-1", "price": "199.00", "inventory_item_id": 55},
+                {"id": 2, "sku": "", "price": "199.00", "inventory_item_id": 56},
+                {"id": 3, "sku": "ABC-2", "price": "199.00", "inventory_item_id": 57}
+            ]
+        }
+
+        response = await post(client, "products/create", payload)
+        await receiver.stop()
+
+        assert response.status == 200
+        event, untagged = repo.product_batches[0]
+        assert event.pos_sku == "ABC-1"
+        assert event.shopify_inventory_item_gid == "gid://shopify/InventoryItem/55"
+        assert event.shopify_variant_gid == "gid://shopify/ProductVariant/1"
+        # Solo la variante con su tag pos-sku: puede enlazarse a una fila del POS
+        assert event.pos_sku_tagged
+        assert untagged.pos_sku == "ABC-2" and not untagged.pos_sku_tagged
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_requeues_events(self):
+        repo = FakeInventoryRepo(fail_times=1)
+        receiver = ShopifyWebhookReceiver(repo, secret=SECRET)
+        receiver.ingest("inventory_levels/update", level_payload(4, "2024-01-01T10:00:00-06:00"))
+
+        await receiver.flush()
+        assert receiver.get_stats()["flush_errors"] == 1
+        assert receiver.get_stats()["pending"] == 1
+
+        await receiver.flush()
+        assert receiver.get_stats()["levels_applied"] == 1
+
+    @pytest.mark.asyncio
+    async def test_malformed_payload_returns_400(self, receiver_client):
+        receiver, repo, client = receiver_client
+
+        bad_quantity = await post(client, "inventory_levels/update", level_payload("muchos", "2024-01-01T10:00:00-06:00"))
+        not_an_object = await post(client, "inventory_levels/update", [1, 2, 3])
+
+        assert bad_quantity.status == 400
+        assert not_an_object.status == 400
+        assert receiver.get_stats()["malformed"] == 2
+        assert receiver.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_poison_event_is_isolated_and_dead_lettered(self, caplog):
+        poison = "gid://shopify/InventoryItem/666"
+        repo = FakeInventoryRepo(poison_items={poison})
+        receiver = ShopifyWebhookReceiver(repo, secret=SECRET, max_event_attempts=2)
+        receiver.ingest("inventory_levels/update", level_payload(4, "2024-01-01T10:00:00-06:00"))
+        receiver.ingest("inventory_levels/update", level_payload(1, "2024-01-01T10:00:00-06:00", item_id=666))
+
+        # El evento sano se aplica aunque el lote falle; el malo se reintenta
+        applied = await receiver.flush()
+        assert applied["levels"] == 1
+        assert receiver.get_stats()["pending"] == 1
+
+        receiver.ingest("inventory_levels/update", level_payload(6, "2024-01-01T10:00:05-06:00", item_id=333))
+        with caplog.at_level("ERROR", logger="inventory_sync.webhooks.dead_letter"):
+            applied = await receiver.flush()
+
+        assert applied["levels"] == 1
+        assert receiver.get_stats()["pending"] == 0
+        assert receiver.get_stats()["dead_lettered"] == 1
+        assert any(poison in record.getMessage() for record in caplog.records)
+        applied_items = [event.inventory_item_gid for batch in repo.level_batches for event in batch]
+        assert poison not in applied_items
+        assert "gid://shopify/InventoryItem/333" in applied_items
+
+    @pytest.mark.asyncio
+    async def test_database_outage_never_dead_letters(self):
+        repo = FakeInventoryRepo(fail_times=5)
+        receiver = ShopifyWebhookReceiver(repo, secret=SECRET, max_event_attempts=1)
+        receiver.ingest("inventory_levels/update", level_payload(4, "2024-01-01T10:00:00-06:00"))
+
+        for _ in range(5):
+            await receiver.flush()
+        assert receiver.get_stats()["dead_lettered"] == 0
+        assert receiver.get_stats()["pending"] == 1
+
+        await receiver.flush()
+        assert receiver.get_stats()["levels_applied"] == 1
@@ -0,0 +1,179 @@
+import pytest
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# La configuración global se construye al importar: valores mínimos para el test
+for key, value in {
+    "DB_HOST": "localhost", "DB_NAME": "test", "DB_USER": "test", "DB_PASSWORD": "test",
+    "ERP_ENDPOINT_URL": "http://localhost/erp", "SHOPIFY_ACCESS_TOKEN": "token",
+    "SHOPIFY_SHOP_DOMAIN": "http://localhost/shopify"
+}.items():
+    os.environ.setdefault(key, value)
+
+from src.presentation import daemon as daemon_module
+from src.shared.config.config_manager import ApplicationConfig
+
+
+class FakeUseCase:
+    """Caso de uso que se bloquea hasta que el test lo libera"""
+
+    def __init__(self, events):
+        self.events = events
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+        self.calls = 0
+
+    def close(self):
+        self.closed = True
+
+    async def release_locations(self):
+        self.released = True
+
+    async def execute(self):
+        self.calls += 1
+        self.events.append("run_started")
+        self.started.set()
+        await self.release.wait()
+        self.events.append("run_finished")
+        return {"status": "SUCCESS", "operation_time_seconds": 0.0}
+
+
+class FakeResource:
+    """Pool de PostgreSQL / sesión HTTP que registra su cierre"""
+
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+        self.events.append(f"{self.name}_closed")
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    events = []
+    created = {"pools": [], "use_cases": []}
+    use_case = FakeUseCase(events)
+
+    async def fake_create_pool(dsn, **kwargs):
+        pool = FakeResource("pool", events)
+        pool.dsn = dsn
+        created["pools"].append(pool)
+        return pool
+
+    def fake_build_sync_use_case(config, db_pool=None, http_session=None):
+        created["use_cases"].append((db_pool, http_session))
+        return use_case
+
+    monkeypatch.setattr(daemon_module.asyncpg, "create_pool", fake_create_pool)
+    monkeypatch.setattr(daemon_module.aiohttp, "ClientSession", lambda **kwargs: FakeResource("session", events))
+    monkeypatch.setattr(daemon_module, "build_sync_use_case", fake_build_sync_use_case)
+
+    config = ApplicationConfig(METRICS_PORT=0, SHOPIFY_WEBHOOK_SECRET="")
+    daemon = daemon_module.SyncDaemon(config, continuous=True)
+    return daemon, use_case, events, created
+
+
+class TestSyncDaemon:
+
+    @pytest.mark.asyncio
+    async def test_overlapping_run_is_skipped(self, harness):
+        daemon, use_case, _, _ = harness
+        await daemon.start()
+        try:
+            first = asyncio.create_task(daemon.run_sync())
+            await use_case.started.wait()
+
+            assert await daemon.run_sync() is None
+            assert use_case.calls == 1
+
+            use_case.release.set()
+            assert (await first)["status"] == "SUCCESS"
+        finally:
+            use_case.release.set()
+            await daemon.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_current_run_before_closing_pool_and_session(self, harness):
+        daemon, use_case, events, _ = harness
+        await daemon.start()
+
+        run = asyncio.create_task(daemon.run_sync())
+        await use_case.started.wait()
+
+        daemon.request_stop()
+        shutdown = asyncio.create_task(daemon.shutdown())
+        await asyncio.sleep(0.05)
+        assert not shutdown.done()
+        assert "pool_closed" not in events
+
+        use_case.release.set()
+        await shutdown
+        await run
+
+        assert events == ["run_started", "run_finished", "session_closed", "pool_closed"]
+        # Tras la señal de cierre no se aceptan nuevas ejecuciones
+        assert await daemon.run_sync() is None
+
+    @pytest.mark.asyncio
+    async def test_pool_and_session_are_reused_across_runs(self, harness):
+        daemon, use_case, _, created = harness
+        use_case.release.set()
+        await daemon.start()
+        try:
+            for _ in range(3):
+                assert (await daemon.run_sync())["status"] == "SUCCESS"
+        finally:
+            await daemon.shutdown()
+
+        assert use_case.calls == 3
+        assert len(created["pools"]) == 1
+        assert created["use_cases"] == [(created["pools"][0], daemon._http_session)]
+        assert created["pools"][0].dsn == daemon._config.database.database_url
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint_is_off_and_local_by_default(self, harness, monkeypatch):
+        _, use_case, _, _ = harness
+        monkeypatch.delenv("METRICS_PORT", raising=False)
+        monkeypatch.delenv("METRICS_HOST", raising=False)
+        config = ApplicationConfig(SHOPIFY_WEBHOOK_SECRET="")
+
+        assert config.sync.metrics_port is None
+        assert config.sync.metrics_host == "127.0.0.1"
+
+        daemon = daemon_module.SyncDaemon(config, continuous=True)
+        use_case.release.set()
+        await daemon.start()
+        try:
+            assert daemon._metrics_runner is None
+        finally:
+            await daemon.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_log_maintenance_does_not_delay_the_startup_run(self, harness):
+        _, use_case, _, _ = harness
+        tz = ZoneInfo("America/Mexico_City")
+        soon = datetime.now(tz) + timedelta(minutes=5)
+        later = datetime.now(tz) + timedelta(hours=3)
+        config = ApplicationConfig(
+            METRICS_PORT=0, SHOPIFY_WEBHOOK_SECRET="",
+            SYNC_TIMEZONE="America/Mexico_City",
+            SYNC_TIMES=f"{later:%H:%M}",
+            SYNC_LOG_MAINTENANCE_TIME=f"{soon:%H:%M}"
+        )
+
+        daemon = daemon_module.SyncDaemon(config)
+        use_case.release.set()
+        await daemon.start()
+        try:
+            assert daemon._scheduler.get_job("sync_log_maintenance") is not None
+            assert daemon._should_run_on_start()
+        finally:
+            await daemon.shutdown()
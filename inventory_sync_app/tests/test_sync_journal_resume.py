@@ -0,0 +1,328 @@
+import pytest
+from datetime import datetime, timedelta
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.application.SyncInventoryUseCase import SyncInventoryUseCase
+from src.domain.entities.SyncRun import SyncRun
+from src.domain.entities.SyncRunChange import SyncRunChange
+from src.domain.entities.ERPReportPartition import ERPReportPartition
+from src.domain.repositories.IERPDataExtractor import IERPDataExtractor
+from src.domain.repositories.IChangeDetector import IChangeDetector
+from src.application.LocationShardCoordinator import LocationShardCoordinator
+from tests.test_location_sharding import InMemoryLeaseRepo
+
+
+class FakeJournal:
+    """Journal en memoria"""
+
+    def __init__(self, open_run=None):
+        self.open_run = open_run
+        self.statuses = {}
+        self.finished = {}
+        self.next_run_id = 100
+
+    async def get_open_run(self):
+        return self.open_run
+
+    async def start_run(self, changes):
+        run_id = self.next_run_id
+        for change in changes:
+            self.statuses[(run_id, change.sku)] = "PENDING"
+        return run_id
+
+    async def register_resume_attempt(self, run_id):
+        self.open_run.resume_attempts += 1
+        self.resume_attempts = self.open_run.resume_attempts
+        return self.resume_attempts
+
+    async def mark_pushed(self, run_id, change, shopi_product):
+        self.statuses[(run_id, change.sku)] = "PUSHED"
+
+    async def mark_failed(self, run_id, change):
+        self.statuses[(run_id, change.sku)] = "FAILED"
+
+    async def mark_confirmed(self, run_id, shopi_products):
+        for product in shopi_products:
+            self.statuses[(run_id, product.pos_sku)] = "CONFIRMED"
+
+    async def finish_run(self, run_id, status="COMPLETED"):
+        self.finished[run_id] = status
+
+
+class FakeInventoryRepo:
+    def __init__(self, levels=()):
+        self.updated = []
+        self.created = []
+        self.levels = list(levels)
+        # Cambia con cada escritura al cache (la sincronización, un webhook u otro worker)
+        self.version = 0
+
+    async def get_current_inventory_levels(self):
+        return list(self.levels)
+
+    async def get_cache_version(self):
+        return self.version
+
+    async def update_inventory_level(self, products):
+        self.updated.extend(products)
+
+    async def products_created_on_shopify(self, products):
+        self.created.extend(products)
+
+
+class FakeExtractor(IERPDataExtractor):
+    def __init__(self):
+        self.unchanged = False
+
+    async def extract_products(self):
+        return []
+
+    async def get_extraction_metadata(self):
+        return {}
+
+    def last_extraction_unchanged(self):
+        return self.unchanged
+
+
+class PartitionedExtractor(FakeExtractor):
+    """Reporte dividido por almacén: unchanged_partitions se marcan sin cambios"""
+
+    def __init__(self, products_by_partition):
+        super().__init__()
+        self.products_by_partition = products_by_partition
+        self.unchanged_partitions = set()
+
+    async def iter_product_partitions(self, locations=None):
+        for partition, products in self.products_by_partition.items():
+            yield ERPReportPartition(partition, products, unchanged=partition in self.unchanged_partitions)
+
+
+class FakeDetector(IChangeDetector):
+    def __init__(self, changes):
+        self._changes = changes
+        self.calls = 0
+        self.detected_products = []
+        self.inventories = []
+
+    async def detect_inventory_changes(self, erp_products, current_inventory):
+        self.calls += 1
+        self.detected_products.extend(erp_products)
+        self.inventories.append(current_inventory)
+        return list(self._changes)
+
+
+class FakeSyncLogRepo:
+    async def create_sync_logs(self, sync_logs):
+        return None
+
+
+def build_use_case(journal, updater, inventory_repo, changes=()):
+    return SyncInventoryUseCase(
+        erp_extractor=FakeExtractor(),
+        inventory_repo=inventory_repo,
+        sync_log_repo=FakeSyncLogRepo(),
+        change_detector=FakeDetector(list(changes)),
+        shopify_updater=updater,
+        sync_journal=journal
+    )
+
+
+class TestSyncJournalResume:
+
+    @pytest.mark.asyncio
+    async def test_interrupted_run_is_applied_without_repushing(self, make_updater):
+        """Lo ya enviado a Shopify se aplica al cache y las creaciones a medias se reconcilian por SKU"""
+        open_run = SyncRun(run_id=7, status="RUNNING", started_at=datetime.now(), changes=[
+            SyncRunChange(run_id=7, pos_sku="UPD-1", id_location=1, sync_op="UPDATE", new_quantity=3, status="PUSHED"),
+            SyncRunChange(run_id=7, pos_sku="NEW-1", id_location=1, sync_op="CREATE", new_quantity=2, status="PENDING"),
+            SyncRunChange(run_id=7, pos_sku="NEW-2", id_location=1, sync_op="CREATE", new_quantity=2, status="PENDING"),
+            SyncRunChange(run_id=7, pos_sku="UPD-2", id_location=1, sync_op="UPDATE", new_quantity=1, status="PENDING")
+        ])
+        journal = FakeJournal(open_run)
+        updater = make_updater(existing_skus={"NEW-1"})
+        inventory_repo = FakeInventoryRepo()
+
+        result = await build_use_case(journal, updater, inventory_repo).execute()
+
+        assert result["status"] == "SUCCESS"
+        assert result["resumed_run_id"] == 7 and result["resumed_changes"] == 2
+        assert [(p.pos_sku, p.new_quantity) for p in inventory_repo.updated] == [("UPD-1", 3)]
+        assert [p.pos_sku for p in inventory_repo.created] == ["NEW-1"]
+        assert updater.reconciled == ["NEW-1", "NEW-2"]
+        assert updater.pushed == []
+        assert journal.finished[7] == "RECOVERED"
+
+    @pytest.mark.asyncio
+    async def test_run_records_each_change_status(self, make_updater, make_change):
+        journal = FakeJournal()
+        updater = make_updater(failing_skus={"B"})
+        changes = [make_change("A"), make_change("B"), make_change("C", sync_op="CREATE")]
+
+        result = await build_use_case(journal, updater, FakeInventoryRepo(), changes).execute()
+
+        assert result["journal_run_id"] == 100
+        assert journal.statuses == {
+            (100, "A"): "CONFIRMED",
+            (100, "B"): "FAILED",
+            (100, "C"): "CONFIRMED"
+        }
+        assert journal.finished[100] == "COMPLETED"
+
+    @pytest.mark.asyncio
+    async def test_resume_failure_does_not_block_the_run(self, make_updater, make_change):
+        open_run = SyncRun(run_id=7, status="RUNNING", started_at=datetime.now(), changes=[
+            SyncRunChange(run_id=7, pos_sku="NEW-1", id_location=1, sync_op="CREATE", new_quantity=2, status="PENDING")
+        ])
+        journal = FakeJournal(open_run)
+        updater = make_updater()
+
+        async def shopify_down(change):
+            raise ConnectionError("Shopify no responde")
+        updater.reconcile_pending_create = shopify_down
+
+        result = await build_use_case(journal, updater, FakeInventoryRepo(), [make_change("A")]).execute()
+
+        assert result["status"] == "SUCCESS"
+        assert "Shopify no responde" in result["resume_error"]
+        assert updater.pushed == ["A"]
+        # El intento quedó contado y la ejecución sigue abierta para la próxima vez
+        assert journal.resume_attempts == 1
+        assert 7 not in journal.finished
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("resume_attempts, age", [(3, timedelta(minutes=5)), (0, timedelta(days=2))])
+    async def test_run_is_abandoned_after_max_attempts_or_age(self, make_updater, resume_attempts, age):
+        open_run = SyncRun(run_id=7, status="RUNNING", started_at=datetime.now() - age, resume_attempts=resume_attempts, changes=[
+            SyncRunChange(run_id=7, pos_sku="NEW-1", id_location=1, sync_op="CREATE", new_quantity=2, status="PENDING")
+        ])
+        journal = FakeJournal(open_run)
+        updater = make_updater(existing_skus={"NEW-1"})
+
+        result = await build_use_case(journal, updater, FakeInventoryRepo()).execute()
+
+        assert result["status"] == "SUCCESS"
+        assert result["abandoned_run_id"] == 7
+        assert journal.finished[7] == "ABANDONED"
+        assert updater.reconciled == []
+
+
+class TestUnchangedERPReport:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("failing_skus,skipped", [((), True), (("B",), False)])
+    async def test_detection_skipped_only_after_clean_run(self, make_updater, make_change, failing_skus, skipped):
+        """Reporte sin cambios: solo se omite la detección si la ejecución anterior aplicó todo"""
+        use_case = build_use_case(FakeJournal(), make_updater(failing_skus=failing_skus), FakeInventoryRepo(), [make_change("A"), make_change("B")])
+        await use_case.execute()
+
+        use_case._erp_extractor.unchanged = True
+        result = await use_case.execute()
+
+        assert result["status"] == "SUCCESS"
+        assert result.get("erp_unchanged", False) is skipped
+        assert use_case._change_detector.calls == (1 if skipped else 2)
+
+    @pytest.mark.asyncio
+    async def test_cache_written_after_clean_run_is_detected_again(self, make_updater, make_change):
+        """Un webhook (edición manual en Shopify) cambió el cache: se detecta aunque el ERP no cambie"""
+        repo = FakeInventoryRepo()
+        use_case = build_use_case(FakeJournal(), make_updater(), repo, [make_change("A")])
+        await use_case.execute()
+        use_case._erp_extractor.unchanged = True
+
+        repo.version += 1
+        drifted = await use_case.execute()
+        unchanged = await use_case.execute()
+
+        assert "erp_unchanged" not in drifted
+        assert unchanged["erp_unchanged"] is True
+        assert use_case._change_detector.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_only_changed_partitions_are_detected(self, make_updater, make_change):
+        """Tras una ejecución limpia solo se detectan los almacenes cuyo reporte cambió"""
+        use_case = build_use_case(FakeJournal(), make_updater(), FakeInventoryRepo(), [make_change("A")])
+        use_case._erp_extractor = PartitionedExtractor({"1": ["p1"], "2": ["p2"], "3": ["p3"]})
+        first = await use_case.execute()
+        assert use_case._change_detector.detected_products == ["p1", "p2", "p3"]
+
+        use_case._erp_extractor.unchanged_partitions = {"1", "3"}
+        use_case._change_detector.detected_products = []
+        second = await use_case.execute()
+
+        assert first["erp_products_extracted"] == second["erp_products_extracted"] == 3
+        assert use_case._change_detector.detected_products == ["p2"]
+        assert second["changes_detected"] == 1 and "erp_unchanged" not in second
+
+
+class TestLocationSharding:
+
+    @pytest.mark.asyncio
+    async def test_worker_only_detects_its_locations(self, make_updater, make_change):
+        levels = [SimpleNamespace(pos_sku="A", id_location=1), SimpleNamespace(pos_sku="A", id_location=2)]
+        repo = InMemoryLeaseRepo(location_ids=[1, 2])
+        repo.leases[2] = ("host-b", repo.now + timedelta(minutes=5))
+        use_case = build_use_case(FakeJournal(), make_updater(), FakeInventoryRepo(levels), [make_change("A")])
+        use_case._location_shard = LocationShardCoordinator(repo, "host-a")
+
+        try:
+            result = await use_case.execute()
+        finally:
+            await use_case.release_locations()
+
+        assert result["status"] == "SUCCESS"
+        assert result["worker"] == "host-a" and result["locations"] == [1]
+        assert use_case._change_detector.inventories == [[levels[0]]]
+        assert list(repo.leases) == [2]
+
+    @pytest.mark.asyncio
+    async def test_worker_without_locations_does_not_sync(self, make_updater, make_change):
+        repo = InMemoryLeaseRepo(location_ids=[1])
+        repo.leases[1] = ("host-b", repo.now + timedelta(minutes=5))
+        updater = make_updater()
+        use_case = build_use_case(FakeJournal(), updater, FakeInventoryRepo(), [make_change("A")])
+        use_case._location_shard = LocationShardCoordinator(repo, "host-a")
+
+        result = await use_case.execute()
+
+        assert result["status"] == "SUCCESS" and result["locations"] == []
+        assert use_case._change_detector.calls == 0
+        assert updater.pushed == []
+
+
+class TestResultShape:
+
+    BASE_KEYS = {
+        "status", "operation_time_seconds", "erp_products_extracted", "changes_detected", "worthy_changes",
+        "journal_run_id", "stage_seconds", "sync_lag_seconds", "sync_lag_upper_bound_seconds",
+        "time_to_shopify", "shopify_api_budget"
+    }
+
+    @pytest.mark.asyncio
+    async def test_every_exit_path_returns_the_same_keys(self, make_updater, make_change):
+        use_case = build_use_case(FakeJournal(), make_updater(), FakeInventoryRepo(), [make_change("A")])
+        full = await use_case.execute()
+        use_case._erp_extractor.unchanged = True
+        unchanged = await use_case.execute()
+
+        repo = InMemoryLeaseRepo(location_ids=[1])
+        repo.leases[1] = ("host-b", repo.now + timedelta(minutes=5))
+        idle = build_use_case(FakeJournal(), make_updater(), FakeInventoryRepo(), [make_change("A")])
+        idle._location_shard = LocationShardCoordinator(repo, "host-a")
+        no_locations = await idle.execute()
+
+        broken_repo = FakeInventoryRepo()
+
+        async def cache_down():
+            raise ConnectionError("PostgreSQL no responde")
+        broken_repo.get_current_inventory_levels = cache_down
+        failed = await build_use_case(FakeJournal(), make_updater(), broken_repo, [make_change("A")]).execute()
+
+        assert unchanged["erp_unchanged"] is True and no_locations["locations"] == []
+        assert failed["status"] == "FAILED" and "PostgreSQL no responde" in failed["error"]
+        for result in (full, unchanged, no_locations, failed):
+            assert self.BASE_KEYS <= result.keys()
@@ -0,0 +1,69 @@
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure import ShopifyInventoryUpdater as updater_module
+from src.infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater
+from src.infrastructure.PostgreSQLInventoryRepository import PostgreSQLInventoryRepository
+from src.domain.entities.InventoryChange import InventoryChange
+
+LOCATION = "gid://shopify/Location/1"
+
+# Misma instancia que usa la infraestructura (importada sin el prefijo src.)
+metrics = updater_module.get_metrics()
+
+
+def sample(name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+class TestSyncMetrics:
+
+    @pytest.mark.asyncio
+    async def test_shopify_latency_and_cost_per_operation(self, fake_shopify):
+        updater = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="token")
+        requests_before = sample("sync_shopify_requests_total", operation="inventorySetQuantities", outcome="success")
+        latency_before = sample("sync_shopify_request_seconds_count", operation="inventorySetQuantities")
+        cost_before = sample("sync_shopify_query_cost_total", operation="inventorySetQuantities")
+
+        created = await updater._create_single_inventory(InventoryChange(
+            sku="SKU-M", id_location=1, shopify_location_gid=LOCATION, old_quantity=0, new_quantity=4, shopify_inventory_item="",
+            sync_op="CREATE", title="Producto SKU-M", price=99.0, price_compare=0.0
+        ))
+
+        assert created.shopify_inventory_level_gid
+        assert sample("sync_shopify_requests_total", operation="inventorySetQuantities", outcome="success") == requests_before + 1
+        assert sample("sync_shopify_request_seconds_count", operation="inventorySetQuantities") == latency_before + 1
+        assert sample("sync_shopify_query_cost_total", operation="inventorySetQuantities") > cost_before
+        assert sample("sync_shopify_budget_available") > 0
+
+    @pytest.mark.asyncio
+    async def test_throttle_wait_is_observed(self):
+        waits_before = sample("sync_shopify_throttle_wait_seconds_count")
+
+        await ShopifyInventoryUpdater(shop_url="http://localhost", access_token="token").throttle_budget.acquire(10)
+
+        assert sample("sync_shopify_throttle_wait_seconds_count") == waits_before + 1
+
+    def test_db_statements_labeled_by_repository_and_verb(self):
+        repo = PostgreSQLInventoryRepository(connection_string="postgresql://localhost/x")
+        labels = {"repository": "PostgreSQLInventoryRepository", "statement": "SELECT"}
+        before = sample("sync_db_statement_seconds_count", **labels)
+
+        repo._log_query(SimpleNamespace(query="\n  select * from shopify_inventory_level", elapsed=0.02, exception=None))
+
+        assert sample("sync_db_statement_seconds_count", **labels) == before + 1
+        assert sample("sync_db_statement_errors_total", **labels) == 0
+
+    def test_textfile_dump(self, tmp_path):
+        path = tmp_path / "metrics" / "sync.prom"
+        metrics.cache_rows_loaded.set(1234)
+
+        metrics.write_textfile(str(path))
+
+        content = path.read_text()
+        assert "sync_cache_rows_loaded 1234.0" in content
+        assert "# TYPE sync_stage_seconds histogram" in content
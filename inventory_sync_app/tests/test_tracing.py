@@ -0,0 +1,123 @@
+import pytest
+import asyncio
+import importlib
+import json
+import logging
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure import ShopifyInventoryUpdater as updater_module
+from src.infrastructure.ShopifyInventoryUpdater import ShopifyInventoryUpdater
+from src.domain.entities.InventoryChange import InventoryChange
+from src.shared.tracing import Tracer, InMemorySpanExporter, JSONFileSpanExporter
+
+LOCATION = "gid://shopify/Location/1"
+
+
+@pytest.fixture
+def exporter():
+    # Mismo tracer que usa la infraestructura (importada sin el prefijo src.)
+    exporter = InMemorySpanExporter()
+    updater_module.get_tracer().set_exporter(exporter)
+    yield exporter
+    updater_module.get_tracer().set_exporter(None)
+
+
+class TestTracer:
+
+    @pytest.mark.asyncio
+    async def test_child_spans_propagate_across_tasks(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+
+        async def child(index):
+            with tracer.span("child", index=index):
+                await asyncio.sleep(0)
+
+        with tracer.span("root") as root:
+            await asyncio.gather(child(1), child(2))
+            # Nada se exporta hasta cerrar la traza
+            assert exporter.spans == []
+
+        children = exporter.by_name("child")
+        assert len(children) == 2
+        assert {span.parent_span_id for span in children} == {root.span_id}
+        assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+
+    def test_exception_marks_span_as_error(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+
+        otlp = exporter.spans[0].to_otlp()
+        assert otlp["status"] == {"code": 2, "message": "boom"}
+        assert otlp["events"][0]["name"] == "exception"
+
+    def test_disabled_tracer_yields_noop_span(self):
+        with Tracer().span("noop", sku="A") as span:
+            span.set_attribute("x", 1)
+        assert not span.is_recording
+
+    def test_json_file_exporter_writes_otlp_lines(self, tmp_path):
+        path = tmp_path / "traces" / "traces.jsonl"
+        tracer = Tracer(JSONFileSpanExporter(str(path)))
+
+        with tracer.span("root", batch_size=3):
+            with tracer.span("child", sku="SKU-1"):
+                pass
+
+        request = json.loads(path.read_text().strip())
+        spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [span["name"] for span in spans] == ["child", "root"]
+        assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+        assert {"key": "batch_size", "value": {"intValue": "3"}} in spans[1]["attributes"]
+        assert int(spans[1]["endTimeUnixNano"]) >= int(spans[1]["startTimeUnixNano"])
+
+
+class TestInstrumentation:
+
+    @pytest.mark.asyncio
+    async def test_push_change_span_carries_sku_location_and_cost(self, exporter, fake_shopify):
+        updater = ShopifyInventoryUpdater(shop_url=fake_shopify.url, access_token="token")
+
+        await updater.push_change(InventoryChange(
+            sku="SKU-T", id_location=1, shopify_location_gid=LOCATION, old_quantity=0, new_quantity=5,
+            shopify_inventory_item="", sync_op="CREATE", title="Producto SKU-T", price=99.0, price_compare=0.0
+        ))
+
+        [push_span] = exporter.by_name("shopify.push_change")
+        assert push_span.attributes["sku"] == "SKU-T"
+        assert push_span.attributes["location.id"] == 1
+        assert push_span.attributes["sync.status"] == "SUCCESS"
+
+        graphql_spans = exporter.by_name("shopify.graphql")
+        assert [span.attributes["graphql.operation"] for span in graphql_spans] == [
+            "productCreate", "productVariantsBulkUpdate", "inventoryActivate", "inventorySetQuantities"
+        ]
+        assert all(span.parent_span_id == push_span.span_id for span in graphql_spans)
+        assert all(span.attributes["graphql.cost"] > 0 for span in graphql_spans)
+
+    def test_log_operation_doubles_as_span(self, monkeypatch, tmp_path):
+        for name, value in {
+            "DB_HOST": "x", "DB_NAME": "x", "DB_USER": "x", "DB_PASSWORD": "x", "ERP_ENDPOINT_URL": "http://x",
+            "SHOPIFY_ACCESS_TOKEN": "x", "SHOPIFY_SHOP_DOMAIN": "http://x", "LOG_DIR": str(tmp_path)
+        }.items():
+            monkeypatch.setenv(name, value)
+        logging_setup = importlib.import_module("src.shared.logging.logging_setup")
+        tracing = importlib.import_module("src.shared.tracing")
+        exporter = InMemorySpanExporter()
+        tracing.configure_tracing(exporter)
+        try:
+            with logging_setup.LogOperation("sync_inventory", logging.getLogger("test"), sync_id="42") as op:
+                op.set_attribute("changes", 10)
+        finally:
+            tracing.configure_tracing(None)
+
+        [span] = exporter.by_name("sync_inventory")
+        assert span.attributes == {"sync_id": "42", "changes": 10}
+        assert op.extra_fields["trace_id"] == span.trace_id
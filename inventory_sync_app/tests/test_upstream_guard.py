@@ -0,0 +1,181 @@
+import pytest
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure import ShopifyInventoryUpdater as updater_module
+from src.infrastructure.PriorityUpdateScheduler import PriorityUpdateScheduler
+from src.shared.resilience import CircuitBreaker, AdaptiveConcurrencyLimiter, UpstreamGuard
+
+CircuitOpenError = updater_module.CircuitOpenError
+RetryableError = updater_module.RetryableError
+ShopifyRequestError = updater_module.ShopifyRequestError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_probes_after_reset(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("erp", failure_threshold=2, reset_timeout_seconds=10.0, clock=clock)
+
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_call()
+        assert error.value.retry_after == 10.0
+        assert error.value.upstream == "erp"
+
+        clock.now = 10.0
+        breaker.before_call()  # request de prueba
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # solo una prueba a la vez
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_probe_reopens_for_a_full_period(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("shopify", failure_threshold=1, reset_timeout_seconds=5.0, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 5.0
+        breaker.before_call()
+        breaker.record_failure()
+
+        clock.now = 9.0
+        assert breaker.state == "open"
+        assert breaker.seconds_until_retry() == pytest.approx(1.0)
+
+
+class TestAdaptiveConcurrencyLimiter:
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_and_single_decrease_per_window(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, latency_target_seconds=1.0)
+
+        # +1/limit por éxito: una ventana completa (~4 requests) suma 1
+        for _ in range(4):
+            limiter.release(await limiter.acquire(), 0.1, failed=False)
+        assert limiter.limit == 4
+        limiter.release(await limiter.acquire(), 0.1, failed=False)
+        assert limiter.limit == 5
+
+        # Tres fallas de requests de la misma ventana reducen una sola vez
+        epochs = [await limiter.acquire() for _ in range(3)]
+        for epoch in epochs:
+            limiter.release(epoch, 0.1, failed=True)
+        assert limiter.limit == 2
+
+        # Un request lento también cuenta como congestión
+        limiter.release(await limiter.acquire(), 5.0, failed=False)
+        assert limiter.limit == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_a_free_slot(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        epoch = await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        limiter.release(epoch, 0.0, failed=False)
+        await asyncio.wait_for(waiter, 1.0)
+        assert limiter.in_flight == 1
+
+
+class TestUpstreamGuard:
+
+    @pytest.mark.asyncio
+    async def test_only_upstream_failures_count(self):
+        guard = UpstreamGuard("erp", breaker=CircuitBreaker("erp", failure_threshold=1))
+
+        with pytest.raises(ShopifyRequestError):
+            async with guard.slot():
+                raise ShopifyRequestError("request inválido")
+        assert guard.accepting_requests()
+
+        with pytest.raises(RetryableError):
+            async with guard.slot():
+                raise RetryableError("503")
+        assert not guard.accepting_requests()
+        with pytest.raises(CircuitOpenError):
+            async with guard.slot():
+                pass
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_stops_calling_shopify(self, flaky_shopify, make_change):
+        flaky_shopify.fail_on = set(range(1, 100))
+        updater = updater_module.ShopifyInventoryUpdater(
+            shop_url=flaky_shopify.url, access_token="token",
+            retry_policy=updater_module.RetryPolicy(max_attempts=1),
+            guard=updater_module.UpstreamGuard(
+                "shopify", breaker=CircuitBreaker("shopify", failure_threshold=3),
+                failure_types=updater_module.SHOPIFY_FAILURE_TYPES
+            )
+        )
+        change = make_change("SKU-1", "UPDATE", 1, "gid://shopify/InventoryItem/9")
+        for _ in range(3):
+            with pytest.raises(updater_module.ShopifyServerError):
+                await updater._update_single_inventory(change)
+
+        with pytest.raises(CircuitOpenError):
+            await updater._update_single_inventory(change)
+        assert flaky_shopify.get_stats()["requests"] == 3
+        assert not updater.accepting_requests
+
+
+class TestConcurrentScheduler:
+
+    @pytest.mark.asyncio
+    async def test_dispatch_is_bounded_by_concurrency_limit(self, make_updater, make_change):
+        class SlowUpdater(make_updater):
+            concurrency_limit = 3
+
+            def __init__(self):
+                super().__init__()
+                self.running = 0
+                self.max_running = 0
+
+            async def push_change(self, change):
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+                await asyncio.sleep(0.01)
+                self.running -= 1
+                return await super().push_change(change)
+
+        updater = SlowUpdater()
+        scheduler = PriorityUpdateScheduler(updater)
+        changes = [make_change(f"N{i}", priority=3) for i in range(9)] + [make_change("C1", priority=1)]
+
+        [update_logs, updated, _, _] = await scheduler.push_changes(changes, [])
+
+        assert updater.max_running == 3
+        assert len(update_logs) == 10 and len(updated) == 10
+        assert scheduler.get_time_to_shopify_report()["critical"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_leaves_rest_pending(self, make_updater, make_change):
+        class TrippingUpdater(make_updater):
+            async def push_change(self, change):
+                # El primer envío abre el circuito
+                self.accepting_requests = False
+                return await super().push_change(change)
+
+        updater = TrippingUpdater()
+        scheduler = PriorityUpdateScheduler(updater)
+
+        await scheduler.push_changes([make_change("C1", priority=1), make_change("N1", priority=3)], [])
+
+        assert updater.pushed == ["C1"]
+        assert scheduler.get_time_to_shopify_report()["normal"]["pending"] == 1
@@ -11,7 +11,9 @@ CREATE TABLE "shopify_product" (
   "shopify_variant_gid" VARCHAR(100) UNIQUE,
   "shopify_inventory_item_gid" VARCHAR(100) UNIQUE,
   "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-  "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+  "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  -- Hora del último webhook de Shopify aplicado (NULL si la última escritura fue local)
+  "shopify_event_at" TIMESTAMP
 );
 
 -- Tabla de ubicaciones Shopify
@@ -21,9 +23,10 @@ CREATE TABLE "shopify_location" (
   "shopify_location_gid" VARCHAR(100) UNIQUE
 );
 
--- Tabla de log de sincronización de productos
+-- Tabla de log de sincronización de productos (particionada por mes en synced_at;
+-- particiones, retención y migración al final del archivo)
 CREATE TABLE "product_sync_log" (
-  "sync_id" SERIAL PRIMARY KEY,
+  "sync_id" BIGSERIAL,
   "pos_sku" VARCHAR(30) NOT NULL,
   "sync_info" TEXT,
   "before_sync" INTEGER CHECK (before_sync >= 0),
@@ -31,11 +34,11 @@ CREATE TABLE "product_sync_log" (
   "synced_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   "synced_status" VARCHAR(20) NOT NULL DEFAULT 'PENDING',
   "sync_type" VARCHAR(20) NOT NULL,
-  CONSTRAINT "fk_product_sync_log_pos_sku"
-    FOREIGN KEY ("pos_sku")
-    REFERENCES "shopify_product"("pos_sku")
-    ON DELETE CASCADE
-);
+  PRIMARY KEY ("sync_id", "synced_at")
+) PARTITION BY RANGE ("synced_at");
+
+-- Filas fuera de las particiones mensuales (create_product_sync_log_partitions las mueve)
+CREATE TABLE "product_sync_log_default" PARTITION OF "product_sync_log" DEFAULT;
 
 -- Tabla de niveles de inventario Shopify (ACTUALIZADA)
 CREATE TABLE "shopify_inventory_level" (
@@ -45,6 +48,8 @@ CREATE TABLE "shopify_inventory_level" (
   "shopify_inventory_level_gid" VARCHAR(100) UNIQUE,
   "quantities_available" FLOAT NOT NULL DEFAULT 0,
   "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  -- Hora del último webhook de Shopify aplicado (NULL si la última escritura fue local)
+  "shopify_event_at" TIMESTAMP,
   CONSTRAINT "fk_shopify_inventory_level_pos_sku"
     FOREIGN KEY ("pos_sku")
     REFERENCES "shopify_product"("pos_sku")
@@ -57,6 +62,60 @@ CREATE TABLE "shopify_inventory_level" (
     UNIQUE ("pos_sku", "id_location")
 );
 
+-- Journal de ejecuciones (checkpoint/resume de sincronizaciones interrumpidas)
+CREATE TABLE "sync_run" (
+  "run_id" SERIAL PRIMARY KEY,
+  "total_changes" INTEGER NOT NULL DEFAULT 0,
+  "status" VARCHAR(20) NOT NULL DEFAULT 'RUNNING',
+  "resume_attempts" INTEGER NOT NULL DEFAULT 0,
+  "owner" VARCHAR(100),
+  "started_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  "finished_at" TIMESTAMP
+);
+
+-- Estado por cambio: PENDING -> PUSHED (Shopify) -> CONFIRMED (cache) | FAILED
+CREATE TABLE "sync_run_change" (
+  "run_id" INTEGER NOT NULL,
+  "pos_sku" VARCHAR(30) NOT NULL,
+  "id_location" INTEGER NOT NULL,
+  "sync_op" VARCHAR(20) NOT NULL,
+  "new_quantity" INTEGER NOT NULL,
+  "shopify_location_gid" VARCHAR(100),
+  "status" VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+  "shopify_product_gid" VARCHAR(100),
+  "shopify_variant_gid" VARCHAR(100),
+  "shopify_inventory_item_gid" VARCHAR(100),
+  "shopify_inventory_level_gid" VARCHAR(100),
+  "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY ("run_id", "pos_sku", "id_location"),
+  CONSTRAINT "fk_sync_run_change_run"
+    FOREIGN KEY ("run_id")
+    REFERENCES "sync_run"("run_id")
+    ON DELETE CASCADE
+);
+
+-- Ubicaciones asignadas a cada worker (modo por ubicaciones con varios procesos/hosts).
+-- Un lease vencido (worker caído) lo puede tomar otro worker.
+CREATE TABLE "sync_location_lease" (
+  "id_location" INTEGER PRIMARY KEY,
+  "owner" VARCHAR(100) NOT NULL,
+  "lease_until" TIMESTAMP NOT NULL,
+  "acquired_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT "fk_sync_location_lease_location"
+    FOREIGN KEY ("id_location")
+    REFERENCES "shopify_location"("id_location")
+    ON DELETE CASCADE
+);
+
+-- Bucket de costo de la API de Shopify compartido entre workers (token bucket)
+CREATE TABLE "shopify_api_budget" (
+  "bucket" VARCHAR(100) PRIMARY KEY,
+  "capacity" FLOAT NOT NULL,
+  "available" FLOAT NOT NULL,
+  "restore_rate" FLOAT NOT NULL,
+  "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Índices para mejorar el rendimiento
 CREATE INDEX "idx_shopify_product_gid" ON "shopify_product"("shopify_product_gid");
 CREATE INDEX "idx_shopify_variant_gid" ON "shopify_product"("shopify_variant_gid");
@@ -64,6 +123,10 @@ CREATE INDEX "idx_inventory_item_gid" ON "shopify_product"("shopify_inventory_it
 CREATE INDEX "idx_shopify_location_gid" ON "shopify_location"("shopify_location_gid");
 CREATE INDEX "idx_inventory_level_pos_sku" ON "shopify_inventory_level"("pos_sku");
 CREATE INDEX "idx_inventory_level_location" ON "shopify_inventory_level"("id_location");
+CREATE INDEX "idx_sync_run_open" ON "sync_run"("owner", "run_id") WHERE "status" = 'RUNNING';
+CREATE INDEX "idx_sync_location_lease_owner" ON "sync_location_lease"("owner");
+-- BRIN: el log se escribe en orden de synced_at, un índice de rangos de bloques basta para consultas por fecha
+CREATE INDEX "idx_product_sync_log_synced_at" ON "product_sync_log" USING BRIN ("synced_at");
 
 -- Función para actualizar el timestamp de updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -84,3 +147,325 @@ CREATE TRIGGER update_shopify_inventory_level_updated_at
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 
+
+-- ============================================================
+-- Cache de inventario desnormalizado (lectura de cada ejecución)
+-- ============================================================
+-- inventory_cache tiene exactamente las columnas de CacheInventoryLevel y un
+-- índice que las cubre todas, así get_current_inventory_levels es un solo
+-- index-only scan en orden (pos_sku, id_location) en vez del JOIN de tres
+-- tablas. Se mantiene al día con triggers por sentencia (tablas de
+-- transición) en la misma transacción que cada escritura: sincronización,
+-- webhooks y helper_load_products. Las bajas y cambios de llave llegan por
+-- la FK en cascada.
+--
+-- Sobre una base existente este bloque se puede aplicar solo (es idempotente)
+-- y termina llenando la tabla con rebuild_inventory_cache().
+
+CREATE TABLE IF NOT EXISTS "inventory_cache" (
+  "pos_sku" VARCHAR(30) NOT NULL,
+  "id_location" INTEGER NOT NULL,
+  "inventory_level_id" INTEGER NOT NULL,
+  "shopify_inventory_level_gid" VARCHAR(100),
+  "quantities_available" FLOAT NOT NULL,
+  "updated_at" TIMESTAMP NOT NULL,
+  "sync_op" VARCHAR(20),
+  "shopify_location_gid" VARCHAR(100),
+  "shopify_inventory_item_gid" VARCHAR(100),
+  "title" VARCHAR(200),
+  "price" FLOAT,
+  "price_compare" FLOAT,
+  -- Momento (reloj de la base) de la última escritura: marca de agua de las lecturas incrementales
+  "refreshed_at" TIMESTAMP NOT NULL DEFAULT clock_timestamp(),
+  CONSTRAINT "pk_inventory_cache"
+    PRIMARY KEY ("pos_sku", "id_location")
+    INCLUDE ("inventory_level_id", "shopify_inventory_level_gid", "quantities_available", "updated_at",
+             "sync_op", "shopify_location_gid", "shopify_inventory_item_gid", "title", "price", "price_compare"),
+  CONSTRAINT "fk_inventory_cache_level"
+    FOREIGN KEY ("pos_sku", "id_location")
+    REFERENCES "shopify_inventory_level"("pos_sku", "id_location")
+    ON UPDATE CASCADE
+    ON DELETE CASCADE
+);
+
+-- Bases con la primera versión de inventory_cache
+ALTER TABLE "inventory_cache" ADD COLUMN IF NOT EXISTS "refreshed_at" TIMESTAMP NOT NULL DEFAULT clock_timestamp();
+CREATE INDEX IF NOT EXISTS "idx_inventory_cache_refreshed_at" ON "inventory_cache"("refreshed_at");
+
+-- Niveles nuevos o modificados: se copian con su producto y ubicación
+CREATE OR REPLACE FUNCTION refresh_inventory_cache_levels()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO inventory_cache
+    (pos_sku, id_location, inventory_level_id, shopify_inventory_level_gid, quantities_available, updated_at,
+     sync_op, shopify_location_gid, shopify_inventory_item_gid, title, price, price_compare)
+    SELECT sil.pos_sku, sil.id_location, sil.inventory_level_id, sil.shopify_inventory_level_gid,
+           sil.quantities_available, sil.updated_at,
+           sp.sync_op, sl.shopify_location_gid, sp.shopify_inventory_item_gid, sp.title, sp.price, sp.price_compare
+    FROM changed_levels sil
+    JOIN shopify_product sp ON sp.pos_sku = sil.pos_sku
+    JOIN shopify_location sl ON sl.id_location = sil.id_location
+    ON CONFLICT (pos_sku, id_location) DO UPDATE SET
+        inventory_level_id = EXCLUDED.inventory_level_id,
+        shopify_inventory_level_gid = EXCLUDED.shopify_inventory_level_gid,
+        quantities_available = EXCLUDED.quantities_available,
+        updated_at = EXCLUDED.updated_at,
+        sync_op = EXCLUDED.sync_op,
+        shopify_location_gid = EXCLUDED.shopify_location_gid,
+        shopify_inventory_item_gid = EXCLUDED.shopify_inventory_item_gid,
+        title = EXCLUDED.title,
+        price = EXCLUDED.price,
+        price_compare = EXCLUDED.price_compare,
+        refreshed_at = clock_timestamp();
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Productos modificados (sync_op, gids, título, precios): se propagan a sus niveles
+CREATE OR REPLACE FUNCTION refresh_inventory_cache_products()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE inventory_cache ic
+    SET sync_op = sp.sync_op,
+        shopify_inventory_item_gid = sp.shopify_inventory_item_gid,
+        title = sp.title,
+        price = sp.price,
+        price_compare = sp.price_compare,
+        refreshed_at = clock_timestamp()
+    FROM changed_products sp
+    WHERE ic.pos_sku = sp.pos_sku
+      AND (ic.sync_op, ic.shopify_inventory_item_gid, ic.title, ic.price, ic.price_compare)
+          IS DISTINCT FROM (sp.sync_op, sp.shopify_inventory_item_gid, sp.title, sp.price, sp.price_compare);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION refresh_inventory_cache_locations()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE inventory_cache ic
+    SET shopify_location_gid = sl.shopify_location_gid,
+        refreshed_at = clock_timestamp()
+    FROM changed_locations sl
+    WHERE ic.id_location = sl.id_location
+      AND ic.shopify_location_gid IS DISTINCT FROM sl.shopify_location_gid;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Reconstrucción completa (llenado inicial o reparación)
+CREATE OR REPLACE FUNCTION rebuild_inventory_cache()
+RETURNS INTEGER AS $$
+DECLARE
+    total INTEGER;
+BEGIN
+    DELETE FROM inventory_cache;
+    INSERT INTO inventory_cache
+    (pos_sku, id_location, inventory_level_id, shopify_inventory_level_gid, quantities_available, updated_at,
+     sync_op, shopify_location_gid, shopify_inventory_item_gid, title, price, price_compare)
+    SELECT sil.pos_sku, sil.id_location, sil.inventory_level_id, sil.shopify_inventory_level_gid,
+           sil.quantities_available, sil.updated_at,
+           sp.sync_op, sl.shopify_location_gid, sp.shopify_inventory_item_gid, sp.title, sp.price, sp.price_compare
+    FROM shopify_inventory_level sil
+    JOIN shopify_product sp ON sp.pos_sku = sil.pos_sku
+    JOIN shopify_location sl ON sl.id_location = sil.id_location;
+    GET DIAGNOSTICS total = ROW_COUNT;
+    RETURN total;
+END;
+$$ language 'plpgsql';
+
+-- Una tabla de transición por trigger: INSERT y UPDATE van en triggers separados
+DROP TRIGGER IF EXISTS refresh_inventory_cache_on_level_insert ON "shopify_inventory_level";
+CREATE TRIGGER refresh_inventory_cache_on_level_insert
+    AFTER INSERT ON "shopify_inventory_level"
+    REFERENCING NEW TABLE AS changed_levels
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_inventory_cache_levels();
+
+DROP TRIGGER IF EXISTS refresh_inventory_cache_on_level_update ON "shopify_inventory_level";
+CREATE TRIGGER refresh_inventory_cache_on_level_update
+    AFTER UPDATE ON "shopify_inventory_level"
+    REFERENCING NEW TABLE AS changed_levels
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_inventory_cache_levels();
+
+DROP TRIGGER IF EXISTS refresh_inventory_cache_on_product_update ON "shopify_product";
+CREATE TRIGGER refresh_inventory_cache_on_product_update
+    AFTER UPDATE ON "shopify_product"
+    REFERENCING NEW TABLE AS changed_products
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_inventory_cache_products();
+
+DROP TRIGGER IF EXISTS refresh_inventory_cache_on_location_update ON "shopify_location";
+CREATE TRIGGER refresh_inventory_cache_on_location_update
+    AFTER UPDATE ON "shopify_location"
+    REFERENCING NEW TABLE AS changed_locations
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_inventory_cache_locations();
+
+SELECT rebuild_inventory_cache();
+
+-- ============================================================
+-- Particiones y retención de product_sync_log
+-- ============================================================
+-- Una partición por mes (product_sync_log_pAAAAMM). El daemon (y cada
+-- ejecución única) llama create_product_sync_log_partitions para tener
+-- listos los meses siguientes y drop_product_sync_log_partitions para
+-- aplicar la retención: se quita una partición entera (DETACH + DROP), sin
+-- DELETE fila por fila ni VACUUM posterior.
+--
+-- El log no tiene FK a shopify_product: es historial (no debe borrarse en
+-- cascada con el producto) y así cada INSERT no revisa otra tabla.
+--
+-- Sobre una base existente este bloque se puede aplicar solo: si
+-- product_sync_log todavía es una tabla normal, la convierte (copia las
+-- filas a particiones mensuales desde el mes más antiguo).
+
+-- Crea las particiones mensuales de from_month hasta months_ahead meses después del actual
+CREATE OR REPLACE FUNCTION create_product_sync_log_partitions(months_ahead INTEGER DEFAULT 2, from_month DATE DEFAULT CURRENT_DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', LEAST(from_month, CURRENT_DATE))::date;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := format('product_sync_log_p%s', to_char(month_start, 'YYYYMM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            IF EXISTS (SELECT 1 FROM product_sync_log_default WHERE synced_at >= month_start AND synced_at < month_end) THEN
+                -- Con filas del mes en la partición default no se puede crear la partición directo:
+                -- se mueven a una tabla nueva y se adjunta
+                EXECUTE format('CREATE TABLE %I (LIKE product_sync_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM product_sync_log_default WHERE synced_at >= %L AND synced_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE product_sync_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF product_sync_log FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ language 'plpgsql';
+
+-- Quita las particiones cuyo mes terminó hace más de retention_months meses (0 = conservar todo)
+CREATE OR REPLACE FUNCTION drop_product_sync_log_partitions(retention_months INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => GREATEST(retention_months, 0)))::date;
+    partition_name TEXT;
+    dropped INTEGER := 0;
+BEGIN
+    IF retention_months <= 0 THEN
+        RETURN 0;
+    END IF;
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'product_sync_log'::regclass
+          AND c.relname ~ '^product_sync_log_p[0-9]{6}$'
+    LOOP
+        IF (to_date(right(partition_name, 6), 'YYYYMM') + interval '1 month') <= cutoff THEN
+            EXECUTE format('ALTER TABLE product_sync_log DETACH PARTITION %I', partition_name);
+            EXECUTE format('DROP TABLE %I', partition_name);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ language 'plpgsql';
+
+-- Migración: product_sync_log como tabla normal -> particionada
+DO $$
+DECLARE
+    oldest DATE;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'product_sync_log' AND relkind = 'r') THEN
+        ALTER TABLE product_sync_log RENAME TO product_sync_log_unpartitioned;
+        ALTER SEQUENCE IF EXISTS product_sync_log_sync_id_seq RENAME TO product_sync_log_unpartitioned_sync_id_seq;
+
+        CREATE TABLE product_sync_log (
+          sync_id BIGSERIAL,
+          pos_sku VARCHAR(30) NOT NULL,
+          sync_info TEXT,
+          before_sync INTEGER CHECK (before_sync >= 0),
+          after_sync INTEGER CHECK (after_sync >= 0),
+          synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          synced_status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+          sync_type VARCHAR(20) NOT NULL,
+          PRIMARY KEY (sync_id, synced_at)
+        ) PARTITION BY RANGE (synced_at);
+        CREATE TABLE product_sync_log_default PARTITION OF product_sync_log DEFAULT;
+        CREATE INDEX idx_product_sync_log_synced_at ON product_sync_log USING BRIN (synced_at);
+
+        SELECT min(synced_at)::date INTO oldest FROM product_sync_log_unpartitioned;
+        PERFORM create_product_sync_log_partitions(2, COALESCE(oldest, CURRENT_DATE));
+
+        INSERT INTO product_sync_log (sync_id, pos_sku, sync_info, before_sync, after_sync, synced_at, synced_status, sync_type)
+        SELECT sync_id, pos_sku, sync_info, before_sync, after_sync, synced_at, synced_status, sync_type
+        FROM product_sync_log_unpartitioned;
+        PERFORM setval('product_sync_log_sync_id_seq', GREATEST((SELECT max(sync_id) FROM product_sync_log), 1));
+
+        DROP TABLE product_sync_log_unpartitioned;
+    END IF;
+END;
+$$;
+
+SELECT create_product_sync_log_partitions();
+
+
+-- ============================================================
+-- Orden de los webhooks de Shopify (shopify_event_at)
+-- ============================================================
+-- Los webhooks llegan desordenados y pueden llegar después de una escritura
+-- de la sincronización. Cada upsert de webhook guarda la hora del evento en
+-- shopify_event_at y solo pisa la fila si el evento es más nuevo que
+-- COALESCE(shopify_event_at, updated_at). Una escritura local (sincronización,
+-- helper_load_products) deja shopify_event_at en NULL, así la guarda vuelve a
+-- compararse contra updated_at, que sigue siendo siempre la hora de la base.
+--
+-- Sobre una base existente este bloque se puede aplicar solo (es idempotente)
+
+-- updated_at vuelve a ser siempre CURRENT_TIMESTAMP (bases con la versión que respetaba el valor asignado)
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+ALTER TABLE "shopify_product" ADD COLUMN IF NOT EXISTS "shopify_event_at" TIMESTAMP;
+ALTER TABLE "shopify_inventory_level" ADD COLUMN IF NOT EXISTS "shopify_event_at" TIMESTAMP;
+
+CREATE OR REPLACE FUNCTION clear_shopify_event_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Los upserts de webhook siempre asignan un shopify_event_at mayor
+    IF NEW.shopify_event_at IS NOT DISTINCT FROM OLD.shopify_event_at THEN
+        NEW.shopify_event_at = NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS clear_shopify_product_event_at ON "shopify_product";
+CREATE TRIGGER clear_shopify_product_event_at
+    BEFORE UPDATE ON "shopify_product"
+    FOR EACH ROW EXECUTE FUNCTION clear_shopify_event_at();
+
+DROP TRIGGER IF EXISTS clear_shopify_inventory_level_event_at ON "shopify_inventory_level";
+CREATE TRIGGER clear_shopify_inventory_level_event_at
+    BEFORE UPDATE ON "shopify_inventory_level"
+    FOR EACH ROW EXECUTE FUNCTION clear_shopify_event_at();